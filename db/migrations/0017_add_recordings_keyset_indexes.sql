@@ -0,0 +1,37 @@
+-- Add indexes for keyset pagination of the recordings list
+
+-- migrate:up
+
+-- The recordings list shows complete recordings one page at a time in
+-- (sort key, id) order. The daemon never runs ANALYZE, and without
+-- statistics the planner takes the index with the longest equality prefix.
+-- These lead with the is_complete equality and then follow the sort key
+-- (the rowid ends every index, so it breaks ties in order), which makes
+-- them win over idx_recordings_complete_stream_start and lets a page stop
+-- after LIMIT rows instead of sorting every complete recording.
+-- idx_recordings_complete_stream_start serves start time order within one
+-- stream; end time and id order are not offered by the UI and are not
+-- indexed. Size sorts as COALESCE(size_bytes, 0) so rows without a size
+-- stay in the keyset comparison.
+CREATE INDEX IF NOT EXISTS idx_recordings_page_start
+    ON recordings(is_complete, start_time) WHERE end_time IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_recordings_page_stream
+    ON recordings(is_complete, stream_name) WHERE end_time IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_recordings_page_size
+    ON recordings(is_complete, COALESCE(size_bytes, 0)) WHERE end_time IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_recordings_page_duration
+    ON recordings(is_complete, (end_time - start_time)) WHERE end_time IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_recordings_page_stream_size
+    ON recordings(is_complete, stream_name, COALESCE(size_bytes, 0)) WHERE end_time IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_recordings_page_stream_duration
+    ON recordings(is_complete, stream_name, (end_time - start_time)) WHERE end_time IS NOT NULL;
+
+-- migrate:down
+
+DROP INDEX IF EXISTS idx_recordings_page_stream_duration;
+DROP INDEX IF EXISTS idx_recordings_page_stream_size;
+DROP INDEX IF EXISTS idx_recordings_page_duration;
+DROP INDEX IF EXISTS idx_recordings_page_size;
+DROP INDEX IF EXISTS idx_recordings_page_stream;
+DROP INDEX IF EXISTS idx_recordings_page_start;
+SELECT 1;
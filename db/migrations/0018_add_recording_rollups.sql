@@ -0,0 +1,114 @@
+-- Add hourly per-stream recording rollups for timeline, calendar and count queries
+
+-- migrate:up
+
+-- One row per stream and hour (bucket = start of the hour, Unix time).
+-- A recording counts in the hour it starts in, and only once it is
+-- complete, matching the recordings list. Detections count in the hour
+-- of their timestamp. The triggers below keep the table in step with
+-- every insert, update and delete.
+CREATE TABLE IF NOT EXISTS recording_rollups (
+    stream_name TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    segments INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    seconds INTEGER NOT NULL DEFAULT 0,
+    detections INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (stream_name, bucket)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_recording_rollups_bucket ON recording_rollups(bucket);
+
+INSERT OR REPLACE INTO recording_rollups (stream_name, bucket, segments, bytes, seconds)
+SELECT stream_name, start_time / 3600 * 3600, COUNT(*),
+       COALESCE(SUM(size_bytes), 0), COALESCE(SUM(end_time - start_time), 0)
+FROM recordings
+WHERE is_complete = 1 AND end_time IS NOT NULL
+GROUP BY stream_name, start_time / 3600 * 3600;
+
+INSERT OR IGNORE INTO recording_rollups (stream_name, bucket)
+SELECT DISTINCT stream_name, timestamp / 3600 * 3600 FROM detections;
+
+UPDATE recording_rollups SET detections = (
+    SELECT COUNT(*) FROM detections d
+    WHERE d.stream_name = recording_rollups.stream_name
+      AND d.timestamp >= recording_rollups.bucket
+      AND d.timestamp < recording_rollups.bucket + 3600
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_insert
+AFTER INSERT ON recordings
+WHEN NEW.is_complete = 1 AND NEW.end_time IS NOT NULL
+BEGIN
+    INSERT OR IGNORE INTO recording_rollups (stream_name, bucket)
+    VALUES (NEW.stream_name, NEW.start_time / 3600 * 3600);
+    UPDATE recording_rollups
+    SET segments = segments + 1,
+        bytes = bytes + COALESCE(NEW.size_bytes, 0),
+        seconds = seconds + (NEW.end_time - NEW.start_time)
+    WHERE stream_name = NEW.stream_name AND bucket = NEW.start_time / 3600 * 3600;
+END;
+
+-- Updates are applied as remove-old then add-new; progress updates of
+-- recordings still being written match neither trigger
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_update_old
+AFTER UPDATE OF stream_name, start_time, end_time, size_bytes, is_complete ON recordings
+WHEN OLD.is_complete = 1 AND OLD.end_time IS NOT NULL
+BEGIN
+    UPDATE recording_rollups
+    SET segments = segments - 1,
+        bytes = bytes - COALESCE(OLD.size_bytes, 0),
+        seconds = seconds - (OLD.end_time - OLD.start_time)
+    WHERE stream_name = OLD.stream_name AND bucket = OLD.start_time / 3600 * 3600;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_update_new
+AFTER UPDATE OF stream_name, start_time, end_time, size_bytes, is_complete ON recordings
+WHEN NEW.is_complete = 1 AND NEW.end_time IS NOT NULL
+BEGIN
+    INSERT OR IGNORE INTO recording_rollups (stream_name, bucket)
+    VALUES (NEW.stream_name, NEW.start_time / 3600 * 3600);
+    UPDATE recording_rollups
+    SET segments = segments + 1,
+        bytes = bytes + COALESCE(NEW.size_bytes, 0),
+        seconds = seconds + (NEW.end_time - NEW.start_time)
+    WHERE stream_name = NEW.stream_name AND bucket = NEW.start_time / 3600 * 3600;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_delete
+AFTER DELETE ON recordings
+WHEN OLD.is_complete = 1 AND OLD.end_time IS NOT NULL
+BEGIN
+    UPDATE recording_rollups
+    SET segments = segments - 1,
+        bytes = bytes - COALESCE(OLD.size_bytes, 0),
+        seconds = seconds - (OLD.end_time - OLD.start_time)
+    WHERE stream_name = OLD.stream_name AND bucket = OLD.start_time / 3600 * 3600;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_detection_insert
+AFTER INSERT ON detections
+BEGIN
+    INSERT OR IGNORE INTO recording_rollups (stream_name, bucket)
+    VALUES (NEW.stream_name, NEW.timestamp / 3600 * 3600);
+    UPDATE recording_rollups SET detections = detections + 1
+    WHERE stream_name = NEW.stream_name AND bucket = NEW.timestamp / 3600 * 3600;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_detection_delete
+AFTER DELETE ON detections
+BEGIN
+    UPDATE recording_rollups SET detections = detections - 1
+    WHERE stream_name = OLD.stream_name AND bucket = OLD.timestamp / 3600 * 3600;
+END;
+
+-- migrate:down
+
+DROP TRIGGER IF EXISTS trg_recording_rollups_detection_delete;
+DROP TRIGGER IF EXISTS trg_recording_rollups_detection_insert;
+DROP TRIGGER IF EXISTS trg_recording_rollups_delete;
+DROP TRIGGER IF EXISTS trg_recording_rollups_update_new;
+DROP TRIGGER IF EXISTS trg_recording_rollups_update_old;
+DROP TRIGGER IF EXISTS trg_recording_rollups_insert;
+DROP TABLE IF EXISTS recording_rollups;
+SELECT 1;
@@ -0,0 +1,48 @@
+-- Add compact detection blocks (one blob per stream and 10-minute bucket)
+
+-- migrate:up
+
+-- With [database] detection_storage = blocks, the storage manager packs
+-- detections older than two buckets into one row per stream and bucket
+-- (bucket = start of the 10 minutes, Unix time) and deletes the rows.
+-- data holds the detections sorted by time: a string table (labels and
+-- zone IDs, with per-label counts) followed by delta-encoded timestamps,
+-- string indexes and 16-bit quantized confidence and box coordinates.
+-- See src/database/db_detection_blocks.c for the layout.
+CREATE TABLE IF NOT EXISTS detection_blocks (
+    id INTEGER PRIMARY KEY,
+    stream_name TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    first_timestamp INTEGER NOT NULL,
+    last_timestamp INTEGER NOT NULL,
+    detection_count INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    UNIQUE (stream_name, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_detection_blocks_last_timestamp ON detection_blocks(last_timestamp);
+
+-- Keep the recording rollups' detection counts right as rows move into
+-- blocks and blocks are deleted by retention
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_block_insert
+AFTER INSERT ON detection_blocks
+BEGIN
+    INSERT OR IGNORE INTO recording_rollups (stream_name, bucket)
+    VALUES (NEW.stream_name, NEW.bucket / 3600 * 3600);
+    UPDATE recording_rollups SET detections = detections + NEW.detection_count
+    WHERE stream_name = NEW.stream_name AND bucket = NEW.bucket / 3600 * 3600;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_recording_rollups_block_delete
+AFTER DELETE ON detection_blocks
+BEGIN
+    UPDATE recording_rollups SET detections = detections - OLD.detection_count
+    WHERE stream_name = OLD.stream_name AND bucket = OLD.bucket / 3600 * 3600;
+END;
+
+-- migrate:down
+
+DROP TRIGGER IF EXISTS trg_recording_rollups_block_delete;
+DROP TRIGGER IF EXISTS trg_recording_rollups_block_insert;
+DROP TABLE IF EXISTS detection_blocks;
+SELECT 1;
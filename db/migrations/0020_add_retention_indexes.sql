@@ -0,0 +1,22 @@
+-- Add indexes for the retention and quota queries
+
+-- migrate:up
+
+-- The retention and quota passes select a stream's unprotected, complete
+-- recordings by start time and filter on trigger type and retention
+-- override. With these columns in the index, rows are only read for the
+-- recordings that are returned. It leads with the equality columns so the
+-- planner prefers it over idx_recordings_complete_stream_start without
+-- ANALYZE statistics.
+CREATE INDEX IF NOT EXISTS idx_recordings_retention
+    ON recordings(stream_name, protected, is_complete, start_time, trigger_type, retention_override_days);
+
+-- Protected recordings per stream, counted from the index alone
+CREATE INDEX IF NOT EXISTS idx_recordings_protected_stream
+    ON recordings(stream_name) WHERE protected = 1;
+
+-- migrate:down
+
+DROP INDEX IF EXISTS idx_recordings_protected_stream;
+DROP INDEX IF EXISTS idx_recordings_retention;
+SELECT 1;
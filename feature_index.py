@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+LightNVR source feature index
+Scans the tree for the facts the feature sheet reports: registered REST
+routes (src/web), schema changes (db/migrations), UI modules
+(web/js/components) and tests (tests/, web/tests/), plus size and line
+counts of any file the sheet mentions.
+
+Results are cached per file in .feature_index_cache.json, keyed on mtime
+and size, so a re-run only re-reads files that changed.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.path.join(REPO_ROOT, ".feature_index_cache.json")
+
+# Bump when an extractor changes so stale cache entries are re-scanned
+CACHE_VERSION = 1
+
+# (kind, directory, filename patterns, recursive)
+SOURCES = [
+    ("web", "src/web", ["*.c"], False),
+    ("migration", "db/migrations", ["*.sql"], False),
+    ("component", "web/js/components", ["*.js", "*.jsx"], True),
+    ("test", "tests", ["*.c", "*.ts", "*.js", "*.cjs"], True),
+    ("test", "web/tests", ["*.js", "*.ts", "*.cjs"], True),
+]
+
+SKIP_DIRS = {"node_modules", "dist", "build", ".git", "test-results"}
+
+ROUTE_ENTRY = re.compile(r'\{\s*"([A-Z*]+)"\s*,\s*"(/[^"]*)"\s*,\s*(\w+)')
+HANDLER_DEF = re.compile(r'^(?:static\s+)?void\s+(mg_handle_\w+)\s*\(\s*struct\s+mg_connection', re.M)
+CREATE_TABLE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.I)
+ADD_COLUMN = re.compile(r'ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)', re.I)
+CREATE_INDEX = re.compile(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)', re.I)
+JS_EXPORT = re.compile(r'^export\s+(?:default\s+)?(?:async\s+)?(?:function\*?|const|let|class)\s+(\w+)', re.M)
+TS_TEST = re.compile(r'''\b(?:test|it)\(\s*(['"`])(.+?)\1''')
+C_TEST = re.compile(r'^(?:static\s+)?(?:void|int|bool)\s+(test_\w+)\s*\(', re.M)
+API_REFERENCE = re.compile(r'''['"`](/api/[^'"`\s?]*)''')
+
+
+# ── Extractors ──────────────────────────────────────────────────────
+# Each returns a JSON-serialisable dict of what the sheet needs from a file.
+
+def scan_web(text):
+    return {
+        "routes": [list(m.groups()) for m in ROUTE_ENTRY.finditer(text)],
+        "handlers": HANDLER_DEF.findall(text),
+    }
+
+
+def scan_migration(text):
+    up = re.split(r'--\s*migrate:down', text, maxsplit=1)[0]
+    first = text.lstrip().splitlines()[0] if text.strip() else ""
+    return {
+        "title": first[2:].strip() if first.startswith("--") else "",
+        "tables": CREATE_TABLE.findall(up),
+        "columns": [f"{t}.{c}" for t, c in ADD_COLUMN.findall(up)],
+        "indexes": [f"{i} ({t})" for i, t in CREATE_INDEX.findall(up)],
+    }
+
+
+def scan_component(text):
+    return {"exports": JS_EXPORT.findall(text)}
+
+
+def scan_test(text):
+    names = [m.group(2) for m in TS_TEST.finditer(text)] + C_TEST.findall(text)
+    # Template literals like `/api/streams/${name}` become a single segment
+    references = sorted({re.sub(r'\$\{[^}]*\}', 'X', r) for r in API_REFERENCE.findall(text)})
+    return {"tests": names, "api_references": references}
+
+
+EXTRACTORS = {
+    "web": scan_web,
+    "migration": scan_migration,
+    "component": scan_component,
+    "test": scan_test,
+}
+
+
+# ── Index ───────────────────────────────────────────────────────────
+
+class FeatureIndex:
+    """Per-file scan results for the repository, backed by a cache file"""
+
+    def __init__(self, root=REPO_ROOT, cache_path=CACHE_PATH):
+        self.root = root
+        self.cache_path = cache_path
+        self.files = {}
+        self.scanned = 0
+        self.reused = 0
+        self._cache = {}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path) as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self._cache = data.get("files", {})
+            except (OSError, ValueError):
+                pass
+
+    def _walk(self, directory, patterns, recursive):
+        base = os.path.join(self.root, directory)
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS) if recursive else []
+            for name in sorted(filenames):
+                if any(fnmatch.fnmatch(name, p) for p in patterns):
+                    yield os.path.relpath(os.path.join(dirpath, name), self.root)
+
+    def file(self, path, kind=None):
+        """Scan result for a repo-relative path (from cache when unchanged)"""
+        if path in self.files:
+            return self.files[path]
+        try:
+            st = os.stat(os.path.join(self.root, path))
+        except OSError:
+            return None
+        cached = self._cache.get(path)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size \
+                and cached.get("kind") == kind:
+            self.reused += 1
+            entry = cached
+        else:
+            self.scanned += 1
+            with open(os.path.join(self.root, path), "rb") as f:
+                data = f.read()
+            text = data.decode("utf-8", errors="replace")
+            entry = {
+                "kind": kind,
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "lines": data.count(b"\n") + (0 if data.endswith(b"\n") or not data else 1),
+                "data": EXTRACTORS[kind](text) if kind in EXTRACTORS else {},
+            }
+        self.files[path] = entry
+        return entry
+
+    def build(self):
+        for kind, directory, patterns, recursive in SOURCES:
+            for path in self._walk(directory, patterns, recursive):
+                self.file(path, kind)
+        return self
+
+    def save(self):
+        if not self.cache_path:
+            return
+        # Keep entries for files looked up in earlier runs that still exist
+        merged = {p: e for p, e in self._cache.items()
+                  if p not in self.files and os.path.exists(os.path.join(self.root, p))}
+        merged.update(self.files)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "files": merged}, f)
+        os.replace(tmp, self.cache_path)
+
+    def of_kind(self, kind):
+        return [(p, e) for p, e in sorted(self.files.items()) if e["kind"] == kind]
+
+    def count(self, directory, pattern="*"):
+        """Number of files under directory (recursive) matching pattern"""
+        return sum(1 for _ in self._walk(directory, [pattern], True))
+
+    # ── Derived views ───────────────────────────────────────────────
+
+    def routes(self):
+        """[(method, path, handler, defining file)] for every registered route"""
+        defined = {}
+        for path, entry in self.of_kind("web"):
+            for handler in entry["data"]["handlers"]:
+                defined.setdefault(handler, path)
+        routes = []
+        for path, entry in self.of_kind("web"):
+            for method, route, handler in entry["data"]["routes"]:
+                routes.append((method, route, handler, defined.get(handler, path)))
+        return routes
+
+    def api_references(self):
+        refs = set()
+        for _, entry in self.of_kind("test"):
+            refs.update(entry["data"]["api_references"])
+        return refs
+
+    def route_covered(self, route, references=None):
+        """True if any test references a URL matching route (# and * are wildcards)"""
+        if references is None:
+            references = self.api_references()
+        pattern = re.compile("^" + re.escape(route).replace(r"\#", "[^/]+").replace(r"\*", ".*") + "/?$")
+        return any(pattern.match(ref) for ref in references)
+
+
+def format_size(size):
+    return f"{size / 1024:.0f}KB" if size >= 1024 else f"{size}B"
+
+
+def describe_file(index, path):
+    """'name (12KB, 340 lines)' for a repo-relative path, or the path if missing"""
+    entry = index.file(path)
+    if entry is None:
+        return f"{os.path.basename(path)} (missing)"
+    return f"{os.path.basename(path)} ({format_size(entry['size'])}, {entry['lines']} lines)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the LightNVR source feature index")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Cache file (default: .feature_index_cache.json)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cache and scan everything")
+    parser.add_argument("--json", action="store_true", help="Print the index as JSON")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.cache):
+        os.remove(args.cache)
+    index = FeatureIndex(cache_path=args.cache).build()
+    index.save()
+
+    if args.json:
+        json.dump(index.files, sys.stdout, indent=2)
+        print()
+    routes = index.routes()
+    references = index.api_references()
+    covered = sum(1 for _, route, _, _ in routes if index.route_covered(route, references))
+    print(f"{len(index.files)} files ({index.scanned} scanned, {index.reused} from cache): "
+          f"{len(routes)} routes ({covered} referenced by tests), "
+          f"{len(index.of_kind('migration'))} migrations, "
+          f"{len(index.of_kind('component'))} UI modules, "
+          f"{len(index.of_kind('test'))} test files", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
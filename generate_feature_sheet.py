@@ -4,12 +4,23 @@ LightNVR Feature Analysis Excel Sheet Generator
 Generates a comprehensive feature breakdown with status tracking.
 """
 
+import argparse
+import os
+import re
+from copy import copy
+from datetime import date
+
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.formatting.rule import CellIsRule
 
+from feature_index import CACHE_PATH, FeatureIndex, describe_file
+
+DEFAULT_OUTPUT = "/home/rahad/work/lightNVR/LightNVR_Feature_Analysis.xlsx"
+
 # ── Colour palette ──────────────────────────────────────────────────
 FILL_HEADER  = PatternFill(start_color="1F2937", end_color="1F2937", fill_type="solid")
 FILL_SECTION = PatternFill(start_color="374151", end_color="374151", fill_type="solid")
@@ -58,6 +69,8 @@ FONT_STATUS = {
 
 # ── Feature data ────────────────────────────────────────────────────
 # (Category, Feature, Sub-Feature/Detail, Status, Test Status, Notes)
+# Notes may use {file:PATH} for "name (size, lines)" and {count:DIR[:GLOB]}
+# for a file count; both are filled in from the source index.
 FEATURES = [
     # ─── Authentication & Authorization ──────────────────────────────
     ("Authentication & Authorization", "Login System", "Username/password login form with session management", "Working", "Done", "HTTP Basic Auth via Mongoose server"),
@@ -207,7 +220,7 @@ FEATURES = [
     ("System Information", "Clear Logs", "Clear system log buffer", "Working", "Done", "clearLogs function"),
     ("System Information", "System Restart", "Restart LightNVR service", "Working", "Done", "restartSystem function"),
     ("System Information", "System Shutdown", "Shutdown LightNVR service", "Working", "Done", "shutdownSystem function"),
-    ("System Information", "Health Check API", "System health endpoint", "Working", "Done", "api_handlers_health.c (17KB)"),
+    ("System Information", "Health Check API", "System health endpoint", "Working", "Done", "{file:src/web/api_handlers_health.c}"),
 
     # ─── Retention & Storage ─────────────────────────────────────────
     ("Retention & Storage", "Global Retention Policy", "Days-based retention for all recordings", "Working", "Done", "retention_days in settings"),
@@ -219,32 +232,32 @@ FEATURES = [
 
     # ─── Recording Engine ────────────────────────────────────────────
     ("Recording Engine", "MP4 Recording", "Direct MP4 container writing", "Working", "Done", "mp4_recording_core.c + mp4_writer.c"),
-    ("Recording Engine", "MP4 Segment Recording", "Segmented MP4 for continuous recording", "Working", "Done", "mp4_segment_recorder.c (69KB)"),
+    ("Recording Engine", "MP4 Segment Recording", "Segmented MP4 for continuous recording", "Working", "Done", "{file:src/video/mp4_segment_recorder.c}"),
     ("Recording Engine", "HLS Recording/Streaming", "HLS segment generation", "Working", "Done", "hls_writer.c + hls_streaming.c"),
     ("Recording Engine", "Audio Transcoding (AAC)", "Transcode incompatible audio to AAC for MP4", "Working", "Done", "Fixed G.711 μ-law → AAC transcoding"),
-    ("Recording Engine", "FFmpeg Utilities", "Codec/format handling via FFmpeg", "Working", "Done", "ffmpeg_utils.c (42KB)"),
-    ("Recording Engine", "Timestamp Management", "Accurate timestamp handling across recordings", "Working", "Done", "timestamp_manager.c (25KB)"),
+    ("Recording Engine", "FFmpeg Utilities", "Codec/format handling via FFmpeg", "Working", "Done", "{file:src/video/ffmpeg_utils.c}"),
+    ("Recording Engine", "Timestamp Management", "Accurate timestamp handling across recordings", "Working", "Done", "{file:src/video/timestamp_manager.c}"),
     ("Recording Engine", "Packet Buffering", "Efficient packet buffer for stream processing", "Working", "Done", "packet_buffer.c"),
 
     # ─── Core Infrastructure ─────────────────────────────────────────
-    ("Core Infrastructure", "Stream Manager", "Centralized stream lifecycle management", "Working", "Done", "stream_manager.c (32KB)"),
-    ("Core Infrastructure", "Stream State Machine", "State transitions for stream lifecycle", "Working", "Done", "stream_state.c (30KB)"),
-    ("Core Infrastructure", "Configuration Manager", "INI-based config with validation", "Working", "Done", "config.c (52KB)"),
+    ("Core Infrastructure", "Stream Manager", "Centralized stream lifecycle management", "Working", "Done", "{file:src/video/stream_manager.c}"),
+    ("Core Infrastructure", "Stream State Machine", "State transitions for stream lifecycle", "Working", "Done", "{file:src/video/stream_state.c}"),
+    ("Core Infrastructure", "Configuration Manager", "INI-based config with validation", "Working", "Done", "{file:src/core/config.c}"),
     ("Core Infrastructure", "Daemon Mode", "Run as background system service", "Working", "Done", "daemon.c with systemd integration"),
     ("Core Infrastructure", "Logger System", "File + syslog + JSON logging", "Working", "Done", "logger.c + logger_json.c"),
     ("Core Infrastructure", "Shutdown Coordinator", "Graceful shutdown with resource cleanup", "Working", "Done", "shutdown_coordinator.c"),
-    ("Core Infrastructure", "go2rtc Integration", "Managing go2rtc process lifecycle", "Working", "Done", "go2rtc directory with 8 source files"),
+    ("Core Infrastructure", "go2rtc Integration", "Managing go2rtc process lifecycle", "Working", "Done", "go2rtc directory with {count:src/video/go2rtc} source files"),
     ("Core Infrastructure", "Database Migrations", "Automatic schema upgrades", "Working", "Done", "db_migrations.c + sqlite_migrate.c"),
     ("Core Infrastructure", "Database Backup", "SQLite database backup", "Working", "Done", "db_backup.c"),
     ("Core Infrastructure", "Thread Management", "Multi-threaded worker pool", "Working", "Done", "thread_utils.c + mongoose_server_multithreading.c"),
-    ("Core Infrastructure", "Mongoose Web Server", "Embedded HTTP server", "Working", "Done", "mongoose_server.c (47KB)"),
+    ("Core Infrastructure", "Mongoose Web Server", "Embedded HTTP server", "Working", "Done", "{file:src/web/mongoose_server.c}"),
     ("Core Infrastructure", "Rate Limiting", "API request rate limiting", "Working", "Done", "Documented in API.md"),
 
     # ─── Docker & Deployment ─────────────────────────────────────────
-    ("Docker & Deployment", "Dockerfile", "Multi-stage build for production", "Working", "Done", "Dockerfile (9KB)"),
+    ("Docker & Deployment", "Dockerfile", "Multi-stage build for production", "Working", "Done", "{file:Dockerfile}"),
     ("Docker & Deployment", "Dockerfile Alpine", "Minimal Alpine-based image", "Working", "Done", "Dockerfile.alpine"),
     ("Docker & Deployment", "Docker Compose", "Full stack deployment config", "Working", "Done", "docker-compose.yml"),
-    ("Docker & Deployment", "Docker Entrypoint", "Auto-init config, DB, web assets", "Working", "Done", "docker-entrypoint.sh (9KB)"),
+    ("Docker & Deployment", "Docker Entrypoint", "Auto-init config, DB, web assets", "Working", "Done", "{file:docker-entrypoint.sh}"),
     ("Docker & Deployment", "Volume Persistence", "Config + data volume separation", "Working", "Done", "/etc/lightnvr + /var/lib/lightnvr/data"),
     ("Docker & Deployment", "Environment Variables", "TZ, GO2RTC_CONFIG_PERSIST, LIGHTNVR_AUTO_INIT", "Working", "Done", "3 env vars documented"),
     ("Docker & Deployment", "Port Mapping", "8080 (web), 8554 (RTSP), 8555 (WebRTC), 1984 (go2rtc)", "Working", "Done", "4 exposed ports"),
@@ -266,11 +279,11 @@ FEATURES = [
     ("REST API", "Streaming APIs (HLS/MJPEG)", "Live stream endpoints", "Working", "Done", "HLS playlist + MJPEG stream"),
     ("REST API", "PTZ Control APIs", "Move, stop, home, presets, capabilities", "Working", "Done", "5 PTZ endpoints"),
     ("REST API", "Detection APIs", "Results, models, zones", "Working", "Done", "3 detection endpoint groups"),
-    ("REST API", "go2rtc Proxy APIs", "Proxy requests to go2rtc", "Working", "Done", "api_handlers_go2rtc_proxy.c (24KB)"),
-    ("REST API", "Timeline APIs", "Timeline data per stream/date", "Working", "Done", "api_handlers_timeline.c (30KB)"),
-    ("REST API", "User Management APIs", "CRUD + API keys", "Working", "Done", "api_handlers_users.c (38KB)"),
+    ("REST API", "go2rtc Proxy APIs", "Proxy requests to go2rtc", "Working", "Done", "{file:src/web/api_handlers_go2rtc_proxy.c}"),
+    ("REST API", "Timeline APIs", "Timeline data per stream/date", "Working", "Done", "{file:src/web/api_handlers_timeline.c}"),
+    ("REST API", "User Management APIs", "CRUD + API keys", "Working", "Done", "{file:src/web/api_handlers_users.c}"),
     ("REST API", "Retention Policy APIs", "Per-stream retention config", "Working", "Done", "api_handlers_retention.c"),
-    ("REST API", "ONVIF Discovery APIs", "Discover and query ONVIF devices", "Working", "Done", "api_handlers_onvif.c (20KB)"),
+    ("REST API", "ONVIF Discovery APIs", "Discover and query ONVIF devices", "Working", "Done", "{file:src/web/api_handlers_onvif.c}"),
     ("REST API", "Health Check API", "Liveness/readiness checks", "Working", "Done", "api_handlers_health.c"),
     ("REST API", "Batch Operations APIs", "Batch delete with progress tracking", "Working", "Done", "api_handlers_recordings_batch.c"),
 
@@ -278,28 +291,210 @@ FEATURES = [
     ("Frontend Architecture", "Preact SPA Framework", "Lightweight 3KB React alternative", "Working", "Done", "Preact + JSX components"),
     ("Frontend Architecture", "Tailwind CSS Styling", "Utility-first CSS framework", "Working", "Done", "tailwind.config.js with custom theme"),
     ("Frontend Architecture", "Vite Build System", "Fast dev server and bundler", "Working", "Done", "vite.config.js with multi-page setup"),
-    ("Frontend Architecture", "Query Client", "Custom data fetching with caching", "Working", "Done", "query-client.js (7KB)"),
-    ("Frontend Architecture", "Fetch Utilities", "Centralized API helpers with retry/timeout", "Working", "Done", "fetch-utils.js (8KB)"),
+    ("Frontend Architecture", "Query Client", "Custom data fetching with caching", "Working", "Done", "{file:web/js/query-client.js}"),
+    ("Frontend Architecture", "Fetch Utilities", "Centralized API helpers with retry/timeout", "Working", "Done", "{file:web/js/fetch-utils.js}"),
     ("Frontend Architecture", "Toast Notifications", "User feedback system", "Working", "Done", "Toast + ToastContainer components"),
     ("Frontend Architecture", "Loading Indicators", "Content/page loading states", "Working", "Done", "LoadingIndicator + ContentLoader"),
-    ("Frontend Architecture", "UI Modal System", "Reusable modal infrastructure", "Working", "Done", "UI.jsx (32KB) with modal helpers"),
+    ("Frontend Architecture", "UI Modal System", "Reusable modal infrastructure", "Working", "Done", "{file:web/js/components/preact/UI.jsx} with modal helpers"),
     ("Frontend Architecture", "Responsive Design", "Mobile-friendly layouts", "Working", "Done", "Grid + responsive breakpoints"),
-    ("Frontend Architecture", "Test Suite", "Jest-based frontend tests", "Working", "Done", "web/tests/ with 12 test files"),
+    ("Frontend Architecture", "Test Suite", "Jest-based frontend tests", "Working", "Done", "web/tests/ with {count:web/tests} test files"),
 
     # ─── Playwright Testing ──────────────────────────────────────────
     ("Testing & Docs", "Playwright Config", "E2E test configuration", "Working", "Done", "playwright.config.ts"),
     ("Testing & Docs", "Screenshot Automation", "Automated documentation screenshots", "Working", "Done", "scripts/update-documentation-media.sh"),
     ("Testing & Docs", "Theme Screenshot Variants", "All theme screenshots for docs", "Working", "Done", "--all-themes flag"),
-    ("Testing & Docs", "Stress Testing", "Load/stress test scripts", "Working", "Done", "stress_test.sh"),
-    ("Testing & Docs", "Backend Test Suite", "C-based test suite", "Working", "Done", "tests/ directory with 33 files"),
-    ("Testing & Docs", "Comprehensive Documentation", "API, architecture, build, config, troubleshooting docs", "Working", "Done", "docs/ with 32 markdown files"),
+    ("Testing & Docs", "Stress Testing", "Load/stress test scripts", "Working", "Done", "stress_test.py (asyncio load generator, scenario file)"),
+    ("Testing & Docs", "Backend Test Suite", "C-based test suite", "Working", "Done", "tests/ directory with {count:tests} files"),
+    ("Testing & Docs", "Comprehensive Documentation", "API, architecture, build, config, troubleshooting docs", "Working", "Done", "docs/ with {count:docs:*.md} markdown files"),
 ]
 
 
-def create_excel():
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "LightNVR Feature Analysis"
+# ── Source-derived features ─────────────────────────────────────────
+NOTE_TOKEN = re.compile(r"\{(file|count):([^}:]+)(?::([^}]+))?\}")
+
+
+def render_note(note, index):
+    def substitute(match):
+        kind, path, pattern = match.groups()
+        if kind == "file":
+            return describe_file(index, path)
+        return str(index.count(path, pattern or "*"))
+    return NOTE_TOKEN.sub(substitute, note)
+
+
+def render_features(features, index):
+    """Curated features with their note tokens filled in"""
+    return [(category, feature, detail, status, test_status, render_note(notes, index))
+            for category, feature, detail, status, test_status, notes in features]
+
+
+def api_category(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return "API Routes: " + stem.replace("api_handlers_", "").replace("_", " ")
+
+
+def indexed_features(index):
+    """One row per route, migration, UI module and test file found in the tree.
+
+    Status is left for review; Test Status says whether any test refers to
+    the route (routes) or is Done for the test files themselves.
+    """
+    rows = []
+
+    references = index.api_references()
+    routes = sorted(index.routes(), key=lambda r: (api_category(r[3]), r[1], r[0]))
+    for method, route, handler, path in routes:
+        covered = index.route_covered(route, references)
+        rows.append((api_category(path), f"{method} {route}", handler, "Needs Review",
+                     "Done" if covered else "Not Started", describe_file(index, path)))
+
+    for path, entry in index.of_kind("migration"):
+        data = entry["data"]
+        changes = ([f"table {t}" for t in data["tables"]] + [f"column {c}" for c in data["columns"]] +
+                   [f"index {i}" for i in data["indexes"]])
+        version = os.path.basename(path).split("_", 1)[0]
+        rows.append(("Database Migrations", f"{version}: {data['title'] or os.path.basename(path)}",
+                     ", ".join(changes) or "(no schema statements)", "Needs Review", "Not Started",
+                     describe_file(index, path)))
+
+    for path, entry in index.of_kind("component"):
+        module = os.path.relpath(path, "web/js/components")
+        exports = entry["data"]["exports"]
+        rows.append(("UI Modules", module, ", ".join(exports) or "(no named exports)",
+                     "Needs Review", "Not Started", describe_file(index, path)))
+
+    for path, entry in index.of_kind("test"):
+        data = entry["data"]
+        detail = f"{len(data['tests'])} tests"
+        if data["api_references"]:
+            detail += f"; API: {', '.join(data['api_references'][:6])}"
+            if len(data["api_references"]) > 6:
+                detail += f" (+{len(data['api_references']) - 6})"
+        rows.append(("Test Coverage", path, detail, "Working", "Done", describe_file(index, path)))
+
+    return rows
+
+
+# ── Named styles ────────────────────────────────────────────────────
+# Registered once per workbook; cells refer to them by name instead of
+# carrying their own Font/Fill/Alignment/Border objects.
+FILL_TITLE  = PatternFill(start_color="111827", end_color="111827", fill_type="solid")
+FILL_LEGEND = PatternFill(start_color="F9FAFB", end_color="F9FAFB", fill_type="solid")
+
+
+def build_named_styles():
+    styles = [
+        NamedStyle("fs_title", font=Font(name="Calibri", bold=True, color="FFFFFF", size=16),
+                   fill=FILL_TITLE, alignment=Alignment(horizontal="center", vertical="center")),
+        NamedStyle("fs_subtitle", font=Font(name="Calibri", italic=True, color="9CA3AF", size=10),
+                   fill=FILL_TITLE, alignment=Alignment(horizontal="center", vertical="center")),
+        NamedStyle("fs_legend", font=Font(name="Calibri", size=10, color="4B5563"),
+                   fill=FILL_LEGEND, alignment=Alignment(horizontal="center", vertical="center")),
+        NamedStyle("fs_header", font=FONT_HEADER, fill=FILL_HEADER,
+                   alignment=ALIGNMENT_CENTER, border=THIN_BORDER),
+        NamedStyle("fs_section", font=FONT_SECTION, fill=FILL_SECTION,
+                   alignment=Alignment(horizontal="left", vertical="center"), border=THIN_BORDER),
+        NamedStyle("fs_summary_title", font=Font(name="Calibri", bold=True, color="FFFFFF", size=13),
+                   fill=FILL_TITLE, alignment=Alignment(horizontal="center", vertical="center")),
+        NamedStyle("fs_summary_label", font=FONT_BOLD, fill=FILL_WHITE,
+                   alignment=ALIGNMENT_LEFT, border=THIN_BORDER),
+        NamedStyle("fs_summary_item", font=FONT_NORMAL, fill=FILL_WHITE,
+                   alignment=ALIGNMENT_LEFT, border=THIN_BORDER),
+        NamedStyle("fs_summary_value", font=FONT_BOLD, fill=FILL_WHITE,
+                   alignment=ALIGNMENT_CENTER, border=THIN_BORDER),
+    ]
+    # Data cells come in a white and a gray (alternate row) variant
+    for suffix, fill in (("", FILL_WHITE), ("_alt", FILL_GRAY)):
+        styles += [
+            NamedStyle(f"fs_center{suffix}", font=FONT_NORMAL, fill=fill,
+                       alignment=ALIGNMENT_CENTER, border=THIN_BORDER),
+            NamedStyle(f"fs_left{suffix}", font=FONT_NORMAL, fill=fill,
+                       alignment=ALIGNMENT_LEFT, border=THIN_BORDER),
+            NamedStyle(f"fs_bold{suffix}", font=FONT_BOLD, fill=fill,
+                       alignment=ALIGNMENT_LEFT, border=THIN_BORDER),
+        ]
+    return styles
+
+
+# Workbooks with more feature rows than this are written in write-only
+# (streaming) mode: rows go straight to the output instead of being held
+# as Cell objects for the whole sheet.
+WRITE_ONLY_THRESHOLD = 1000
+
+COLUMNS = 6
+
+
+class SheetBuilder:
+    """Appends styled rows top to bottom, in normal or write-only mode"""
+
+    def __init__(self, ws, write_only, styles):
+        self.ws = ws
+        self.write_only = write_only
+        self.row = 0
+        # Resolve each named style to its style array once; assigning
+        # cell.style by name searches the workbook's style list every time
+        self.style_arrays = {style.name: style.as_tuple() for style in styles}
+
+    def append(self, cells, height=None, merge=()):
+        """cells: [(value, style name)]; merge: [(first column, last column)]"""
+        self.row += 1
+        if height:
+            self.ws.row_dimensions[self.row].height = height
+        if self.write_only:
+            row = []
+            for value, style in cells:
+                cell = WriteOnlyCell(self.ws, value=value)
+                cell._style = copy(self.style_arrays[style])
+                row.append(cell)
+            self.ws.append(row)
+        else:
+            self.ws.append([value for value, _ in cells])
+            for column, (_, style) in enumerate(cells, 1):
+                self.ws.cell(row=self.row, column=column)._style = copy(self.style_arrays[style])
+        for first, last in merge:
+            self.ws.merged_cells.add(f"{get_column_letter(first)}{self.row}:"
+                                     f"{get_column_letter(last)}{self.row}")
+        return self.row
+
+    def skip(self):
+        self.row += 1
+        self.ws.append([])
+
+
+def contiguous_ranges(rows):
+    """Collapse sorted row numbers into (first, last) runs"""
+    ranges = []
+    for row in rows:
+        if ranges and row == ranges[-1][1] + 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
+
+def create_excel(features=FEATURES, output_path=DEFAULT_OUTPUT, write_only=None):
+    if write_only is None:
+        write_only = len(features) > WRITE_ONLY_THRESHOLD
+
+    wb = openpyxl.Workbook(write_only=write_only)
+    styles = build_named_styles()
+    for style in styles:
+        wb.add_named_style(style)
+    if write_only:
+        ws = wb.create_sheet("LightNVR Feature Analysis")
+    else:
+        ws = wb.active
+        ws.title = "LightNVR Feature Analysis"
+    sheet = SheetBuilder(ws, write_only, styles)
+
+    # Count categories and statuses up front; write-only sheets cannot go back
+    categories = {}
+    status_counts = {}
+    test_counts = {}
+    for category, _, _, status, test_status, _ in features:
+        categories[category] = categories.get(category, 0) + 1
+        status_counts[status] = status_counts.get(status, 0) + 1
+        test_counts[test_status] = test_counts.get(test_status, 0) + 1
 
     # ── Column widths ───────────────────────────────────────────────
     col_widths = [8, 28, 50, 16, 16, 50]
@@ -308,137 +503,51 @@ def create_excel():
     for i, w in enumerate(col_widths, 1):
         ws.column_dimensions[get_column_letter(i)].width = w
 
-    # ── Title row ───────────────────────────────────────────────────
-    ws.merge_cells("A1:F1")
-    title_cell = ws["A1"]
-    title_cell.value = "LightNVR – Full Feature Analysis Report"
-    title_cell.font = Font(name="Calibri", bold=True, color="FFFFFF", size=16)
-    title_cell.fill = PatternFill(start_color="111827", end_color="111827", fill_type="solid")
-    title_cell.alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[1].height = 40
-
-    # ── Subtitle row ────────────────────────────────────────────────
-    ws.merge_cells("A2:F2")
-    sub_cell = ws["A2"]
-    sub_cell.value = "Generated: 2026-02-11  |  Project: opensensor/lightNVR  |  Total Features: {}".format(len(FEATURES))
-    sub_cell.font = Font(name="Calibri", italic=True, color="9CA3AF", size=10)
-    sub_cell.fill = PatternFill(start_color="111827", end_color="111827", fill_type="solid")
-    sub_cell.alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[2].height = 25
-
-    # ── Legend row ──────────────────────────────────────────────────
-    ws.merge_cells("A3:F3")
-    legend_cell = ws["A3"]
-    legend_cell.value = "🟢 Working/Done = Green  |  🔴 Not Working/Issue = Red  |  🟡 Testing/Partial = Yellow  |  🔵 Needs Review = Blue"
-    legend_cell.font = Font(name="Calibri", size=10, color="4B5563")
-    legend_cell.fill = PatternFill(start_color="F9FAFB", end_color="F9FAFB", fill_type="solid")
-    legend_cell.alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[3].height = 25
+    # ── Freeze panes (must be set before rows in write-only mode) ───
+    ws.freeze_panes = "A5"
+
+    # ── Title, subtitle and legend rows ─────────────────────────────
+    full_width = [(1, COLUMNS)]
+    sheet.append([("LightNVR – Full Feature Analysis Report", "fs_title")], 40, full_width)
+    sheet.append([("Generated: {}  |  Project: opensensor/lightNVR  |  Total Features: {}".format(
+        date.today().isoformat(), len(features)), "fs_subtitle")], 25, full_width)
+    sheet.append([("🟢 Working/Done = Green  |  🔴 Not Working/Issue = Red  |  🟡 Testing/Partial = Yellow  |  🔵 Needs Review = Blue",
+                   "fs_legend")], 25, full_width)
 
     # ── Header row ──────────────────────────────────────────────────
-    header_row = 4
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=header_row, column=col_idx, value=header)
-        cell.font = FONT_HEADER
-        cell.fill = FILL_HEADER
-        cell.alignment = ALIGNMENT_CENTER
-        cell.border = THIN_BORDER
-    ws.row_dimensions[header_row].height = 30
+    header_row = sheet.append([(header, "fs_header") for header in headers], 30)
 
     # ── Data rows ───────────────────────────────────────────────────
-    current_row = header_row + 1
     current_category = None
     feature_num = 0
     data_rows = []  # Track rows that have Status/Test Status cells for dropdowns
 
-    for category, feature, detail, status, test_status, notes in FEATURES:
+    for category, feature, detail, status, test_status, notes in features:
         # Section header when category changes
         if category != current_category:
             current_category = category
-            ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=6)
-            cell = ws.cell(row=current_row, column=1, value=f"▶  {category}")
-            cell.font = FONT_SECTION
-            cell.fill = FILL_SECTION
-            cell.alignment = Alignment(horizontal="left", vertical="center")
-            cell.border = THIN_BORDER
-            ws.row_dimensions[current_row].height = 28
-            current_row += 1
+            sheet.append([(f"▶  {category}", "fs_section")], 28, full_width)
 
         feature_num += 1
-        alt_fill = FILL_GRAY if feature_num % 2 == 0 else FILL_WHITE
-
-        # Column A: #
-        cell = ws.cell(row=current_row, column=1, value=feature_num)
-        cell.font = FONT_NORMAL
-        cell.fill = alt_fill
-        cell.alignment = ALIGNMENT_CENTER
-        cell.border = THIN_BORDER
-
-        # Column B: Feature
-        cell = ws.cell(row=current_row, column=2, value=feature)
-        cell.font = FONT_BOLD
-        cell.fill = alt_fill
-        cell.alignment = ALIGNMENT_LEFT
-        cell.border = THIN_BORDER
-
-        # Column C: Detail
-        cell = ws.cell(row=current_row, column=3, value=detail)
-        cell.font = FONT_NORMAL
-        cell.fill = alt_fill
-        cell.alignment = ALIGNMENT_LEFT
-        cell.border = THIN_BORDER
-
-        # Column D: Status (color driven by conditional formatting)
-        cell = ws.cell(row=current_row, column=4, value=status)
-        cell.font = FONT_NORMAL
-        cell.fill = alt_fill
-        cell.alignment = ALIGNMENT_CENTER
-        cell.border = THIN_BORDER
-
-        # Column E: Test Status (color driven by conditional formatting)
-        cell = ws.cell(row=current_row, column=5, value=test_status)
-        cell.font = FONT_NORMAL
-        cell.fill = alt_fill
-        cell.alignment = ALIGNMENT_CENTER
-        cell.border = THIN_BORDER
-
-        # Column F: Notes
-        cell = ws.cell(row=current_row, column=6, value=notes)
-        cell.font = FONT_NORMAL
-        cell.fill = alt_fill
-        cell.alignment = ALIGNMENT_LEFT
-        cell.border = THIN_BORDER
-
-        ws.row_dimensions[current_row].height = 22
-        data_rows.append(current_row)
-        current_row += 1
+        alt = "_alt" if feature_num % 2 == 0 else ""
+
+        # Status / Test Status colours are driven by conditional formatting
+        data_rows.append(sheet.append([
+            (feature_num, "fs_center" + alt),
+            (feature, "fs_bold" + alt),
+            (detail, "fs_left" + alt),
+            (status, "fs_center" + alt),
+            (test_status, "fs_center" + alt),
+            (notes, "fs_left" + alt),
+        ], 22))
+    last_data_row = sheet.row
 
     # ── Summary section ─────────────────────────────────────────────
-    current_row += 1
-    ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=6)
-    cell = ws.cell(row=current_row, column=1, value="📊  Summary Statistics")
-    cell.font = Font(name="Calibri", bold=True, color="FFFFFF", size=13)
-    cell.fill = PatternFill(start_color="111827", end_color="111827", fill_type="solid")
-    cell.alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[current_row].height = 32
-    current_row += 1
-
-    # Count categories
-    categories = {}
-    for cat, *_ in FEATURES:
-        categories[cat] = categories.get(cat, 0) + 1
-
-    # Count statuses
-    status_counts = {}
-    for *_, status, test_status, _ in FEATURES:
-        status_counts[status] = status_counts.get(status, 0) + 1
-
-    test_counts = {}
-    for *_, test_status, _ in FEATURES:
-        test_counts[test_status] = test_counts.get(test_status, 0) + 1
+    sheet.skip()
+    sheet.append([("📊  Summary Statistics", "fs_summary_title")], 32, full_width)
 
     summary_data = [
-        ("Total Features", str(len(FEATURES))),
+        ("Total Features", str(len(features))),
         ("Total Categories", str(len(categories))),
         ("", ""),
         ("Status Breakdown:", ""),
@@ -456,24 +565,11 @@ def create_excel():
     for cat, count in sorted(categories.items()):
         summary_data.append((f"  {cat}", str(count)))
 
+    summary_columns = [(1, 4), (5, 6)]
     for label, value in summary_data:
-        cell_a = ws.cell(row=current_row, column=1)
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=4)
-        cell_a.value = label
-        cell_a.font = FONT_BOLD if not label.startswith("  ") else FONT_NORMAL
-        cell_a.fill = FILL_WHITE
-        cell_a.alignment = ALIGNMENT_LEFT
-        cell_a.border = THIN_BORDER
-
-        cell_b = ws.cell(row=current_row, column=5)
-        ws.merge_cells(start_row=current_row, start_column=5, end_row=current_row, end_column=6)
-        cell_b.value = value
-        cell_b.font = FONT_BOLD
-        cell_b.fill = FILL_WHITE
-        cell_b.alignment = ALIGNMENT_CENTER
-        cell_b.border = THIN_BORDER
-
-        current_row += 1
+        label_style = "fs_summary_item" if label.startswith("  ") else "fs_summary_label"
+        sheet.append([(label, label_style), (None, label_style), (None, label_style),
+                      (None, label_style), (value, "fs_summary_value")], merge=summary_columns)
 
     # ── Dropdown data validation for Status (col D) ─────────────────
     status_dv = DataValidation(
@@ -486,7 +582,7 @@ def create_excel():
     status_dv.errorTitle = "Invalid Status"
     status_dv.prompt = "Select feature status"
     status_dv.promptTitle = "Status"
-    ws.add_data_validation(status_dv)
+    ws.data_validations.append(status_dv)
 
     # ── Dropdown data validation for Test Status (col E) ────────────
     test_dv = DataValidation(
@@ -499,12 +595,12 @@ def create_excel():
     test_dv.errorTitle = "Invalid Test Status"
     test_dv.prompt = "Select test status"
     test_dv.promptTitle = "Test Status"
-    ws.add_data_validation(test_dv)
+    ws.data_validations.append(test_dv)
 
-    # Apply dropdowns to all feature data rows
-    for row_num in data_rows:
-        status_dv.add(ws.cell(row=row_num, column=4))   # Column D
-        test_dv.add(ws.cell(row=row_num, column=5))     # Column E
+    # Apply dropdowns per run of feature rows (one range per category)
+    for first, last in contiguous_ranges(data_rows):
+        status_dv.add(f"D{first}:D{last}")
+        test_dv.add(f"E{first}:E{last}")
 
     # ── Conditional formatting for auto-coloring on selection ────────
     # Define color rules: (value, fill_color, font_color)
@@ -522,8 +618,7 @@ def create_excel():
         ("Not Started",  "F3F4F6", "6B7280"),  # Gray bg, gray text
     ]
 
-    first_data_row = data_rows[0]
-    last_data_row = data_rows[-1]
+    first_data_row = data_rows[0] if data_rows else header_row + 1
     col_d_range = f"D{first_data_row}:D{last_data_row}"
     col_e_range = f"E{first_data_row}:E{last_data_row}"
 
@@ -549,19 +644,39 @@ def create_excel():
             )
         )
 
-    # ── Freeze panes ────────────────────────────────────────────────
-    ws.freeze_panes = "A5"
-
     # ── Auto-filter ─────────────────────────────────────────────────
-    ws.auto_filter.ref = f"A4:F{header_row + len(FEATURES) + len(categories)}"
+    ws.auto_filter.ref = f"A{header_row}:F{last_data_row}"
 
     # ── Save ────────────────────────────────────────────────────────
-    output_path = "/home/rahad/work/lightNVR/LightNVR_Feature_Analysis.xlsx"
     wb.save(output_path)
     print(f"✅ Excel sheet saved to: {output_path}")
-    print(f"   Total features: {len(FEATURES)}")
+    print(f"   Total features: {len(features)}")
     print(f"   Total categories: {len(categories)}")
+    if write_only:
+        print("   Written in write-only (streaming) mode")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the LightNVR feature analysis workbook")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"Output .xlsx path (default: {DEFAULT_OUTPUT})")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--write-only", dest="write_only", action="store_true", default=None,
+                      help=f"Force streaming mode (default: above {WRITE_ONLY_THRESHOLD} features)")
+    mode.add_argument("--no-write-only", dest="write_only", action="store_false",
+                      help="Force building the sheet in memory")
+    parser.add_argument("--curated-only", action="store_true",
+                        help="Leave out the rows generated from the source index")
+    parser.add_argument("--index-cache", default=CACHE_PATH,
+                        help="Source index cache (default: .feature_index_cache.json)")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    create_excel()
+    args = parse_args()
+    index = FeatureIndex(cache_path=args.index_cache).build()
+    features = render_features(FEATURES, index)
+    if not args.curated_only:
+        features += indexed_features(index)
+    index.save()
+    print(f"Source index: {index.scanned} files scanned, {index.reused} from cache")
+    create_excel(features, output_path=args.output, write_only=args.write_only)
@@ -105,6 +105,9 @@ typedef struct {
 
     // Database settings
     char db_path[MAX_PATH_LENGTH];
+    bool detection_block_storage;   // Pack old detections into compact blocks ([database] detection_storage = blocks)
+    int db_backup_interval_hours;   // Hours between online database backups (0 = only at startup and shutdown)
+    bool db_backup_compress;        // Gzip the online database backups
     
     // Web server settings
     int web_port;
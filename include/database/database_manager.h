@@ -6,9 +6,11 @@
 #include "database/db_events.h"
 #include "database/db_recordings.h"
 #include "database/db_detections.h"
+#include "database/db_detection_blocks.h"
 #include "database/db_streams.h"
 #include "database/db_schema.h"
 #include "database/db_motion_config.h"
+#include "database/db_write_queue.h"
 
 // This header now just includes all the database module headers
 // All database functionality is now split into logical modules
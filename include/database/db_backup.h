@@ -1,6 +1,26 @@
 #ifndef LIGHTNVR_DB_BACKUP_H
 #define LIGHTNVR_DB_BACKUP_H
 
+#include <stdbool.h>
+#include <time.h>
+
+// Pages copied per step of an online backup
+#define BACKUP_PAGES_PER_STEP 256
+
+// Pause between steps of an online backup, so writers get the database
+#define BACKUP_STEP_DELAY_MS 50
+
+/**
+ * Progress of the online backup
+ */
+typedef struct {
+    bool active;                // Whether an online backup is running
+    char dest_path[1024];       // Backup file being written
+    int total_pages;            // Pages in the database (0 until the first step)
+    int remaining_pages;        // Pages still to copy
+    time_t start_time;          // When the backup was started
+} backup_progress_t;
+
 /**
  * Backup the database to a specified path
  * 
@@ -10,6 +30,43 @@
  */
 int backup_database(const char *source_path, const char *dest_path);
 
+/**
+ * Start an online backup of the open database
+ * The copy is made from the main connection a few pages at a time by
+ * continue_online_backup(), so writes made in between end up in the backup
+ * instead of restarting it. The copy is written next to dest_path and only
+ * replaces it once it has passed an integrity check.
+ *
+ * @param dest_path Path to the backup file
+ * @param compress Whether to gzip the finished copy (written to dest_path.gz)
+ * @return 0 on success, non-zero on failure (including a backup already running)
+ */
+int start_online_backup(const char *dest_path, bool compress);
+
+/**
+ * Copy the next pages of the online backup
+ * Each step copies BACKUP_PAGES_PER_STEP pages while holding the database
+ * mutex, then sleeps for BACKUP_STEP_DELAY_MS without it.
+ *
+ * @param max_steps Maximum number of steps to run in this call
+ * @return 1 if the backup finished, 0 if pages remain, -1 on error (the backup is abandoned)
+ */
+int continue_online_backup(int max_steps);
+
+/**
+ * Abandon the online backup, if one is running
+ * The partial copy is removed and the previous backup file is left as it was.
+ */
+void cancel_online_backup(void);
+
+/**
+ * Get the progress of the online backup
+ *
+ * @param progress Structure to fill
+ * @return true if an online backup is running, false otherwise
+ */
+bool get_online_backup_progress(backup_progress_t *progress);
+
 /**
  * Restore database from backup
  * 
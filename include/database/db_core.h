@@ -9,6 +9,9 @@
 #include "database/db_maintenance.h"
 #include "database/db_backup.h"
 
+// Number of read-only connections handed out by acquire_db_reader
+#define DB_READER_POOL_SIZE 4
+
 /**
  * Initialize the database
  * 
@@ -24,6 +27,7 @@ void shutdown_database(void);
 
 /**
  * Get the database handle (for internal use by other database modules)
+ * This is the writer connection; use it with the db mutex held.
  * 
  * @return SQLite database handle
  */
@@ -36,6 +40,29 @@ sqlite3 *get_db_handle(void);
  */
 pthread_mutex_t *get_db_mutex(void);
 
+/**
+ * Borrow a connection for read-only queries
+ *
+ * Returns a connection from the reader pool so the query does not wait for
+ * the db mutex, which the writer holds for inserts and updates. If the pool
+ * is not available (not initialized, or every reader stays busy for too
+ * long) this returns the global handle with the db mutex locked instead, so
+ * callers never need a second code path.
+ *
+ * Statements prepared on the returned connection must be finalized before
+ * it is released.
+ *
+ * @return SQLite database handle, or NULL if the database is not initialized
+ */
+sqlite3 *acquire_db_reader(void);
+
+/**
+ * Return a connection obtained from acquire_db_reader
+ *
+ * @param reader The handle returned by acquire_db_reader
+ */
+void release_db_reader(sqlite3 *reader);
+
 /**
  * Checkpoint the database WAL file
  * This ensures all changes are written to the main database file
@@ -44,4 +71,23 @@ pthread_mutex_t *get_db_mutex(void);
  */
 int checkpoint_database(void);
 
+/**
+ * Set how often run_scheduled_backup() backs up the database
+ *
+ * @param interval_seconds Seconds between backups (0 to only back up at startup and shutdown)
+ * @param compress Whether to gzip scheduled backups (written to the backup path + .gz)
+ */
+void set_database_backup_schedule(int interval_seconds, bool compress);
+
+/**
+ * Run the scheduled online backup
+ * Starts a backup to the backup path when the last one is older than the
+ * interval and copies up to max_steps steps of it. An unfinished backup is
+ * picked up again by the next call.
+ *
+ * @param max_steps Maximum number of backup steps in this call
+ * @return 1 if a backup finished, 0 if nothing was due or pages remain, -1 on error
+ */
+int run_scheduled_backup(int max_steps);
+
 #endif // LIGHTNVR_DB_CORE_H
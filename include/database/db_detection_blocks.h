@@ -0,0 +1,88 @@
+#ifndef LIGHTNVR_DB_DETECTION_BLOCKS_H
+#define LIGHTNVR_DB_DETECTION_BLOCKS_H
+
+#include <stdbool.h>
+#include <time.h>
+#include <sqlite3.h>
+#include "database/db_detections.h"
+#include "video/detection_result.h"
+
+// Seconds of detections packed into one block (divides an hour)
+#define DETECTION_BLOCK_SECONDS 600
+
+// Buckets are packed once they ended this long ago, so late writes still land as rows
+#define DETECTION_BLOCK_GRACE_SECONDS (2 * DETECTION_BLOCK_SECONDS)
+
+/**
+ * Enable or disable packing detections into blocks
+ * Readers always look at both rows and blocks; this only controls whether
+ * compact_detection_blocks() is run by the storage manager.
+ *
+ * @param enabled Whether block storage is on ([database] detection_storage = blocks)
+ */
+void set_detection_block_storage(bool enabled);
+
+/**
+ * Check whether detections are packed into blocks
+ *
+ * @return true if block storage is on
+ */
+bool detection_block_storage_enabled(void);
+
+/**
+ * Pack detection rows of closed buckets into blocks
+ * Works through the buckets oldest first, one transaction per bucket: the
+ * rows of every stream in the bucket are encoded into one block per stream
+ * (merged with an existing block for late rows) and then deleted. Calls
+ * continue where the previous one stopped; a bucket that fails to pack is
+ * logged, left as rows and retried on the next pass.
+ *
+ * @param max_buckets Maximum number of buckets to look at in this call
+ * @return Number of detections packed, or -1 on error
+ */
+int compact_detection_blocks(int max_buckets);
+
+/**
+ * Read the newest detections of a stream in a time range from blocks
+ *
+ * @param db Database connection (reader or writer, held by the caller)
+ * @param stream_name Stream name
+ * @param start_time Start time (inclusive)
+ * @param end_time End time (inclusive)
+ * @param detections Array to fill, newest first
+ * @param timestamps Array to fill with the detection times (may be NULL)
+ * @param max_count Maximum number of detections to return
+ * @return Number of detections found, or -1 on error
+ */
+int read_block_detections(sqlite3 *db, const char *stream_name, time_t start_time, time_t end_time,
+                          detection_t *detections, time_t *timestamps, int max_count);
+
+/**
+ * Add the label counts of a stream's blocks in a time range to a summary
+ * Blocks inside the range are counted from their string table without
+ * decoding the detections.
+ *
+ * @param db Database connection (reader or writer, held by the caller)
+ * @param stream_name Stream name
+ * @param start_time Start time (inclusive)
+ * @param end_time End time (inclusive)
+ * @param labels Summary to add to (unsorted)
+ * @param label_count Number of entries in labels, updated
+ * @param max_labels Capacity of labels; further labels are dropped
+ * @return 0 on success, -1 on error
+ */
+int count_block_detection_labels(sqlite3 *db, const char *stream_name, time_t start_time, time_t end_time,
+                                 detection_label_summary_t *labels, int *label_count, int max_labels);
+
+/**
+ * Check whether a stream's blocks hold a detection in a time range
+ *
+ * @param db Database connection (reader or writer, held by the caller)
+ * @param stream_name Stream name
+ * @param start_time Start time (inclusive)
+ * @param end_time End time (inclusive)
+ * @return 1 if detections exist, 0 if none, -1 on error
+ */
+int block_detections_exist(sqlite3 *db, const char *stream_name, time_t start_time, time_t end_time);
+
+#endif // LIGHTNVR_DB_DETECTION_BLOCKS_H
@@ -2,6 +2,7 @@
 #define LIGHTNVR_DB_MAINTENANCE_H
 
 #include <stdint.h>
+#include <time.h>
 
 /**
  * Get the database size
@@ -12,11 +13,36 @@ int64_t get_database_size(void);
 
 /**
  * Vacuum the database to reclaim space
+ * Releases all free pages with incremental vacuum. A database that does not
+ * use incremental auto_vacuum yet is converted with one full VACUUM.
  * 
  * @return 0 on success, non-zero on failure
  */
 int vacuum_database(void);
 
+/**
+ * Release up to max_pages free pages back to the filesystem
+ * Works in small steps and releases the database mutex between them, so it
+ * can run from the storage manager without holding up writes. Does nothing
+ * unless the database uses incremental auto_vacuum.
+ *
+ * @param max_pages Maximum number of pages to release in this call
+ * @return Number of pages released, or -1 on error
+ */
+int incremental_vacuum_database(int max_pages);
+
+/**
+ * Delete rows older than a cutoff in batches
+ * Pages through the expired rows in rowid order, deleting up to 1000 per
+ * short transaction and releasing the database mutex between batches.
+ *
+ * @param table Table name
+ * @param time_column Column compared against the cutoff
+ * @param cutoff_time Rows with time_column before this are deleted
+ * @return Number of rows deleted, or -1 on error
+ */
+int delete_expired_rows(const char *table, const char *time_column, time_t cutoff_time);
+
 /**
  * Check database integrity
  * 
@@ -24,6 +50,28 @@ int vacuum_database(void);
  */
 int check_database_integrity(void);
 
+/**
+ * Check that a query is planned with indexes
+ * Runs EXPLAIN QUERY PLAN and logs a warning for each table the query would
+ * scan in full.
+ *
+ * @param name Query name for the log
+ * @param sql Query to check (parameters may be left unbound)
+ * @return 1 if every table is read through an index, 0 if one is scanned, -1 on error
+ */
+int check_query_plan(const char *name, const char *sql);
+
+/**
+ * Check that a query is planned with indexes and needs no sort
+ * Like check_query_plan(), and also warns when the rows have to be sorted
+ * in a temporary b-tree for ORDER BY, so a LIMIT cannot stop early.
+ *
+ * @param name Query name for the log
+ * @param sql Query to check (parameters may be left unbound)
+ * @return 1 if the plan uses indexes for both, 0 if not, -1 on error
+ */
+int check_query_plan_order(const char *name, const char *sql);
+
 /**
  * Execute a SQL query and get the results
  * 
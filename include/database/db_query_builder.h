@@ -11,6 +11,7 @@
 #define DB_QUERY_BUILDER_H
 
 #include <stdbool.h>
+#include <stddef.h>
 #include <stdint.h>
 #include <sqlite3.h>
 
@@ -120,6 +121,79 @@ double qb_get_double(sqlite3_stmt *stmt, const query_builder_t *qb,
 bool qb_get_bool(sqlite3_stmt *stmt, const query_builder_t *qb,
                  const char *column_name, bool default_value);
 
+/**
+ * How a result column is stored into a row struct
+ */
+typedef enum {
+    QB_FIELD_INT,           // Integer member of any width (int, int64_t, time_t, ...)
+    QB_FIELD_DOUBLE,        // float or double member
+    QB_FIELD_BOOL,          // bool member, set when the value is non-zero
+    QB_FIELD_TEXT           // char array member, truncated to fit
+} qb_field_type_t;
+
+/**
+ * Mapping of a column to a member of a row struct
+ */
+typedef struct {
+    const char *column_name;    // Column name as added to the query builder
+    qb_field_type_t type;       // How to store the value
+    size_t offset;              // offsetof() the member in the row struct
+    size_t size;                // sizeof() the member
+} qb_field_t;
+
+/**
+ * Describe a row struct member for qb_compile_decoder()
+ */
+#define QB_FIELD(row_type, member, column_name, field_type) \
+    { (column_name), (field_type), offsetof(row_type, member), sizeof(((row_type *)0)->member) }
+
+/**
+ * Row decoder with the result index of every field resolved up front
+ */
+typedef struct {
+    qb_field_t fields[MAX_TRACKED_COLUMNS];
+    int indices[MAX_TRACKED_COLUMNS];   // Result index of each field, -1 if not in the result
+    int field_count;
+} qb_row_decoder_t;
+
+/**
+ * Compile a row decoder for a built query
+ * Resolves each field's column once, so decoding rows needs no name lookups.
+ * Call after qb_build_select(); fields for columns missing from the table
+ * are decoded as zero or an empty string.
+ *
+ * @param qb Query builder the statement was prepared from
+ * @param fields Fields to decode
+ * @param field_count Number of fields
+ * @param decoder Decoder to fill
+ * @return 0 on success, -1 on error
+ */
+int qb_compile_decoder(const query_builder_t *qb, const qb_field_t *fields, int field_count,
+                       qb_row_decoder_t *decoder);
+
+/**
+ * Decode the current row of a statement into a row struct
+ * NULL values are stored as zero or an empty string.
+ *
+ * @param stmt Statement positioned on a row
+ * @param decoder Compiled decoder
+ * @param row Row struct to fill
+ */
+void qb_decode_row(sqlite3_stmt *stmt, const qb_row_decoder_t *decoder, void *row);
+
+/**
+ * Step a statement and decode its rows into an array of row structs
+ *
+ * @param stmt Prepared statement (bound, not yet stepped or reset)
+ * @param decoder Compiled decoder
+ * @param rows Array of row structs
+ * @param row_size sizeof() one row struct
+ * @param max_rows Capacity of rows
+ * @return Number of rows decoded, or -1 on error
+ */
+int qb_fetch_rows(sqlite3_stmt *stmt, const qb_row_decoder_t *decoder, void *rows, size_t row_size,
+                  int max_rows);
+
 #ifdef __cplusplus
 }
 #endif
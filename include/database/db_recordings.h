@@ -1,14 +1,17 @@
 #ifndef LIGHTNVR_DB_RECORDINGS_H
 #define LIGHTNVR_DB_RECORDINGS_H
 
+#include <stddef.h>
 #include <stdint.h>
 #include <stdbool.h>
 #include <time.h>
 
+#include "core/config.h"
+
 // Recording metadata structure
 typedef struct {
     uint64_t id;
-    char stream_name[64];
+    char stream_name[MAX_STREAM_NAME];
     char file_path[256];
     time_t start_time;
     time_t end_time;
@@ -69,6 +72,34 @@ int get_recording_metadata(time_t start_time, time_t end_time,
 int get_recording_count(time_t start_time, time_t end_time, 
                        const char *stream_name, int has_detection);
 
+// Recording totals for one stream and time bucket (from recording_rollups)
+typedef struct {
+    char stream_name[MAX_STREAM_NAME];
+    time_t bucket_start;    // Start of the bucket (Unix time)
+    int segments;           // Complete recordings that started in the bucket
+    uint64_t size_bytes;    // Total size of those recordings
+    uint64_t seconds;       // Total recorded duration of those recordings
+    int detections;         // Detections with a timestamp in the bucket
+} recording_rollup_t;
+
+/**
+ * Get per-stream recording totals by hour or day from the rollup table
+ * Reads the hourly rows kept up to date by the recordings and detections
+ * triggers, so calendar and overview queries never scan the recordings.
+ *
+ * @param stream_name Stream name filter (NULL for all streams)
+ * @param start_time Start of the range (0 for no limit), rounded down to the hour
+ * @param end_time End of the range (0 for no limit)
+ * @param bucket_seconds Bucket size, a whole number of hours (3600 or 86400)
+ * @param utc_offset Local UTC offset in seconds, so day buckets start at local midnight
+ * @param rollups Array to fill, ordered by bucket then stream
+ * @param max_count Maximum number of rows to return
+ * @return Number of rows found, or -1 on error
+ */
+int get_recording_rollups(const char *stream_name, time_t start_time, time_t end_time,
+                          int bucket_seconds, long utc_offset,
+                          recording_rollup_t *rollups, int max_count);
+
 /**
  * Get paginated recording metadata from the database with sorting
  * 
@@ -76,7 +107,7 @@ int get_recording_count(time_t start_time, time_t end_time,
  * @param end_time End time filter (0 for no filter)
  * @param stream_name Stream name filter (NULL for all streams)
  * @param has_detection Filter for recordings with detection events (0 for all)
- * @param sort_field Field to sort by (e.g., "start_time", "stream_name", "size_bytes")
+ * @param sort_field Field to sort by (see get_recording_metadata_after)
  * @param sort_order Sort order ("asc" or "desc")
  * @param metadata Array to fill with recording metadata
  * @param limit Maximum number of recordings to return
@@ -89,6 +120,48 @@ int get_recording_metadata_paginated(time_t start_time, time_t end_time,
                                    recording_metadata_t *metadata, 
                                    int limit, int offset);
 
+// Buffer size for a recordings list cursor, including the terminator
+// (hex of "field|order|id|key", where the key may be a full stream name)
+#define RECORDING_CURSOR_SIZE 640
+
+/**
+ * Get the page of recording metadata that follows a cursor (keyset pagination)
+ * Rows are ordered by the sort field with the recording ID as tie-breaker,
+ * and the page is read by seeking past the cursor row instead of skipping
+ * an offset, so deep pages cost the same as the first one.
+ *
+ * @param start_time Start time filter (0 for no filter)
+ * @param end_time End time filter (0 for no filter)
+ * @param stream_name Stream name filter (NULL for all streams)
+ * @param has_detection Filter for recordings with detection events (0 for all)
+ * @param sort_field Field to sort by ("start_time", "end_time", "id", "stream_name"/"name",
+ *                   "size_bytes"/"size" or "duration")
+ * @param sort_order Sort order ("asc" or "desc")
+ * @param cursor Cursor from encode_recording_cursor() (NULL or "" for the first page)
+ * @param metadata Array to fill with recording metadata
+ * @param limit Maximum number of recordings to return
+ * @return Number of recordings found, -1 on error, -2 if the cursor is invalid
+ *         or was made for a different sort
+ */
+int get_recording_metadata_after(time_t start_time, time_t end_time,
+                                 const char *stream_name, int has_detection,
+                                 const char *sort_field, const char *sort_order,
+                                 const char *cursor,
+                                 recording_metadata_t *metadata, int limit);
+
+/**
+ * Encode the position after a recording as an opaque cursor
+ *
+ * @param last Last recording of the current page
+ * @param sort_field Sort field of the page
+ * @param sort_order Sort order of the page
+ * @param cursor Buffer for the cursor (RECORDING_CURSOR_SIZE bytes is enough)
+ * @param cursor_size Size of the buffer
+ * @return 0 on success, non-zero on failure
+ */
+int encode_recording_cursor(const recording_metadata_t *last, const char *sort_field,
+                            const char *sort_order, char *cursor, size_t cursor_size);
+
 /**
  * Get recording metadata by ID
  *
@@ -189,4 +262,13 @@ int get_recordings_for_quota_enforcement(const char *stream_name,
  */
 int get_orphaned_db_entries(recording_metadata_t *recordings, int max_count);
 
+/**
+ * Check that the retention, quota and recordings list queries are planned with indexes
+ * Logs a warning for each query that would scan the recordings table, and
+ * for each list page by an indexed sort field that would need a sort.
+ *
+ * @return Number of queries without a suitable index, or -1 on error
+ */
+int check_recordings_query_plans(void);
+
 #endif // LIGHTNVR_DB_RECORDINGS_H
@@ -20,6 +20,16 @@ void init_schema_cache(void);
  */
 bool cached_column_exists(const char *table_name, const char *column_name);
 
+/**
+ * Check if a table exists, using the cache if available
+ * Only tables that were found are cached, so a table created by a migration
+ * later on is still picked up.
+ *
+ * @param table_name Name of the table to check
+ * @return true if the table exists, false otherwise
+ */
+bool cached_table_exists(const char *table_name);
+
 /**
  * Free the schema cache
  * This should be called during server shutdown
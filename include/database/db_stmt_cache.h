@@ -0,0 +1,58 @@
+#ifndef LIGHTNVR_DB_STMT_CACHE_H
+#define LIGHTNVR_DB_STMT_CACHE_H
+
+#include <stdint.h>
+#include <sqlite3.h>
+
+/**
+ * Prepared statement cache statistics
+ */
+typedef struct {
+    uint64_t hits;          // Lookups served by an already prepared statement
+    uint64_t prepares;      // Statements prepared and added to the cache
+    uint64_t uncached;      // One-off statements (no idle slot or entry busy)
+    uint64_t evictions;     // Idle statements finalized to make room on their connection
+    int cached;             // Statements currently held by the cache
+} stmt_cache_stats_t;
+
+/**
+ * Get a prepared statement for the given SQL on a connection
+ * The statement is prepared on first use and kept for later calls with the
+ * same connection and SQL text. Each connection keeps a bounded number of
+ * statements; the least recently used idle one is finalized to make room. It comes back reset with no bindings, so
+ * callers bind and step it as if it had just been prepared.
+ *
+ * The caller must hold whatever lock protects the connection, and must hand
+ * the statement back with release_cached_statement() instead of finalizing it.
+ *
+ * @param db Database connection
+ * @param sql SQL text
+ * @return Statement, or NULL if it could not be prepared (see sqlite3_errmsg)
+ */
+sqlite3_stmt *get_cached_statement(sqlite3 *db, const char *sql);
+
+/**
+ * Return a statement obtained from get_cached_statement()
+ * The statement is reset and its bindings cleared; statements that were not
+ * kept by the cache are finalized.
+ *
+ * @param stmt Statement to release (NULL is ignored)
+ */
+void release_cached_statement(sqlite3_stmt *stmt);
+
+/**
+ * Finalize all cached statements for a connection
+ * This must be called before the connection is closed
+ *
+ * @param db Database connection
+ */
+void finalize_cached_statements(sqlite3 *db);
+
+/**
+ * Get statement cache statistics
+ *
+ * @param stats Structure to fill
+ */
+void get_stmt_cache_stats(stmt_cache_stats_t *stats);
+
+#endif // LIGHTNVR_DB_STMT_CACHE_H
@@ -0,0 +1,101 @@
+#ifndef LIGHTNVR_DB_WRITE_QUEUE_H
+#define LIGHTNVR_DB_WRITE_QUEUE_H
+
+#include <stdint.h>
+#include <time.h>
+
+#include "database/db_events.h"
+#include "video/detection_result.h"
+
+// Pending writes held before callers fall back to writing synchronously
+#define DB_WRITE_QUEUE_CAPACITY 512
+
+// Commit a batch at least this often while writes are pending
+#define DB_WRITE_QUEUE_FLUSH_MS 250
+
+// Commit early once this many rows are pending
+#define DB_WRITE_QUEUE_BATCH_ROWS 200
+
+/**
+ * Write queue statistics
+ */
+typedef struct {
+    int depth;              // Writes currently pending
+    int max_depth;          // Highest depth seen since start
+    uint64_t queued;        // Writes accepted by the queue
+    uint64_t rows_written;  // Rows committed by the writer thread
+    uint64_t batches;       // Transactions committed by the writer thread
+    uint64_t overflows;     // Writes done synchronously because the queue was full
+    uint64_t failures;      // Writes that failed
+    double last_batch_ms;   // Time the last batch held the database lock
+} db_write_queue_stats_t;
+
+/**
+ * Start the database writer thread
+ * Until it is started (and after it is stopped) the queue_* functions
+ * write synchronously.
+ *
+ * @return 0 on success, non-zero on failure
+ */
+int start_db_write_queue(void);
+
+/**
+ * Stop the writer thread after committing everything still queued
+ */
+void stop_db_write_queue(void);
+
+/**
+ * Queue detection results for storage
+ * Equivalent to store_detections_in_db(), committed with other pending
+ * writes within DB_WRITE_QUEUE_FLUSH_MS.
+ *
+ * @param stream_name Stream name
+ * @param result Detection results (copied)
+ * @param timestamp Timestamp of the detection (0 for current time)
+ * @return 0 on success, non-zero on failure
+ */
+int queue_detections(const char *stream_name, const detection_result_t *result, time_t timestamp);
+
+/**
+ * Queue an event for storage
+ * Equivalent to add_event(), except that the event ID is not returned.
+ *
+ * @param type Event type
+ * @param stream_name Stream name (can be NULL for system events)
+ * @param description Short description of the event
+ * @param details Detailed information about the event (can be NULL)
+ * @return 0 on success, non-zero on failure
+ */
+int queue_event(event_type_t type, const char *stream_name,
+                const char *description, const char *details);
+
+/**
+ * Queue a progress update for a recording that is still being written
+ * The update is skipped if the recording has been marked complete in the
+ * meantime, so a late progress update never reopens a finished recording.
+ * Use update_recording_metadata() to complete a recording.
+ *
+ * @param id Recording ID
+ * @param end_time Current end time
+ * @param size_bytes Current file size in bytes
+ * @return 0 on success, non-zero on failure
+ */
+int queue_recording_progress(uint64_t id, time_t end_time, uint64_t size_bytes);
+
+/**
+ * Wait until everything queued before this call has been committed
+ * For callers that read back what they just queued.
+ *
+ * @param timeout_ms Maximum time to wait
+ * @return 0 on success, -1 on timeout
+ */
+int flush_db_write_queue(int timeout_ms);
+
+/**
+ * Get write queue statistics
+ *
+ * @param stats Structure to fill
+ */
+void get_db_write_queue_stats(db_write_queue_stats_t *stats);
+
+#endif // LIGHTNVR_DB_WRITE_QUEUE_H
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Disk <-> database reconciliation report for LightNVR recordings
+Walks the MP4 tree and the recordings table in path order and merges the two
+streams, reporting files with no row, rows with no file and size mismatches.
+
+Memory use is constant: both sides are consumed as sorted iterators and the
+report is written as it is produced. Works against a live database with
+--online, but is meant to be run against a copy, e.g.:
+
+    sqlite3 /var/lib/lightnvr/lightnvr.db ".backup /tmp/lightnvr-copy.db"
+    ./reconcile_recordings.py --db /tmp/lightnvr-copy.db --report report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from test_sync_direct import DB_PATH, BATCH_SIZE, open_database, apply_batch
+
+MP4_PATH = "/var/lib/lightnvr/recordings/mp4"
+
+# Rows pulled from the sorted recordings query per fetch
+FETCH_SIZE = 2000
+
+
+def _entry_sort_key(entry):
+    # Directories sort as "name/" so a depth-first walk yields paths in the
+    # same byte order SQLite's BINARY collation uses for file_path
+    try:
+        is_dir = entry.is_dir(follow_symlinks=False)
+    except OSError:
+        is_dir = False
+    return entry.name + "/" if is_dir else entry.name
+
+
+def walk_sorted(root, extensions=(".mp4",)):
+    """Yield (path, size) for recording files under root in sorted path order"""
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=_entry_sort_key)
+    except OSError as e:
+        print(f"Warning: cannot scan {root}: {e}", file=sys.stderr)
+        return
+
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_sorted(entry.path, extensions)
+            elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(extensions):
+                yield entry.path, entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+
+
+def iter_rows_by_path(conn, root, fetch_size=FETCH_SIZE):
+    """Yield (id, file_path, size_bytes) for rows under root ordered by file_path
+
+    Rows are paged by (file_path, id) and each page is read in full, so no
+    statement is left open while fixes are written on the same connection
+    and no read snapshot pins the WAL for the whole run.
+    """
+    prefix = root.rstrip("/") + "/"
+    # "0" is the character after "/", bounding the range to paths under root
+    upper = prefix[:-1] + "0"
+    rows = conn.execute(
+        "SELECT id, file_path, size_bytes FROM recordings "
+        "WHERE file_path >= ? AND file_path < ? ORDER BY file_path, id LIMIT ?",
+        (prefix, upper, fetch_size)).fetchall()
+    while rows:
+        yield from rows
+        last_id, last_path = rows[-1][0], rows[-1][1]
+        rows = conn.execute(
+            "SELECT id, file_path, size_bytes FROM recordings "
+            "WHERE (file_path > ? OR (file_path = ? AND id > ?)) AND file_path < ? "
+            "ORDER BY file_path, id LIMIT ?",
+            (last_path, last_path, last_id, upper, fetch_size)).fetchall()
+
+
+def merge_join(files, rows):
+    """Merge two path-sorted streams.
+
+    Yields (path, size_on_disk, row) where either side may be None. Several
+    rows pointing at the same file are each paired with it.
+    """
+    file_item = next(files, None)
+    row = next(rows, None)
+    while file_item is not None or row is not None:
+        if row is None or (file_item is not None and file_item[0] < row[1]):
+            yield file_item[0], file_item[1], None
+            file_item = next(files, None)
+        elif file_item is None or row[1] < file_item[0]:
+            yield row[1], None, row
+            row = next(rows, None)
+        else:
+            path, size = file_item
+            while row is not None and row[1] == path:
+                yield path, size, row
+                row = next(rows, None)
+            file_item = next(files, None)
+
+
+class ReportWriter:
+    """Streams report entries into a JSON document"""
+
+    def __init__(self, out, header):
+        self.out = out
+        self.first = True
+        body = json.dumps(header, indent=2)
+        self.out.write(body[:-2] + ',\n  "entries": [')
+
+    def add(self, entry):
+        self.out.write(("\n    " if self.first else ",\n    ") + json.dumps(entry))
+        self.first = False
+
+    def close(self, summary):
+        self.out.write("\n  ],\n  \"summary\": ")
+        self.out.write(json.dumps(summary, indent=2).replace("\n", "\n  "))
+        self.out.write("\n}\n")
+
+
+def reconcile(db_path, root, out, fix_sizes=False, delete_missing=False,
+              online=False, batch_size=BATCH_SIZE):
+    conn = open_database(db_path, online)
+    started = time.time()
+
+    summary = {
+        "files_scanned": 0,
+        "rows_scanned": 0,
+        "matched": 0,
+        "size_mismatch": 0,
+        "untracked_file": 0,
+        "missing_file": 0,
+        "sizes_fixed": 0,
+        "rows_deleted": 0,
+    }
+    size_updates = []
+    deletes = []
+
+    report = ReportWriter(out, {
+        "database": os.path.abspath(db_path),
+        "recordings_root": os.path.abspath(root),
+        "generated_at": int(started),
+        "fix_sizes": fix_sizes,
+        "delete_missing": delete_missing,
+    })
+
+    last_file = None
+    for path, size, row in merge_join(walk_sorted(root), iter_rows_by_path(conn, root)):
+        if size is not None and path != last_file:
+            summary["files_scanned"] += 1
+            last_file = path
+        if row is not None:
+            summary["rows_scanned"] += 1
+
+        if row is None:
+            summary["untracked_file"] += 1
+            report.add({"type": "untracked_file", "path": path, "size": size,
+                        "action": "none (rebuild_recordings can import it)"})
+        elif size is None:
+            summary["missing_file"] += 1
+            action = "delete_row" if delete_missing else "none"
+            report.add({"type": "missing_file", "id": row[0], "path": path,
+                        "db_size": row[2], "action": action})
+            if delete_missing:
+                deletes.append((row[0],))
+        elif size != row[2]:
+            summary["size_mismatch"] += 1
+            action = "update_size" if fix_sizes else "none"
+            report.add({"type": "size_mismatch", "id": row[0], "path": path,
+                        "db_size": row[2], "disk_size": size, "action": action})
+            if fix_sizes:
+                size_updates.append((size, row[0]))
+        else:
+            summary["matched"] += 1
+
+        if len(size_updates) >= batch_size:
+            summary["sizes_fixed"] += len(size_updates)
+            apply_batch(conn, "UPDATE recordings SET size_bytes = ? WHERE id = ?", size_updates, online)
+        if len(deletes) >= batch_size:
+            summary["rows_deleted"] += len(deletes)
+            apply_batch(conn, "DELETE FROM recordings WHERE id = ?", deletes, online)
+
+    summary["sizes_fixed"] += len(size_updates)
+    apply_batch(conn, "UPDATE recordings SET size_bytes = ? WHERE id = ?", size_updates, online)
+    summary["rows_deleted"] += len(deletes)
+    apply_batch(conn, "DELETE FROM recordings WHERE id = ?", deletes, online)
+
+    summary["rows_outside_root"] = conn.execute(
+        "SELECT COUNT(*) FROM recordings WHERE NOT (file_path >= ? AND file_path < ?)",
+        (root.rstrip("/") + "/", root.rstrip("/") + "0")).fetchone()[0]
+    summary["elapsed_seconds"] = round(time.time() - started, 3)
+    conn.close()
+
+    report.close(summary)
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Reconcile LightNVR recordings on disk with the database")
+    parser.add_argument("--db", default=DB_PATH, help=f"Path to lightnvr.db or a copy (default: {DB_PATH})")
+    parser.add_argument("--root", default=MP4_PATH, help=f"MP4 recordings root (default: {MP4_PATH})")
+    parser.add_argument("--report", default="-", help="JSON report path (default: stdout)")
+    parser.add_argument("--fix-sizes", action="store_true", help="Update size_bytes for mismatched rows")
+    parser.add_argument("--delete-missing", action="store_true", help="Delete rows whose file is gone")
+    parser.add_argument("--online", action="store_true",
+                        help="Apply fixes alongside the running service (see test_sync_direct.py)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Fix statements per transaction (default: {BATCH_SIZE})")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    out = sys.stdout if args.report == "-" else open(args.report, "w")
+    try:
+        summary = reconcile(args.db, args.root, out, args.fix_sizes, args.delete_missing,
+                            args.online, max(1, args.batch_size))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Reconciliation complete: {summary['matched']} matched, "
+          f"{summary['size_mismatch']} size mismatches, "
+          f"{summary['untracked_file']} files without rows, "
+          f"{summary['missing_file']} rows without files", file=sys.stderr)
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot recordings/detections/timeline queries against synthetic
+LightNVR databases of increasing size.
+
+The SQL is taken from the C sources rather than copied here: static
+statements are read from the string literals in each function, and the
+dynamically built ones (the recordings page query behind
+get_recording_metadata_paginated and get_recording_metadata_after, and
+get_recording_count) are assembled from the fragments the C code appends.
+If a fragment can no longer be found the script stops, so the benchmark
+cannot silently drift from the daemon.
+
+For every database and query it records EXPLAIN QUERY PLAN, flags full
+table scans and temporary sort b-trees, and times the query. The latency of
+each query across the database sizes is reported as a scaling exponent
+(0 = flat, 1 = linear in the number of rows).
+
+Usage:
+    ./scripts/bench_queries.py --days 1,7,30 --streams 16
+    ./scripts/bench_queries.py --db /tmp/lightnvr-copy.db --report bench.json
+    ./scripts/bench_queries.py --days 7,30 --fail-on-scan
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate_test_db  # noqa: E402
+
+REPO_ROOT = generate_test_db.REPO_ROOT
+DB_RECORDINGS_C = os.path.join(REPO_ROOT, "src", "database", "db_recordings.c")
+DB_DETECTIONS_C = os.path.join(REPO_ROOT, "src", "database", "db_detections.c")
+DB_DETECTION_BLOCKS_H = os.path.join(REPO_ROOT, "include", "database", "db_detection_blocks.h")
+
+# Limits used by the callers in src/ (see the matching #defines)
+RECORDINGS_PAGE_SIZE = 20          # api_handlers_recordings_get.c default limit
+MAX_TIMELINE_SEGMENTS = 1000       # api_handlers_timeline.c
+MAX_RECORDINGS_PER_STREAM = 100    # storage_manager.c
+MAX_DETECTIONS = 20                # detection_result.h
+DETECTION_TIME_MAX = 1 << 62       # db_detections.c, open end of a range
+
+# Fixed so cached databases are reproducible between runs
+BENCH_END_TIME = 1700000000
+
+STRING_LITERAL = re.compile(r'"((?:[^"\\\n]|\\.)*)"')
+BETWEEN_LITERALS = re.compile(r'\s*(?://[^\n]*\n\s*|/\*.*?\*/\s*)*', re.S)
+
+
+class SqlDriftError(Exception):
+    """Raised when the SQL in the C sources no longer matches what we expect"""
+
+
+def function_body(source, name):
+    """Return the text of the body of C function `name` in source"""
+    match = re.search(r'^[A-Za-z_][\w \t\*]*\b' + re.escape(name) + r'\s*\([^;{]*\)\s*\{',
+                      source, re.M)
+    if not match:
+        raise SqlDriftError(f"function {name} not found")
+    depth = 0
+    i = match.end() - 1
+    while i < len(source):
+        c = source[i]
+        if c == '"':
+            i = STRING_LITERAL.match(source, i).end()
+            continue
+        if c == "'":
+            i = source.index("'", i + 2) + 1 if source[i + 1] == "\\" else i + 3
+            continue
+        if source.startswith("//", i):
+            i = source.index("\n", i)
+        elif source.startswith("/*", i):
+            i = source.index("*/", i) + 2
+            continue
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return source[match.end():i]
+        i += 1
+    raise SqlDriftError(f"unterminated body for {name}")
+
+
+def string_groups(body):
+    """Return the adjacent-literal concatenations found in a function body"""
+    groups = []
+    pos = 0
+    while True:
+        match = STRING_LITERAL.search(body, pos)
+        if not match:
+            return groups
+        parts = [match.group(1)]
+        pos = match.end()
+        while True:
+            gap = BETWEEN_LITERALS.match(body, pos)
+            nxt = STRING_LITERAL.match(body, gap.end())
+            if not nxt:
+                break
+            parts.append(nxt.group(1))
+            pos = nxt.end()
+        groups.append(bytes("".join(parts), "utf-8").decode("unicode_escape"))
+
+
+class CSource:
+    """SQL literals of the functions in one C file"""
+
+    def __init__(self, path):
+        with open(path) as f:
+            self.source = f.read()
+        self.path = path
+        self._cache = {}
+
+    def literals(self, function):
+        if function not in self._cache:
+            self._cache[function] = string_groups(function_body(self.source, function))
+        return self._cache[function]
+
+    def statements(self, function):
+        """SELECT statements in function, in source order, without the trailing ';'"""
+        return [s.strip().rstrip(";").strip() for s in self.literals(function)
+                if s.lstrip().upper().startswith("SELECT")]
+
+    def statement(self, function, index=0):
+        statements = self.statements(function)
+        if len(statements) <= index:
+            raise SqlDriftError(f"{os.path.basename(self.path)}:{function} has "
+                                f"{len(statements)} SELECT statements, expected at least {index + 1}")
+        return statements[index]
+
+    def constant(self, function, name):
+        """SQL of the file-level string constant name, checking function uses it"""
+        if f"= {name};" not in function_body(self.source, function):
+            raise SqlDriftError(f"{os.path.basename(self.path)}:{function} no longer uses {name}")
+        match = re.search(r'^static const char \*const ' + re.escape(name) +
+                          r'\s*=((?:\s*' + STRING_LITERAL.pattern + r')+)\s*;', self.source, re.M)
+        if not match:
+            raise SqlDriftError(f"{name} not found in {os.path.basename(self.path)}")
+        return "".join(string_groups(match.group(1))).strip().rstrip(";").strip()
+
+    def fragment(self, function, text):
+        """Return text after checking the function still appends exactly it"""
+        if text not in self.literals(function):
+            raise SqlDriftError(f"{os.path.basename(self.path)}:{function} no longer "
+                                f"contains {text!r}")
+        return text
+
+
+def c_define(path, name):
+    """Return the integer value of #define name in the header at path"""
+    with open(path) as f:
+        match = re.search(r'^#define\s+' + re.escape(name) + r'\s+(\d+)\b', f.read(), re.M)
+    if not match:
+        raise SqlDriftError(f"{os.path.basename(path)} no longer defines {name}")
+    return int(match.group(1))
+
+
+def detection_filter_sql(src):
+    """Mirror append_detection_filter; generated databases have detection_blocks (0019)"""
+    function = "append_detection_filter"
+    literals = src.literals(function)
+    clause = next((s for s in literals
+                   if s.startswith(" AND (r.trigger_type = 'detection' OR EXISTS")), None)
+    blocks = next((s for s in literals
+                   if s.startswith(" OR EXISTS (SELECT 1 FROM detection_blocks")), None)
+    if clause is None or blocks is None:
+        raise SqlDriftError(f"{function} detection filter not found")
+    blocks %= c_define(DB_DETECTION_BLOCKS_H, "DETECTION_BLOCK_SECONDS")
+    return clause + blocks + src.fragment(function, ")")
+
+
+def recordings_filter_sql(src, function, base, start_time, end_time, stream_name, has_detection,
+                          range_prefix=None):
+    """Mirror the WHERE clause builder shared by the two recordings list functions
+
+    range_prefix is the prefix the page query formats into its date range
+    terms ("" or "+"), None where the terms are plain literals.
+    """
+    sql = src.statement(function)
+    if not sql.startswith(base):
+        raise SqlDriftError(f"{function} base query changed: {sql!r}")
+    params = []
+    if has_detection:
+        if "append_detection_filter(sql, " not in function_body(src.source, function):
+            raise SqlDriftError(f"{function} no longer calls append_detection_filter")
+        sql += detection_filter_sql(src)
+    for value, term in ((start_time, " AND %sr.start_time >= ?"), (end_time, " AND %sr.start_time <= ?")):
+        if not value:
+            continue
+        if range_prefix is None:
+            sql += src.fragment(function, term % "")
+        else:
+            sql += src.fragment(function, term) % range_prefix
+        params.append(value)
+    if stream_name:
+        sql += src.fragment(function, " AND r.stream_name = ?")
+        params.append(stream_name)
+    return sql, params
+
+
+# recording_sort_fields in db_recordings.c
+RECORDINGS_SORT_KEYS = {
+    "start_time": "r.start_time",
+    "end_time": "r.end_time",
+    "id": "r.id",
+    "stream_name": "r.stream_name",
+    "size_bytes": "COALESCE(r.size_bytes, 0)",
+    "duration": "(r.end_time - r.start_time)",
+}
+
+
+def recordings_page_sql(src, start_time=0, end_time=0, stream_name=None, has_detection=False,
+                        sort_field="start_time", sort_order="DESC", limit=RECORDINGS_PAGE_SIZE,
+                        offset=0, after=None, ties=False):
+    """query_recordings_page (built by build_recordings_page_sql): offset pages, or
+    keyset pages when after=(key, id). A keyset page is two statements, the rows
+    sharing the cursor's key (ties=True) and then the keys past it."""
+    function = "build_recordings_page_sql"
+    key = RECORDINGS_SORT_KEYS[sort_field]
+    if f'"{key}"' not in src.source:
+        raise SqlDriftError(f"sort key {key!r} for {sort_field} not found in {os.path.basename(src.path)}")
+    sql, params = recordings_filter_sql(src, function, "SELECT r.id, r.stream_name",
+                                        start_time, end_time, stream_name, has_detection,
+                                        range_prefix="+" if after and ties else "")
+    if after:
+        op = ">" if sort_order == "ASC" else "<"
+        if ties:
+            src.fragment(function, " AND %s = ? AND r.id %s ?")
+            sql += f" AND {key} = ? AND r.id {op} ?"
+            params += [after[0], after[1]]
+        else:
+            src.fragment(function, " AND %s %s ?")
+            sql += f" AND {key} {op} ?"
+            params += [after[0]]
+    if after and ties:
+        src.fragment(function, " ORDER BY r.id %s")
+        sql += f" ORDER BY r.id {sort_order}"
+    else:
+        src.fragment(function, " ORDER BY %s %s, r.id %s")
+        sql += f" ORDER BY {key} {sort_order}, r.id {sort_order}"
+    if after:
+        return sql + src.fragment(function, " LIMIT ?"), params + [limit]
+    sql += src.fragment(function, " LIMIT ? OFFSET ?")
+    return sql, params + [limit, offset]
+
+
+def recordings_count_sql(src, start_time=0, end_time=0, stream_name=None, has_detection=False):
+    """get_recording_count"""
+    return recordings_filter_sql(src, "get_recording_count", "SELECT COUNT(*) FROM recordings r",
+                                 start_time, end_time, stream_name, has_detection)
+
+
+class Workload:
+    """Representative parameters derived from the contents of a database"""
+
+    def __init__(self, conn):
+        self.end = conn.execute("SELECT COALESCE(MAX(end_time), 0) FROM recordings").fetchone()[0]
+        self.recordings = conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+        self.detections = conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+        # Busiest camera, which is what the slowest page views look at
+        row = conn.execute(
+            "SELECT stream_name FROM detections GROUP BY stream_name ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone() or conn.execute(
+            "SELECT stream_name FROM recordings GROUP BY stream_name ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()
+        self.stream = row[0] if row else "camera-01"
+        self.recording = conn.execute(
+            "SELECT start_time, end_time FROM recordings WHERE stream_name = ? "
+            "ORDER BY start_time DESC LIMIT 1 OFFSET 4", (self.stream,)).fetchone() or (0, 0)
+        self.day_start = self.end - 86400
+        # Last row before the deep page, as a keyset cursor would carry it
+        self.middle = conn.execute(
+            "SELECT start_time, id FROM recordings WHERE is_complete = 1 AND end_time IS NOT NULL "
+            "ORDER BY start_time DESC, id DESC LIMIT 1 OFFSET ?",
+            (max(0, self.recordings // 2 - 1),)).fetchone() or (0, 0)
+
+
+def build_queries(recordings_src, detections_src, w):
+    """Return [(name, sql, params)] for the hot queries with workload w"""
+    queries = []
+
+    def add(name, sql_params):
+        queries.append((name,) + tuple(sql_params))
+
+    # Recordings page: default view, a deep page, filtered views, other sort orders
+    add("recordings_page", recordings_page_sql(recordings_src))
+    add("recordings_page_deep", recordings_page_sql(recordings_src, offset=max(0, w.recordings // 2)))
+    add("recordings_page_deep_keyset_ties", recordings_page_sql(recordings_src, after=w.middle, ties=True))
+    add("recordings_page_deep_keyset", recordings_page_sql(recordings_src, after=w.middle))
+    add("recordings_page_stream_day", recordings_page_sql(
+        recordings_src, w.day_start, w.end, w.stream))
+    add("recordings_page_detection", recordings_page_sql(recordings_src, has_detection=True))
+    add("recordings_page_by_size", recordings_page_sql(recordings_src, sort_field="size_bytes"))
+    add("recordings_page_by_duration", recordings_page_sql(recordings_src, sort_field="duration"))
+    add("recordings_count", recordings_count_sql(recordings_src))
+    add("recordings_count_stream_day", recordings_count_sql(recordings_src, w.day_start, w.end, w.stream))
+    add("recordings_count_detection", recordings_count_sql(recordings_src, has_detection=True))
+
+    # Timeline: get_timeline_segments asks for one stream over a day, oldest first
+    add("timeline_segments", recordings_page_sql(
+        recordings_src, w.day_start, w.end, w.stream, sort_field="start_time", sort_order="ASC",
+        limit=MAX_TIMELINE_SEGMENTS))
+
+    # Storage manager, once per stream per cycle
+    retention_days, detection_retention_days = 7, 30
+    regular_cutoff = w.end - retention_days * 86400
+    detection_cutoff = w.end - detection_retention_days * 86400
+    add("retention_candidates", (
+        recordings_src.constant("get_recordings_for_retention", "retention_sql"),
+        [w.stream, retention_days, regular_cutoff, detection_retention_days, detection_cutoff,
+         max(regular_cutoff, detection_cutoff), MAX_RECORDINGS_PER_STREAM]))
+    add("quota_candidates", (
+        recordings_src.constant("get_recordings_for_quota_enforcement", "quota_sql"),
+        [w.stream, MAX_RECORDINGS_PER_STREAM]))
+
+    # Detections API: every time filter becomes one inclusive range (rows part)
+    range_sql = detections_src.statement("collect_latest_detections")
+    add("detections_range_day", (range_sql, [w.stream, w.day_start, w.end, MAX_DETECTIONS]))
+    add("detections_max_age", (range_sql, [w.stream, w.end - 3600, DETECTION_TIME_MAX, MAX_DETECTIONS]))
+
+    # Labels summary, called once per row of the recordings page (rows part)
+    add("detection_labels_recording", (
+        detections_src.statement("get_detection_labels_summary"),
+        [w.stream, w.recording[0], w.recording[1]]))
+    add("detection_labels_day", (
+        detections_src.statement("get_detection_labels_summary"),
+        [w.stream, w.day_start, w.end]))
+    return queries
+
+
+def query_plan(conn, sql, params):
+    """Return (plan lines, warnings) for sql"""
+    lines = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    warnings = []
+    for line in lines:
+        if line.startswith("SCAN") and " USING " not in line and "CONSTANT ROW" not in line:
+            warnings.append(f"full scan: {line}")
+        elif line.startswith("SCAN") and "INDEX" in line:
+            warnings.append(f"index scan: {line}")
+        elif "TEMP B-TREE" in line:
+            warnings.append(f"sort: {line}")
+    return lines, warnings
+
+
+def time_query(conn, sql, params, iterations, max_seconds):
+    """Run sql until iterations or max_seconds are used up, return stats in ms"""
+    conn.execute(sql, params).fetchall()  # warm the page cache
+    samples = []
+    rows = 0
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(iterations):
+        started = time.perf_counter()
+        rows = len(conn.execute(sql, params).fetchall())
+        samples.append((time.perf_counter() - started) * 1000)
+        if time.perf_counter() > deadline:
+            break
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "rows": rows,
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def bench_database(db_path, iterations, max_seconds):
+    recordings_src = CSource(DB_RECORDINGS_C)
+    detections_src = CSource(DB_DETECTIONS_C)
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    workload = Workload(conn)
+    result = {
+        "database": os.path.abspath(db_path),
+        "size_bytes": os.path.getsize(db_path),
+        "recordings": workload.recordings,
+        "detections": workload.detections,
+        "stream": workload.stream,
+        "queries": {},
+    }
+    for name, sql, params in build_queries(recordings_src, detections_src, workload):
+        plan, warnings = query_plan(conn, sql, params)
+        entry = {"sql": sql, "params": params, "plan": plan, "warnings": warnings}
+        entry.update(time_query(conn, sql, params, iterations, max_seconds))
+        result["queries"][name] = entry
+    conn.close()
+    return result
+
+
+def generated_database(work_dir, days, streams, seed):
+    """Create (or reuse) a generated database for the given size"""
+    path = os.path.join(work_dir, f"bench-{streams}s-{days:g}d-{seed}.db")
+    if os.path.exists(path):
+        return path
+
+    print(f"Generating {days:g} days x {streams} streams -> {path}", file=sys.stderr)
+    tmp = path + ".tmp"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tmp + suffix):
+            os.remove(tmp + suffix)
+    args = generate_test_db.generation_args(tmp, streams=streams, days=days, end_time=BENCH_END_TIME)
+    generate_test_db.build_database(args, random.Random(seed))
+    os.replace(tmp, path)
+    return path
+
+
+def scaling(results):
+    """Per query, fit latency ~ recordings^k between the smallest and largest DB"""
+    curves = {}
+    if not results:
+        return curves
+    for name in results[0]["queries"]:
+        points = [(r["recordings"] + r["detections"], r["queries"][name]["median_ms"])
+                  for r in results]
+        curve = {"points": [{"rows": rows, "median_ms": ms} for rows, ms in points]}
+        (rows_a, ms_a), (rows_b, ms_b) = points[0], points[-1]
+        if len(points) > 1 and rows_b > rows_a > 0 and ms_a > 0 and ms_b > 0:
+            curve["exponent"] = round(math.log(ms_b / ms_a) / math.log(rows_b / rows_a), 2)
+        curves[name] = curve
+    return curves
+
+
+def print_report(results, curves):
+    names = list(results[0]["queries"])
+    width = max(len(n) for n in names)
+    header = f"{'query':<{width}}" + "".join(
+        f"  {r['recordings']:>9,} rec" for r in results) + "  scaling  plan"
+    print(header)
+    print("-" * len(header))
+    for name in names:
+        line = f"{name:<{width}}"
+        for r in results:
+            line += f"  {r['queries'][name]['median_ms']:>10.3f}ms"
+        exponent = curves[name].get("exponent")
+        line += f"  {exponent:>7}" if exponent is not None else f"  {'-':>7}"
+        warnings = results[-1]["queries"][name]["warnings"]
+        line += "  " + ("; ".join(warnings) if warnings else "ok")
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark LightNVR hot SQL queries")
+    parser.add_argument("--db", action="append", default=[],
+                        help="Benchmark an existing database (repeatable, smallest first)")
+    parser.add_argument("--days", default="1,7,30",
+                        help="Comma separated history lengths to generate (default: 1,7,30)")
+    parser.add_argument("--streams", type=int, default=16, help="Cameras per generated DB (default: 16)")
+    parser.add_argument("--seed", type=int, default=1, help="Generator seed (default: 1)")
+    parser.add_argument("--work-dir", default="/tmp/lightnvr-bench",
+                        help="Where generated databases are kept between runs (default: /tmp/lightnvr-bench)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed runs per query (default: 50)")
+    parser.add_argument("--max-seconds", type=float, default=5.0,
+                        help="Stop timing a query after this long (default: 5)")
+    parser.add_argument("--report", help="Write the full results as JSON to this file")
+    parser.add_argument("--fail-on-scan", action="store_true",
+                        help="Exit non-zero if any query plan has a full table scan")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        if args.db:
+            databases = args.db
+        else:
+            os.makedirs(args.work_dir, exist_ok=True)
+            databases = [generated_database(args.work_dir, float(days), args.streams, args.seed)
+                         for days in args.days.split(",") if days.strip()]
+
+        results = [bench_database(db, max(1, args.iterations), args.max_seconds) for db in databases]
+    except SqlDriftError as e:
+        print(f"Error: SQL extraction failed: {e}", file=sys.stderr)
+        return 2
+
+    curves = scaling(results)
+    print_report(results, curves)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"generated_at": int(time.time()), "databases": results, "scaling": curves},
+                      f, indent=2)
+
+    scans = sorted({name for r in results for name, q in r["queries"].items()
+                    if any(w.startswith("full scan") for w in q["warnings"])})
+    if scans:
+        print(f"\nFull table scans in: {', '.join(scans)}", file=sys.stderr)
+        if args.fail_on_scan:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
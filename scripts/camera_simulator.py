@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Local RTSP camera fleet for recording-pipeline throughput tests.
+
+Serves N synthetic cameras from a dedicated go2rtc instance (on its own
+ports, so it does not clash with the go2rtc lightnvr manages). Each camera is
+an exec: source running ffmpeg over a looped clip that was encoded once per
+resolution/fps/GOP/bitrate profile, so serving a camera is a cheap stream
+copy and the simulator does not compete with lightnvr for CPU.
+
+Faults are configured per camera:
+  disconnect_every / disconnect_for   drop the stream from go2rtc, which tears
+                                      down lightnvr's RTSP session, then put
+                                      it back
+  ts_jump_every / ts_jump_seconds     add a timestamp discontinuity every N
+                                      seconds (setts bitstream filter); a
+                                      negative jump makes timestamps go back
+
+Unless --no-daemon is given it also starts lightnvr (config/lightnvr-test.ini
+pointed at a scratch directory), adds cameras in steps (--steps 1,4,8,16) and
+for each step measures lightnvr's CPU, RSS, per-thread CPU and the MP4/HLS
+segment files written per camera.
+
+Usage:
+    ./scripts/camera_simulator.py --cameras 16 --steps 1,4,8,16 --duration 60
+    ./scripts/camera_simulator.py --fleet scripts/camera_fleet.json --no-daemon
+"""
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from profile_daemon import (REPO_ROOT, DEFAULT_BINARY, DEFAULT_CONFIG, CLOCK_TICKS,  # noqa: E402
+                            Client, Daemon, prepare_config, read_stat, thread_cpu_seconds)
+
+WORK_DIR = "/tmp/lightnvr-camsim"
+GO2RTC_BINARY = os.path.join(REPO_ROOT, "go2rtc", "go2rtc")
+
+# Simulator ports; lightnvr-test.ini's own go2rtc uses 11984/18554/18555
+SIM_API_PORT = 21984
+SIM_RTSP_PORT = 28554
+
+# Length of the encoded loop; long enough that the loop point is rare
+CLIP_SECONDS = 60
+
+DEFAULT_CAMERA = {
+    "size": "1280x720",
+    "fps": 15,
+    "gop": 30,
+    "bitrate": "2M",
+    "disconnect_every": 0,
+    "disconnect_for": 5,
+    "ts_jump_every": 0,
+    "ts_jump_seconds": 0,
+}
+
+
+class Camera:
+    """One simulated camera and its fault schedule"""
+
+    def __init__(self, name, settings):
+        self.name = name
+        unknown = set(settings) - set(DEFAULT_CAMERA) - {"name", "count"}
+        if unknown:
+            raise ValueError(f"{name}: unknown settings {', '.join(sorted(unknown))}")
+        merged = dict(DEFAULT_CAMERA, **{k: v for k, v in settings.items() if k in DEFAULT_CAMERA})
+        self.width, self.height = (int(v) for v in str(merged["size"]).lower().split("x"))
+        self.fps = int(merged["fps"])
+        self.gop = int(merged["gop"])
+        self.bitrate = str(merged["bitrate"])
+        self.disconnect_every = float(merged["disconnect_every"])
+        self.disconnect_for = float(merged["disconnect_for"])
+        self.ts_jump_every = float(merged["ts_jump_every"])
+        self.ts_jump_seconds = float(merged["ts_jump_seconds"])
+        self.clip = None
+
+    @property
+    def profile(self):
+        return f"{self.width}x{self.height}-{self.fps}fps-g{self.gop}-{self.bitrate}"
+
+    def source(self):
+        """go2rtc exec: source that streams the looped clip"""
+        command = ["exec:ffmpeg", "-hide_banner", "-loglevel", "error", "-re",
+                   "-stream_loop", "-1", "-i", self.clip, "-c", "copy"]
+        if self.ts_jump_every > 0 and self.ts_jump_seconds:
+            # Shift every timestamp by one more jump each ts_jump_every seconds
+            # (no spaces: go2rtc splits exec commands on whitespace)
+            command += ["-bsf:v", f"setts=ts=TS+floor(TS*TB/{self.ts_jump_every:g})"
+                                  f"*{self.ts_jump_seconds:g}/TB"]
+        command += ["-f", "rtsp", "{output}"]
+        return " ".join(command)
+
+    def rtsp_url(self, port=SIM_RTSP_PORT):
+        return f"rtsp://127.0.0.1:{port}/{self.name}"
+
+
+def load_fleet(path, cameras, defaults):
+    """Build the camera list from a fleet file or from the CLI defaults
+
+    Settings given on the command line (defaults) win over both the
+    fleet's "defaults" and each camera entry.
+    """
+    if path:
+        with open(path) as f:
+            fleet = json.load(f)
+        base = dict(fleet.get("defaults", {}))
+        entries = fleet.get("cameras", [])
+    else:
+        base = {}
+        entries = [{"count": cameras}]
+
+    result = []
+    for entry in entries:
+        settings = {**base, **entry, **defaults}
+        count = int(settings.get("count", 1))
+        for _ in range(count):
+            if "name" in entry and count == 1:
+                name = entry["name"]
+            else:
+                name = f"{entry.get('name', 'sim')}{len(result) + 1:02d}"
+            result.append(Camera(name, settings))
+    return result
+
+
+def parse_bitrate(value):
+    """Bits per second from an ffmpeg style rate such as 2M or 800k"""
+    multipliers = {"k": 1000, "m": 1000 ** 2, "g": 1000 ** 3}
+    value = str(value).strip().lower()
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def encode_clip(camera, work_dir, source_clip):
+    """Encode (once per profile) the loop the camera will serve"""
+    path = os.path.join(work_dir, "clips", f"{camera.profile}.mp4")
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if source_clip:
+        inputs = ["-stream_loop", "-1", "-i", source_clip]
+        scale = ["-vf", f"scale={camera.width}:{camera.height},fps={camera.fps}"]
+    else:
+        inputs = ["-f", "lavfi", "-i", f"testsrc2=size={camera.width}x{camera.height}:rate={camera.fps}"]
+        scale = []
+    print(f"Encoding {camera.profile} clip...", file=sys.stderr)
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"] + inputs + scale +
+        ["-t", str(CLIP_SECONDS), "-an", "-c:v", "libx264", "-preset", "veryfast",
+         "-pix_fmt", "yuv420p", "-g", str(camera.gop), "-keyint_min", str(camera.gop),
+         "-sc_threshold", "0", "-b:v", camera.bitrate, "-maxrate", camera.bitrate,
+         "-bufsize", str(2 * parse_bitrate(camera.bitrate)), "-movflags", "+faststart", path + ".tmp.mp4"],
+        check=True)
+    os.replace(path + ".tmp.mp4", path)
+    return path
+
+
+class Go2rtcServer:
+    """Dedicated go2rtc instance serving the simulated cameras"""
+
+    def __init__(self, binary, work_dir, api_port, rtsp_port):
+        self.binary = binary
+        self.work_dir = work_dir
+        self.api_port = api_port
+        self.rtsp_port = rtsp_port
+        self.proc = None
+
+    def start(self, cameras):
+        # JSON is valid YAML, so no YAML library is needed for the config
+        config = {
+            "api": {"listen": f"127.0.0.1:{self.api_port}"},
+            "rtsp": {"listen": f":{self.rtsp_port}"},
+            "webrtc": {"listen": f"127.0.0.1:{self.rtsp_port + 1}"},
+            "log": {"level": "warn"},
+            "streams": {camera.name: camera.source() for camera in cameras},
+        }
+        config_path = os.path.join(self.work_dir, "go2rtc-sim.yaml")
+        with open(config_path, "w") as f:
+            json.dump(config, f, indent=2)
+        log = open(os.path.join(self.work_dir, "go2rtc-sim.log"), "wb")
+        self.proc = subprocess.Popen([self.binary, "-config", config_path], stdout=log,
+                                     stderr=subprocess.STDOUT, cwd=self.work_dir)
+        log.close()
+
+        deadline = time.time() + 15
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"go2rtc exited with status {self.proc.returncode}")
+            try:
+                self._api("GET", "/api/streams")
+                return
+            except OSError:
+                time.sleep(0.3)
+        raise RuntimeError("go2rtc did not start")
+
+    def _api(self, method, path):
+        request = urllib.request.Request(f"http://127.0.0.1:{self.api_port}{path}", method=method)
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+
+    def remove(self, camera):
+        self._api("DELETE", "/api/streams?" + urllib.parse.urlencode({"src": camera.name}))
+
+    def add(self, camera):
+        self._api("PUT", "/api/streams?" + urllib.parse.urlencode(
+            {"name": camera.name, "src": camera.source()}))
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.send_signal(signal.SIGTERM)
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+
+class FaultInjector:
+    """Runs the per-camera disconnect schedules in a background thread"""
+
+    def __init__(self, server):
+        self.server = server
+        self.active = []
+        self.events = []
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def watch(self, camera):
+        if camera.disconnect_every > 0:
+            with self.lock:
+                self.active.append([camera, time.time() + camera.disconnect_every, True])
+
+    def _run(self):
+        while not self.stopping.wait(0.2):
+            now = time.time()
+            with self.lock:
+                due = [entry for entry in self.active if entry[1] <= now]
+            for entry in due:
+                camera, _, connected = entry
+                try:
+                    if connected:
+                        self.server.remove(camera)
+                        entry[1] = now + camera.disconnect_for
+                    else:
+                        self.server.add(camera)
+                        entry[1] = now + camera.disconnect_every
+                    entry[2] = not connected
+                    self.events.append({"time": round(now, 3), "camera": camera.name,
+                                        "event": "disconnect" if connected else "reconnect"})
+                except OSError as e:
+                    print(f"Warning: fault injection on {camera.name} failed: {e}", file=sys.stderr)
+                    entry[1] = now + 1
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+
+# --- Measurement ----------------------------------------------------------
+
+def process_tree(pid):
+    """pid and all its descendants"""
+    children = collections.defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            _, fields = read_stat(f"/proc/{entry}/stat")
+        except OSError:
+            continue
+        children[int(fields[1])].append(int(entry))
+    tree, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        tree.append(p)
+        todo.extend(children.get(p, []))
+    return tree
+
+
+def tree_usage(pid):
+    """(cpu seconds, rss bytes) summed over pid's process tree"""
+    cpu = 0.0
+    rss = 0
+    for p in process_tree(pid):
+        try:
+            _, fields = read_stat(f"/proc/{p}/stat")
+            cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return cpu, rss
+
+
+def segment_files(storage, kind, camera):
+    """{path: size} for the files lightnvr wrote for camera under storage/kind"""
+    root = os.path.join(storage, kind, camera)
+    files = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            try:
+                files[path] = os.path.getsize(path)
+            except OSError:
+                pass
+    return files
+
+
+def segment_snapshot(storage, cameras):
+    return {(kind, c.name): segment_files(storage, kind, c.name)
+            for kind in ("mp4", "hls") for c in cameras}
+
+
+def segment_throughput(before, after, seconds):
+    """Per camera and kind: new files and bytes written per minute"""
+    result = collections.defaultdict(dict)
+    for (kind, camera), files in after.items():
+        old = before.get((kind, camera), {})
+        new_files = [p for p in files if p not in old]
+        written = sum(max(0, size - old.get(p, 0)) for p, size in files.items())
+        result[camera][kind] = {
+            "new_files": len(new_files),
+            "files_per_minute": round(60.0 * len(new_files) / seconds, 2),
+            "mb_per_minute": round(60.0 * written / seconds / 1e6, 3),
+        }
+    return dict(result)
+
+
+def add_camera_to_lightnvr(client, camera, rtsp_port, segment_duration):
+    status, body = client.request("POST", "/api/streams", {
+        "name": camera.name,
+        "url": camera.rtsp_url(rtsp_port),
+        "enabled": True,
+        "streaming_enabled": True,
+        "record": True,
+        "width": camera.width,
+        "height": camera.height,
+        "fps": camera.fps,
+        "codec": "h264",
+        "segment_duration": segment_duration,
+    })
+    if status not in (200, 201, 409):
+        raise RuntimeError(f"adding {camera.name} failed: {status} {body[:200]!r}")
+
+
+def measure_step(pid, sim_pid, cameras, storage, warmup, duration):
+    time.sleep(warmup)
+    snapshot = segment_snapshot(storage, cameras)
+    cpu_before, _ = tree_usage(pid)
+    sim_before, _ = tree_usage(sim_pid)
+    threads_before = thread_cpu_seconds(pid)
+    rss_samples = []
+    started = time.time()
+    while time.time() - started < duration:
+        rss_samples.append(tree_usage(pid)[1])
+        time.sleep(min(1.0, max(0.0, duration - (time.time() - started))))
+    elapsed = time.time() - started
+    cpu_after, _ = tree_usage(pid)
+    sim_after, _ = tree_usage(sim_pid)
+    threads = thread_cpu_seconds(pid)
+    threads.subtract(threads_before)
+
+    n = len(cameras)
+    throughput = segment_throughput(snapshot, segment_snapshot(storage, cameras), elapsed)
+    cpu_percent = 100.0 * (cpu_after - cpu_before) / elapsed
+    rss = max(rss_samples) if rss_samples else 0
+    return {
+        "cameras": n,
+        "seconds": round(elapsed, 1),
+        "cpu_percent": round(cpu_percent, 1),
+        "cpu_percent_per_camera": round(cpu_percent / n, 2),
+        "rss_mb": round(rss / 1e6, 1),
+        "rss_mb_per_camera": round(rss / 1e6 / n, 2),
+        "simulator_cpu_percent": round(100.0 * (sim_after - sim_before) / elapsed, 1),
+        "thread_cpu_percent": {name: round(100.0 * v / elapsed, 1)
+                               for name, v in threads.most_common() if v > 0},
+        "mp4_mb_per_minute": round(sum(t["mp4"]["mb_per_minute"] for t in throughput.values()), 3),
+        "hls_mb_per_minute": round(sum(t["hls"]["mb_per_minute"] for t in throughput.values()), 3),
+        "per_camera": throughput,
+    }
+
+
+def print_steps(steps):
+    print(f"\n{'cameras':>7} {'cpu %':>7} {'cpu/cam':>8} {'rss MB':>8} {'MB/cam':>7} "
+          f"{'mp4 MB/min':>11} {'hls MB/min':>11} {'sim cpu %':>10}  stalled")
+    for s in steps:
+        stalled = [c for c, t in s["per_camera"].items()
+                   if t["mp4"]["mb_per_minute"] == 0 and t["hls"]["mb_per_minute"] == 0]
+        print(f"{s['cameras']:>7} {s['cpu_percent']:>7.1f} {s['cpu_percent_per_camera']:>8.2f} "
+              f"{s['rss_mb']:>8.1f} {s['rss_mb_per_camera']:>7.2f} {s['mp4_mb_per_minute']:>11.2f} "
+              f"{s['hls_mb_per_minute']:>11.2f} {s['simulator_cpu_percent']:>10.1f}  "
+              f"{', '.join(stalled) or '-'}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of RTSP cameras for lightnvr")
+    parser.add_argument("--fleet", help="JSON fleet file (see scripts/camera_fleet.json)")
+    parser.add_argument("--cameras", type=int, default=16, help="Cameras when no fleet file is given (default: 16)")
+    parser.add_argument("--size", help="Override resolution for every camera, e.g. 1920x1080")
+    parser.add_argument("--fps", type=int, help="Override frame rate")
+    parser.add_argument("--gop", type=int, help="Override keyframe interval in frames")
+    parser.add_argument("--bitrate", help="Override bitrate, e.g. 4M")
+    parser.add_argument("--clip", help="Source clip to loop (default: ffmpeg testsrc2 pattern)")
+    parser.add_argument("--go2rtc-binary", default=GO2RTC_BINARY if os.path.exists(GO2RTC_BINARY) else "go2rtc",
+                        help="go2rtc used to serve the cameras")
+    parser.add_argument("--rtsp-port", type=int, default=SIM_RTSP_PORT, help=f"RTSP port (default: {SIM_RTSP_PORT})")
+    parser.add_argument("--api-port", type=int, default=SIM_API_PORT, help=f"go2rtc API port (default: {SIM_API_PORT})")
+    parser.add_argument("--work-dir", default=WORK_DIR, help=f"Scratch and results directory (default: {WORK_DIR})")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Only serve the cameras (until Ctrl-C or --duration)")
+    parser.add_argument("--binary", default=DEFAULT_BINARY, help="lightnvr binary")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="Base config (default: config/lightnvr-test.ini)")
+    parser.add_argument("--port", type=int, default=18091, help="lightnvr web port (default: 18091)")
+    parser.add_argument("--steps", help="Comma separated camera counts to measure (default: all cameras)")
+    parser.add_argument("--segment-duration", type=int, default=60, help="Recording segment seconds (default: 60)")
+    parser.add_argument("--warmup", type=float, default=15, help="Seconds before measuring each step (default: 15)")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds measured per step (default: 60)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    overrides = {k: v for k, v in (("size", args.size), ("fps", args.fps), ("gop", args.gop),
+                                   ("bitrate", args.bitrate)) if v is not None}
+    try:
+        cameras = load_fleet(args.fleet, args.cameras, overrides)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for tool in ("ffmpeg", args.go2rtc_binary):
+        if not shutil.which(tool):
+            print(f"Error: {tool} not found", file=sys.stderr)
+            return 1
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    for camera in cameras:
+        camera.clip = encode_clip(camera, args.work_dir, args.clip)
+
+    server = Go2rtcServer(args.go2rtc_binary, args.work_dir, args.api_port, args.rtsp_port)
+    faults = FaultInjector(server)
+    daemon = None
+    steps = []
+    try:
+        server.start(cameras)
+        faults.start()
+        for camera in cameras:
+            faults.watch(camera)
+        print(f"Serving {len(cameras)} cameras on rtsp://127.0.0.1:{args.rtsp_port}/<name>",
+              file=sys.stderr)
+
+        if args.no_daemon:
+            for camera in cameras:
+                print(camera.rtsp_url(args.rtsp_port))
+            if args.duration:
+                time.sleep(args.duration)
+            else:
+                signal.pause()
+            return 0
+
+        db_path = os.path.join(args.work_dir, "lightnvr.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        config_path, credentials = prepare_config(args.config, args.work_dir, db_path, args.port, True)
+        storage = os.path.join(args.work_dir, "recordings")
+        daemon = Daemon(args.binary, config_path, args.work_dir)
+        pid = daemon.start()
+        client = Client(args.port, credentials)
+        daemon.wait_ready(client)
+
+        counts = [int(n) for n in args.steps.split(",")] if args.steps else [len(cameras)]
+        added = 0
+        for count in counts:
+            count = min(count, len(cameras))
+            while added < count:
+                add_camera_to_lightnvr(client, cameras[added], args.rtsp_port, args.segment_duration)
+                added += 1
+            print(f"Measuring {count} cameras ({args.warmup:g}s warmup, {args.duration:g}s)...",
+                  file=sys.stderr)
+            steps.append(measure_step(pid, server.proc.pid, cameras[:count], storage,
+                                      args.warmup, args.duration))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        faults.stop()
+        if daemon is not None:
+            daemon.stop()
+        server.stop()
+
+    if steps:
+        print_steps(steps)
+        path = os.path.join(args.work_dir, "camsim-results.json")
+        with open(path, "w") as f:
+            json.dump({"generated_at": int(time.time()),
+                       "cameras": [{"name": c.name, "profile": c.profile,
+                                    "disconnect_every": c.disconnect_every,
+                                    "ts_jump_every": c.ts_jump_every} for c in cameras],
+                       "steps": steps, "fault_events": faults.events}, f, indent=2)
+        print(f"\nResults written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Export and import LightNVR recordings, detections, detection blocks and
+events as columnar files
+
+Each table is written to <dir>/<table>.lnvc in chunks of --chunk-rows rows,
+so neither side holds more than one chunk in memory. Within a chunk every
+column is stored separately and zlib-compressed:
+
+    integers   delta-encoded int64 (ids and timestamps shrink to a few bytes)
+    reals      float64
+    text       lengths + UTF-8 bytes; stream_name, label and codec use a
+               per-chunk dictionary and 32-bit codes instead
+    blobs      lengths + raw bytes (detection_blocks.data)
+    anything else (mixed types in one column) falls back to JSON
+
+Import drops the table's secondary indexes, loads every chunk with
+executemany() inside one transaction and rebuilds the indexes at the end,
+which is far cheaper than maintaining them row by row. Stop the daemon
+before importing into its database.
+
+File layout (all integers little-endian):
+    b"LNVRCOL1" | u32 header length | header JSON
+    chunk*: u32 rows | per column: u8 encoding, u32 length, zlib payload
+    u32 0 (end marker)
+
+Usage:
+    ./scripts/columnar_transfer.py export --db /var/lib/lightnvr/lightnvr.db --out /tmp/nvr-export
+    ./scripts/columnar_transfer.py export --db lightnvr.db --out front-door --stream front_door --since 2024-01-01
+    ./scripts/columnar_transfer.py import --db /var/lib/lightnvr/lightnvr.db --dir /tmp/nvr-export --append
+    ./scripts/columnar_transfer.py info /tmp/nvr-export/detections.lnvc
+"""
+
+import argparse
+import array
+import itertools
+import json
+import operator
+import os
+import sqlite3
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate_test_db  # noqa: E402
+
+MAGIC = b"LNVRCOL1"
+FORMAT_VERSION = 1
+
+ENC_INT = 0
+ENC_REAL = 1
+ENC_DICT = 2
+ENC_TEXT = 3
+ENC_JSON = 4
+ENC_BLOB = 5
+ENCODING_NAMES = {ENC_INT: "int", ENC_REAL: "real", ENC_DICT: "dict", ENC_TEXT: "text",
+                  ENC_JSON: "json", ENC_BLOB: "blob"}
+
+# table -> time column used by --since/--until. detection_blocks holds the
+# detections packed with [database] detection_storage = blocks, one row per
+# stream and 10-minute bucket.
+TABLES = {
+    "recordings": "start_time",
+    "detections": "timestamp",
+    "detection_blocks": "bucket",
+    "events": "timestamp",
+}
+
+DICTIONARY_COLUMNS = {"stream_name", "label", "codec"}
+
+DEFAULT_CHUNK_ROWS = 65536
+# Level 1 keeps export CPU-cheap; the encodings already do most of the work
+COMPRESS_LEVEL = 1
+
+U32 = struct.Struct("<I")
+CHUNK_COLUMN = struct.Struct("<BI")
+BIG_ENDIAN = sys.byteorder == "big"
+
+
+class FormatError(Exception):
+    """Raised for files that are not valid columnar exports"""
+
+
+# ── Column encoding ─────────────────────────────────────────────────
+
+def _pack_array(typecode, values):
+    data = array.array(typecode, values)
+    if BIG_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpack_array(typecode, data):
+    values = array.array(typecode)
+    values.frombytes(data)
+    if BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _null_flags(values):
+    """(b'\\x01' + per-row null flags, values with None replaced by 0) or (b'\\x00', values)"""
+    if None not in values:
+        return b"\x00", values
+    flags = bytes(v is None for v in values)
+    return b"\x01" + flags, [0 if v is None else v for v in values]
+
+
+def _apply_nulls(flags, values):
+    if flags is None:
+        return list(values)
+    return [None if null else v for null, v in zip(flags, values)]
+
+
+def _split_nulls(payload, rows):
+    if payload[0] == 0:
+        return None, payload[1:]
+    return payload[1:1 + rows], payload[1 + rows:]
+
+
+def encode_column(name, values):
+    """(encoding, payload) for one column of a chunk"""
+    types = set(map(type, values))
+    types.discard(type(None))
+    try:
+        if types <= {int}:
+            prefix, filled = _null_flags(values)
+            deltas = itertools.chain(filled[:1], map(operator.sub, filled[1:], filled[:-1]))
+            return ENC_INT, prefix + _pack_array("q", deltas)
+        if types == {float}:
+            prefix, filled = _null_flags(values)
+            return ENC_REAL, prefix + _pack_array("d", filled)
+    except OverflowError:
+        pass
+    if types == {str} and name in DICTIONARY_COLUMNS:
+        dictionary = [v for v in dict.fromkeys(values) if v is not None]
+        codes = {word: code for code, word in enumerate(dictionary, 1)}
+        codes[None] = 0
+        words = json.dumps(dictionary).encode()
+        return ENC_DICT, U32.pack(len(words)) + words + _pack_array("I", map(codes.__getitem__, values))
+    if types == {str}:
+        prefix, filled = _null_flags(values)
+        encoded = [v.encode() if v else b"" for v in filled]
+        return ENC_TEXT, prefix + _pack_array("I", map(len, encoded)) + b"".join(encoded)
+    if types == {bytes}:
+        prefix, filled = _null_flags(values)
+        encoded = [v or b"" for v in filled]
+        return ENC_BLOB, prefix + _pack_array("I", map(len, encoded)) + b"".join(encoded)
+    return ENC_JSON, json.dumps(values).encode()
+
+
+def decode_column(encoding, payload, rows):
+    if encoding == ENC_INT:
+        flags, data = _split_nulls(payload, rows)
+        return _apply_nulls(flags, itertools.accumulate(_unpack_array("q", data)))
+    if encoding == ENC_REAL:
+        flags, data = _split_nulls(payload, rows)
+        return _apply_nulls(flags, _unpack_array("d", data))
+    if encoding == ENC_DICT:
+        size = U32.unpack_from(payload)[0]
+        words = [None] + json.loads(payload[4:4 + size])
+        return [words[code] for code in _unpack_array("I", payload[4 + size:])]
+    if encoding in (ENC_TEXT, ENC_BLOB):
+        flags, data = _split_nulls(payload, rows)
+        lengths = _unpack_array("I", data[:rows * 4])
+        text = data[rows * 4:]
+        ends = list(itertools.accumulate(lengths))
+        values = [text[end - length:end] for end, length in zip(ends, lengths)]
+        if encoding == ENC_TEXT:
+            values = [v.decode() for v in values]
+        return _apply_nulls(flags, values)
+    if encoding == ENC_JSON:
+        return json.loads(payload)
+    raise FormatError(f"unknown column encoding {encoding}")
+
+
+# ── Files ───────────────────────────────────────────────────────────
+
+class ColumnarWriter:
+    """Writes one table as a sequence of column-major chunks"""
+
+    def __init__(self, path, table, columns, metadata=None):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.file = open(self.tmp, "wb")
+        header = {"format": FORMAT_VERSION, "table": table, "columns": columns,
+                  "created_at": int(time.time())}
+        header.update(metadata or {})
+        encoded = json.dumps(header).encode()
+        self.file.write(MAGIC + U32.pack(len(encoded)) + encoded)
+        self.columns = columns
+        self.rows = 0
+        self.bytes_in = 0
+
+    def write_chunk(self, rows):
+        if not rows:
+            return
+        self.file.write(U32.pack(len(rows)))
+        for name, values in zip(self.columns, zip(*rows)):
+            encoding, payload = encode_column(name, list(values))
+            self.bytes_in += len(payload)
+            compressed = zlib.compress(payload, COMPRESS_LEVEL)
+            self.file.write(CHUNK_COLUMN.pack(encoding, len(compressed)) + compressed)
+        self.rows += len(rows)
+
+    def close(self):
+        self.file.write(U32.pack(0))
+        self.file.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp)
+
+
+class ColumnarReader:
+    """Reads a columnar file chunk by chunk"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise FormatError(f"{path} is not a LightNVR columnar export")
+        size = self._u32()
+        self.header = json.loads(self.file.read(size))
+        if self.header.get("format") != FORMAT_VERSION:
+            raise FormatError(f"{path}: unsupported format version {self.header.get('format')}")
+        self.table = self.header["table"]
+        self.columns = self.header["columns"]
+
+    def _u32(self):
+        data = self.file.read(4)
+        if len(data) != 4:
+            raise FormatError(f"{self.path} is truncated")
+        return U32.unpack(data)[0]
+
+    def raw_chunks(self):
+        """Yield (rows, [(encoding, compressed payload)]) without decoding"""
+        while True:
+            rows = self._u32()
+            if rows == 0:
+                return
+            columns = []
+            for _ in self.columns:
+                header = self.file.read(CHUNK_COLUMN.size)
+                if len(header) != CHUNK_COLUMN.size:
+                    raise FormatError(f"{self.path} is truncated")
+                encoding, length = CHUNK_COLUMN.unpack(header)
+                columns.append((encoding, self.file.read(length)))
+            yield rows, columns
+
+    def chunks(self):
+        """Yield {column: values} per chunk"""
+        for rows, columns in self.raw_chunks():
+            yield {name: decode_column(encoding, zlib.decompress(payload), rows)
+                   for name, (encoding, payload) in zip(self.columns, columns)}
+
+    def close(self):
+        self.file.close()
+
+
+def read_table(path):
+    """Yield the rows of an exported table as dicts, one chunk in memory at a time"""
+    reader = ColumnarReader(path)
+    try:
+        for chunk in reader.chunks():
+            yield from (dict(zip(chunk, row)) for row in zip(*chunk.values()))
+    finally:
+        reader.close()
+
+
+# ── Export ──────────────────────────────────────────────────────────
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def parse_time(text):
+    """Unix seconds or an ISO date/datetime (local time)"""
+    if text is None or text.isdigit():
+        return int(text) if text else None
+    return int(datetime.fromisoformat(text).timestamp())
+
+
+def export_table(conn, table, path, chunk_rows, stream=None, since=None, until=None):
+    columns = table_columns(conn, table)
+    if not columns:
+        return None
+    conditions, params = [], []
+    if stream:
+        conditions.append("stream_name = ?")
+        params.append(stream)
+    if since is not None:
+        conditions.append(f"{TABLES[table]} >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append(f"{TABLES[table]} < ?")
+        params.append(until)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    writer = ColumnarWriter(path, table, columns, {"filter": {"stream": stream, "since": since, "until": until}})
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            writer.write_chunk(rows)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return writer
+
+
+def export_database(db, out_dir, tables, chunk_rows, stream=None, since=None, until=None):
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(f"file:{os.path.abspath(db)}?mode=ro", uri=True)
+    try:
+        # One read transaction so the tables are consistent with each other
+        conn.execute("BEGIN")
+        for table in tables:
+            started = time.perf_counter()
+            path = os.path.join(out_dir, f"{table}.lnvc")
+            writer = export_table(conn, table, path, chunk_rows, stream, since, until)
+            if writer is None:
+                print(f"  {table}: not in database, skipped")
+                continue
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(path)
+            print(f"  {table}: {writer.rows:,} rows -> {path} ({size / 1024 / 1024:.1f} MB, "
+                  f"{size / max(writer.rows, 1):.1f} bytes/row) in {elapsed:.1f}s")
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+# ── Import ──────────────────────────────────────────────────────────
+
+def secondary_indexes(conn, table):
+    return [(name, sql) for name, sql in conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL",
+        (table,))]
+
+
+def max_id(conn, table):
+    return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+
+class MultiRowInsert:
+    """INSERTs with as many rows per statement as the bind limit allows
+
+    Roughly 1.5x faster than executemany() with one row per statement,
+    since SQLite runs the statement setup once per batch.
+    """
+
+    def __init__(self, conn, table, columns):
+        self.conn = conn
+        self.per_statement = max(1, generate_test_db.MAX_VARIABLES // len(columns))
+        placeholders = "(" + ",".join("?" * len(columns)) + ")"
+        prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        self.multi_sql = prefix + ",".join([placeholders] * self.per_statement)
+        self.single_sql = prefix + placeholders
+
+    def write(self, rows):
+        full = len(rows) - len(rows) % self.per_statement
+        for start in range(0, full, self.per_statement):
+            batch = rows[start:start + self.per_statement]
+            self.conn.execute(self.multi_sql, list(itertools.chain.from_iterable(batch)))
+        self.conn.executemany(self.single_sql, rows[full:])
+        return len(rows)
+
+
+def import_table(conn, path, append=False, id_offsets=None):
+    """Load one exported table; returns (table, rows, id offset applied)"""
+    reader = ColumnarReader(path)
+    try:
+        table = reader.table
+        existing = table_columns(conn, table)
+        if not existing:
+            raise FormatError(f"table {table} does not exist in the target database")
+        columns = [c for c in reader.columns if c in existing]
+        dropped = [c for c in reader.columns if c not in existing]
+        if dropped:
+            print(f"  {table}: target has no column(s) {', '.join(dropped)}, not imported")
+
+        # New ids go after the existing rows; references to other imported tables follow them
+        offset = max_id(conn, table) if append else 0
+        shifted = {"id": offset} if offset else {}
+        if id_offsets and id_offsets.get("recordings") and table == "detections":
+            shifted["recording_id"] = id_offsets["recordings"]
+
+        insert = MultiRowInsert(conn, table, columns)
+        rows = 0
+        for chunk in reader.chunks():
+            values = []
+            for name in columns:
+                column = chunk[name]
+                if name in shifted:
+                    delta = shifted[name]
+                    column = [None if v is None else v + delta for v in column]
+                values.append(column)
+            rows += insert.write(list(zip(*values)))
+        return table, rows, offset
+    finally:
+        reader.close()
+
+
+def import_directory(db, in_dir, tables, append=False, create=False):
+    if not os.path.exists(db) and not create:
+        raise FileNotFoundError(f"{db} does not exist (use --create to make a new database)")
+    conn = sqlite3.connect(db, isolation_level=None)
+    try:
+        if create:
+            generate_test_db.create_schema(conn)
+
+        # Bulk load settings, as in generate_test_db.py; WAL is restored afterwards
+        conn.execute("PRAGMA journal_mode=MEMORY")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-262144")
+
+        paths = [(t, os.path.join(in_dir, f"{t}.lnvc")) for t in tables]
+        paths = [(t, p) for t, p in paths if os.path.exists(p)]
+        if not paths:
+            raise FileNotFoundError(f"no .lnvc files for {', '.join(tables)} in {in_dir}")
+
+        conn.execute("BEGIN")
+        try:
+            indexes = {t: secondary_indexes(conn, t) for t, _ in paths}
+            for table_indexes in indexes.values():
+                for name, _ in table_indexes:
+                    conn.execute(f"DROP INDEX {name}")
+
+            id_offsets = {}
+            for table, path in paths:
+                started = time.perf_counter()
+                _, rows, offset = import_table(conn, path, append, id_offsets)
+                id_offsets[table] = offset
+                print(f"  {table}: {rows:,} rows in {time.perf_counter() - started:.1f}s"
+                      + (f" (ids shifted by {offset:,})" if offset else ""))
+
+            started = time.perf_counter()
+            for table_indexes in indexes.values():
+                for _, sql in table_indexes:
+                    conn.execute(sql)
+            count = sum(len(v) for v in indexes.values())
+            print(f"  rebuilt {count} indexes in {time.perf_counter() - started:.1f}s")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+
+# ── Info ────────────────────────────────────────────────────────────
+
+def print_info(path):
+    reader = ColumnarReader(path)
+    try:
+        print(f"{path}: table {reader.table}, exported {datetime.fromtimestamp(reader.header['created_at'])}")
+        if any(reader.header.get("filter", {}).values()):
+            print(f"  filter: {reader.header['filter']}")
+        sizes = {name: 0 for name in reader.columns}
+        encodings = {name: set() for name in reader.columns}
+        rows = chunks = 0
+        for chunk_rows, columns in reader.raw_chunks():
+            rows += chunk_rows
+            chunks += 1
+            for name, (encoding, payload) in zip(reader.columns, columns):
+                sizes[name] += len(payload)
+                encodings[name].add(ENCODING_NAMES.get(encoding, str(encoding)))
+        print(f"  {rows:,} rows in {chunks} chunks, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        for name in reader.columns:
+            per_row = sizes[name] / rows if rows else 0
+            print(f"    {name:<24} {'/'.join(sorted(encodings[name])):<10} "
+                  f"{sizes[name] / 1024:>10.1f} KB  {per_row:6.2f} bytes/row")
+    finally:
+        reader.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Columnar export/import of LightNVR recording metadata")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    tables = ",".join(TABLES)
+    export = commands.add_parser("export", help="Write tables to <out>/<table>.lnvc")
+    export.add_argument("--db", required=True, help="Source database (opened read-only)")
+    export.add_argument("--out", required=True, help="Output directory")
+    export.add_argument("--tables", default=tables, help=f"Comma separated tables (default: {tables})")
+    export.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"Rows per chunk (default: {DEFAULT_CHUNK_ROWS})")
+    export.add_argument("--stream", help="Only rows for this stream")
+    export.add_argument("--since", help="Only rows at or after this time (unix seconds or ISO date)")
+    export.add_argument("--until", help="Only rows before this time (unix seconds or ISO date)")
+
+    load = commands.add_parser("import", help="Load <dir>/<table>.lnvc files into a database")
+    load.add_argument("--db", required=True, help="Target database (stop the daemon first)")
+    load.add_argument("--dir", required=True, help="Directory written by export")
+    load.add_argument("--tables", default=tables, help=f"Comma separated tables (default: {tables})")
+    load.add_argument("--append", action="store_true",
+                      help="Give imported rows new ids after the existing ones (for merging boxes)")
+    load.add_argument("--create", action="store_true",
+                      help="Create the database and schema if it does not exist")
+
+    info = commands.add_parser("info", help="Describe an exported file")
+    info.add_argument("files", nargs="+", help=".lnvc files")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        if args.command == "info":
+            for path in args.files:
+                print_info(path)
+            return 0
+
+        tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+        unknown = [t for t in tables if t not in TABLES]
+        if unknown:
+            print(f"Unsupported table(s): {', '.join(unknown)}", file=sys.stderr)
+            return 1
+
+        started = time.time()
+        if args.command == "export":
+            print(f"Exporting {', '.join(tables)} from {args.db}")
+            export_database(args.db, args.out, tables, args.chunk_rows, args.stream,
+                            parse_time(args.since), parse_time(args.until))
+        else:
+            # Recordings first so detections can follow their shifted ids
+            tables.sort(key=list(TABLES).index)
+            print(f"Importing {', '.join(tables)} into {args.db}")
+            import_directory(args.db, args.dir, tables, args.append, args.create)
+        print(f"Done in {time.time() - started:.1f}s")
+    except (FormatError, FileNotFoundError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Synthetic LightNVR database generator for benchmarking
+
+Builds a schema-faithful lightnvr.db the way the daemon does: the bootstrap
+tables from init_database() (db_core.c) and init_motion_config_tables()
+(db_motion_config.c), then every db/migrations/*.sql file in version order
+with the same idempotent statement handling as sqlite_migrate.c. It then
+bulk-loads recordings, detections, events and motion_recordings with
+per-stream time distributions (continuous segments with outages, diurnal
+detection activity).
+
+Examples:
+    # 16 cameras, 90 days of 15 minute segments (~138k recordings)
+    scripts/generate_test_db.py --output /tmp/lightnvr-90d.db --streams 16 --days 90
+
+    # Smaller segments and sparse placeholder MP4s for the sync tools
+    scripts/generate_test_db.py --output /tmp/small.db --days 3 --segment 60 \\
+        --placeholder-files /tmp/recordings
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import sqlite3
+import struct
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, "db", "migrations")
+
+# Tables created by init_database() in db_core.c before migrations run
+CORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    stream_name TEXT,
+    description TEXT NOT NULL,
+    details TEXT
+);
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stream_name TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    width REAL NOT NULL,
+    height REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recordings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stream_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER,
+    size_bytes INTEGER,
+    width INTEGER,
+    height INTEGER,
+    fps INTEGER,
+    codec TEXT,
+    is_complete INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS streams (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    enabled INTEGER DEFAULT 1,
+    streaming_enabled INTEGER DEFAULT 1,
+    width INTEGER DEFAULT 1280,
+    height INTEGER DEFAULT 720,
+    fps INTEGER DEFAULT 30,
+    codec TEXT DEFAULT 'h264',
+    priority INTEGER DEFAULT 5,
+    record INTEGER DEFAULT 1,
+    segment_duration INTEGER DEFAULT 900
+);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_type ON events (type);
+CREATE INDEX IF NOT EXISTS idx_events_stream ON events (stream_name);
+CREATE INDEX IF NOT EXISTS idx_recordings_start_time ON recordings (start_time);
+CREATE INDEX IF NOT EXISTS idx_recordings_end_time ON recordings (end_time);
+CREATE INDEX IF NOT EXISTS idx_recordings_stream ON recordings (stream_name);
+CREATE INDEX IF NOT EXISTS idx_recordings_complete_stream_start ON recordings (is_complete, stream_name, start_time);
+CREATE INDEX IF NOT EXISTS idx_streams_name ON streams (name);
+CREATE INDEX IF NOT EXISTS idx_detections_stream_timestamp ON detections (stream_name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections (timestamp);
+"""
+
+# Tables created by init_motion_config_tables() in db_motion_config.c
+MOTION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS motion_recordings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stream_name TEXT NOT NULL,
+    file_path TEXT NOT NULL UNIQUE,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER,
+    size_bytes INTEGER DEFAULT 0,
+    width INTEGER,
+    height INTEGER,
+    fps INTEGER,
+    codec TEXT,
+    is_complete INTEGER DEFAULT 0,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_motion_recordings_stream ON motion_recordings(stream_name);
+CREATE INDEX IF NOT EXISTS idx_motion_recordings_time ON motion_recordings(start_time);
+"""
+
+# event_type_t in db_events.h
+EVENT_RECORDING_START = 0
+EVENT_RECORDING_STOP = 1
+EVENT_STREAM_CONNECTED = 2
+EVENT_STREAM_DISCONNECTED = 3
+
+LABELS = [("person", 40), ("car", 30), ("truck", 6), ("bicycle", 5), ("dog", 8),
+          ("cat", 6), ("motorbike", 3), ("bird", 2)]
+
+# Relative detection activity per hour of day (night is quiet)
+HOURLY_ACTIVITY = [1, 1, 1, 1, 1, 2, 4, 7, 9, 8, 7, 7, 8, 8, 7, 7, 8, 9, 9, 7, 5, 3, 2, 1]
+
+PROFILES = [
+    # width, height, fps, codec, bitrate (bytes/second)
+    (1920, 1080, 15, "h264", 500_000),
+    (2560, 1440, 15, "hevc", 600_000),
+    (1280, 720, 25, "h264", 250_000),
+    (3840, 2160, 10, "hevc", 1_000_000),
+]
+
+# SQLITE_MAX_VARIABLE_NUMBER is 32766 on current builds, 999 on old ones
+MAX_VARIABLES = 999 if sqlite3.sqlite_version_info < (3, 32, 0) else 32766
+
+
+def split_statements(sql):
+    """Split a migration section into statements (trigger bodies stay whole)"""
+    statements = []
+    current = ""
+    for line in sql.splitlines():
+        if not current.strip() and line.lstrip().startswith("--"):
+            continue
+        for ch in line + "\n":
+            current += ch
+            # complete_statement knows about strings, comments and BEGIN ... END
+            if ch == ";" and sqlite3.complete_statement(current):
+                statement = current.strip().rstrip(";").strip()
+                if statement:
+                    statements.append(statement)
+                current = ""
+    tail = current.strip()
+    if tail and not tail.startswith("--"):
+        statements.append(tail)
+    return statements
+
+
+def migration_section(path, direction="up"):
+    with open(path) as f:
+        content = f.read()
+    match = re.search(r"--\s*migrate:%s\s*\n(.*?)(?=--\s*migrate:(?:up|down)|\Z)" % direction,
+                      content, re.S)
+    return match.group(1) if match else ""
+
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Return [(version, description, path)] sorted by version, like sqlite_migrate.c"""
+    result = []
+    for path in glob.glob(os.path.join(migrations_dir, "*.sql")):
+        name = os.path.basename(path)[:-4]
+        version, _, description = name.partition("_")
+        if version.isdigit():
+            result.append((version, description.replace("_", " "), path))
+    return sorted(result)
+
+
+def column_exists(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def execute_statement(conn, statement):
+    """Execute one migration statement; returns False if it was skipped as already applied"""
+    match = re.match(r"ALTER\s+TABLE\s+(\S+)\s+ADD\s+COLUMN\s+(\S+)", statement, re.I)
+    if match and column_exists(conn, match.group(1), match.group(2)):
+        return False
+    try:
+        conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        msg = str(e)
+        if "duplicate column name" in msg or "already exists" in msg:
+            return False
+        raise
+    return True
+
+
+def apply_migrations(conn, migrations_dir=MIGRATIONS_DIR, pending_only=True, on_statement=None,
+                     on_migration=None):
+    """Apply migrations in version order, recording them in schema_migrations
+
+    on_statement(version, statement, executed, seconds) is called after each
+    statement and on_migration(version, description, seconds) after each
+    migration's COMMIT.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                 "  version TEXT PRIMARY KEY,"
+                 "  applied_at INTEGER NOT NULL DEFAULT (strftime('%s', 'now')))")
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    count = 0
+    for version, description, path in list_migrations(migrations_dir):
+        if pending_only and version in applied:
+            continue
+        migration_started = time.perf_counter()
+        conn.execute("BEGIN")
+        try:
+            for statement in split_statements(migration_section(path)):
+                started = time.perf_counter()
+                executed = execute_statement(conn, statement)
+                if on_statement:
+                    on_statement(version, statement, executed, time.perf_counter() - started)
+            conn.execute("INSERT OR IGNORE INTO schema_migrations (version) VALUES (?)", (version,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if on_migration:
+            on_migration(version, description, time.perf_counter() - migration_started)
+        count += 1
+    return count
+
+
+def create_schema(conn, migrations_dir=MIGRATIONS_DIR):
+    conn.executescript(CORE_SCHEMA)
+    apply_migrations(conn, migrations_dir)
+    conn.executescript(MOTION_SCHEMA)
+
+
+class BulkInserter:
+    """Buffers rows and writes them with multi-row INSERT statements"""
+
+    def __init__(self, conn, table, columns, rows_per_statement=None):
+        self.conn = conn
+        self.columns = columns
+        limit = max(1, MAX_VARIABLES // len(columns))
+        self.rows_per_statement = min(rows_per_statement or 500, limit)
+        placeholders = "(" + ",".join("?" * len(columns)) + ")"
+        self.sql = (f"INSERT INTO {table} ({','.join(columns)}) VALUES "
+                    + ",".join([placeholders] * self.rows_per_statement))
+        self.single_sql = f"INSERT INTO {table} ({','.join(columns)}) VALUES {placeholders}"
+        self.buffer = []
+        self.count = 0
+
+    def add(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.rows_per_statement:
+            self.conn.execute(self.sql, [v for r in self.buffer for v in r])
+            self.count += len(self.buffer)
+            self.buffer.clear()
+
+    def flush(self):
+        if self.buffer:
+            self.conn.executemany(self.single_sql, self.buffer)
+            self.count += len(self.buffer)
+            self.buffer.clear()
+
+
+def mp4_placeholder_header(duration, width, height, fps, codec, size):
+    """Minimal faststart MP4 header (ftyp + moov + mdat header) for a sparse file"""
+    def box(kind, payload):
+        return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+    def full_box(kind, payload):
+        return box(kind, b"\0\0\0\0" + payload)
+
+    timescale = 1000
+    length = int(duration * timescale)
+    samples = int(duration * fps)
+    fourcc = b"hvc1" if codec == "hevc" else b"avc1"
+    sample_entry = box(fourcc, b"\0" * 6 + struct.pack(">H", 1) + b"\0" * 16
+                       + struct.pack(">HH", width, height) + b"\0" * 50)
+    stbl = box(b"stbl", full_box(b"stsd", struct.pack(">I", 1) + sample_entry)
+               + full_box(b"stsz", struct.pack(">II", 0, samples)))
+    mdia = box(b"mdia", full_box(b"mdhd", struct.pack(">IIII", 0, 0, timescale, length) + b"\0" * 4)
+               + full_box(b"hdlr", b"\0" * 4 + b"vide" + b"\0" * 13)
+               + box(b"minf", stbl))
+    tkhd = full_box(b"tkhd", struct.pack(">IIIII", 0, 0, 1, 0, length) + b"\0" * 52
+                    + struct.pack(">II", width << 16, height << 16))
+    mvhd = full_box(b"mvhd", struct.pack(">IIII", 0, 0, timescale, length) + b"\0" * 80)
+    header = box(b"ftyp", b"isom\0\0\x02\0isomiso2avc1mp41") + box(b"moov", mvhd + box(b"trak", tkhd + mdia))
+    mdat_size = max(8, size - len(header))
+    return header + struct.pack(">I4s", mdat_size, b"mdat")
+
+
+def write_placeholder(path, duration, width, height, fps, codec, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(mp4_placeholder_header(duration, width, height, fps, codec, size))
+        f.truncate(size)
+
+
+def stream_names(count):
+    return [f"cam{i + 1:02d}" for i in range(count)]
+
+
+def generate(conn, args, rng):
+    now = int(args.end_time or time.time())
+    start = now - int(args.days * 86400)
+    recordings_root = args.placeholder_files or "/var/lib/lightnvr/recordings"
+    names = stream_names(args.streams)
+    label_names = [label for label, _ in LABELS]
+    label_weights = [weight for _, weight in LABELS]
+
+    recordings = BulkInserter(conn, "recordings", [
+        "stream_name", "file_path", "start_time", "end_time", "size_bytes", "width", "height",
+        "fps", "codec", "is_complete", "trigger_type", "protected", "retention_override_days"],
+        args.rows_per_insert)
+    detections = BulkInserter(conn, "detections", [
+        "stream_name", "timestamp", "label", "confidence", "x", "y", "width", "height",
+        "track_id", "zone_id"], args.rows_per_insert)
+    events = BulkInserter(conn, "events", [
+        "type", "timestamp", "stream_name", "description", "details"], args.rows_per_insert)
+    motion = BulkInserter(conn, "motion_recordings", [
+        "stream_name", "file_path", "start_time", "end_time", "size_bytes", "width", "height",
+        "fps", "codec", "is_complete", "created_at"], args.rows_per_insert)
+
+    placeholders = 0
+
+    for index, name in enumerate(names):
+        width, height, fps, codec, bitrate = PROFILES[index % len(PROFILES)]
+        conn.execute(
+            "INSERT OR IGNORE INTO streams (name, url, width, height, fps, codec, segment_duration, "
+            "detection_based_recording, retention_days) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, f"rtsp://192.168.1.{100 + index}:554/stream1", width, height, fps, codec,
+             args.segment, 1 if index % 4 == 0 else 0, rng.choice([7, 14, 30, 30, 90])))
+        detection_stream = rng.random() < args.detection_streams
+        motion_stream = rng.random() < args.motion_streams
+        stream_bitrate = bitrate * rng.uniform(0.7, 1.3)
+
+        t = start + rng.randrange(args.segment)
+        while t < now:
+            # Camera outage: skip ahead and log the disconnect/reconnect
+            if rng.random() < args.outage_rate:
+                gap = int(rng.expovariate(1 / 1800.0)) + 30
+                events.add((EVENT_STREAM_DISCONNECTED, t, name, f"Stream {name} disconnected", None))
+                events.add((EVENT_STREAM_CONNECTED, t + gap, name, f"Stream {name} connected", None))
+                t += gap
+                continue
+
+            duration = min(args.segment + rng.randint(-2, 2), now - t)
+            if duration <= 0:
+                break
+            end = t + duration
+            size = int(stream_bitrate * duration * rng.uniform(0.8, 1.2))
+            complete = 1 if end < now else 0
+            trigger = "detection" if detection_stream and rng.random() < 0.3 else "scheduled"
+            path = os.path.join(recordings_root, "mp4", name,
+                                time.strftime("recording_%Y%m%d_%H%M%S.mp4", time.gmtime(t)))
+            recordings.add((name, path, t, end, size, width, height, fps, codec, complete, trigger,
+                            1 if rng.random() < args.protected_rate else 0,
+                            rng.choice([7, 365]) if rng.random() < 0.001 else None))
+            if args.events:
+                events.add((EVENT_RECORDING_START, t, name, f"Recording started for {name}", path))
+                events.add((EVENT_RECORDING_STOP, end, name, f"Recording stopped for {name}", path))
+
+            if args.placeholder_files:
+                write_placeholder(path, duration, width, height, fps, codec, size)
+                placeholders += 1
+
+            if detection_stream:
+                hour = time.gmtime(t).tm_hour
+                expected = args.detections_per_hour * duration / 3600.0 * HOURLY_ACTIVITY[hour] / 5.0
+                bursts = int(rng.expovariate(1.0) * expected / 4) if expected else 0
+                for _ in range(bursts):
+                    # A tracked object seen for a few consecutive frames
+                    ts = t + rng.randrange(max(1, duration))
+                    label = rng.choices(label_names, label_weights)[0]
+                    track = rng.randrange(1, 1_000_000)
+                    x, y = rng.random() * 0.8, rng.random() * 0.8
+                    w, h = rng.uniform(0.05, 0.2), rng.uniform(0.1, 0.4)
+                    for frame in range(rng.randint(2, 8)):
+                        detections.add((name, ts + frame, label, round(rng.uniform(0.4, 0.99), 3),
+                                        round(x, 4), round(y, 4), round(w, 4), round(h, 4),
+                                        track, ""))
+                        x = min(0.95, max(0.0, x + rng.uniform(-0.02, 0.02)))
+                        y = min(0.95, max(0.0, y + rng.uniform(-0.02, 0.02)))
+
+            if motion_stream and rng.random() < 0.2:
+                m_start = t + rng.randrange(max(1, duration))
+                m_end = m_start + rng.randint(10, 120)
+                motion.add((name, os.path.join(recordings_root, "motion", name,
+                                               f"{name}_{m_start}_motion.mp4"),
+                            m_start, m_end, int(stream_bitrate * (m_end - m_start)),
+                            width, height, fps, codec, 1, m_end))
+            t = end
+
+        print(f"  {name}: {recordings.count + len(recordings.buffer):,} recordings, "
+              f"{detections.count + len(detections.buffer):,} detections so far")
+
+    for inserter in (recordings, detections, events, motion):
+        inserter.flush()
+    return {
+        "recordings": recordings.count,
+        "detections": detections.count,
+        "events": events.count,
+        "motion_recordings": motion.count,
+        "placeholder_files": placeholders,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a synthetic LightNVR database")
+    parser.add_argument("--output", required=True, help="Database file to create")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing output file")
+    parser.add_argument("--streams", type=int, default=16, help="Number of cameras (default: 16)")
+    parser.add_argument("--days", type=float, default=30, help="Days of history (default: 30)")
+    parser.add_argument("--end-time", type=int, default=None, help="Unix time of the newest segment (default: now)")
+    parser.add_argument("--segment", type=int, default=900, help="Segment length in seconds (default: 900)")
+    parser.add_argument("--detections-per-hour", type=float, default=120,
+                        help="Average detection rows per hour on detecting streams (default: 120)")
+    parser.add_argument("--detection-streams", type=float, default=0.75,
+                        help="Fraction of streams with object detection (default: 0.75)")
+    parser.add_argument("--motion-streams", type=float, default=0.25,
+                        help="Fraction of streams with ONVIF motion recordings (default: 0.25)")
+    parser.add_argument("--outage-rate", type=float, default=0.002,
+                        help="Probability of a camera outage before each segment (default: 0.002)")
+    parser.add_argument("--protected-rate", type=float, default=0.01,
+                        help="Fraction of protected recordings (default: 0.01)")
+    parser.add_argument("--no-events", dest="events", action="store_false",
+                        help="Skip per-recording start/stop events")
+    parser.add_argument("--placeholder-files", metavar="RECORDINGS_DIR", default=None,
+                        help="Also create sparse placeholder MP4s under RECORDINGS_DIR/mp4/<stream>/")
+    parser.add_argument("--rows-per-insert", type=int, default=500,
+                        help="Rows per multi-row INSERT statement (default: 500)")
+    parser.add_argument("--migrations-dir", default=MIGRATIONS_DIR, help="Migration SQL directory")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="Run ANALYZE after loading; the daemon never does, so query plans "
+                             "then differ from production (default: off)")
+    return parser
+
+
+def generation_args(output, **overrides):
+    """Generator options with the CLI defaults, for use from other scripts"""
+    args = build_parser().parse_args(["--output", output])
+    for name, value in overrides.items():
+        setattr(args, name, value)
+    return args
+
+
+def build_database(args, rng):
+    """Create args.output from scratch and fill it; returns the row counts"""
+    conn = sqlite3.connect(args.output, isolation_level=None)
+
+    print(f"Creating schema from {args.migrations_dir}")
+    create_schema(conn, args.migrations_dir)
+
+    # Bulk load settings; the daemon's WAL mode is restored afterwards
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+
+    print(f"Generating {args.days:g} days for {args.streams} streams...")
+    conn.execute("BEGIN")
+    counts = generate(conn, args, rng)
+    conn.execute("COMMIT")
+
+    if args.analyze:
+        conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    return counts
+
+
+def main():
+    args = build_parser().parse_args()
+    if os.path.exists(args.output):
+        if not args.force:
+            print(f"{args.output} already exists, use --force to overwrite", file=sys.stderr)
+            return 1
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.output + suffix):
+                os.remove(args.output + suffix)
+
+    started = time.time()
+    counts = build_database(args, random.Random(args.seed))
+
+    elapsed = time.time() - started
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"\nGenerated {args.output} ({size_mb:.1f} MB) in {elapsed:.1f}s:")
+    for table, count in counts.items():
+        print(f"  - {count:,} {table.replace('_', ' ')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
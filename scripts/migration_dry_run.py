@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Dry-run and time the pending LightNVR schema migrations on database snapshots
+
+Each snapshot is copied with the SQLite backup API (so a live WAL database
+can be used as the source) and the pending db/migrations/*.sql files are
+applied to the copy the way sqlite_migrate.c does: one transaction per
+migration, idempotent ADD COLUMN / CREATE handling. Every statement is
+timed and classified by the table it writes; operations that rewrite every
+row of a table (an x_new copy renamed over x, DROP COLUMN, VACUUM) are
+reported as rewrites.
+
+The legacy C migrations in db_schema.c are scanned for table rebuilds such
+as the streams_new rebuild in migration_v5_to_v6. Those are rehearsed on
+the copy inside a transaction that is rolled back, so their cost is known
+even though the snapshot keeps its schema.
+
+Times are extrapolated to --target-size by scaling the row-dependent
+statements (index builds, copies, UPDATE/DELETE) on the large tables with
+the database size. The result is the expected time the daemon spends
+migrating at startup, during which it does not record.
+
+Usage:
+    ./scripts/migration_dry_run.py --db /backup/lightnvr.db --target-size 8G
+    ./scripts/migration_dry_run.py --db site-a.db --db site-b.db --jobs 2 --report dry-run.json
+    ./scripts/migration_dry_run.py --days 7,30 --replay-from 0013
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench_queries  # noqa: E402
+import generate_test_db  # noqa: E402
+
+REPO_ROOT = generate_test_db.REPO_ROOT
+DB_SCHEMA_C = os.path.join(REPO_ROOT, "src", "database", "db_schema.c")
+
+LEGACY_MIGRATION = re.compile(r'^static int (migration_v(\d+)_to_v(\d+))\s*\(void\)\s*\{', re.M)
+
+# (operation, pattern capturing the affected table, scales with table size).
+# INSERT ... SELECT also captures the table it reads, which sets its cost.
+OPERATIONS = [
+    ("index build", re.compile(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?\w+\s+ON\s+(\w+)', re.I), True),
+    ("add column", re.compile(r'ALTER\s+TABLE\s+(\w+)\s+ADD\s+(?:COLUMN\s+)?', re.I), False),
+    ("drop column", re.compile(r'ALTER\s+TABLE\s+(\w+)\s+DROP\s+(?:COLUMN\s+)?', re.I), True),
+    ("rename", re.compile(r'ALTER\s+TABLE\s+(\w+)\s+RENAME', re.I), False),
+    ("insert select", re.compile(r'INSERT\s+(?:OR\s+\w+\s+)?INTO\s+(\w+).*?\bSELECT\b.*?\bFROM\s+(?P<source>\w+)',
+                                 re.I | re.S), True),
+    ("create table", re.compile(r'CREATE\s+(?:TEMP\w*\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.I), False),
+    ("create trigger", re.compile(r'CREATE\s+TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?\w+\s+.*?\bON\s+(\w+)', re.I | re.S), False),
+    ("drop table", re.compile(r'DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(\w+)', re.I), True),
+    ("drop index", re.compile(r'DROP\s+INDEX\s+(?:IF\s+EXISTS\s+)?(\w+)', re.I), False),
+    ("update", re.compile(r'UPDATE\s+(?:OR\s+\w+\s+)?(\w+)', re.I), True),
+    ("delete", re.compile(r'DELETE\s+FROM\s+(\w+)', re.I), True),
+    ("vacuum", re.compile(r'VACUUM()', re.I), True),
+]
+
+# Operations that write every row of a table into new pages. A copy into
+# x_new is one too when the migration renames x_new over x (see
+# mark_rebuilds); other INSERT ... SELECTs (backfills) are not.
+REWRITES = {"drop column", "vacuum"}
+
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text):
+    """'512M', '8G' or a byte count"""
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def format_size(size):
+    for suffix in ("T", "G", "M", "K"):
+        if size >= SIZE_SUFFIXES[suffix]:
+            return f"{size / SIZE_SUFFIXES[suffix]:.1f}{suffix}"
+    return f"{size}B"
+
+
+def classify(statement):
+    """(operation, table written, table read, scales) for one SQL statement"""
+    text = statement.strip()
+    for operation, pattern, scales in OPERATIONS:
+        match = pattern.match(text)
+        if match:
+            table = match.group(1) or None
+            return operation, table, match.groupdict().get("source", table), scales
+    return "other", None, None, False
+
+
+def mark_rebuilds(statements):
+    """Flag copies into x_new that the same migration renames to x as rewrites"""
+    renamed = {s["table"] for s in statements if s["operation"] == "rename" and s["executed"]}
+    for s in statements:
+        if (s["operation"] == "insert select" and s["executed"] and s["table"] in renamed
+                and s["table"].endswith("_new")):
+            s["rewrite"] = True
+
+
+def legacy_rewrites(path=DB_SCHEMA_C):
+    """Table rebuilds (CREATE x_new / copy / DROP / RENAME) in the db_schema.c migrations"""
+    source = bench_queries.CSource(path)
+    rewrites = []
+    for match in LEGACY_MIGRATION.finditer(source.source):
+        function, from_version, to_version = match.group(1), int(match.group(2)), int(match.group(3))
+        literals = source.literals(function)
+        for literal in literals:
+            new_table = re.match(r'\s*CREATE\s+TABLE\s+(\w+)_new\b', literal, re.I)
+            if not new_table:
+                continue
+            table = new_table.group(1)
+            mentions = re.compile(r'\b%s(?:_new)?\b' % re.escape(table))
+            statements = [s.strip() for s in literals
+                          if re.match(r'\s*(CREATE|INSERT|DROP|ALTER)\b', s, re.I) and mentions.search(s)]
+            rewrites.append({"function": function, "from_version": from_version,
+                             "to_version": to_version, "table": table, "statements": statements})
+    return rewrites
+
+
+def copy_snapshot(source, destination):
+    """Consistent copy of a (possibly live, WAL-mode) database; returns seconds taken"""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(destination + suffix):
+            os.remove(destination + suffix)
+    started = time.perf_counter()
+    src = sqlite3.connect(f"file:{os.path.abspath(source)}?mode=ro", uri=True)
+    dst = sqlite3.connect(destination)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return time.perf_counter() - started
+
+
+def table_rows(conn):
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+    return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+
+def applied_versions(conn):
+    try:
+        return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    except sqlite3.OperationalError:
+        return set()
+
+
+def legacy_schema_version(conn):
+    try:
+        row = conn.execute("SELECT version FROM schema_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def rewind(conn, from_version, migrations_dir):
+    """Roll back applied migrations >= from_version (down sections, newest first)"""
+    applied = applied_versions(conn)
+    rewound = []
+    for version, _, path in reversed(generate_test_db.list_migrations(migrations_dir)):
+        if version < from_version or version not in applied:
+            continue
+        conn.execute("BEGIN")
+        try:
+            for statement in generate_test_db.split_statements(generate_test_db.migration_section(path, "down")):
+                conn.execute(statement)
+            conn.execute("DELETE FROM schema_migrations WHERE version = ?", (version,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        rewound.append(version)
+    return rewound
+
+
+def rehearse_rewrite(conn, rewrite):
+    """Run a legacy table rebuild in a transaction that is rolled back; returns seconds"""
+    conn.execute("BEGIN")
+    try:
+        started = time.perf_counter()
+        for statement in rewrite["statements"]:
+            conn.execute(statement)
+        return time.perf_counter() - started
+    finally:
+        conn.execute("ROLLBACK")
+
+
+def shorten(statement, width=72):
+    text = " ".join(statement.split())
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def dry_run(snapshot, work_dir, migrations_dir, replay_from=None, keep=False):
+    """Apply the pending migrations to a copy of snapshot and time them"""
+    name = os.path.splitext(os.path.basename(snapshot))[0]
+    copy = os.path.join(work_dir, f"{name}-{os.getpid()}.dryrun.db")
+    result = {"snapshot": snapshot, "size_bytes": os.path.getsize(snapshot),
+              "copy_seconds": round(copy_snapshot(snapshot, copy), 3)}
+
+    conn = sqlite3.connect(copy, isolation_level=None)
+    try:
+        # Same settings the daemon uses (init_database in db_core.c)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+
+        result["rewound"] = rewind(conn, replay_from, migrations_dir) if replay_from else []
+        rows = table_rows(conn)
+        result["rows"] = rows
+
+        statements = []
+        migrations = []
+
+        def on_statement(version, statement, executed, seconds):
+            operation, table, source, scales = classify(statement)
+            statements.append({
+                "version": version, "statement": shorten(statement), "operation": operation,
+                "table": table, "source": source, "rows": rows.get(source, 0) if source else 0,
+                "scales": scales and executed, "rewrite": operation in REWRITES and executed,
+                "executed": executed, "seconds": round(seconds, 6),
+            })
+
+        def on_migration(version, description, seconds):
+            migrations.append({"version": version, "description": description,
+                               "seconds": round(seconds, 6)})
+
+        generate_test_db.apply_migrations(conn, migrations_dir, True, on_statement, on_migration)
+        for migration in migrations:
+            migration["statements"] = [s for s in statements if s["version"] == migration["version"]]
+            mark_rebuilds(migration["statements"])
+        result["migrations"] = migrations
+
+        legacy_version = legacy_schema_version(conn)
+        result["legacy_schema_version"] = legacy_version
+        rehearsals = []
+        for rewrite in legacy_rewrites():
+            entry = {k: rewrite[k] for k in ("function", "from_version", "to_version", "table")}
+            entry["rows"] = rows.get(rewrite["table"], 0)
+            # Only rebuild_recordings runs these, for databases still on schema_version
+            entry["pending"] = legacy_version is not None and legacy_version < rewrite["to_version"]
+            try:
+                entry["seconds"] = round(rehearse_rewrite(conn, rewrite), 6)
+            except sqlite3.Error as e:
+                entry["error"] = str(e)
+            rehearsals.append(entry)
+        result["legacy_rewrites"] = rehearsals
+    finally:
+        conn.close()
+        if not keep:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(copy + suffix):
+                    os.remove(copy + suffix)
+    if keep:
+        result["copy"] = copy
+    return result
+
+
+def growing_tables(rows):
+    """Tables holding at least 1% of all rows; config tables (streams, users...) stay small"""
+    total = sum(rows.values())
+    return {table for table, count in rows.items() if total and count * 100 >= total}
+
+
+def estimate(result, target_size):
+    """Scale the measured times from the snapshot size to target_size
+
+    Only statements that touch every row of a table that grows with the
+    database (recordings, detections, events...) are scaled; the commit of a
+    migration is scaled along with them.
+    """
+    factor = target_size / result["size_bytes"] if result["size_bytes"] else 1.0
+    growing = growing_tables(result["rows"])
+    total = 0.0
+    for migration in result["migrations"]:
+        scaled = [s for s in migration["statements"] if s["scales"] and s["source"] in growing]
+        if scaled:
+            fixed = sum(s["seconds"] for s in migration["statements"] if s not in scaled)
+            migration["estimated_seconds"] = round(fixed + (migration["seconds"] - fixed) * factor, 3)
+        else:
+            migration["estimated_seconds"] = round(migration["seconds"], 3)
+        total += migration["estimated_seconds"]
+    for rewrite in result["legacy_rewrites"]:
+        if "seconds" in rewrite:
+            scale = factor if rewrite["table"] in growing else 1.0
+            rewrite["estimated_seconds"] = round(rewrite["seconds"] * scale, 3)
+            if rewrite["pending"]:
+                total += rewrite["estimated_seconds"]
+    result["target_size_bytes"] = target_size
+    result["estimated_downtime_seconds"] = round(total, 3)
+    return result
+
+
+def print_report(results):
+    for result in results:
+        print(f"\n{result['snapshot']} ({format_size(result['size_bytes'])}, "
+              f"{result['rows'].get('recordings', 0):,} recordings, "
+              f"{result['rows'].get('detections', 0):,} detections)")
+        print(f"  snapshot copy: {result['copy_seconds']:.2f}s")
+        if result["rewound"]:
+            print(f"  replaying: {', '.join(sorted(result['rewound']))}")
+        if not result["migrations"]:
+            print("  no pending migrations")
+        for migration in result["migrations"]:
+            print(f"  {migration['version']} {migration['description']:<28} "
+                  f"{migration['seconds'] * 1000:>10.1f}ms  est. {migration['estimated_seconds']:.2f}s")
+            for s in migration["statements"]:
+                if not s["executed"]:
+                    note = "skipped (already applied)"
+                else:
+                    note = f"{s['seconds'] * 1000:.1f}ms"
+                    if s["scales"]:
+                        note += f", {s['rows']:,} rows"
+                        if s["source"] != s["table"]:
+                            note += f" of {s['source']}"
+                    if s["rewrite"]:
+                        note += ", REWRITES TABLE"
+                print(f"      {s['operation']:<13} {s['table'] or '':<18} {note}")
+        for rewrite in result["legacy_rewrites"]:
+            state = "pending" if rewrite["pending"] else "not pending"
+            timing = (f"{rewrite['seconds'] * 1000:.1f}ms, est. {rewrite['estimated_seconds']:.2f}s"
+                      if "seconds" in rewrite else f"failed: {rewrite['error']}")
+            print(f"  legacy {rewrite['function']} rebuilds {rewrite['table']} "
+                  f"({rewrite['rows']:,} rows, {state}): {timing}")
+        print(f"  estimated downtime at {format_size(result['target_size_bytes'])}: "
+              f"{result['estimated_downtime_seconds']:.2f}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dry-run LightNVR schema migrations on snapshot copies")
+    parser.add_argument("--db", action="append", default=[],
+                        help="Database snapshot to test (repeatable); it is copied, never modified")
+    parser.add_argument("--days", default="7",
+                        help="Without --db, generate snapshots with these history lengths (default: 7)")
+    parser.add_argument("--streams", type=int, default=16, help="Cameras per generated DB (default: 16)")
+    parser.add_argument("--seed", type=int, default=1, help="Generator seed (default: 1)")
+    parser.add_argument("--work-dir", default="/tmp/lightnvr-migrate",
+                        help="Where copies and generated snapshots go (default: /tmp/lightnvr-migrate)")
+    parser.add_argument("--migrations-dir", default=generate_test_db.MIGRATIONS_DIR,
+                        help="Migration SQL directory (default: db/migrations)")
+    parser.add_argument("--replay-from", metavar="VERSION",
+                        help="Roll back migrations >= VERSION on the copy first and time them again")
+    parser.add_argument("--target-size", type=parse_size, default=None,
+                        help="Estimate downtime for a database of this size, e.g. 8G "
+                             "(default: each snapshot's own size)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Snapshots tested in parallel (default: CPU count)")
+    parser.add_argument("--keep", action="store_true", help="Keep the migrated copies")
+    parser.add_argument("--report", help="Write the full results as JSON to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.work_dir, exist_ok=True)
+    if args.db:
+        snapshots = args.db
+    else:
+        snapshots = [bench_queries.generated_database(args.work_dir, float(days), args.streams, args.seed)
+                     for days in args.days.split(",") if days.strip()]
+    missing = [s for s in snapshots if not os.path.exists(s)]
+    if missing:
+        print(f"Snapshot not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    jobs = max(1, min(args.jobs, len(snapshots)))
+    print(f"Dry-running migrations on {len(snapshots)} snapshot(s), {jobs} at a time", file=sys.stderr)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(dry_run, s, args.work_dir, args.migrations_dir, args.replay_from, args.keep)
+                   for s in snapshots]
+        results = []
+        failed = False
+        for snapshot, future in zip(snapshots, futures):
+            try:
+                results.append(future.result())
+            except sqlite3.Error as e:
+                print(f"{snapshot}: migration failed: {e}", file=sys.stderr)
+                failed = True
+
+    for result in results:
+        estimate(result, args.target_size or result["size_bytes"])
+    print_report(results)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"generated_at": int(time.time()), "snapshots": results}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,725 @@
+#!/usr/bin/env python3
+"""
+Profile the lightnvr daemon under API load, one endpoint at a time.
+
+Starts build/bin/lightnvr with a copy of config/lightnvr-test.ini pointed at
+a generated database, then drives each REST endpoint in its own phase while
+sampling the process. Because only one endpoint is loaded at a time, every
+sample taken during a phase is attributed to that endpoint; an idle phase
+first measures the background cost (storage manager, stream threads) so it
+can be subtracted from the per-request CPU figures.
+
+Samplers, picked automatically in this order unless --sampler is given:
+  perf  perf record -g; on-CPU stacks (needs perf_event_paranoid <= 1 or root)
+  gdb   periodic "thread apply all bt"; on-CPU (running threads) and wall
+        (all threads) stacks, but pauses the daemon briefly on every sample
+  proc  /proc/<pid>/task thread states and wait channels only, no user stacks
+
+For each endpoint the results directory gets <endpoint>.cpu.folded (and
+.wall.folded where available) in the collapsed-stack format used by
+flamegraph.pl and speedscope, an SVG flame graph of each, and summary.json.
+
+Usage:
+    ./scripts/profile_daemon.py --days 7 --duration 20
+    ./scripts/profile_daemon.py --db /tmp/lightnvr-copy.db --endpoints recordings,timeline
+"""
+
+import argparse
+import base64
+import collections
+import configparser
+import hashlib
+import html
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate_test_db  # noqa: E402
+
+REPO_ROOT = generate_test_db.REPO_ROOT
+DEFAULT_BINARY = os.path.join(REPO_ROOT, "build", "bin", "lightnvr")
+DEFAULT_CONFIG = os.path.join(REPO_ROOT, "config", "lightnvr-test.ini")
+WORK_DIR = "/tmp/lightnvr-profile"
+
+ENDPOINTS = ["recordings", "timeline", "detection", "streams"]
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+# --- Daemon setup ---------------------------------------------------------
+
+def prepare_database(work_dir, source_db, days, streams, seed):
+    """Copy or generate the database the daemon will run against"""
+    path = os.path.join(work_dir, "lightnvr.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    if source_db:
+        src = sqlite3.connect(f"file:{source_db}?mode=ro", uri=True)
+        dst = sqlite3.connect(path)
+        src.backup(dst)
+        src.close()
+        dst.close()
+    else:
+        # Newest segment is "now" so retention does not see the data as expired
+        args = generate_test_db.generation_args(path, streams=streams, days=days,
+                                                end_time=int(time.time()))
+        generate_test_db.build_database(args, random.Random(seed))
+
+    # Profile the API, not camera connections or retention deleting the data set
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("UPDATE streams SET enabled = 0")
+    for column in ("retention_days", "detection_retention_days"):
+        if generate_test_db.column_exists(conn, "streams", column):
+            conn.execute(f"UPDATE streams SET {column} = 0")
+    conn.close()
+    return path
+
+
+def prepare_config(config_path, work_dir, db_path, port, go2rtc):
+    """Write a copy of the test config that uses work_dir and db_path"""
+    config = configparser.ConfigParser(inline_comment_prefixes=(";",), interpolation=None,
+                                       strict=False)
+    config.optionxform = str
+    config.read(config_path)
+
+    def put(section, key, value):
+        if not config.has_section(section):
+            config.add_section(section)
+        config.set(section, key, str(value))
+
+    recordings = os.path.join(work_dir, "recordings")
+    os.makedirs(os.path.join(recordings, "mp4"), exist_ok=True)
+    put("general", "pid_file", os.path.join(work_dir, "lightnvr.pid"))
+    put("general", "log_file", os.path.join(work_dir, "lightnvr.log"))
+    put("general", "log_level", 1)  # WARN, so logging does not dominate the profile
+    put("storage", "path", recordings)
+    put("storage", "mp4_path", os.path.join(recordings, "mp4"))
+    put("storage", "retention_days", 0)
+    put("storage", "mp4_retention_days", 0)
+    put("database", "path", db_path)
+    put("web", "port", port)
+    web_root = config.get("web", "root", fallback="./web/dist")
+    put("web", "root", os.path.normpath(os.path.join(REPO_ROOT, web_root)))
+    if not go2rtc:
+        put("go2rtc", "enabled", "false")
+    else:
+        put("go2rtc", "config_dir", os.path.join(work_dir, "go2rtc"))
+
+    path = os.path.join(work_dir, "lightnvr-profile.ini")
+    with open(path, "w") as f:
+        config.write(f)
+    credentials = (config.get("web", "username", fallback="admin"),
+                   config.get("web", "password", fallback="admin"))
+    return path, credentials
+
+
+class Daemon:
+    """A lightnvr child process"""
+
+    def __init__(self, binary, config_path, work_dir):
+        self.binary = binary
+        self.config_path = config_path
+        self.output_path = os.path.join(work_dir, "lightnvr.out")
+        self.proc = None
+
+    def start(self):
+        output = open(self.output_path, "wb")
+        # Run from the repo root like scripts/start-test-lightnvr.sh
+        self.proc = subprocess.Popen([self.binary, "-c", self.config_path], cwd=REPO_ROOT,
+                                     stdout=output, stderr=subprocess.STDOUT)
+        output.close()
+        return self.proc.pid
+
+    def wait_ready(self, client, timeout=30):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"lightnvr exited with status {self.proc.returncode}, "
+                                   f"see {self.output_path}")
+            try:
+                status, _ = client.get("/api/streams")
+                if status in (200, 401):
+                    return
+            except OSError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f"lightnvr did not answer within {timeout}s, see {self.output_path}")
+
+    def stop(self):
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        self.proc.send_signal(signal.SIGTERM)
+        try:
+            self.proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+# --- Load -----------------------------------------------------------------
+
+class Client:
+    """Keep-alive HTTP client with basic auth, one per worker thread"""
+
+    def __init__(self, port, credentials):
+        self.port = port
+        token = base64.b64encode(f"{credentials[0]}:{credentials[1]}".encode()).decode()
+        self.headers = {"Authorization": f"Basic {token}", "Connection": "keep-alive"}
+        self.conn = None
+
+    def get(self, path):
+        return self.request("GET", path)
+
+    def request(self, method, path, payload=None):
+        """Send a request, JSON-encoding payload if given; returns (status, body)"""
+        headers = dict(self.headers)
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers["Content-Type"] = "application/json"
+        for attempt in (0, 1):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                body = response.read()
+                if response.getheader("Connection", "").lower() == "close":
+                    self.close()
+                return response.status, body
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed a kept-alive connection; retry once on a new one
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts))
+
+
+def endpoint_paths(db_path, name, rng, count=64):
+    """Representative request paths for an endpoint, built from the database"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    streams = [r[0] for r in conn.execute("SELECT name FROM streams ORDER BY name")] or ["camera-01"]
+    end = conn.execute("SELECT COALESCE(MAX(end_time), 0) FROM recordings").fetchone()[0] or int(time.time())
+    pages = max(1, conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0] // 20)
+    conn.close()
+
+    paths = []
+    for _ in range(count):
+        stream = rng.choice(streams)
+        if name == "recordings":
+            # Mostly the first pages, like the UI, with the occasional deep page
+            page = rng.randint(1, 5) if rng.random() < 0.9 else rng.randint(1, pages)
+            sort = rng.choice(["start_time", "start_time", "size_bytes", "stream_name"])
+            paths.append(f"/api/recordings?page={page}&limit=20&sort={sort}&order=desc")
+        elif name == "timeline":
+            day_end = end - rng.randint(0, 6) * 86400
+            paths.append(f"/api/timeline/segments?stream={stream}"
+                         f"&start={iso(day_end - 86400)}&end={iso(day_end)}")
+        elif name == "detection":
+            window_end = end - rng.randint(0, 24) * 3600
+            paths.append(f"/api/detection/results/{stream}?start={window_end - 3600}&end={window_end}")
+        elif name == "streams":
+            paths.append("/api/streams")
+    return paths
+
+
+class Phase:
+    """Closed-loop load against one endpoint for a fixed time"""
+
+    def __init__(self, port, credentials, paths, concurrency, duration):
+        self.port = port
+        self.credentials = credentials
+        self.paths = paths
+        self.concurrency = concurrency
+        self.duration = duration
+        self.latencies = []
+        self.statuses = collections.Counter()
+        self.lock = threading.Lock()
+
+    def _worker(self, index, deadline):
+        client = Client(self.port, self.credentials)
+        latencies = []
+        statuses = collections.Counter()
+        i = index
+        while time.perf_counter() < deadline:
+            path = self.paths[i % len(self.paths)]
+            i += self.concurrency
+            started = time.perf_counter()
+            try:
+                status, _ = client.get(path)
+            except OSError:
+                status = "error"
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+        client.close()
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.statuses.update(statuses)
+
+    def run(self):
+        deadline = time.perf_counter() + self.duration
+        threads = [threading.Thread(target=self._worker, args=(i, deadline), daemon=True)
+                   for i in range(self.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+
+# --- Process accounting ---------------------------------------------------
+
+def read_stat(path):
+    """Return (comm, fields after comm) from a /proc stat file"""
+    with open(path) as f:
+        data = f.read()
+    lparen, rparen = data.index("("), data.rindex(")")
+    return data[lparen + 1:rparen], data[rparen + 2:].split()
+
+
+def process_cpu_seconds(pid):
+    _, fields = read_stat(f"/proc/{pid}/stat")
+    # utime and stime are fields 14 and 15; fields[0] is field 3 (state)
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def thread_cpu_seconds(pid):
+    """CPU seconds per thread name"""
+    totals = collections.Counter()
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        try:
+            comm, fields = read_stat(f"/proc/{pid}/task/{tid}/stat")
+        except OSError:
+            continue
+        totals[comm] += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return totals
+
+
+def thread_states(pid):
+    """{tid: (comm, state)} for the threads of pid"""
+    states = {}
+    try:
+        tids = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return states
+    for tid in tids:
+        try:
+            comm, fields = read_stat(f"/proc/{pid}/task/{tid}/stat")
+        except OSError:
+            continue
+        states[int(tid)] = (comm, fields[0])
+    return states
+
+
+# --- Samplers -------------------------------------------------------------
+
+class PerfSampler:
+    """perf record over the phase, folded with perf script"""
+
+    name = "perf"
+    has_wall = False
+
+    def __init__(self, frequency, work_dir, call_graph):
+        self.frequency = frequency
+        self.work_dir = work_dir
+        self.call_graph = call_graph
+        self.proc = None
+        self.data_path = None
+
+    @staticmethod
+    def available():
+        return shutil.which("perf") is not None
+
+    def start(self, pid):
+        fd, self.data_path = tempfile.mkstemp(prefix="perf-", suffix=".data", dir=self.work_dir)
+        os.close(fd)
+        self.proc = subprocess.Popen(
+            ["perf", "record", "-q", "-F", str(self.frequency), "--call-graph", self.call_graph,
+             "-p", str(pid), "-o", self.data_path],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def stop(self):
+        self.proc.send_signal(signal.SIGINT)
+        _, err = self.proc.communicate()
+        if self.proc.returncode not in (0, -signal.SIGINT):
+            raise RuntimeError(f"perf record failed: {err.decode(errors='replace').strip()}")
+        output = subprocess.run(["perf", "script", "-i", self.data_path],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                check=True).stdout.decode(errors="replace")
+        os.remove(self.data_path)
+        return fold_perf_script(output), None
+
+
+PERF_HEADER = re.compile(r"^(\S.*?)\s+(\d+)(?:/(\d+))?\s")
+
+
+def fold_perf_script(text):
+    """Collapse perf script output into {stack: count}"""
+    folded = collections.Counter()
+    for block in text.split("\n\n"):
+        lines = block.strip("\n").splitlines()
+        if not lines:
+            continue
+        header = PERF_HEADER.match(lines[0])
+        if not header:
+            continue
+        frames = []
+        for line in lines[1:]:
+            parts = line.strip().split(None, 1)
+            if len(parts) < 2:
+                continue
+            symbol, _, dso = parts[1].rpartition(" (")
+            symbol = re.sub(r"\+0x[0-9a-f]+$", "", symbol)
+            if symbol in ("", "[unknown]"):
+                symbol = f"[{os.path.basename(dso.rstrip(')'))}]"
+            frames.append(symbol)
+        folded[";".join([header.group(1)] + frames[::-1])] += 1
+    return folded
+
+
+GDB_THREAD = re.compile(r"^Thread \d+ \(.*?LWP (\d+)\)")
+GDB_FRAME = re.compile(r"^#\d+\s+(?:0x[0-9a-f]+ in )?(\S+)")
+
+
+class GdbSampler:
+    """Periodic gdb backtraces of every thread"""
+
+    name = "gdb"
+    has_wall = True
+
+    def __init__(self, frequency):
+        self.interval = 1.0 / frequency
+        self.cpu = collections.Counter()
+        self.wall = collections.Counter()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    @staticmethod
+    def available():
+        return shutil.which("gdb") is not None
+
+    def start(self, pid):
+        self.cpu.clear()
+        self.wall.clear()
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, args=(pid,), daemon=True)
+        self.thread.start()
+
+    def _run(self, pid):
+        while not self.stopping.is_set():
+            started = time.monotonic()
+            self.sample(pid)
+            self.stopping.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def sample(self, pid):
+        # States are read before attaching; once gdb stops the process every
+        # thread shows as traced
+        states = thread_states(pid)
+        result = subprocess.run(
+            ["gdb", "-p", str(pid), "-batch", "-nx", "-ex", "set pagination off",
+             "-ex", "thread apply all bt"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        tid = None
+        frames = []
+        for line in result.stdout.decode(errors="replace").splitlines() + [""]:
+            match = GDB_THREAD.match(line)
+            if match or not line.strip():
+                if tid is not None and frames:
+                    comm, state = states.get(tid, ("?", "?"))
+                    stack = ";".join([comm] + frames[::-1])
+                    self.wall[stack] += 1
+                    if state == "R":
+                        self.cpu[stack] += 1
+                tid = int(match.group(1)) if match else None
+                frames = []
+                continue
+            frame = GDB_FRAME.match(line.strip())
+            if tid is not None and frame:
+                frames.append(frame.group(1))
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+        return collections.Counter(self.cpu), collections.Counter(self.wall)
+
+
+class ProcSampler:
+    """Thread states and wait channels from /proc; no user-space stacks"""
+
+    name = "proc"
+    has_wall = True
+
+    def __init__(self, frequency):
+        self.gdb = GdbSampler(frequency)
+        self.gdb.sample = self.sample
+
+    @staticmethod
+    def available():
+        return True
+
+    def start(self, pid):
+        self.gdb.start(pid)
+
+    def sample(self, pid):
+        for tid, (comm, state) in thread_states(pid).items():
+            try:
+                with open(f"/proc/{pid}/task/{tid}/wchan") as f:
+                    wchan = f.read().strip() or "0"
+            except OSError:
+                wchan = "0"
+            where = "running" if state == "R" else (wchan if wchan != "0" else f"state {state}")
+            stack = f"{comm};{where}"
+            self.gdb.wall[stack] += 1
+            if state == "R":
+                self.gdb.cpu[stack] += 1
+
+    def stop(self):
+        return self.gdb.stop()
+
+
+def make_sampler(name, frequency, work_dir, call_graph):
+    choices = {
+        "perf": lambda: PerfSampler(frequency, work_dir, call_graph),
+        "gdb": lambda: GdbSampler(min(frequency, 20)),
+        "proc": lambda: ProcSampler(frequency),
+    }
+    if name == "auto":
+        name = next(n for n, cls in (("perf", PerfSampler), ("gdb", GdbSampler), ("proc", ProcSampler))
+                    if cls.available())
+    return choices[name]()
+
+
+# --- Output ---------------------------------------------------------------
+
+def write_folded(path, folded):
+    with open(path, "w") as f:
+        for stack, count in sorted(folded.items()):
+            f.write(f"{stack} {count}\n")
+
+
+def top_frames(folded, limit=5):
+    """Leaf frames by share of samples"""
+    total = sum(folded.values())
+    leaves = collections.Counter()
+    for stack, count in folded.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    return [{"frame": frame, "percent": round(100.0 * count / total, 1)}
+            for frame, count in leaves.most_common(limit)] if total else []
+
+
+def frame_color(name):
+    digest = hashlib.md5(name.encode()).digest()
+    return f"rgb({205 + digest[0] % 50},{digest[1] % 230},{digest[2] % 55})"
+
+
+def write_flame_graph(path, folded, title, width=1200, frame_height=16):
+    """Render folded stacks as a standalone SVG flame graph"""
+    root = {"children": {}, "count": 0}
+    for stack, count in folded.items():
+        node = root
+        node["count"] += count
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"children": {}, "count": 0})
+            node["count"] += count
+    total = root["count"]
+
+    rects = []
+    depth_max = 0
+    min_width = 0.1  # pixels; narrower frames are dropped
+
+    def layout(node, x, depth):
+        nonlocal depth_max
+        for frame, child in sorted(node["children"].items()):
+            w = (width - 20) * child["count"] / total
+            if w >= min_width:
+                depth_max = max(depth_max, depth)
+                rects.append((x, depth, w, frame, child["count"]))
+                layout(child, x, depth + 1)
+            x += w
+
+    if total:
+        layout(root, 10.0, 0)
+    height = (depth_max + 1) * frame_height + 60
+
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'font-family="monospace" font-size="11">',
+           f'<rect width="100%" height="100%" fill="#f8f8f8"/>',
+           f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="15">'
+           f'{html.escape(title)} ({total} samples)</text>']
+    for x, depth, w, frame, count in rects:
+        y = height - 20 - (depth + 1) * frame_height
+        label = html.escape(frame)
+        out.append(f'<g><title>{label} ({count} samples, {100.0 * count / total:.2f}%)</title>'
+                   f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+                   f'fill="{frame_color(frame)}" rx="2"/>')
+        chars = int(w / 7)
+        if chars >= 3:
+            text = frame if len(frame) <= chars else frame[:chars - 2] + ".."
+            out.append(f'<text x="{x + 3:.1f}" y="{y + frame_height - 4}">{html.escape(text)}</text>')
+        out.append("</g>")
+    out.append("</svg>")
+    with open(path, "w") as f:
+        f.write("\n".join(out))
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+def print_summary(results, sampler):
+    print(f"\nSampler: {sampler}")
+    print(f"{'endpoint':<12} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7} {'cpu ms/req':>11} {'cpu %':>7}  top frames")
+    for name, r in results.items():
+        top = ", ".join(f"{t['frame']} {t['percent']}%" for t in r["top_cpu_frames"][:3])
+        print(f"{name:<12} {r['requests']:>9} {r['requests_per_second']:>8.1f} "
+              f"{r['latency_ms']['p50']:>8.2f} {r['latency_ms']['p99']:>8.2f} {r['errors']:>7} "
+              f"{r['cpu_ms_per_request']:>11.3f} {r['cpu_percent']:>7.1f}  {top}")
+
+
+# --- Main -----------------------------------------------------------------
+
+def run_phase(name, pid, sampler, phase, results_dir, idle_seconds=0):
+    """Sample pid while phase runs (or for idle_seconds without load)"""
+    cpu_before = process_cpu_seconds(pid)
+    threads_before = thread_cpu_seconds(pid)
+    sampler.start(pid)
+    started = time.perf_counter()
+    if phase is None:
+        time.sleep(idle_seconds)
+    else:
+        phase.run()
+    elapsed = time.perf_counter() - started
+    cpu_folded, wall_folded = sampler.stop()
+    cpu_seconds = process_cpu_seconds(pid) - cpu_before
+    threads = thread_cpu_seconds(pid)
+    threads.subtract(threads_before)
+
+    write_folded(os.path.join(results_dir, f"{name}.cpu.folded"), cpu_folded)
+    write_flame_graph(os.path.join(results_dir, f"{name}.cpu.svg"), cpu_folded,
+                      f"{name}: on-CPU ({sampler.name})")
+    if wall_folded is not None:
+        write_folded(os.path.join(results_dir, f"{name}.wall.folded"), wall_folded)
+        write_flame_graph(os.path.join(results_dir, f"{name}.wall.svg"), wall_folded,
+                          f"{name}: all threads ({sampler.name})")
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "thread_cpu_seconds": {k: round(v, 3) for k, v in threads.most_common() if v > 0},
+        "cpu_samples": sum(cpu_folded.values()),
+        "top_cpu_frames": top_frames(cpu_folded),
+        "top_wall_frames": top_frames(wall_folded) if wall_folded is not None else [],
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Profile lightnvr under per-endpoint API load")
+    parser.add_argument("--binary", default=DEFAULT_BINARY, help=f"lightnvr binary (default: {DEFAULT_BINARY})")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="Base config file (default: config/lightnvr-test.ini)")
+    parser.add_argument("--db", help="Profile against a copy of this database instead of generating one")
+    parser.add_argument("--days", type=float, default=7, help="Days of history to generate (default: 7)")
+    parser.add_argument("--streams", type=int, default=8, help="Cameras to generate (default: 8)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--work-dir", default=WORK_DIR, help=f"Scratch and results directory (default: {WORK_DIR})")
+    parser.add_argument("--port", type=int, default=18090, help="Web port for the profiled daemon (default: 18090)")
+    parser.add_argument("--go2rtc", action="store_true", help="Leave go2rtc enabled as in the test config")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"Comma separated phases (default: {','.join(ENDPOINTS)})")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per endpoint phase (default: 15)")
+    parser.add_argument("--idle", type=float, default=5, help="Seconds of idle baseline (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients (default: 4)")
+    parser.add_argument("--sampler", choices=["auto", "perf", "gdb", "proc"], default="auto")
+    parser.add_argument("--frequency", type=int, default=99, help="Samples per second (default: 99; gdb max 20)")
+    parser.add_argument("--call-graph", default="dwarf", help="perf --call-graph mode (default: dwarf)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    endpoints = [e for e in args.endpoints.split(",") if e]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        print(f"Unknown endpoints: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 1
+    if not os.path.exists(args.binary):
+        print(f"lightnvr binary not found at {args.binary}, build it first: ./scripts/build.sh",
+              file=sys.stderr)
+        return 1
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    results_dir = os.path.join(args.work_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+
+    db_path = prepare_database(args.work_dir, args.db, args.days, args.streams, args.seed)
+    config_path, credentials = prepare_config(args.config, args.work_dir, db_path, args.port, args.go2rtc)
+    sampler = make_sampler(args.sampler, args.frequency, args.work_dir, args.call_graph)
+    rng = random.Random(args.seed)
+
+    daemon = Daemon(args.binary, config_path, args.work_dir)
+    results = collections.OrderedDict()
+    try:
+        pid = daemon.start()
+        daemon.wait_ready(Client(args.port, credentials))
+        print(f"lightnvr running as pid {pid}, sampling with {sampler.name}", file=sys.stderr)
+
+        print(f"idle baseline ({args.idle:g}s)...", file=sys.stderr)
+        idle = run_phase("idle", pid, sampler, None, results_dir, args.idle)
+        idle_cpu_rate = idle["cpu_seconds"] / max(idle["elapsed_seconds"], 1e-9)
+
+        for name in endpoints:
+            print(f"{name} ({args.duration:g}s x {args.concurrency} clients)...", file=sys.stderr)
+            phase = Phase(args.port, credentials, endpoint_paths(db_path, name, rng),
+                          args.concurrency, args.duration)
+            r = run_phase(name, pid, sampler, phase, results_dir)
+            requests = len(phase.latencies)
+            errors = sum(c for s, c in phase.statuses.items() if s == "error" or s >= 400)
+            api_cpu = max(0.0, r["cpu_seconds"] - idle_cpu_rate * r["elapsed_seconds"])
+            r.update({
+                "requests": requests,
+                "requests_per_second": round(requests / r["elapsed_seconds"], 1),
+                "statuses": {str(k): v for k, v in phase.statuses.items()},
+                "errors": errors,
+                "latency_ms": {p: round(percentile(phase.latencies, q) * 1000, 3)
+                               for p, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+                "cpu_ms_per_request": round(1000 * api_cpu / requests, 3) if requests else 0.0,
+                "cpu_percent": round(100 * r["cpu_seconds"] / r["elapsed_seconds"], 1),
+            })
+            results[name] = r
+    finally:
+        daemon.stop()
+
+    with open(os.path.join(results_dir, "summary.json"), "w") as f:
+        json.dump({"generated_at": int(time.time()), "sampler": sampler.name,
+                   "database": db_path, "concurrency": args.concurrency,
+                   "idle": idle, "endpoints": results}, f, indent=2)
+
+    print_summary(results, sampler.name)
+    print(f"\nFlame graphs and folded stacks in {results_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
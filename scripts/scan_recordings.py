@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Find truncated or corrupt MP4 recordings without decoding them
+
+Every .mp4 under the recordings tree is checked in a process pool by
+walking its top-level boxes: each box header must fit in the file, the
+mdat payload must end within the file, and there must be a moov box. A
+segment cut off by a power loss typically ends inside mdat (ffmpeg writes
+the real mdat size and the moov only when the file is closed), so these
+checks find it from a few header reads per file.
+
+Results are appended to a checkpoint file as they come in; re-running with
+the same checkpoint skips files already scanned whose size and mtime are
+unchanged, so a multi-terabyte scan can be interrupted and resumed. Bad
+files are written to a JSON report and, with --db --mark-incomplete, their
+recordings rows get is_complete = 0 so the UI and retention treat them as
+partial.
+
+Usage:
+    ./scripts/scan_recordings.py --recordings-dir /var/lib/lightnvr/recordings --report scan.json
+    ./scripts/scan_recordings.py --recordings-dir /mnt/archive --jobs 8 --checkpoint /tmp/archive.scan
+    ./scripts/scan_recordings.py --recordings-dir /var/lib/lightnvr/recordings \\
+        --db /var/lib/lightnvr/lightnvr.db --mark-incomplete
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import struct
+import sys
+import time
+
+DEFAULT_RECORDINGS_DIR = "/var/lib/lightnvr/recordings"
+
+BOX_HEADER = struct.Struct(">I4s")
+LARGE_SIZE = struct.Struct(">Q")
+
+# Top-level boxes expected at the start of a file
+FILE_TYPES = {b"ftyp", b"styp"}
+
+# Skip files modified more recently than this; they may still be recording
+DEFAULT_MIN_AGE = 120
+
+# How many results to buffer before appending them to the checkpoint
+CHECKPOINT_EVERY = 200
+
+
+# ── MP4 checks ──────────────────────────────────────────────────────
+
+def check_mp4(path):
+    """Walk the top-level boxes of path; returns a result dict"""
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        return {"path": path, "size": 0, "mtime": 0, "ok": False, "problems": [f"stat failed: {e}"],
+                "boxes": []}
+    result = {"path": path, "size": st.st_size, "mtime": int(st.st_mtime), "problems": [], "boxes": []}
+    problems = result["problems"]
+    if st.st_size == 0:
+        problems.append("empty file")
+        result["ok"] = False
+        return result
+
+    try:
+        with open(path, "rb") as f:
+            offset = 0
+            while offset < st.st_size:
+                remaining = st.st_size - offset
+                if remaining < BOX_HEADER.size:
+                    problems.append(f"{remaining} trailing bytes at {offset}")
+                    break
+                f.seek(offset)
+                size, kind = BOX_HEADER.unpack(f.read(BOX_HEADER.size))
+                header = BOX_HEADER.size
+                if size == 1:
+                    data = f.read(LARGE_SIZE.size)
+                    if len(data) < LARGE_SIZE.size:
+                        problems.append(f"truncated 64-bit size for {kind!r} at {offset}")
+                        break
+                    size = LARGE_SIZE.unpack(data)[0]
+                    header += LARGE_SIZE.size
+                elif size == 0:
+                    # Box extends to the end of the file
+                    size = remaining
+                name = kind.decode("latin-1")
+                if not kind.isascii() or size < header:
+                    problems.append(f"invalid box header {kind!r} (size {size}) at {offset}")
+                    break
+                result["boxes"].append([name, offset, size])
+                if size > remaining:
+                    problems.append(f"{name} at {offset} needs {size} bytes, only {remaining} in file")
+                    break
+                offset += size
+    except OSError as e:
+        problems.append(f"read failed: {e}")
+
+    kinds = [box[0] for box in result["boxes"]]
+    if kinds and kinds[0].encode() not in FILE_TYPES:
+        problems.append(f"starts with {kinds[0]}, not ftyp")
+    if "moov" not in kinds:
+        problems.append("no moov box")
+    if "mdat" not in kinds and "moof" not in kinds:
+        problems.append("no mdat box")
+    result["ok"] = not problems
+    return result
+
+
+# ── Checkpoint ──────────────────────────────────────────────────────
+
+def load_checkpoint(path):
+    """{file path: result} from an earlier (possibly interrupted) run"""
+    results = {}
+    if not path or not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # Last line of an interrupted run
+                continue
+            results[result["path"]] = result
+    return results
+
+
+def find_mp4s(root, min_age, done):
+    """Yield files under root that still need scanning (sorted, for stable progress)"""
+    cutoff = time.time() - min_age
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if not name.lower().endswith(".mp4"):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_mtime > cutoff:
+                continue
+            previous = done.get(path)
+            if previous and previous["size"] == st.st_size and previous["mtime"] == int(st.st_mtime):
+                continue
+            yield path
+
+
+def scan(root, jobs, checkpoint, min_age, progress_every=5.0):
+    """Scan root, appending to checkpoint; returns {path: result} including earlier runs"""
+    results = load_checkpoint(checkpoint)
+    if results:
+        print(f"Resuming: {len(results):,} files already scanned", file=sys.stderr)
+
+    out = open(checkpoint, "a") if checkpoint else None
+    pending = []
+    scanned = bad = scanned_bytes = 0
+    started = last_report = time.time()
+    try:
+        with multiprocessing.Pool(jobs) as pool:
+            for result in pool.imap_unordered(check_mp4, find_mp4s(root, min_age, results), chunksize=16):
+                results[result["path"]] = result
+                scanned += 1
+                scanned_bytes += result["size"]
+                bad += not result["ok"]
+                if out:
+                    pending.append(json.dumps(result))
+                    if len(pending) >= CHECKPOINT_EVERY:
+                        out.write("\n".join(pending) + "\n")
+                        out.flush()
+                        pending.clear()
+                now = time.time()
+                if now - last_report >= progress_every:
+                    last_report = now
+                    rate = scanned / (now - started)
+                    print(f"  {scanned:,} files ({scanned_bytes / 1024 ** 4:.2f} TB), {bad:,} bad, "
+                          f"{rate:.0f} files/s", file=sys.stderr)
+    finally:
+        if out:
+            if pending:
+                out.write("\n".join(pending) + "\n")
+            out.close()
+    print(f"Scanned {scanned:,} files in {time.time() - started:.1f}s, {bad:,} bad", file=sys.stderr)
+    return results
+
+
+# ── Database ────────────────────────────────────────────────────────
+
+def recording_rows(conn, paths):
+    """{file path: (id, is_complete)} for the given paths"""
+    rows = {}
+    paths = list(paths)
+    for start in range(0, len(paths), 500):
+        batch = paths[start:start + 500]
+        query = ("SELECT file_path, id, is_complete FROM recordings WHERE file_path IN (%s)"
+                 % ",".join("?" * len(batch)))
+        for file_path, recording_id, is_complete in conn.execute(query, batch):
+            rows[file_path] = (recording_id, is_complete)
+    return rows
+
+
+def mark_incomplete(db, bad, dry_run=False):
+    """Set is_complete = 0 on the recordings rows of bad files; returns (matched, changed)"""
+    conn = sqlite3.connect(db, timeout=30)
+    try:
+        rows = recording_rows(conn, (r["path"] for r in bad))
+        for result in bad:
+            row = rows.get(result["path"])
+            result["recording_id"] = row[0] if row else None
+        ids = [row[0] for row in rows.values() if row[1]]
+        if ids and not dry_run:
+            with conn:
+                conn.executemany("UPDATE recordings SET is_complete = 0 WHERE id = ?", ((i,) for i in ids))
+        return len(rows), len(ids)
+    finally:
+        conn.close()
+
+
+def write_report(path, root, results, bad):
+    summary = {
+        "recordings_dir": root,
+        "generated_at": int(time.time()),
+        "files": len(results),
+        "bytes": sum(r["size"] for r in results.values()),
+        "bad": len(bad),
+    }
+    with open(path, "w") as f:
+        json.dump({"summary": summary, "bad": bad}, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check LightNVR MP4 recordings for truncation")
+    parser.add_argument("--recordings-dir", default=DEFAULT_RECORDINGS_DIR,
+                        help=f"Tree to scan (default: {DEFAULT_RECORDINGS_DIR})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--checkpoint",
+                        help="Append results here and skip files already in it (for resuming)")
+    parser.add_argument("--min-age", type=int, default=DEFAULT_MIN_AGE,
+                        help=f"Skip files modified in the last N seconds (default: {DEFAULT_MIN_AGE})")
+    parser.add_argument("--report", help="Write the bad files and a summary as JSON here")
+    parser.add_argument("--db", help="LightNVR database to match bad files against")
+    parser.add_argument("--mark-incomplete", action="store_true",
+                        help="Set is_complete = 0 on the recordings rows of bad files (needs --db)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="With --mark-incomplete, only report the rows that would change")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.isdir(args.recordings_dir):
+        print(f"Recordings directory not found: {args.recordings_dir}", file=sys.stderr)
+        return 1
+    if args.mark_incomplete and not args.db:
+        print("--mark-incomplete needs --db", file=sys.stderr)
+        return 1
+
+    results = scan(os.path.abspath(args.recordings_dir), max(1, args.jobs), args.checkpoint, args.min_age)
+    bad = sorted((r for r in results.values() if not r["ok"] and os.path.exists(r["path"])),
+                 key=lambda r: r["path"])
+    for result in bad:
+        print(f"{result['path']}: {'; '.join(result['problems'])}")
+
+    if args.db:
+        try:
+            matched, changed = mark_incomplete(args.db, bad, dry_run=not args.mark_incomplete or args.dry_run)
+        except sqlite3.Error as e:
+            print(f"Database update failed: {e}", file=sys.stderr)
+            return 1
+        action = "marked" if args.mark_incomplete and not args.dry_run else "would mark"
+        print(f"{matched:,} bad files have recordings rows; {action} {changed:,} as incomplete",
+              file=sys.stderr)
+
+    if args.report:
+        write_report(args.report, args.recordings_dir, results, bad)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -61,6 +61,9 @@ void load_default_config(config_t *config) {
 
     // Database settings
     snprintf(config->db_path, MAX_PATH_LENGTH, "/var/lib/lightnvr/lightnvr.db");
+    config->detection_block_storage = false;
+    config->db_backup_interval_hours = 0;
+    config->db_backup_compress = false;
     
     // Web server settings
     config->web_port = 8080;
@@ -387,6 +390,12 @@ static int config_ini_handler(void* user, const char* section, const char* name,
     else if (strcmp(section, "database") == 0) {
         if (strcmp(name, "path") == 0) {
             strncpy(config->db_path, value, MAX_PATH_LENGTH - 1);
+        } else if (strcmp(name, "detection_storage") == 0) {
+            config->detection_block_storage = strcmp(value, "blocks") == 0;
+        } else if (strcmp(name, "backup_interval_hours") == 0) {
+            config->db_backup_interval_hours = atoi(value);
+        } else if (strcmp(name, "backup_compress") == 0) {
+            config->db_backup_compress = (strcmp(value, "true") == 0 || strcmp(value, "1") == 0);
         }
     }
     // Web server settings
@@ -1057,7 +1066,10 @@ int save_config(const config_t *config, const char *path) {
 
     // Write database settings
     fprintf(file, "[database]\n");
-    fprintf(file, "path = %s\n\n", config->db_path);
+    fprintf(file, "path = %s\n", config->db_path);
+    fprintf(file, "detection_storage = %s\n", config->detection_block_storage ? "blocks" : "rows");
+    fprintf(file, "backup_interval_hours = %d\n", config->db_backup_interval_hours);
+    fprintf(file, "backup_compress = %s\n\n", config->db_backup_compress ? "true" : "false");
     
     // Write web server settings
     fprintf(file, "[web]\n");
@@ -1171,6 +1183,9 @@ void print_config(const config_t *config) {
     
     printf("  Database Settings:\n");
     printf("    Database Path: %s\n", config->db_path);
+    printf("    Detection Storage: %s\n", config->detection_block_storage ? "blocks" : "rows");
+    printf("    Backup Interval: %d hours\n", config->db_backup_interval_hours);
+    printf("    Backup Compress: %s\n", config->db_backup_compress ? "true" : "false");
     
     printf("  Web Server Settings:\n");
     printf("    Web Port: %d\n", config->web_port);
@@ -518,6 +518,17 @@ int main(int argc, char *argv[]) {
     init_schema_cache();
     log_info("Schema cache initialized");
 
+    // Start the writer thread that batches detection, event and recording progress writes
+    if (start_db_write_queue() != 0) {
+        log_warn("Failed to start database write queue, writes will be synchronous");
+    }
+
+    // Older detections are packed into blocks by the storage manager thread
+    set_detection_block_storage(config.detection_block_storage);
+
+    // Scheduled online backups are run by the storage manager thread
+    set_database_backup_schedule(config.db_backup_interval_hours * 3600, config.db_backup_compress);
+
     // Initialize storage manager
     if (init_storage_manager(config.storage_path, config.max_storage_size) != 0) {
         log_error("Failed to initialize storage manager");
@@ -14,6 +14,7 @@
 #include <errno.h>
 #include <stdbool.h>
 #include <fcntl.h>
+#include <sys/wait.h>
 
 #include "database/db_core.h"
 #include "database/db_backup.h"
@@ -23,6 +24,154 @@
 // Flag to indicate if a backup is in progress
 static bool backup_in_progress = false;
 
+// State of the online backup; the mutex guards it against cancel_online_backup() from another thread
+static pthread_mutex_t online_backup_mutex = PTHREAD_MUTEX_INITIALIZER;
+static struct {
+    sqlite3 *dest_db;
+    sqlite3_backup *backup;
+    char dest_path[1024];
+    char temp_path[1040];
+    bool compress;
+    time_t start_time;
+    int total_pages;
+    int remaining_pages;
+    int reported_percent;
+} online_backup = {0};
+
+// Open a database file read-only and run an integrity check on it
+static int verify_database_file(const char *path) {
+    sqlite3 *test_db;
+    sqlite3_stmt *stmt = NULL;
+    int result = -1;
+
+    int rc = sqlite3_open_v2(path, &test_db, SQLITE_OPEN_READONLY, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Database file %s appears to be corrupt: %s", path, sqlite3_errmsg(test_db));
+        sqlite3_close(test_db);
+        return -1;
+    }
+
+    rc = sqlite3_prepare_v2(test_db, "PRAGMA integrity_check;", -1, &stmt, NULL);
+    if (rc == SQLITE_OK) {
+        if (sqlite3_step(stmt) == SQLITE_ROW) {
+            const char *check_result = (const char *)sqlite3_column_text(stmt, 0);
+            if (check_result && strcmp(check_result, "ok") == 0) {
+                result = 0;
+            } else {
+                log_error("Integrity check of %s failed: %s", path, check_result ? check_result : "unknown error");
+            }
+        }
+        sqlite3_finalize(stmt);
+    } else {
+        log_error("Failed to prepare integrity check for %s: %s", path, sqlite3_errmsg(test_db));
+    }
+
+    sqlite3_close(test_db);
+    return result;
+}
+
+// Gzip a file with a low-priority gzip process (no zlib in the build)
+static int compress_backup_file(const char *src_path, const char *dest_path) {
+    int fd = open(dest_path, O_WRONLY | O_CREAT | O_TRUNC, 0644);
+    if (fd < 0) {
+        log_error("Failed to create compressed backup %s: %s", dest_path, strerror(errno));
+        return -1;
+    }
+
+    pid_t pid = fork();
+    if (pid < 0) {
+        log_error("Failed to start gzip: %s", strerror(errno));
+        close(fd);
+        return -1;
+    }
+
+    if (pid == 0) {
+        dup2(fd, STDOUT_FILENO);
+        close(fd);
+        if (nice(19) == -1) {
+            // Still compress at normal priority
+        }
+        execlp("gzip", "gzip", "-c", src_path, (char *)NULL);
+        _exit(127);
+    }
+
+    close(fd);
+
+    int status = 0;
+    if (waitpid(pid, &status, 0) < 0 || !WIFEXITED(status) || WEXITSTATUS(status) != 0) {
+        log_error("gzip failed for %s", src_path);
+        unlink(dest_path);
+        return -1;
+    }
+
+    return 0;
+}
+
+// Release the online backup; the caller holds online_backup_mutex
+static void close_online_backup(void) {
+    if (online_backup.backup) {
+        pthread_mutex_t *db_mutex = get_db_mutex();
+        pthread_mutex_lock(db_mutex);
+        sqlite3_backup_finish(online_backup.backup);
+        pthread_mutex_unlock(db_mutex);
+        online_backup.backup = NULL;
+    }
+    if (online_backup.dest_db) {
+        sqlite3_close(online_backup.dest_db);
+        online_backup.dest_db = NULL;
+    }
+    backup_in_progress = false;
+}
+
+// Verify the finished copy and move it into place; the caller holds online_backup_mutex
+static int complete_online_backup(void) {
+    // The copy takes the journal mode of the source; switch it back so the
+    // backup is a single self-contained file
+    sqlite3_exec(online_backup.dest_db, "PRAGMA journal_mode=DELETE;", NULL, NULL, NULL);
+    close_online_backup();
+
+    int fd = open(online_backup.temp_path, O_RDONLY);
+    if (fd < 0 || fsync(fd) != 0) {
+        log_error("Failed to sync backup %s: %s", online_backup.temp_path, strerror(errno));
+        if (fd >= 0) {
+            close(fd);
+        }
+        unlink(online_backup.temp_path);
+        return -1;
+    }
+    close(fd);
+
+    if (verify_database_file(online_backup.temp_path) != 0) {
+        log_error("Online backup failed verification, keeping the previous backup");
+        unlink(online_backup.temp_path);
+        return -1;
+    }
+
+    if (online_backup.compress) {
+        char compressed_path[1040];
+        char compressed_temp_path[1048];
+        snprintf(compressed_path, sizeof(compressed_path), "%s.gz", online_backup.dest_path);
+        snprintf(compressed_temp_path, sizeof(compressed_temp_path), "%s.gz", online_backup.temp_path);
+
+        int rc = compress_backup_file(online_backup.temp_path, compressed_temp_path);
+        unlink(online_backup.temp_path);
+        if (rc != 0 || rename(compressed_temp_path, compressed_path) != 0) {
+            log_error("Failed to write compressed backup %s", compressed_path);
+            unlink(compressed_temp_path);
+            return -1;
+        }
+    } else if (rename(online_backup.temp_path, online_backup.dest_path) != 0) {
+        log_error("Failed to move backup into place at %s: %s", online_backup.dest_path, strerror(errno));
+        unlink(online_backup.temp_path);
+        return -1;
+    }
+
+    log_info("Online database backup to %s%s completed in %ld seconds (%d pages)",
+             online_backup.dest_path, online_backup.compress ? ".gz" : "",
+             (long)(time(NULL) - online_backup.start_time), online_backup.total_pages);
+    return 0;
+}
+
 // Backup the database to a specified path
 int backup_database(const char *source_path, const char *dest_path) {
     int rc;
@@ -98,9 +247,160 @@ int backup_database(const char *source_path, const char *dest_path) {
     return 0;
 }
 
+// Start an online backup of the open database
+int start_online_backup(const char *dest_path, bool compress) {
+    int rc;
+    sqlite3 *db = get_db_handle();
+    pthread_mutex_t *db_mutex = get_db_mutex();
+
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
+
+    if (!dest_path) {
+        log_error("Invalid parameters for start_online_backup");
+        return -1;
+    }
+
+    pthread_mutex_lock(&online_backup_mutex);
+
+    if (backup_in_progress) {
+        log_warn("Backup already in progress, skipping");
+        pthread_mutex_unlock(&online_backup_mutex);
+        return -1;
+    }
+
+    memset(&online_backup, 0, sizeof(online_backup));
+    strncpy(online_backup.dest_path, dest_path, sizeof(online_backup.dest_path) - 1);
+    snprintf(online_backup.temp_path, sizeof(online_backup.temp_path), "%s.tmp", online_backup.dest_path);
+    online_backup.compress = compress;
+    online_backup.start_time = time(NULL);
+
+    // A leftover partial copy from an interrupted run is started over
+    unlink(online_backup.temp_path);
+
+    rc = sqlite3_open_v2(online_backup.temp_path, &online_backup.dest_db,
+                         SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to open destination database for backup: %s", sqlite3_errmsg(online_backup.dest_db));
+        sqlite3_close(online_backup.dest_db);
+        online_backup.dest_db = NULL;
+        pthread_mutex_unlock(&online_backup_mutex);
+        return -1;
+    }
+
+    // The partial copy is only moved into place once complete and verified,
+    // so it is written without a journal or syncs and synced once at the end
+    sqlite3_exec(online_backup.dest_db, "PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;", NULL, NULL, NULL);
+
+    // Backing up from the main connection means its writes are copied into
+    // the backup as they happen, rather than forcing it to start over
+    pthread_mutex_lock(db_mutex);
+    online_backup.backup = sqlite3_backup_init(online_backup.dest_db, "main", db, "main");
+    pthread_mutex_unlock(db_mutex);
+
+    if (!online_backup.backup) {
+        log_error("Failed to initialize backup: %s", sqlite3_errmsg(online_backup.dest_db));
+        sqlite3_close(online_backup.dest_db);
+        online_backup.dest_db = NULL;
+        unlink(online_backup.temp_path);
+        pthread_mutex_unlock(&online_backup_mutex);
+        return -1;
+    }
+
+    backup_in_progress = true;
+    log_info("Starting online database backup to %s", online_backup.dest_path);
+
+    pthread_mutex_unlock(&online_backup_mutex);
+    return 0;
+}
+
+// Copy the next pages of the online backup
+int continue_online_backup(int max_steps) {
+    pthread_mutex_t *db_mutex = get_db_mutex();
+
+    for (int step = 0; step < max_steps; step++) {
+        if (step > 0) {
+            sqlite3_sleep(BACKUP_STEP_DELAY_MS);
+        }
+
+        pthread_mutex_lock(&online_backup_mutex);
+
+        if (!online_backup.backup) {
+            // Never started, or cancelled in the meantime
+            pthread_mutex_unlock(&online_backup_mutex);
+            return -1;
+        }
+
+        pthread_mutex_lock(db_mutex);
+        int rc = sqlite3_backup_step(online_backup.backup, BACKUP_PAGES_PER_STEP);
+        online_backup.total_pages = sqlite3_backup_pagecount(online_backup.backup);
+        online_backup.remaining_pages = sqlite3_backup_remaining(online_backup.backup);
+        pthread_mutex_unlock(db_mutex);
+
+        if (rc == SQLITE_DONE) {
+            int result = complete_online_backup();
+            pthread_mutex_unlock(&online_backup_mutex);
+            return result == 0 ? 1 : -1;
+        }
+
+        if (rc != SQLITE_OK && rc != SQLITE_BUSY && rc != SQLITE_LOCKED) {
+            log_error("Failed to perform online backup: %s", sqlite3_errstr(rc));
+            close_online_backup();
+            unlink(online_backup.temp_path);
+            pthread_mutex_unlock(&online_backup_mutex);
+            return -1;
+        }
+
+        // Report progress every 10%
+        if (online_backup.total_pages > 0) {
+            int percent = (int)(100LL * (online_backup.total_pages - online_backup.remaining_pages) /
+                                online_backup.total_pages);
+            if (percent / 10 > online_backup.reported_percent / 10) {
+                log_info("Online database backup %d%% done (%d of %d pages)", percent,
+                         online_backup.total_pages - online_backup.remaining_pages, online_backup.total_pages);
+                online_backup.reported_percent = percent;
+            }
+        }
+
+        pthread_mutex_unlock(&online_backup_mutex);
+    }
+
+    return 0;
+}
+
+// Abandon the online backup, if one is running
+void cancel_online_backup(void) {
+    pthread_mutex_lock(&online_backup_mutex);
+    if (online_backup.backup || online_backup.dest_db) {
+        log_info("Cancelling online database backup to %s", online_backup.dest_path);
+        close_online_backup();
+        unlink(online_backup.temp_path);
+    }
+    pthread_mutex_unlock(&online_backup_mutex);
+}
+
+// Get the progress of the online backup
+bool get_online_backup_progress(backup_progress_t *progress) {
+    pthread_mutex_lock(&online_backup_mutex);
+    bool active = online_backup.backup != NULL;
+    if (progress) {
+        memset(progress, 0, sizeof(*progress));
+        progress->active = active;
+        if (active) {
+            strncpy(progress->dest_path, online_backup.dest_path, sizeof(progress->dest_path) - 1);
+            progress->total_pages = online_backup.total_pages;
+            progress->remaining_pages = online_backup.remaining_pages;
+            progress->start_time = online_backup.start_time;
+        }
+    }
+    pthread_mutex_unlock(&online_backup_mutex);
+    return active;
+}
+
 // Restore database from backup
 int restore_database_from_backup(const char *backup_path, const char *db_path) {
-    int rc;
     sqlite3 *db = get_db_handle();
     
     log_info("Restoring database from backup: %s to %s", backup_path, db_path);
@@ -149,34 +449,11 @@ int restore_database_from_backup(const char *backup_path, const char *db_path) {
     fclose(dst);
     
     // Verify the restored database
-    sqlite3 *test_db;
-    rc = sqlite3_open_v2(db_path, &test_db, SQLITE_OPEN_READONLY, NULL);
-    if (rc != SQLITE_OK) {
-        log_error("Restored database appears to be corrupt: %s", sqlite3_errmsg(test_db));
-        sqlite3_close(test_db);
+    if (verify_database_file(db_path) != 0) {
+        log_error("Restored database failed verification");
         return -1;
     }
     
-    // Run integrity check on the restored database
-    sqlite3_stmt *stmt = NULL;
-    const char *integrity_sql = "PRAGMA integrity_check;";
-    
-    rc = sqlite3_prepare_v2(test_db, integrity_sql, -1, &stmt, NULL);
-    if (rc == SQLITE_OK) {
-        if (sqlite3_step(stmt) == SQLITE_ROW) {
-            const char *result = (const char *)sqlite3_column_text(stmt, 0);
-            if (result && strcmp(result, "ok") != 0) {
-                log_error("Restored database integrity check failed: %s", result);
-                sqlite3_finalize(stmt);
-                sqlite3_close(test_db);
-                return -1;
-            }
-        }
-        sqlite3_finalize(stmt);
-    }
-    
-    sqlite3_close(test_db);
-    
     log_info("Database restored successfully from backup");
     return 0;
 }
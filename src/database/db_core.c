@@ -22,6 +22,9 @@
 #include "database/db_schema.h"
 #include "database/db_migrations.h"
 #include "database/db_backup.h"
+#include "database/db_stmt_cache.h"
+#include "database/db_write_queue.h"
+#include "database/db_recordings.h"
 #include "core/logger.h"
 
 // Database handle
@@ -36,8 +39,11 @@ static char db_file_path[1024] = {0};
 // Backup file path
 static char db_backup_path[1024] = {0};
 
-// Backup interval in seconds (default: 1 hour)
-static int backup_interval = 3600;
+// Interval in seconds between scheduled online backups (0: only at startup and shutdown)
+static int backup_interval = 0;
+
+// Whether scheduled backups are gzipped
+static bool backup_compress = false;
 
 // Last backup time
 static time_t last_backup_time = 0;
@@ -50,6 +56,23 @@ static bool backup_in_progress = false;
 
 // No longer tracking prepared statements - each function is responsible for finalizing its own statements
 
+// Read-only connections for query paths (DB_READER_POOL_SIZE in db_core.h).
+// The global handle above stays the single writer; in WAL mode these can
+// read while it writes.
+
+// How long acquire_db_reader waits for a free reader before falling back
+#define DB_READER_WAIT_MS 2000
+
+static sqlite3 *reader_pool[DB_READER_POOL_SIZE];
+static bool reader_in_use[DB_READER_POOL_SIZE];
+static int reader_count = 0;
+static bool reader_pool_open = false;
+// Readers still borrowed when the pool closed; release_db_reader closes them
+static sqlite3 *reader_leftovers[DB_READER_POOL_SIZE];
+static int leftover_count = 0;
+static pthread_mutex_t reader_pool_mutex = PTHREAD_MUTEX_INITIALIZER;
+static pthread_cond_t reader_pool_cond = PTHREAD_COND_INITIALIZER;
+
 // Create directory if it doesn't exist
 static int create_directory(const char *path) {
     struct stat st;
@@ -121,6 +144,197 @@ int checkpoint_database(void) {
     return 0;
 }
 
+// Set how often the storage manager backs up the database
+void set_database_backup_schedule(int interval_seconds, bool compress) {
+    backup_interval = interval_seconds > 0 ? interval_seconds : 0;
+    backup_compress = compress;
+}
+
+// Start a scheduled backup when one is due and copy its next pages
+int run_scheduled_backup(int max_steps) {
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
+
+    if (!get_online_backup_progress(NULL)) {
+        if (backup_interval <= 0) {
+            return 0;
+        }
+
+        // After a restart, the age of the last backup comes from the file itself
+        if (last_backup_time == 0) {
+            char path[1040];
+            struct stat st;
+            snprintf(path, sizeof(path), "%s%s", db_backup_path, backup_compress ? ".gz" : "");
+            if (stat(path, &st) == 0) {
+                last_backup_time = st.st_mtime;
+            }
+        }
+
+        if (time(NULL) - last_backup_time < backup_interval) {
+            return 0;
+        }
+
+        if (start_online_backup(db_backup_path, backup_compress) != 0) {
+            return -1;
+        }
+    }
+
+    int rc = continue_online_backup(max_steps);
+    if (rc != 0) {
+        // A failed backup is also retried only at the next interval
+        last_backup_time = time(NULL);
+    }
+    return rc;
+}
+
+// Open the reader pool; failures leave the pool smaller (or empty) rather than failing init
+static void open_reader_pool(const char *db_path) {
+    if (!wal_mode_enabled) {
+        log_info("WAL mode not enabled, reads will use the main database connection");
+        return;
+    }
+
+    pthread_mutex_lock(&reader_pool_mutex);
+    reader_count = 0;
+    for (int i = 0; i < DB_READER_POOL_SIZE; i++) {
+        sqlite3 *reader = NULL;
+        // Private cache: a shared cache would put the readers behind the writer's table locks
+        int rc = sqlite3_open_v2(db_path, &reader,
+                                 SQLITE_OPEN_READONLY | SQLITE_OPEN_NOMUTEX | SQLITE_OPEN_PRIVATECACHE,
+                                 NULL);
+        if (rc != SQLITE_OK) {
+            log_warn("Failed to open reader connection %d: %s", i,
+                     reader ? sqlite3_errmsg(reader) : "unknown error");
+            if (reader) {
+                sqlite3_close_v2(reader);
+            }
+            break;
+        }
+        sqlite3_busy_timeout(reader, 10000);
+        reader_pool[reader_count] = reader;
+        reader_in_use[reader_count] = false;
+        reader_count++;
+    }
+    reader_pool_open = reader_count > 0;
+    pthread_mutex_unlock(&reader_pool_mutex);
+
+    log_info("Opened %d read-only database connections", reader_count);
+}
+
+// Finalize a reader's statements and close it
+static void close_reader(sqlite3 *reader) {
+    finalize_cached_statements(reader);
+    sqlite3_stmt *stmt;
+    while ((stmt = sqlite3_next_stmt(reader, NULL)) != NULL) {
+        sqlite3_finalize(stmt);
+    }
+    sqlite3_close_v2(reader);
+}
+
+// Close the reader pool, waiting briefly for borrowed readers to come back
+static void close_reader_pool(void) {
+    pthread_mutex_lock(&reader_pool_mutex);
+    reader_pool_open = false;
+
+    struct timespec deadline;
+    clock_gettime(CLOCK_REALTIME, &deadline);
+    deadline.tv_sec += 5;
+
+    for (int i = 0; i < reader_count; i++) {
+        while (reader_in_use[i]) {
+            if (pthread_cond_timedwait(&reader_pool_cond, &reader_pool_mutex, &deadline) == ETIMEDOUT) {
+                log_warn("Reader connection %d still in use at shutdown", i);
+                break;
+            }
+        }
+        if (!reader_in_use[i]) {
+            close_reader(reader_pool[i]);
+        } else if (leftover_count < DB_READER_POOL_SIZE) {
+            // Leave it open rather than closing it under a running query,
+            // release_db_reader closes it when the query finishes
+            reader_leftovers[leftover_count++] = reader_pool[i];
+        } else {
+            log_warn("Too many reader connections still in use, leaving connection %d open", i);
+        }
+        reader_pool[i] = NULL;
+        reader_in_use[i] = false;
+    }
+    reader_count = 0;
+    pthread_mutex_unlock(&reader_pool_mutex);
+}
+
+// Borrow a read-only connection, or the main handle with the db mutex held
+sqlite3 *acquire_db_reader(void) {
+    if (!db) {
+        return NULL;
+    }
+
+    pthread_mutex_lock(&reader_pool_mutex);
+    if (reader_pool_open) {
+        struct timespec deadline;
+        clock_gettime(CLOCK_REALTIME, &deadline);
+        deadline.tv_sec += DB_READER_WAIT_MS / 1000;
+        deadline.tv_nsec += (long)(DB_READER_WAIT_MS % 1000) * 1000000L;
+        if (deadline.tv_nsec >= 1000000000L) {
+            deadline.tv_sec++;
+            deadline.tv_nsec -= 1000000000L;
+        }
+
+        while (reader_pool_open) {
+            for (int i = 0; i < reader_count; i++) {
+                if (!reader_in_use[i]) {
+                    reader_in_use[i] = true;
+                    sqlite3 *reader = reader_pool[i];
+                    pthread_mutex_unlock(&reader_pool_mutex);
+                    return reader;
+                }
+            }
+            if (pthread_cond_timedwait(&reader_pool_cond, &reader_pool_mutex, &deadline) == ETIMEDOUT) {
+                log_warn("All %d reader connections busy, using the main connection", reader_count);
+                break;
+            }
+        }
+    }
+    pthread_mutex_unlock(&reader_pool_mutex);
+
+    // No reader available: run the query on the writer connection as before
+    pthread_mutex_lock(&db_mutex);
+    return db;
+}
+
+// Return a connection obtained from acquire_db_reader
+void release_db_reader(sqlite3 *reader) {
+    if (!reader) {
+        return;
+    }
+
+    if (reader == db) {
+        pthread_mutex_unlock(&db_mutex);
+        return;
+    }
+
+    pthread_mutex_lock(&reader_pool_mutex);
+    for (int i = 0; i < reader_count; i++) {
+        if (reader_pool[i] == reader) {
+            reader_in_use[i] = false;
+            break;
+        }
+    }
+    for (int i = 0; i < leftover_count; i++) {
+        if (reader_leftovers[i] == reader) {
+            // Borrowed across close_reader_pool, nothing else can reach it now
+            close_reader(reader);
+            reader_leftovers[i] = reader_leftovers[--leftover_count];
+            reader_leftovers[leftover_count] = NULL;
+            break;
+        }
+    }
+    pthread_cond_broadcast(&reader_pool_cond);
+    pthread_mutex_unlock(&reader_pool_mutex);
+}
+
 // Initialize the database
 int init_database(const char *db_path) {
     int rc;
@@ -319,6 +533,20 @@ int init_database(const char *db_path) {
         // Continue anyway
     }
 
+    // Enable incremental auto_vacuum so space can be reclaimed a few pages at a time.
+    // This must come before WAL mode, which writes the header of a new database;
+    // existing databases are converted by vacuum_database()
+    log_info("Enabling auto_vacuum");
+    rc = sqlite3_exec(db, "PRAGMA auto_vacuum=INCREMENTAL;", NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        log_warn("Failed to enable auto_vacuum: %s", err_msg);
+        if (err_msg) {
+            sqlite3_free(err_msg);
+            err_msg = NULL;
+        }
+        // Continue anyway
+    }
+
     // Enable WAL mode for better performance and crash resistance
     log_info("Enabling WAL mode for better crash resistance");
     rc = sqlite3_exec(db, "PRAGMA journal_mode=WAL;", NULL, NULL, &err_msg);
@@ -359,18 +587,6 @@ int init_database(const char *db_path) {
         // Continue anyway
     }
 
-    // Enable auto_vacuum to keep the database file size manageable
-    log_info("Enabling auto_vacuum");
-    rc = sqlite3_exec(db, "PRAGMA auto_vacuum=INCREMENTAL;", NULL, NULL, &err_msg);
-    if (rc != SQLITE_OK) {
-        log_warn("Failed to enable auto_vacuum: %s", err_msg);
-        if (err_msg) {
-            sqlite3_free(err_msg);
-            err_msg = NULL;
-        }
-        // Continue anyway
-    }
-
     // Check if we can write to the database
     log_info("Testing database write capability");
     rc = sqlite3_exec(db, "CREATE TABLE IF NOT EXISTS test_table (id INTEGER);", NULL, NULL, &err_msg);
@@ -575,6 +791,12 @@ int init_database(const char *db_path) {
         return -1;
     }
 
+    // Readers are opened last so they see the migrated schema
+    open_reader_pool(db_path);
+
+    // Warn if the retention and quota passes would scan the recordings table
+    check_recordings_query_plans();
+
     log_info("Database initialized successfully");
 
     // Create an initial backup if this is a new database
@@ -612,6 +834,12 @@ static void reset_sqlite_internal_state(void) {
 void shutdown_database(void) {
     log_info("Starting database shutdown process");
 
+    // Commit queued writes first so they are part of the final backup
+    stop_db_write_queue();
+
+    // An unfinished scheduled backup is dropped in favour of the final one
+    cancel_online_backup();
+
     // Create a final backup before shutting down
     if (db != NULL && db_file_path[0] != '\0') {
         log_info("Creating final backup before shutdown");
@@ -626,6 +854,9 @@ void shutdown_database(void) {
     // by waiting a bit longer before acquiring the mutex
     usleep(500000);  // 500ms to allow in-flight operations to complete
 
+    // Close the read-only connections before the main one
+    close_reader_pool();
+
     // Use a try-lock first to avoid deadlocks if the mutex is already locked
     int lock_result = pthread_mutex_trylock(&db_mutex);
 
@@ -670,6 +901,16 @@ void shutdown_database(void) {
             }
         }
 
+        // Cached statements first, so the cache holds no dangling pointers
+        stmt_cache_stats_t cache_stats;
+        get_stmt_cache_stats(&cache_stats);
+        log_info("Statement cache: %llu hits, %llu prepares, %llu uncached, %llu evictions",
+                 (unsigned long long)cache_stats.hits,
+                 (unsigned long long)cache_stats.prepares,
+                 (unsigned long long)cache_stats.uncached,
+                 (unsigned long long)cache_stats.evictions);
+        finalize_cached_statements(db_to_close);
+
         // No longer using tracked statements - we now rely on sqlite3_next_stmt to find all statements
 
         // Finalize all prepared statements before closing the database
@@ -0,0 +1,860 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <stdbool.h>
+#include <math.h>
+#include <pthread.h>
+#include <sqlite3.h>
+
+#include "database/db_detection_blocks.h"
+#include "database/db_core.h"
+#include "database/db_stmt_cache.h"
+#include "database/db_schema_cache.h"
+#include "core/config.h"
+#include "core/logger.h"
+
+/*
+ * Block layout (integers are unsigned LEB128 varints unless noted):
+ *
+ *   u8      format version (1)
+ *   varint  string count, then per string: length, bytes, and the number
+ *           of detections in the block using it as their label
+ *   varint  detection count, then per detection, sorted by time:
+ *             seconds since the previous detection (since the bucket
+ *             start for the first one), label string index, zone string
+ *             index, zigzag track ID, then confidence, x, y, width and
+ *             height as little-endian u16 (value * 65535, clamped to 0..1)
+ *
+ * A typical detection takes 14-15 bytes instead of ~120 for a row with its
+ * two index entries, and a bucket of a busy camera is one row to delete.
+ */
+#define DETECTION_BLOCK_VERSION 1
+
+// Distinct labels and zone IDs in one block
+#define MAX_BLOCK_STRINGS 256
+
+// Smallest possible encoded detection: 4 one-byte varints and 5 u16
+#define MIN_ENCODED_DETECTION 14
+
+typedef struct {
+    sqlite3_int64 timestamp;
+    uint32_t label;          // Index into the string table
+    uint32_t zone;           // Index into the string table
+    int32_t track_id;
+    uint16_t confidence;
+    uint16_t x, y, width, height;
+} block_record_t;
+
+typedef struct {
+    char value[MAX_LABEL_LENGTH];
+    int label_count;         // Detections with this label (decoded blocks only)
+} block_string_t;
+
+typedef struct {
+    block_string_t strings[MAX_BLOCK_STRINGS];
+    int string_count;
+    block_record_t *records;
+    int record_count;
+    int capacity;
+} detection_block_t;
+
+typedef struct {
+    uint8_t *data;
+    size_t size;
+    size_t capacity;
+    bool failed;
+} block_buffer_t;
+
+typedef struct {
+    const uint8_t *data;
+    size_t size;
+    size_t pos;
+    bool failed;
+} block_reader_t;
+
+// Blocks of a stream overlapping a time range, newest first
+static const char *block_range_sql =
+    "SELECT bucket, first_timestamp, last_timestamp, data FROM detection_blocks "
+    "WHERE stream_name = ? AND bucket >= ? AND bucket <= ? "
+    "AND first_timestamp <= ? AND last_timestamp >= ? "
+    "ORDER BY bucket DESC;";
+
+static bool block_storage_enabled = false;
+
+// Start of the next bucket to pack; reset to 0 once a pass finds nothing
+// left, so rows written late into packed buckets are picked up again
+static sqlite3_int64 next_bucket = 0;
+
+void set_detection_block_storage(bool enabled) {
+    block_storage_enabled = enabled;
+}
+
+bool detection_block_storage_enabled(void) {
+    return block_storage_enabled;
+}
+
+// Start of the bucket holding a timestamp (rounds down for negative times too)
+static sqlite3_int64 bucket_start(sqlite3_int64 timestamp) {
+    sqlite3_int64 bucket = timestamp / DETECTION_BLOCK_SECONDS * DETECTION_BLOCK_SECONDS;
+    return bucket > timestamp ? bucket - DETECTION_BLOCK_SECONDS : bucket;
+}
+
+static uint16_t quantize(double value) {
+    if (!(value > 0.0)) {
+        return 0;
+    }
+    if (value >= 1.0) {
+        return 65535;
+    }
+    return (uint16_t)lrint(value * 65535.0);
+}
+
+static float dequantize(uint16_t value) {
+    return (float)value / 65535.0f;
+}
+
+// ── Encoding ────────────────────────────────────────────────────────
+
+static void put_byte(block_buffer_t *buf, uint8_t byte) {
+    if (buf->failed) {
+        return;
+    }
+    if (buf->size == buf->capacity) {
+        size_t capacity = buf->capacity ? buf->capacity * 2 : 4096;
+        uint8_t *data = realloc(buf->data, capacity);
+        if (!data) {
+            buf->failed = true;
+            return;
+        }
+        buf->data = data;
+        buf->capacity = capacity;
+    }
+    buf->data[buf->size++] = byte;
+}
+
+static void put_varint(block_buffer_t *buf, uint64_t value) {
+    while (value >= 0x80) {
+        put_byte(buf, (uint8_t)(value | 0x80));
+        value >>= 7;
+    }
+    put_byte(buf, (uint8_t)value);
+}
+
+static void put_u16(block_buffer_t *buf, uint16_t value) {
+    put_byte(buf, (uint8_t)(value & 0xff));
+    put_byte(buf, (uint8_t)(value >> 8));
+}
+
+static uint64_t get_varint(block_reader_t *reader) {
+    uint64_t value = 0;
+    for (int shift = 0; shift < 64; shift += 7) {
+        if (reader->pos >= reader->size) {
+            break;
+        }
+        uint8_t byte = reader->data[reader->pos++];
+        value |= (uint64_t)(byte & 0x7f) << shift;
+        if (!(byte & 0x80)) {
+            return value;
+        }
+    }
+    reader->failed = true;
+    return 0;
+}
+
+static uint16_t get_u16(block_reader_t *reader) {
+    if (reader->size - reader->pos < 2) {
+        reader->failed = true;
+        return 0;
+    }
+    uint16_t value = (uint16_t)(reader->data[reader->pos] | (reader->data[reader->pos + 1] << 8));
+    reader->pos += 2;
+    return value;
+}
+
+static void free_block(detection_block_t *block) {
+    free(block->records);
+    block->records = NULL;
+    block->record_count = 0;
+    block->capacity = 0;
+}
+
+// Index of a label or zone ID in the block's string table, added if new
+static int block_string_index(detection_block_t *block, const char *value) {
+    if (!value) {
+        value = "";
+    }
+    for (int i = 0; i < block->string_count; i++) {
+        if (strncmp(block->strings[i].value, value, MAX_LABEL_LENGTH - 1) == 0) {
+            return i;
+        }
+    }
+    if (block->string_count == MAX_BLOCK_STRINGS) {
+        log_error("Detection block has more than %d distinct labels and zones", MAX_BLOCK_STRINGS);
+        return -1;
+    }
+    block_string_t *entry = &block->strings[block->string_count];
+    memset(entry, 0, sizeof(*entry));
+    strncpy(entry->value, value, sizeof(entry->value) - 1);
+    return block->string_count++;
+}
+
+static block_record_t *block_add_record(detection_block_t *block) {
+    if (block->record_count == block->capacity) {
+        int capacity = block->capacity ? block->capacity * 2 : 256;
+        block_record_t *records = realloc(block->records, capacity * sizeof(block_record_t));
+        if (!records) {
+            log_error("Failed to allocate memory for detection block");
+            return NULL;
+        }
+        block->records = records;
+        block->capacity = capacity;
+    }
+    block_record_t *record = &block->records[block->record_count++];
+    memset(record, 0, sizeof(*record));
+    return record;
+}
+
+// Merge the sorted runs [0, split) and [split, count); on equal times the first run goes first
+static int merge_block_records(detection_block_t *block, int split) {
+    if (split <= 0 || split >= block->record_count ||
+        block->records[split - 1].timestamp <= block->records[split].timestamp) {
+        return 0;
+    }
+
+    block_record_t *merged = malloc(block->record_count * sizeof(block_record_t));
+    if (!merged) {
+        log_error("Failed to allocate memory for detection block merge");
+        return -1;
+    }
+
+    int a = 0, b = split, out = 0;
+    while (a < split && b < block->record_count) {
+        if (block->records[b].timestamp < block->records[a].timestamp) {
+            merged[out++] = block->records[b++];
+        } else {
+            merged[out++] = block->records[a++];
+        }
+    }
+    while (a < split) {
+        merged[out++] = block->records[a++];
+    }
+    while (b < block->record_count) {
+        merged[out++] = block->records[b++];
+    }
+
+    free(block->records);
+    block->records = merged;
+    block->capacity = block->record_count;
+    return 0;
+}
+
+static int encode_block(const detection_block_t *block, sqlite3_int64 bucket, block_buffer_t *buf) {
+    int label_counts[MAX_BLOCK_STRINGS] = {0};
+    for (int i = 0; i < block->record_count; i++) {
+        label_counts[block->records[i].label]++;
+    }
+
+    put_byte(buf, DETECTION_BLOCK_VERSION);
+    put_varint(buf, (uint64_t)block->string_count);
+    for (int i = 0; i < block->string_count; i++) {
+        size_t len = strlen(block->strings[i].value);
+        put_varint(buf, len);
+        for (size_t j = 0; j < len; j++) {
+            put_byte(buf, (uint8_t)block->strings[i].value[j]);
+        }
+        put_varint(buf, (uint64_t)label_counts[i]);
+    }
+
+    put_varint(buf, (uint64_t)block->record_count);
+    sqlite3_int64 previous = bucket;
+    for (int i = 0; i < block->record_count; i++) {
+        const block_record_t *record = &block->records[i];
+        put_varint(buf, (uint64_t)(record->timestamp - previous));
+        put_varint(buf, record->label);
+        put_varint(buf, record->zone);
+        put_varint(buf, ((uint32_t)record->track_id << 1) ^ (uint32_t)(record->track_id >> 31));
+        put_u16(buf, record->confidence);
+        put_u16(buf, record->x);
+        put_u16(buf, record->y);
+        put_u16(buf, record->width);
+        put_u16(buf, record->height);
+        previous = record->timestamp;
+    }
+
+    return buf->failed ? -1 : 0;
+}
+
+/**
+ * Decode a block; with headers_only only the string table and label counts
+ * are read. Returns 0 on success, -1 if the block is corrupt.
+ */
+static int decode_block(const void *data, int size, sqlite3_int64 bucket,
+                        detection_block_t *block, bool headers_only) {
+    block_reader_t reader = {data, size > 0 ? (size_t)size : 0, 0, false};
+
+    block->string_count = 0;
+    block->record_count = 0;
+
+    if (reader.size == 0 || reader.data[reader.pos++] != DETECTION_BLOCK_VERSION) {
+        return -1;
+    }
+
+    uint64_t string_count = get_varint(&reader);
+    if (string_count > MAX_BLOCK_STRINGS) {
+        return -1;
+    }
+    for (uint64_t i = 0; i < string_count && !reader.failed; i++) {
+        block_string_t *entry = &block->strings[block->string_count++];
+        uint64_t len = get_varint(&reader);
+        if (len >= sizeof(entry->value) || len > reader.size - reader.pos) {
+            return -1;
+        }
+        memcpy(entry->value, reader.data + reader.pos, len);
+        entry->value[len] = '\0';
+        reader.pos += len;
+        entry->label_count = (int)get_varint(&reader);
+    }
+
+    uint64_t record_count = get_varint(&reader);
+    if (reader.failed || record_count > (reader.size - reader.pos) / MIN_ENCODED_DETECTION) {
+        return -1;
+    }
+    if (headers_only) {
+        return 0;
+    }
+
+    sqlite3_int64 timestamp = bucket;
+    for (uint64_t i = 0; i < record_count; i++) {
+        block_record_t *record = block_add_record(block);
+        if (!record) {
+            return -1;
+        }
+        timestamp += (sqlite3_int64)get_varint(&reader);
+        record->timestamp = timestamp;
+        record->label = (uint32_t)get_varint(&reader);
+        record->zone = (uint32_t)get_varint(&reader);
+        uint32_t track = (uint32_t)get_varint(&reader);
+        record->track_id = (int32_t)((track >> 1) ^ -(track & 1));
+        record->confidence = get_u16(&reader);
+        record->x = get_u16(&reader);
+        record->y = get_u16(&reader);
+        record->width = get_u16(&reader);
+        record->height = get_u16(&reader);
+        if (reader.failed || record->label >= string_count || record->zone >= string_count) {
+            return -1;
+        }
+    }
+
+    return 0;
+}
+
+static void fill_detection(const detection_block_t *block, const block_record_t *record, detection_t *detection) {
+    memset(detection, 0, sizeof(*detection));
+    strncpy(detection->label, block->strings[record->label].value, MAX_LABEL_LENGTH - 1);
+    strncpy(detection->zone_id, block->strings[record->zone].value, MAX_ZONE_ID_LENGTH - 1);
+    detection->confidence = dequantize(record->confidence);
+    detection->x = dequantize(record->x);
+    detection->y = dequantize(record->y);
+    detection->width = dequantize(record->width);
+    detection->height = dequantize(record->height);
+    detection->track_id = record->track_id;
+}
+
+// ── Compaction ──────────────────────────────────────────────────────
+
+/**
+ * Write one stream's block for a bucket, replacing the existing block
+ * (whose records were loaded into the block before the new rows).
+ */
+static int write_stream_block(sqlite3 *db, const char *stream_name, sqlite3_int64 bucket,
+                              detection_block_t *block, int existing_count, bool replace) {
+    if (merge_block_records(block, existing_count) != 0) {
+        return -1;
+    }
+
+    block_buffer_t buf = {0};
+    if (encode_block(block, bucket, &buf) != 0) {
+        log_error("Failed to encode detection block for stream %s", stream_name);
+        free(buf.data);
+        return -1;
+    }
+
+    sqlite3_stmt *stmt;
+    int rc;
+    if (replace) {
+        rc = sqlite3_prepare_v2(db, "DELETE FROM detection_blocks WHERE stream_name = ? AND bucket = ?;",
+                                -1, &stmt, NULL);
+        if (rc != SQLITE_OK) {
+            log_error("Failed to prepare detection block delete: %s", sqlite3_errmsg(db));
+            free(buf.data);
+            return -1;
+        }
+        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
+        sqlite3_bind_int64(stmt, 2, bucket);
+        rc = sqlite3_step(stmt);
+        sqlite3_finalize(stmt);
+        if (rc != SQLITE_DONE) {
+            log_error("Failed to delete detection block: %s", sqlite3_errmsg(db));
+            free(buf.data);
+            return -1;
+        }
+    }
+
+    rc = sqlite3_prepare_v2(db,
+        "INSERT INTO detection_blocks (stream_name, bucket, first_timestamp, last_timestamp, "
+        "detection_count, data) VALUES (?, ?, ?, ?, ?, ?);", -1, &stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare detection block insert: %s", sqlite3_errmsg(db));
+        free(buf.data);
+        return -1;
+    }
+    sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
+    sqlite3_bind_int64(stmt, 2, bucket);
+    sqlite3_bind_int64(stmt, 3, block->records[0].timestamp);
+    sqlite3_bind_int64(stmt, 4, block->records[block->record_count - 1].timestamp);
+    sqlite3_bind_int(stmt, 5, block->record_count);
+    sqlite3_bind_blob(stmt, 6, buf.data, (int)buf.size, SQLITE_STATIC);
+    rc = sqlite3_step(stmt);
+    sqlite3_finalize(stmt);
+    free(buf.data);
+
+    if (rc != SQLITE_DONE) {
+        log_error("Failed to insert detection block: %s", sqlite3_errmsg(db));
+        return -1;
+    }
+    return 0;
+}
+
+// Load a stream's existing block for a bucket; returns 1 if found, 0 if not, -1 on error
+static int load_stream_block(sqlite3 *db, const char *stream_name, sqlite3_int64 bucket,
+                             detection_block_t *block) {
+    sqlite3_stmt *stmt;
+    int rc = sqlite3_prepare_v2(db, "SELECT data FROM detection_blocks WHERE stream_name = ? AND bucket = ?;",
+                                -1, &stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare detection block lookup: %s", sqlite3_errmsg(db));
+        return -1;
+    }
+    sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
+    sqlite3_bind_int64(stmt, 2, bucket);
+
+    int found = 0;
+    rc = sqlite3_step(stmt);
+    if (rc == SQLITE_ROW) {
+        if (decode_block(sqlite3_column_blob(stmt, 0), sqlite3_column_bytes(stmt, 0), bucket, block, false) != 0) {
+            log_error("Corrupt detection block for stream %s at %lld", stream_name, (long long)bucket);
+            found = -1;
+        } else {
+            found = 1;
+        }
+    } else if (rc != SQLITE_DONE) {
+        log_error("Failed to read detection block: %s", sqlite3_errmsg(db));
+        found = -1;
+    }
+    sqlite3_finalize(stmt);
+    return found;
+}
+
+/**
+ * Find the first bucket with detections between from and limit; caller holds
+ * the database mutex. Returns 1 and sets bucket if found, 0 if there is none,
+ * or -1 on error.
+ */
+static int find_next_bucket(sqlite3 *db, sqlite3_int64 from, sqlite3_int64 limit, sqlite3_int64 *bucket) {
+    sqlite3_stmt *stmt;
+    int rc = sqlite3_prepare_v2(db, "SELECT MIN(timestamp) FROM detections WHERE timestamp >= ? AND timestamp < ?;",
+                                -1, &stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+        return -1;
+    }
+    sqlite3_bind_int64(stmt, 1, from);
+    sqlite3_bind_int64(stmt, 2, limit);
+    rc = sqlite3_step(stmt);
+    if (rc != SQLITE_ROW || sqlite3_column_type(stmt, 0) == SQLITE_NULL) {
+        if (rc != SQLITE_ROW) {
+            log_error("Failed to find detections to pack: %s", sqlite3_errmsg(db));
+        }
+        sqlite3_finalize(stmt);
+        return rc == SQLITE_ROW ? 0 : -1;
+    }
+    *bucket = bucket_start(sqlite3_column_int64(stmt, 0));
+    sqlite3_finalize(stmt);
+    return 1;
+}
+
+/**
+ * Pack the detections of one bucket; caller holds the database mutex.
+ * Returns the number of detections packed, or -1 on error.
+ */
+static int compact_bucket(sqlite3 *db, sqlite3_int64 bucket) {
+    sqlite3_stmt *stmt;
+    int rc;
+
+    if (sqlite3_exec(db, "BEGIN TRANSACTION;", NULL, NULL, NULL) != SQLITE_OK) {
+        log_error("Failed to begin transaction: %s", sqlite3_errmsg(db));
+        return -1;
+    }
+
+    rc = sqlite3_prepare_v2(db,
+        "SELECT stream_name, timestamp, label, confidence, x, y, width, height, track_id, zone_id "
+        "FROM detections WHERE timestamp >= ? AND timestamp < ? "
+        "ORDER BY stream_name, timestamp, id;", -1, &stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+        sqlite3_exec(db, "ROLLBACK;", NULL, NULL, NULL);
+        return -1;
+    }
+    sqlite3_bind_int64(stmt, 1, bucket);
+    sqlite3_bind_int64(stmt, 2, bucket + DETECTION_BLOCK_SECONDS);
+
+    detection_block_t *block = calloc(1, sizeof(detection_block_t));
+    if (!block) {
+        log_error("Failed to allocate memory for detection block");
+        sqlite3_finalize(stmt);
+        sqlite3_exec(db, "ROLLBACK;", NULL, NULL, NULL);
+        return -1;
+    }
+
+    char stream_name[MAX_STREAM_NAME] = {0};
+    int existing = 0;
+    int packed = 0;
+    bool failed = false;
+
+    while (!failed && (rc = sqlite3_step(stmt)) == SQLITE_ROW) {
+        const char *row_stream = (const char *)sqlite3_column_text(stmt, 0);
+        if (!row_stream) {
+            row_stream = "";
+        }
+
+        if (packed == 0 || strcmp(row_stream, stream_name) != 0) {
+            if (packed > 0 &&
+                write_stream_block(db, stream_name, bucket, block, existing, existing > 0) != 0) {
+                failed = true;
+                break;
+            }
+            free_block(block);
+            block->string_count = 0;
+            strncpy(stream_name, row_stream, sizeof(stream_name) - 1);
+
+            // Rows that arrived after the bucket was packed are merged into its block
+            int found = load_stream_block(db, stream_name, bucket, block);
+            if (found < 0) {
+                failed = true;
+                break;
+            }
+            existing = block->record_count;
+        }
+
+        block_record_t *record = block_add_record(block);
+        int label = block_string_index(block, (const char *)sqlite3_column_text(stmt, 2));
+        int zone = block_string_index(block, (const char *)sqlite3_column_text(stmt, 9));
+        if (!record || label < 0 || zone < 0) {
+            failed = true;
+            break;
+        }
+        record->timestamp = sqlite3_column_int64(stmt, 1);
+        record->label = (uint32_t)label;
+        record->zone = (uint32_t)zone;
+        record->confidence = quantize(sqlite3_column_double(stmt, 3));
+        record->x = quantize(sqlite3_column_double(stmt, 4));
+        record->y = quantize(sqlite3_column_double(stmt, 5));
+        record->width = quantize(sqlite3_column_double(stmt, 6));
+        record->height = quantize(sqlite3_column_double(stmt, 7));
+        record->track_id = sqlite3_column_type(stmt, 8) == SQLITE_NULL ? -1 : sqlite3_column_int(stmt, 8);
+        packed++;
+    }
+
+    if (!failed && rc != SQLITE_DONE) {
+        log_error("Failed to read detections for packing: %s", sqlite3_errmsg(db));
+        failed = true;
+    }
+    sqlite3_finalize(stmt);
+
+    if (!failed && packed > 0 &&
+        write_stream_block(db, stream_name, bucket, block, existing, existing > 0) != 0) {
+        failed = true;
+    }
+    free_block(block);
+    free(block);
+
+    if (!failed) {
+        rc = sqlite3_prepare_v2(db, "DELETE FROM detections WHERE timestamp >= ? AND timestamp < ?;",
+                                -1, &stmt, NULL);
+        if (rc == SQLITE_OK) {
+            sqlite3_bind_int64(stmt, 1, bucket);
+            sqlite3_bind_int64(stmt, 2, bucket + DETECTION_BLOCK_SECONDS);
+            rc = sqlite3_step(stmt);
+            sqlite3_finalize(stmt);
+        }
+        if (rc != SQLITE_DONE) {
+            log_error("Failed to delete packed detections: %s", sqlite3_errmsg(db));
+            failed = true;
+        }
+    }
+
+    if (failed || sqlite3_exec(db, "COMMIT;", NULL, NULL, NULL) != SQLITE_OK) {
+        log_error("Failed to pack detections at %lld", (long long)bucket);
+        sqlite3_exec(db, "ROLLBACK;", NULL, NULL, NULL);
+        return -1;
+    }
+
+    return packed;
+}
+
+int compact_detection_blocks(int max_buckets) {
+    sqlite3 *db = get_db_handle();
+    pthread_mutex_t *db_mutex = get_db_mutex();
+
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
+
+    // Nothing to pack into until migration 0019 has run
+    if (!cached_table_exists("detection_blocks")) {
+        return 0;
+    }
+
+    sqlite3_int64 limit = bucket_start((sqlite3_int64)time(NULL) - DETECTION_BLOCK_GRACE_SECONDS);
+    int packed = 0;
+    int buckets = 0;
+
+    // One bucket per lock so detection writes are not held up for the whole backlog
+    while (buckets < max_buckets) {
+        sqlite3_int64 bucket;
+
+        pthread_mutex_lock(db_mutex);
+        int found = find_next_bucket(db, next_bucket, limit, &bucket);
+        int count = found > 0 ? compact_bucket(db, bucket) : 0;
+        pthread_mutex_unlock(db_mutex);
+
+        if (found < 0) {
+            return -1;
+        }
+        if (found == 0) {
+            next_bucket = 0;
+            break;
+        }
+
+        // A bucket that can't be packed keeps its rows and is retried on the next pass
+        if (count < 0) {
+            log_warn("Skipping detections at %lld that could not be packed", (long long)bucket);
+        } else {
+            packed += count;
+        }
+        next_bucket = bucket + DETECTION_BLOCK_SECONDS;
+        buckets++;
+    }
+
+    if (packed > 0) {
+        log_info("Packed %d detections into blocks (%d buckets)", packed, buckets);
+    }
+    return packed;
+}
+
+// ── Readers ─────────────────────────────────────────────────────────
+
+static sqlite3_stmt *prepare_block_range(sqlite3 *db, const char *stream_name,
+                                         time_t start_time, time_t end_time) {
+    sqlite3_stmt *stmt = get_cached_statement(db, block_range_sql);
+    if (!stmt) {
+        log_error("Failed to prepare detection block query: %s", sqlite3_errmsg(db));
+        return NULL;
+    }
+    sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
+    sqlite3_bind_int64(stmt, 2, bucket_start((sqlite3_int64)start_time));
+    sqlite3_bind_int64(stmt, 3, (sqlite3_int64)end_time);
+    sqlite3_bind_int64(stmt, 4, (sqlite3_int64)end_time);
+    sqlite3_bind_int64(stmt, 5, (sqlite3_int64)start_time);
+    return stmt;
+}
+
+int read_block_detections(sqlite3 *db, const char *stream_name, time_t start_time, time_t end_time,
+                          detection_t *detections, time_t *timestamps, int max_count) {
+    if (!db || !stream_name || !detections || max_count <= 0) {
+        return -1;
+    }
+
+    if (!cached_table_exists("detection_blocks")) {
+        return 0;
+    }
+
+    sqlite3_stmt *stmt = prepare_block_range(db, stream_name, start_time, end_time);
+    if (!stmt) {
+        return -1;
+    }
+
+    detection_block_t *block = calloc(1, sizeof(detection_block_t));
+    if (!block) {
+        release_cached_statement(stmt);
+        return -1;
+    }
+
+    int count = 0;
+    int rc = SQLITE_DONE;
+    while (count < max_count && (rc = sqlite3_step(stmt)) == SQLITE_ROW) {
+        sqlite3_int64 bucket = sqlite3_column_int64(stmt, 0);
+        if (decode_block(sqlite3_column_blob(stmt, 3), sqlite3_column_bytes(stmt, 3), bucket, block, false) != 0) {
+            log_warn("Skipping corrupt detection block for stream %s at %lld", stream_name, (long long)bucket);
+            free_block(block);
+            continue;
+        }
+
+        for (int i = block->record_count - 1; i >= 0 && count < max_count; i--) {
+            const block_record_t *record = &block->records[i];
+            if (record->timestamp < start_time || record->timestamp > end_time) {
+                continue;
+            }
+            fill_detection(block, record, &detections[count]);
+            if (timestamps) {
+                timestamps[count] = (time_t)record->timestamp;
+            }
+            count++;
+        }
+        free_block(block);
+    }
+
+    if (count < max_count && rc != SQLITE_DONE) {
+        log_error("Failed to read detection blocks: %s", sqlite3_errmsg(db));
+        count = -1;
+    }
+
+    free(block);
+    release_cached_statement(stmt);
+    return count;
+}
+
+static void add_label_count(detection_label_summary_t *labels, int *label_count, int max_labels,
+                            const char *label, int count) {
+    if (count <= 0) {
+        return;
+    }
+    for (int i = 0; i < *label_count; i++) {
+        if (strcmp(labels[i].label, label) == 0) {
+            labels[i].count += count;
+            return;
+        }
+    }
+    if (*label_count < max_labels) {
+        detection_label_summary_t *entry = &labels[(*label_count)++];
+        strncpy(entry->label, label, MAX_LABEL_LENGTH - 1);
+        entry->label[MAX_LABEL_LENGTH - 1] = '\0';
+        entry->count = count;
+    }
+}
+
+int count_block_detection_labels(sqlite3 *db, const char *stream_name, time_t start_time, time_t end_time,
+                                 detection_label_summary_t *labels, int *label_count, int max_labels) {
+    if (!db || !stream_name || !labels || !label_count) {
+        return -1;
+    }
+
+    if (!cached_table_exists("detection_blocks")) {
+        return 0;
+    }
+
+    sqlite3_stmt *stmt = prepare_block_range(db, stream_name, start_time, end_time);
+    if (!stmt) {
+        return -1;
+    }
+
+    detection_block_t *block = calloc(1, sizeof(detection_block_t));
+    if (!block) {
+        release_cached_statement(stmt);
+        return -1;
+    }
+
+    int rc = SQLITE_DONE;
+    while ((rc = sqlite3_step(stmt)) == SQLITE_ROW) {
+        sqlite3_int64 bucket = sqlite3_column_int64(stmt, 0);
+        // Blocks inside the range are counted from the string table alone
+        bool inside = sqlite3_column_int64(stmt, 1) >= start_time && sqlite3_column_int64(stmt, 2) <= end_time;
+
+        if (decode_block(sqlite3_column_blob(stmt, 3), sqlite3_column_bytes(stmt, 3), bucket, block, inside) != 0) {
+            log_warn("Skipping corrupt detection block for stream %s at %lld", stream_name, (long long)bucket);
+            free_block(block);
+            continue;
+        }
+
+        if (!inside) {
+            for (int i = 0; i < block->string_count; i++) {
+                block->strings[i].label_count = 0;
+            }
+            for (int i = 0; i < block->record_count; i++) {
+                if (block->records[i].timestamp >= start_time && block->records[i].timestamp <= end_time) {
+                    block->strings[block->records[i].label].label_count++;
+                }
+            }
+        }
+
+        for (int i = 0; i < block->string_count; i++) {
+            add_label_count(labels, label_count, max_labels, block->strings[i].value, block->strings[i].label_count);
+        }
+        free_block(block);
+    }
+
+    free(block);
+    release_cached_statement(stmt);
+
+    if (rc != SQLITE_DONE) {
+        log_error("Failed to read detection blocks: %s", sqlite3_errmsg(db));
+        return -1;
+    }
+    return 0;
+}
+
+int block_detections_exist(sqlite3 *db, const char *stream_name, time_t start_time, time_t end_time) {
+    if (!db || !stream_name) {
+        return -1;
+    }
+
+    if (!cached_table_exists("detection_blocks")) {
+        return 0;
+    }
+
+    sqlite3_stmt *stmt = prepare_block_range(db, stream_name, start_time, end_time);
+    if (!stmt) {
+        return -1;
+    }
+
+    detection_block_t *block = NULL;
+    int exists = 0;
+    int rc = SQLITE_DONE;
+    while (!exists && (rc = sqlite3_step(stmt)) == SQLITE_ROW) {
+        sqlite3_int64 first = sqlite3_column_int64(stmt, 1);
+        sqlite3_int64 last = sqlite3_column_int64(stmt, 2);
+
+        // The first or last detection of the block is in the range
+        if (first >= start_time || last <= end_time) {
+            exists = 1;
+            break;
+        }
+
+        // The range falls between two detections of the block, or on one
+        if (!block && !(block = calloc(1, sizeof(detection_block_t)))) {
+            exists = -1;
+            break;
+        }
+        sqlite3_int64 bucket = sqlite3_column_int64(stmt, 0);
+        if (decode_block(sqlite3_column_blob(stmt, 3), sqlite3_column_bytes(stmt, 3), bucket, block, false) == 0) {
+            for (int i = 0; i < block->record_count; i++) {
+                if (block->records[i].timestamp >= start_time && block->records[i].timestamp <= end_time) {
+                    exists = 1;
+                    break;
+                }
+            }
+        }
+        free_block(block);
+    }
+
+    if (exists == 0 && rc != SQLITE_DONE) {
+        log_error("Failed to read detection blocks: %s", sqlite3_errmsg(db));
+        exists = -1;
+    }
+
+    free(block);
+    release_cached_statement(stmt);
+    return exists;
+}
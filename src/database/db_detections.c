@@ -12,6 +12,10 @@
 
 #include "database/db_detections.h"
 #include "database/db_core.h"
+#include "database/db_maintenance.h"
+#include "database/db_stmt_cache.h"
+#include "database/db_detection_blocks.h"
+#include "database/db_schema_cache.h"
 #include "core/logger.h"
 #include "video/detection_result.h"
 
@@ -132,8 +136,9 @@ int store_detections_in_db(const char *stream_name, const detection_result_t *re
     const char *sql = "INSERT INTO detections (stream_name, timestamp, label, confidence, x, y, width, height, track_id, zone_id) "
                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);";
 
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
+    // Cached: this runs several times a second per camera while detection is on
+    stmt = get_cached_statement(db, sql);
+    if (!stmt) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
         sqlite3_exec(db, "ROLLBACK;", NULL, NULL, NULL);
         pthread_mutex_unlock(db_mutex);
@@ -158,7 +163,7 @@ int store_detections_in_db(const char *stream_name, const detection_result_t *re
         rc = sqlite3_step(stmt);
         if (rc != SQLITE_DONE) {
             log_error("Failed to insert detection %d: %s", i, sqlite3_errmsg(db));
-            sqlite3_finalize(stmt);
+            release_cached_statement(stmt);
             sqlite3_exec(db, "ROLLBACK;", NULL, NULL, NULL);
             pthread_mutex_unlock(db_mutex);
             return -1;
@@ -169,8 +174,7 @@ int store_detections_in_db(const char *stream_name, const detection_result_t *re
         sqlite3_clear_bindings(stmt);
     }
     
-    // Untrack and finalize the prepared statement
-    sqlite3_finalize(stmt);
+    release_cached_statement(stmt);
     
     // Commit transaction
     rc = sqlite3_exec(db, "COMMIT;", NULL, NULL, &err_msg);
@@ -204,6 +208,135 @@ int store_detections_in_db(const char *stream_name, const detection_result_t *re
     return 0;
 }
 
+// Bounds for open-ended time ranges
+#define DETECTION_TIME_MIN (-((sqlite3_int64)1 << 62))
+#define DETECTION_TIME_MAX ((sqlite3_int64)1 << 62)
+
+/**
+ * Turn the time filters of the detection lookups into an inclusive range
+ * A start/end range wins over max_age; no filter at all means every detection.
+ */
+static void detection_time_range(uint64_t max_age, time_t start_time, time_t end_time,
+                                 sqlite3_int64 *from, sqlite3_int64 *to) {
+    *from = DETECTION_TIME_MIN;
+    *to = DETECTION_TIME_MAX;
+
+    if (start_time > 0 || end_time > 0) {
+        if (start_time > 0) {
+            *from = (sqlite3_int64)start_time;
+        }
+        if (end_time > 0) {
+            *to = (sqlite3_int64)end_time;
+        }
+    } else if (max_age > 0) {
+        *from = (sqlite3_int64)(time(NULL) - max_age);
+    }
+}
+
+/**
+ * Start a read transaction so rows and blocks are read from one snapshot
+ * (a bucket being packed is then seen either as rows or as its block)
+ *
+ * @return true if a transaction was started and must be ended with end_detection_read()
+ */
+static bool begin_detection_read(sqlite3 *db) {
+    // Leave a transaction the connection is already in alone
+    return sqlite3_get_autocommit(db) && sqlite3_exec(db, "BEGIN;", NULL, NULL, NULL) == SQLITE_OK;
+}
+
+static void end_detection_read(sqlite3 *db, bool in_transaction) {
+    if (in_transaction) {
+        sqlite3_exec(db, "COMMIT;", NULL, NULL, NULL);
+    }
+}
+
+/**
+ * Collect the newest detections of a stream in a range from rows and blocks
+ * Caller holds the connection.
+ *
+ * @return Number of detections (newest first), or -1 on error
+ */
+static int collect_latest_detections(sqlite3 *db, const char *stream_name,
+                                     sqlite3_int64 from, sqlite3_int64 to,
+                                     detection_t *detections, time_t *timestamps, int max_count) {
+    detection_t block_detections[MAX_DETECTIONS];
+    time_t block_timestamps[MAX_DETECTIONS];
+    detection_t row_detections[MAX_DETECTIONS];
+    time_t row_timestamps[MAX_DETECTIONS];
+    int row_count = 0;
+
+    if (max_count > MAX_DETECTIONS) {
+        max_count = MAX_DETECTIONS;
+    }
+
+    const char *sql =
+        "SELECT timestamp, label, confidence, x, y, width, height, track_id, zone_id "
+        "FROM detections "
+        "WHERE stream_name = ? AND timestamp >= ? AND timestamp <= ? "
+        "ORDER BY timestamp DESC "
+        "LIMIT ?;";
+
+    bool in_transaction = begin_detection_read(db);
+
+    sqlite3_stmt *stmt = get_cached_statement(db, sql);
+    if (!stmt) {
+        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+        end_detection_read(db, in_transaction);
+        return -1;
+    }
+
+    sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
+    sqlite3_bind_int64(stmt, 2, from);
+    sqlite3_bind_int64(stmt, 3, to);
+    sqlite3_bind_int(stmt, 4, max_count);
+
+    while (sqlite3_step(stmt) == SQLITE_ROW && row_count < max_count) {
+        detection_t *detection = &row_detections[row_count];
+        const char *label = (const char *)sqlite3_column_text(stmt, 1);
+        const char *zone_id = (const char *)sqlite3_column_text(stmt, 8);
+
+        memset(detection, 0, sizeof(*detection));
+        strncpy(detection->label, label ? label : "unknown", MAX_LABEL_LENGTH - 1);
+        if (zone_id) {
+            strncpy(detection->zone_id, zone_id, MAX_ZONE_ID_LENGTH - 1);
+        }
+        detection->confidence = (float)sqlite3_column_double(stmt, 2);
+        detection->x = (float)sqlite3_column_double(stmt, 3);
+        detection->y = (float)sqlite3_column_double(stmt, 4);
+        detection->width = (float)sqlite3_column_double(stmt, 5);
+        detection->height = (float)sqlite3_column_double(stmt, 6);
+        detection->track_id = sqlite3_column_type(stmt, 7) == SQLITE_NULL ? -1 : sqlite3_column_int(stmt, 7);
+        row_timestamps[row_count] = (time_t)sqlite3_column_int64(stmt, 0);
+        row_count++;
+    }
+    release_cached_statement(stmt);
+
+    int block_count = read_block_detections(db, stream_name, (time_t)from, (time_t)to,
+                                            block_detections, block_timestamps, max_count);
+    end_detection_read(db, in_transaction);
+    if (block_count < 0) {
+        block_count = 0;
+    }
+
+    // Merge the two newest-first lists
+    int count = 0, r = 0, b = 0;
+    while (count < max_count && (r < row_count || b < block_count)) {
+        bool take_row = b >= block_count || (r < row_count && row_timestamps[r] >= block_timestamps[b]);
+        detections[count] = take_row ? row_detections[r] : block_detections[b];
+        if (timestamps) {
+            timestamps[count] = take_row ? row_timestamps[r] : block_timestamps[b];
+        }
+        if (take_row) {
+            r++;
+        } else {
+            b++;
+        }
+        count++;
+    }
+
+    return count;
+}
+
 /**
  * Get detection results from the database
  * 
@@ -216,11 +349,7 @@ int store_detections_in_db(const char *stream_name, const detection_result_t *re
  */
 int get_detections_from_db_time_range(const char *stream_name, detection_result_t *result, 
                                      uint64_t max_age, time_t start_time, time_t end_time) {
-    int rc;
-    sqlite3_stmt *stmt;
-    
     sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
     
     if (!db) {
         log_error("Database not initialized");
@@ -235,163 +364,26 @@ int get_detections_from_db_time_range(const char *stream_name, detection_result_
     // Initialize result
     memset(result, 0, sizeof(detection_result_t));
     
-    pthread_mutex_lock(db_mutex);
-    
-    // Build query based on filters
-    char sql[512];
-    
-    if (start_time > 0 && end_time > 0) {
-        // Time range filter
-        log_debug("Getting detections for stream %s between %lld and %lld",
-                stream_name, (long long)start_time, (long long)end_time);
-        
-        snprintf(sql, sizeof(sql), 
-                "SELECT label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp >= ? AND timestamp <= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)start_time);
-        sqlite3_bind_int64(stmt, 3, (sqlite3_int64)end_time);
-        sqlite3_bind_int(stmt, 4, MAX_DETECTIONS);
-    } else if (start_time > 0) {
-        // Start time filter only
-        log_debug("Getting detections for stream %s from %lld",
-                stream_name, (long long)start_time);
-        
-        snprintf(sql, sizeof(sql), 
-                "SELECT label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp >= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)start_time);
-        sqlite3_bind_int(stmt, 3, MAX_DETECTIONS);
-    } else if (end_time > 0) {
-        // End time filter only
-        log_debug("Getting detections for stream %s until %lld",
-                stream_name, (long long)end_time);
-        
-        snprintf(sql, sizeof(sql), 
-                "SELECT label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp <= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)end_time);
-        sqlite3_bind_int(stmt, 3, MAX_DETECTIONS);
-    } else if (max_age > 0) {
-        // Max age filter
-        // Calculate cutoff time
-        time_t cutoff_time = time(NULL) - max_age;
-
-        log_debug("Getting detections for stream %s since %lld (max age %llu seconds)",
-                stream_name, (long long)cutoff_time, (unsigned long long)max_age);
-
-        // Get all detections within the time window (not just the latest timestamp)
-        snprintf(sql, sizeof(sql),
-                "SELECT label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp >= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)cutoff_time);
-        sqlite3_bind_int(stmt, 3, MAX_DETECTIONS);
-    } else {
-        // No filters, just get the latest detections
-        log_debug("Getting latest detections for stream %s (no time filters)", stream_name);
-        
-        snprintf(sql, sizeof(sql), 
-                "SELECT label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int(stmt, 2, MAX_DETECTIONS);
+    // Detection lookups go through the reader pool instead of queueing behind store_detections_in_db
+    db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
     }
     
-    // Execute query and fetch results
-    int count = 0;
-    while (sqlite3_step(stmt) == SQLITE_ROW && count < MAX_DETECTIONS) {
-        // Get detection data
-        const char *label = (const char *)sqlite3_column_text(stmt, 0);
-        float confidence = (float)sqlite3_column_double(stmt, 1);
-        float x = (float)sqlite3_column_double(stmt, 2);
-        float y = (float)sqlite3_column_double(stmt, 3);
-        float width = (float)sqlite3_column_double(stmt, 4);
-        float height = (float)sqlite3_column_double(stmt, 5);
-        
-        // Store in result
-        if (label) {
-            strncpy(result->detections[count].label, label, MAX_LABEL_LENGTH - 1);
-            result->detections[count].label[MAX_LABEL_LENGTH - 1] = '\0';
-        } else {
-            strncpy(result->detections[count].label, "unknown", MAX_LABEL_LENGTH - 1);
-        }
-        
-        result->detections[count].confidence = confidence;
-        result->detections[count].x = x;
-        result->detections[count].y = y;
-        result->detections[count].width = width;
-        result->detections[count].height = height;
-        
-        count++;
+    sqlite3_int64 from, to;
+    detection_time_range(max_age, start_time, end_time, &from, &to);
+    log_debug("Getting detections for stream %s between %lld and %lld",
+              stream_name, (long long)from, (long long)to);
+
+    // Rows hold recent detections, blocks the packed older ones
+    int count = collect_latest_detections(db, stream_name, from, to, result->detections, NULL, MAX_DETECTIONS);
+    release_db_reader(db);
+
+    if (count < 0) {
+        return -1;
     }
-    
     result->count = count;
-
-    sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
     
     log_debug("Found %d detections in database for stream %s", count, stream_name);
     return count;
@@ -410,11 +402,7 @@ int get_detections_from_db_time_range(const char *stream_name, detection_result_
  */
 int get_detection_timestamps(const char *stream_name, detection_result_t *result, time_t *timestamps,
                            uint64_t max_age, time_t start_time, time_t end_time) {
-    int rc;
-    sqlite3_stmt *stmt;
-    
     sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
     
     if (!db) {
         log_error("Database not initialized");
@@ -426,151 +414,43 @@ int get_detection_timestamps(const char *stream_name, detection_result_t *result
         return -1;
     }
     
-    pthread_mutex_lock(db_mutex);
-    
-    // Build query based on filters
-    char sql[512];
-    
-    if (start_time > 0 && end_time > 0) {
-        // Time range filter
-        snprintf(sql, sizeof(sql), 
-                "SELECT timestamp, label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp >= ? AND timestamp <= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
+    db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
 
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)start_time);
-        sqlite3_bind_int64(stmt, 3, (sqlite3_int64)end_time);
-        sqlite3_bind_int(stmt, 4, MAX_DETECTIONS);
-    } else if (start_time > 0) {
-        // Start time filter only
-        snprintf(sql, sizeof(sql), 
-                "SELECT timestamp, label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp >= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)start_time);
-        sqlite3_bind_int(stmt, 3, MAX_DETECTIONS);
-    } else if (end_time > 0) {
-        // End time filter only
-        snprintf(sql, sizeof(sql), 
-                "SELECT timestamp, label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp <= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)end_time);
-        sqlite3_bind_int(stmt, 3, MAX_DETECTIONS);
-    } else if (max_age > 0) {
-        // Max age filter
-        // Calculate cutoff time
-        time_t cutoff_time = time(NULL) - max_age;
-        
-        // First get the latest timestamp
-        snprintf(sql, sizeof(sql), 
-                "SELECT timestamp, label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? AND timestamp >= ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)cutoff_time);
-        sqlite3_bind_int(stmt, 3, MAX_DETECTIONS);
-    } else {
-        // No filters, just get the latest detections
-        snprintf(sql, sizeof(sql), 
-                "SELECT timestamp, label, confidence, x, y, width, height "
-                "FROM detections "
-                "WHERE stream_name = ? "
-                "ORDER BY timestamp DESC "
-                "LIMIT ?;");
-        
-        rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-        if (rc != SQLITE_OK) {
-            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-            pthread_mutex_unlock(db_mutex);
-            return -1;
-        }
-        
-        // Bind parameters
-        sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
-        sqlite3_bind_int(stmt, 2, MAX_DETECTIONS);
+    sqlite3_int64 from, to;
+    detection_time_range(max_age, start_time, end_time, &from, &to);
+
+    detection_t candidates[MAX_DETECTIONS];
+    time_t candidate_timestamps[MAX_DETECTIONS];
+    int count = collect_latest_detections(db, stream_name, from, to, candidates, candidate_timestamps,
+                                          result->count);
+    release_db_reader(db);
+
+    if (count < 0) {
+        return -1;
     }
-    
-    // Execute query and fetch results
-    int count = 0;
-    while (sqlite3_step(stmt) == SQLITE_ROW && count < result->count) {
-        // Get timestamp
-        timestamps[count] = (time_t)sqlite3_column_int64(stmt, 0);
-        
-        // Get detection data to match with result
-        const char *label = (const char *)sqlite3_column_text(stmt, 1);
-        float confidence = (float)sqlite3_column_double(stmt, 2);
-        float x = (float)sqlite3_column_double(stmt, 3);
-        float y = (float)sqlite3_column_double(stmt, 4);
-        float width = (float)sqlite3_column_double(stmt, 5);
-        float height = (float)sqlite3_column_double(stmt, 6);
+
+    for (int c = 0; c < count; c++) {
+        timestamps[c] = candidate_timestamps[c];
         
         // Find matching detection in result
         for (int i = 0; i < result->count; i++) {
-            if (strcmp(result->detections[i].label, label) == 0 &&
-                fabs(result->detections[i].confidence - confidence) < 0.001 &&
-                fabs(result->detections[i].x - x) < 0.001 &&
-                fabs(result->detections[i].y - y) < 0.001 &&
-                fabs(result->detections[i].width - width) < 0.001 &&
-                fabs(result->detections[i].height - height) < 0.001) {
+            if (strcmp(result->detections[i].label, candidates[c].label) == 0 &&
+                fabs(result->detections[i].confidence - candidates[c].confidence) < 0.001 &&
+                fabs(result->detections[i].x - candidates[c].x) < 0.001 &&
+                fabs(result->detections[i].y - candidates[c].y) < 0.001 &&
+                fabs(result->detections[i].width - candidates[c].width) < 0.001 &&
+                fabs(result->detections[i].height - candidates[c].height) < 0.001) {
                 // Found matching detection, store timestamp
-                timestamps[i] = timestamps[count];
+                timestamps[i] = candidate_timestamps[c];
                 break;
             }
         }
-        
-        count++;
     }
     
-    sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
-    
     return 0;
 }
 
@@ -601,7 +481,6 @@ int has_detections_in_time_range(const char *stream_name, time_t start_time, tim
     int has_detections = 0;
 
     sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
 
     if (!db) {
         log_error("Database not initialized");
@@ -616,7 +495,11 @@ int has_detections_in_time_range(const char *stream_name, time_t start_time, tim
     log_debug("Checking for detections: stream=%s, start=%lld, end=%lld",
              stream_name, (long long)start_time, (long long)end_time);
 
-    pthread_mutex_lock(db_mutex);
+    db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
 
     // Use EXISTS for efficiency - stops at first match
     const char *sql = "SELECT EXISTS(SELECT 1 FROM detections WHERE stream_name = ? AND timestamp >= ? AND timestamp <= ? LIMIT 1);";
@@ -624,7 +507,7 @@ int has_detections_in_time_range(const char *stream_name, time_t start_time, tim
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
+        release_db_reader(db);
         return -1;
     }
 
@@ -639,12 +522,17 @@ int has_detections_in_time_range(const char *stream_name, time_t start_time, tim
     } else {
         log_error("Failed to check for detections: %s", sqlite3_errmsg(db));
         sqlite3_finalize(stmt);
-        pthread_mutex_unlock(db_mutex);
+        release_db_reader(db);
         return -1;
     }
 
     sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+
+    // Older detections may have been packed into blocks
+    if (has_detections == 0) {
+        has_detections = block_detections_exist(db, stream_name, start_time, end_time);
+    }
+    release_db_reader(db);
 
     return has_detections;
 }
@@ -658,7 +546,6 @@ int has_detections_in_time_range(const char *stream_name, time_t start_time, tim
 int delete_old_detections(uint64_t max_age) {
     int rc;
     sqlite3_stmt *stmt;
-    int deleted_count = 0;
     
     sqlite3 *db = get_db_handle();
     pthread_mutex_t *db_mutex = get_db_mutex();
@@ -668,42 +555,63 @@ int delete_old_detections(uint64_t max_age) {
         return -1;
     }
     
-    pthread_mutex_lock(db_mutex);
-    
-    const char *sql = "DELETE FROM detections WHERE timestamp < ?;";
-    
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
-        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
-        return -1;
-    }
-    
     // Calculate cutoff time
     time_t cutoff_time = time(NULL) - max_age;
     
-    // Bind parameters
-    sqlite3_bind_int64(stmt, 1, (sqlite3_int64)cutoff_time);
-    
-    // Execute statement
-    rc = sqlite3_step(stmt);
-    if (rc != SQLITE_DONE) {
-        log_error("Failed to delete old detections: %s", sqlite3_errmsg(db));
-        sqlite3_finalize(stmt);
-        pthread_mutex_unlock(db_mutex);
+    int deleted_count = delete_expired_rows("detections", "timestamp", cutoff_time);
+    if (deleted_count < 0) {
         return -1;
     }
-    
-    deleted_count = sqlite3_changes(db);
 
-    // finalize the prepared statement
-    sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+    // Packed detections go a whole block at a time, once its last detection has expired
+    if (cached_table_exists("detection_blocks")) {
+        pthread_mutex_lock(db_mutex);
+
+        int packed_count = 0;
+        rc = sqlite3_prepare_v2(db, "SELECT COALESCE(SUM(detection_count), 0) FROM detection_blocks "
+                                    "WHERE last_timestamp < ?;", -1, &stmt, NULL);
+        if (rc == SQLITE_OK) {
+            sqlite3_bind_int64(stmt, 1, (sqlite3_int64)cutoff_time);
+            if (sqlite3_step(stmt) == SQLITE_ROW) {
+                packed_count = sqlite3_column_int(stmt, 0);
+            }
+            sqlite3_finalize(stmt);
+
+            rc = sqlite3_prepare_v2(db, "DELETE FROM detection_blocks WHERE last_timestamp < ?;", -1, &stmt, NULL);
+        }
+        if (rc == SQLITE_OK) {
+            sqlite3_bind_int64(stmt, 1, (sqlite3_int64)cutoff_time);
+            if (sqlite3_step(stmt) == SQLITE_DONE) {
+                log_info("Deleted %d old detection blocks from database", sqlite3_changes(db));
+                deleted_count += packed_count;
+            } else {
+                log_error("Failed to delete old detection blocks: %s", sqlite3_errmsg(db));
+            }
+            sqlite3_finalize(stmt);
+        } else {
+            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+        }
+
+        pthread_mutex_unlock(db_mutex);
+    }
 
     log_info("Deleted %d old detections from database", deleted_count);
     return deleted_count;
 }
 
+// Distinct labels collected for a summary before picking the most frequent
+#define MAX_SUMMARY_LABELS 128
+
+// qsort comparator: most frequent label first, ties by label name
+static int compare_label_counts(const void *a, const void *b) {
+    const detection_label_summary_t *la = a;
+    const detection_label_summary_t *lb = b;
+    if (la->count != lb->count) {
+        return (lb->count > la->count) - (lb->count < la->count);
+    }
+    return strcmp(la->label, lb->label);
+}
+
 /**
  * Get a summary of detection labels for a stream within a time range
  * Returns unique labels with their counts, sorted by count descending
@@ -722,7 +630,6 @@ int get_detection_labels_summary(const char *stream_name, time_t start_time, tim
     int count = 0;
 
     sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
 
     if (!db) {
         log_error("Database not initialized");
@@ -737,21 +644,27 @@ int get_detection_labels_summary(const char *stream_name, time_t start_time, tim
     // Initialize labels array
     memset(labels, 0, max_labels * sizeof(detection_label_summary_t));
 
-    pthread_mutex_lock(db_mutex);
+    db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
 
-    // Query to get unique labels with counts, sorted by count descending
+    // Unique labels with counts from the rows; sorted after adding the blocks' counts
     const char *sql =
         "SELECT label, COUNT(*) as cnt "
         "FROM detections "
         "WHERE stream_name = ? AND timestamp >= ? AND timestamp <= ? "
-        "GROUP BY label "
-        "ORDER BY cnt DESC "
-        "LIMIT ?;";
+        "GROUP BY label;";
 
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
+    bool in_transaction = begin_detection_read(db);
+
+    // Called for every recording in the recordings list
+    stmt = get_cached_statement(db, sql);
+    if (!stmt) {
         log_error("Failed to prepare statement for get_detection_labels_summary: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
+        end_detection_read(db, in_transaction);
+        release_db_reader(db);
         return -1;
     }
 
@@ -759,30 +672,45 @@ int get_detection_labels_summary(const char *stream_name, time_t start_time, tim
     sqlite3_bind_text(stmt, 1, stream_name, -1, SQLITE_STATIC);
     sqlite3_bind_int64(stmt, 2, (sqlite3_int64)start_time);
     sqlite3_bind_int64(stmt, 3, (sqlite3_int64)end_time);
-    sqlite3_bind_int(stmt, 4, max_labels);
+
+    detection_label_summary_t all_labels[MAX_SUMMARY_LABELS];
+    int label_count = 0;
 
     // Execute query and fetch results
-    while ((rc = sqlite3_step(stmt)) == SQLITE_ROW && count < max_labels) {
+    while ((rc = sqlite3_step(stmt)) == SQLITE_ROW && label_count < MAX_SUMMARY_LABELS) {
         const char *label = (const char *)sqlite3_column_text(stmt, 0);
-        int label_count = sqlite3_column_int(stmt, 1);
 
         if (label) {
-            strncpy(labels[count].label, label, MAX_LABEL_LENGTH - 1);
-            labels[count].label[MAX_LABEL_LENGTH - 1] = '\0';
-            labels[count].count = label_count;
-            count++;
+            strncpy(all_labels[label_count].label, label, MAX_LABEL_LENGTH - 1);
+            all_labels[label_count].label[MAX_LABEL_LENGTH - 1] = '\0';
+            all_labels[label_count].count = sqlite3_column_int(stmt, 1);
+            label_count++;
         }
     }
 
     if (rc != SQLITE_DONE && rc != SQLITE_ROW) {
         log_error("Failed to fetch detection labels: %s", sqlite3_errmsg(db));
-        sqlite3_finalize(stmt);
-        pthread_mutex_unlock(db_mutex);
+        release_cached_statement(stmt);
+        end_detection_read(db, in_transaction);
+        release_db_reader(db);
         return -1;
     }
 
-    sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+    release_cached_statement(stmt);
+
+    // Packed detections count too
+    rc = count_block_detection_labels(db, stream_name, start_time, end_time,
+                                      all_labels, &label_count, MAX_SUMMARY_LABELS);
+    end_detection_read(db, in_transaction);
+    release_db_reader(db);
+    if (rc != 0) {
+        return -1;
+    }
+
+    qsort(all_labels, label_count, sizeof(detection_label_summary_t), compare_label_counts);
+
+    count = label_count < max_labels ? label_count : max_labels;
+    memcpy(labels, all_labels, count * sizeof(detection_label_summary_t));
 
     return count;
 }
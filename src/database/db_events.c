@@ -11,6 +11,8 @@
 
 #include "database/db_events.h"
 #include "database/db_core.h"
+#include "database/db_maintenance.h"
+#include "database/db_stmt_cache.h"
 #include "core/logger.h"
 
 // Add an event to the database
@@ -38,8 +40,8 @@ uint64_t add_event(event_type_t type, const char *stream_name,
     const char *sql = "INSERT INTO events (type, timestamp, stream_name, description, details) "
                       "VALUES (?, ?, ?, ?, ?);";
     
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
+    stmt = get_cached_statement(db, sql);
+    if (!stmt) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
         pthread_mutex_unlock(db_mutex);
         return 0;
@@ -72,8 +74,7 @@ uint64_t add_event(event_type_t type, const char *stream_name,
         log_debug("Added event with ID %llu", (unsigned long long)event_id);
     }
     
-    // finalize the prepared statement
-    sqlite3_finalize(stmt);
+    release_cached_statement(stmt);
     pthread_mutex_unlock(db_mutex);
     
     return event_id;
@@ -194,49 +195,8 @@ int get_events(time_t start_time, time_t end_time, int type,
 
 // Delete old events from the database
 int delete_old_events(uint64_t max_age) {
-    int rc;
-    sqlite3_stmt *stmt;
-    int deleted_count = 0;
-    
-    sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
-    
-    if (!db) {
-        log_error("Database not initialized");
-        return -1;
-    }
-    
-    pthread_mutex_lock(db_mutex);
-    
-    const char *sql = "DELETE FROM events WHERE timestamp < ?;";
-    
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
-        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
-        return -1;
-    }
-    
     // Calculate cutoff time
     time_t cutoff_time = time(NULL) - max_age;
-    
-    // Bind parameters
-    sqlite3_bind_int64(stmt, 1, (sqlite3_int64)cutoff_time);
-    
-    // Execute statement
-    rc = sqlite3_step(stmt);
-    if (rc != SQLITE_DONE) {
-        log_error("Failed to delete old events: %s", sqlite3_errmsg(db));
-        sqlite3_finalize(stmt);
-        pthread_mutex_unlock(db_mutex);
-        return -1;
-    }
-    
-    deleted_count = sqlite3_changes(db);
-    
-    // finalize the prepared statement
-    sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
-    
-    return deleted_count;
+
+    return delete_expired_rows("events", "timestamp", cutoff_time);
 }
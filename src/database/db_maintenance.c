@@ -11,6 +11,7 @@
 #include <unistd.h>
 #include <errno.h>
 #include <stdint.h>
+#include <limits.h>
 
 #include "database/db_core.h"
 #include "database/db_maintenance.h"
@@ -65,10 +66,205 @@ int64_t get_database_size(void) {
     return size;
 }
 
+// Rows deleted per transaction by retention deletes
+#define RETENTION_DELETE_BATCH 1000
+
+// Free pages released per transaction by incremental vacuum
+#define INCREMENTAL_VACUUM_STEP 256
+
+// Pause between batches so queued writes get the database mutex in between
+#define MAINTENANCE_YIELD_US 5000
+
+// auto_vacuum mode reported by PRAGMA auto_vacuum for INCREMENTAL
+#define AUTO_VACUUM_INCREMENTAL 2
+
+// Longest query check_query_plan() can explain
+#define MAX_EXPLAIN_SQL 4096
+
+// Run a pragma that returns a single integer; the caller holds the database mutex
+static int query_pragma_int(sqlite3 *db, const char *sql, int64_t *value) {
+    sqlite3_stmt *stmt;
+
+    int rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+        return -1;
+    }
+
+    rc = sqlite3_step(stmt);
+    if (rc == SQLITE_ROW) {
+        *value = sqlite3_column_int64(stmt, 0);
+    }
+    sqlite3_finalize(stmt);
+
+    return rc == SQLITE_ROW ? 0 : -1;
+}
+
+// Delete expired rows in batches, paging by rowid from the last row deleted
+int delete_expired_rows(const char *table, const char *time_column, time_t cutoff_time) {
+    int rc;
+    sqlite3_stmt *batch_stmt;
+    sqlite3_stmt *delete_stmt;
+    char sql[256];
+    sqlite3_int64 last_rowid = 0;
+    int deleted_count = 0;
+    sqlite3 *db = get_db_handle();
+    pthread_mutex_t *db_mutex = get_db_mutex();
+
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
+
+    if (!table || !time_column) {
+        log_error("Invalid parameters for delete_expired_rows");
+        return -1;
+    }
+
+    pthread_mutex_lock(db_mutex);
+
+    // Last rowid of the next batch of expired rows; NULL when none are left
+    snprintf(sql, sizeof(sql),
+             "SELECT MAX(rowid) FROM (SELECT rowid FROM %s WHERE %s < ? AND rowid > ? "
+             "ORDER BY rowid LIMIT %d);",
+             table, time_column, RETENTION_DELETE_BATCH);
+    rc = sqlite3_prepare_v2(db, sql, -1, &batch_stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+        pthread_mutex_unlock(db_mutex);
+        return -1;
+    }
+
+    snprintf(sql, sizeof(sql), "DELETE FROM %s WHERE rowid > ? AND rowid <= ? AND %s < ?;", table, time_column);
+    rc = sqlite3_prepare_v2(db, sql, -1, &delete_stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+        sqlite3_finalize(batch_stmt);
+        pthread_mutex_unlock(db_mutex);
+        return -1;
+    }
+
+    // Each batch is its own transaction; the mutex is released in between
+    // so recording and detection writes are never held up for long. Gaps in
+    // the rowids and rows that are not expired cost nothing, since every
+    // batch holds up to RETENTION_DELETE_BATCH expired rows.
+    for (;;) {
+        sqlite3_bind_int64(batch_stmt, 1, (sqlite3_int64)cutoff_time);
+        sqlite3_bind_int64(batch_stmt, 2, last_rowid);
+        rc = sqlite3_step(batch_stmt);
+        if (rc != SQLITE_ROW) {
+            log_error("Failed to find expired rows in %s: %s", table, sqlite3_errmsg(db));
+            deleted_count = -1;
+            break;
+        }
+        if (sqlite3_column_type(batch_stmt, 0) == SQLITE_NULL) {
+            break;
+        }
+        sqlite3_int64 batch_end = sqlite3_column_int64(batch_stmt, 0);
+        sqlite3_reset(batch_stmt);
+
+        sqlite3_bind_int64(delete_stmt, 1, last_rowid);
+        sqlite3_bind_int64(delete_stmt, 2, batch_end);
+        sqlite3_bind_int64(delete_stmt, 3, (sqlite3_int64)cutoff_time);
+        rc = sqlite3_step(delete_stmt);
+        if (rc != SQLITE_DONE) {
+            log_error("Failed to delete expired rows from %s: %s", table, sqlite3_errmsg(db));
+            deleted_count = -1;
+            break;
+        }
+        int changes = sqlite3_changes(db);
+        deleted_count += changes;
+        sqlite3_reset(delete_stmt);
+        last_rowid = batch_end;
+        if (changes < RETENTION_DELETE_BATCH) {
+            break;
+        }
+
+        pthread_mutex_unlock(db_mutex);
+        usleep(MAINTENANCE_YIELD_US);
+        pthread_mutex_lock(db_mutex);
+    }
+
+    sqlite3_finalize(batch_stmt);
+    sqlite3_finalize(delete_stmt);
+    pthread_mutex_unlock(db_mutex);
+
+    return deleted_count;
+}
+
+// Release free pages back to the filesystem, a few at a time
+int incremental_vacuum_database(int max_pages) {
+    int64_t auto_vacuum = 0;
+    int freed_pages = 0;
+    sqlite3 *db = get_db_handle();
+    pthread_mutex_t *db_mutex = get_db_mutex();
+
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
+
+    pthread_mutex_lock(db_mutex);
+    if (query_pragma_int(db, "PRAGMA auto_vacuum;", &auto_vacuum) != 0) {
+        pthread_mutex_unlock(db_mutex);
+        return -1;
+    }
+    pthread_mutex_unlock(db_mutex);
+
+    if (auto_vacuum != AUTO_VACUUM_INCREMENTAL) {
+        log_debug("Incremental vacuum skipped, database needs a full vacuum to enable it");
+        return 0;
+    }
+
+    while (freed_pages < max_pages) {
+        int64_t free_pages = 0;
+        char sql[64];
+
+        pthread_mutex_lock(db_mutex);
+        if (query_pragma_int(db, "PRAGMA freelist_count;", &free_pages) != 0) {
+            pthread_mutex_unlock(db_mutex);
+            return -1;
+        }
+
+        int step = max_pages - freed_pages;
+        if (step > INCREMENTAL_VACUUM_STEP) {
+            step = INCREMENTAL_VACUUM_STEP;
+        }
+        if (step > free_pages) {
+            step = (int)free_pages;
+        }
+        if (step <= 0) {
+            pthread_mutex_unlock(db_mutex);
+            break;
+        }
+
+        char *err_msg = NULL;
+        snprintf(sql, sizeof(sql), "PRAGMA incremental_vacuum(%d);", step);
+        int rc = sqlite3_exec(db, sql, NULL, NULL, &err_msg);
+        pthread_mutex_unlock(db_mutex);
+
+        if (rc != SQLITE_OK) {
+            log_error("Failed to run incremental vacuum: %s", err_msg);
+            sqlite3_free(err_msg);
+            return -1;
+        }
+
+        freed_pages += step;
+        usleep(MAINTENANCE_YIELD_US);
+    }
+
+    if (freed_pages > 0) {
+        log_info("Incremental vacuum released %d pages", freed_pages);
+    }
+
+    return freed_pages;
+}
+
 // Vacuum the database to reclaim space
 int vacuum_database(void) {
     int rc;
     char *err_msg = NULL;
+    int64_t auto_vacuum = 0;
     sqlite3 *db = get_db_handle();
     pthread_mutex_t *db_mutex = get_db_mutex();
     
@@ -78,8 +274,21 @@ int vacuum_database(void) {
     }
     
     pthread_mutex_lock(db_mutex);
-    
-    rc = sqlite3_exec(db, "VACUUM;", NULL, NULL, &err_msg);
+
+    if (query_pragma_int(db, "PRAGMA auto_vacuum;", &auto_vacuum) != 0) {
+        pthread_mutex_unlock(db_mutex);
+        return -1;
+    }
+
+    if (auto_vacuum == AUTO_VACUUM_INCREMENTAL) {
+        pthread_mutex_unlock(db_mutex);
+        return incremental_vacuum_database(INT_MAX) < 0 ? -1 : 0;
+    }
+
+    // Databases created before incremental auto_vacuum was enabled need one
+    // full VACUUM to switch over; after that, space is reclaimed incrementally
+    log_info("Converting database to incremental auto_vacuum, this rewrites the whole file once");
+    rc = sqlite3_exec(db, "PRAGMA auto_vacuum=INCREMENTAL; VACUUM;", NULL, NULL, &err_msg);
     if (rc != SQLITE_OK) {
         log_error("Failed to vacuum database: %s", err_msg);
         sqlite3_free(err_msg);
@@ -168,6 +377,70 @@ int check_database_integrity(void) {
     return result;
 }
 
+// Explain a query and warn about full scans, and with check_order about sorts
+static int explain_query_plan(const char *name, const char *sql, bool check_order) {
+    int rc;
+    sqlite3_stmt *stmt;
+    char explain_sql[MAX_EXPLAIN_SQL];
+    int result = 1;
+    sqlite3 *db = get_db_handle();
+    pthread_mutex_t *db_mutex = get_db_mutex();
+
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
+
+    if (!name || !sql) {
+        log_error("Invalid parameters for query plan check");
+        return -1;
+    }
+
+    if (snprintf(explain_sql, sizeof(explain_sql), "EXPLAIN QUERY PLAN %s", sql) >= (int)sizeof(explain_sql)) {
+        log_error("Query too long to check plan: %s", name);
+        return -1;
+    }
+
+    pthread_mutex_lock(db_mutex);
+
+    rc = sqlite3_prepare_v2(db, explain_sql, -1, &stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare query plan check for %s: %s", name, sqlite3_errmsg(db));
+        pthread_mutex_unlock(db_mutex);
+        return -1;
+    }
+
+    // Plan rows read "SEARCH t USING INDEX ..." or "SCAN t USING INDEX ..."
+    // when an index is used; a bare "SCAN t" reads the whole table
+    while (sqlite3_step(stmt) == SQLITE_ROW) {
+        const char *detail = (const char *)sqlite3_column_text(stmt, 3);
+        if (detail && strncmp(detail, "SCAN ", 5) == 0 && !strstr(detail, " USING ")) {
+            log_warn("Query \"%s\" does not use an index: %s", name, detail);
+            result = 0;
+        }
+        // "USE TEMP B-TREE FOR ORDER BY" sorts every matching row before the first is returned
+        if (check_order && detail && strstr(detail, "TEMP B-TREE FOR") && strstr(detail, "ORDER BY")) {
+            log_warn("Query \"%s\" is not ordered by an index: %s", name, detail);
+            result = 0;
+        }
+    }
+
+    sqlite3_finalize(stmt);
+    pthread_mutex_unlock(db_mutex);
+
+    return result;
+}
+
+// Check that a query is planned with indexes
+int check_query_plan(const char *name, const char *sql) {
+    return explain_query_plan(name, sql, false);
+}
+
+// Check that a query is planned with indexes and returns rows in index order
+int check_query_plan_order(const char *name, const char *sql) {
+    return explain_query_plan(name, sql, true);
+}
+
 // Execute a SQL query and get the results
 int database_execute_query(const char *sql, void **result, int *rows, int *cols) {
     int rc;
@@ -227,3 +227,141 @@ bool qb_get_bool(sqlite3_stmt *stmt, const query_builder_t *qb,
     return sqlite3_column_int(stmt, idx) != 0;
 }
 
+
+// Store an integer into a member of the given width
+static void store_int(void *dest, size_t size, sqlite3_int64 value) {
+    switch (size) {
+        case sizeof(int8_t): {
+            int8_t v = (int8_t)value;
+            memcpy(dest, &v, sizeof(v));
+            break;
+        }
+        case sizeof(int16_t): {
+            int16_t v = (int16_t)value;
+            memcpy(dest, &v, sizeof(v));
+            break;
+        }
+        case sizeof(int32_t): {
+            int32_t v = (int32_t)value;
+            memcpy(dest, &v, sizeof(v));
+            break;
+        }
+        default: {
+            int64_t v = (int64_t)value;
+            memcpy(dest, &v, sizeof(v));
+            break;
+        }
+    }
+}
+
+int qb_compile_decoder(const query_builder_t *qb, const qb_field_t *fields, int field_count,
+                       qb_row_decoder_t *decoder) {
+    if (!qb || !fields || !decoder || field_count < 0 || field_count > MAX_TRACKED_COLUMNS) {
+        return -1;
+    }
+
+    memset(decoder, 0, sizeof(qb_row_decoder_t));
+
+    for (int i = 0; i < field_count; i++) {
+        const qb_field_t *field = &fields[i];
+
+        bool valid_size;
+        switch (field->type) {
+            case QB_FIELD_INT:
+                valid_size = field->size == 1 || field->size == 2 || field->size == 4 || field->size == 8;
+                break;
+            case QB_FIELD_DOUBLE:
+                valid_size = field->size == sizeof(float) || field->size == sizeof(double);
+                break;
+            case QB_FIELD_BOOL:
+                valid_size = field->size == sizeof(bool);
+                break;
+            default:
+                valid_size = field->size > 0;
+                break;
+        }
+
+        if (!field->column_name || !valid_size) {
+            log_error("Invalid decoder field %d for table %s", i, qb->table_name);
+            return -1;
+        }
+
+        decoder->fields[i] = *field;
+        decoder->indices[i] = qb_get_column_index(qb, field->column_name);
+    }
+
+    decoder->field_count = field_count;
+    return 0;
+}
+
+void qb_decode_row(sqlite3_stmt *stmt, const qb_row_decoder_t *decoder, void *row) {
+    // The sqlite3_column_* accessors already return 0, 0.0 or NULL for NULL
+    // values, so no type check is needed per cell
+    for (int i = 0; i < decoder->field_count; i++) {
+        const qb_field_t *field = &decoder->fields[i];
+        char *dest = (char *)row + field->offset;
+        int idx = decoder->indices[i];
+        bool present = idx >= 0;
+
+        switch (field->type) {
+            case QB_FIELD_INT:
+                store_int(dest, field->size, present ? sqlite3_column_int64(stmt, idx) : 0);
+                break;
+
+            case QB_FIELD_DOUBLE: {
+                double value = present ? sqlite3_column_double(stmt, idx) : 0.0;
+                if (field->size == sizeof(float)) {
+                    float f = (float)value;
+                    memcpy(dest, &f, sizeof(f));
+                } else {
+                    memcpy(dest, &value, sizeof(value));
+                }
+                break;
+            }
+
+            case QB_FIELD_BOOL: {
+                bool value = present && sqlite3_column_int64(stmt, idx) != 0;
+                memcpy(dest, &value, sizeof(value));
+                break;
+            }
+
+            case QB_FIELD_TEXT: {
+                const unsigned char *text = present ? sqlite3_column_text(stmt, idx) : NULL;
+                size_t len = 0;
+                if (text) {
+                    len = (size_t)sqlite3_column_bytes(stmt, idx);
+                    if (len >= field->size) {
+                        len = field->size - 1;
+                    }
+                    memcpy(dest, text, len);
+                }
+                dest[len] = '\0';
+                break;
+            }
+        }
+    }
+}
+
+int qb_fetch_rows(sqlite3_stmt *stmt, const qb_row_decoder_t *decoder, void *rows, size_t row_size,
+                  int max_rows) {
+    if (!stmt || !decoder || !rows || max_rows < 0) {
+        return -1;
+    }
+
+    int count = 0;
+    while (count < max_rows) {
+        int rc = sqlite3_step(stmt);
+        if (rc == SQLITE_DONE) {
+            break;
+        }
+        if (rc != SQLITE_ROW) {
+            log_error("Failed to fetch rows: %s", sqlite3_errmsg(sqlite3_db_handle(stmt)));
+            return -1;
+        }
+
+        qb_decode_row(stmt, decoder, (char *)rows + (size_t)count * row_size);
+        count++;
+    }
+
+    return count;
+}
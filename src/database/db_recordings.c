@@ -12,6 +12,10 @@
 
 #include "database/db_recordings.h"
 #include "database/db_core.h"
+#include "database/db_maintenance.h"
+#include "database/db_stmt_cache.h"
+#include "database/db_schema_cache.h"
+#include "database/db_detection_blocks.h"
 #include "core/logger.h"
 
 // Add recording metadata to the database
@@ -39,15 +43,14 @@ uint64_t add_recording_metadata(const recording_metadata_t *metadata) {
                       "size_bytes, width, height, fps, codec, is_complete, trigger_type) "
                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);";
 
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
+    // Cached: recordings are added for every segment of every stream
+    stmt = get_cached_statement(db, sql);
+    if (!stmt) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
         pthread_mutex_unlock(db_mutex);
         return 0;
     }
 
-    // No longer tracking statements - each function is responsible for finalizing its own statements
-
     // Bind parameters
     sqlite3_bind_text(stmt, 1, metadata->stream_name, -1, SQLITE_STATIC);
     sqlite3_bind_text(stmt, 2, metadata->file_path, -1, SQLITE_STATIC);
@@ -79,8 +82,7 @@ uint64_t add_recording_metadata(const recording_metadata_t *metadata) {
         log_debug("Added recording metadata with ID %llu", (unsigned long long)recording_id);
     }
 
-    // Finalize the prepared statement
-    sqlite3_finalize(stmt);
+    release_cached_statement(stmt);
     pthread_mutex_unlock(db_mutex);
 
     return recording_id;
@@ -105,15 +107,13 @@ int update_recording_metadata(uint64_t id, time_t end_time,
     const char *sql = "UPDATE recordings SET end_time = ?, size_bytes = ?, is_complete = ? "
                       "WHERE id = ?;";
 
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
+    stmt = get_cached_statement(db, sql);
+    if (!stmt) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
         pthread_mutex_unlock(db_mutex);
         return -1;
     }
 
-    // No longer tracking statements - each function is responsible for finalizing its own statements
-
     // Bind parameters
     sqlite3_bind_int64(stmt, 1, (sqlite3_int64)end_time);
     sqlite3_bind_int64(stmt, 2, (sqlite3_int64)size_bytes);
@@ -124,13 +124,12 @@ int update_recording_metadata(uint64_t id, time_t end_time,
     rc = sqlite3_step(stmt);
     if (rc != SQLITE_DONE) {
         log_error("Failed to update recording metadata: %s", sqlite3_errmsg(db));
-        sqlite3_finalize(stmt);
+        release_cached_statement(stmt);
         pthread_mutex_unlock(db_mutex);
         return -1;
     }
 
-    // Finalize the prepared statement
-    sqlite3_finalize(stmt);
+    release_cached_statement(stmt);
     pthread_mutex_unlock(db_mutex);
 
     return 0;
@@ -143,7 +142,6 @@ int get_recording_metadata_by_id(uint64_t id, recording_metadata_t *metadata) {
     int result = -1;
 
     sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
 
     if (!db) {
         log_error("Database not initialized");
@@ -155,7 +153,12 @@ int get_recording_metadata_by_id(uint64_t id, recording_metadata_t *metadata) {
         return -1;
     }
 
-    pthread_mutex_lock(db_mutex);
+    // Read-only query: use a pooled reader so it doesn't wait for writers
+    db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
 
     const char *sql = "SELECT id, stream_name, file_path, start_time, end_time, "
                       "size_bytes, width, height, fps, codec, is_complete, trigger_type "
@@ -164,7 +167,7 @@ int get_recording_metadata_by_id(uint64_t id, recording_metadata_t *metadata) {
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
+        release_db_reader(db);
         return -1;
     }
 
@@ -229,14 +232,13 @@ int get_recording_metadata_by_id(uint64_t id, recording_metadata_t *metadata) {
 
     // Finalize the prepared statement
     sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+    release_db_reader(db);
 
     return result;
 }
 
 // Get recording metadata by file path
 int get_recording_metadata_by_path(const char *file_path, recording_metadata_t *metadata) {
-    int rc;
     sqlite3_stmt *stmt;
     int result = -1;
 
@@ -260,8 +262,8 @@ int get_recording_metadata_by_path(const char *file_path, recording_metadata_t *
                       "protected, retention_override_days "
                       "FROM recordings WHERE file_path = ?;";
 
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
+    stmt = get_cached_statement(db, sql);
+    if (!stmt) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
         pthread_mutex_unlock(db_mutex);
         return -1;
@@ -330,7 +332,7 @@ int get_recording_metadata_by_path(const char *file_path, recording_metadata_t *
         result = 0; // Success
     }
 
-    sqlite3_finalize(stmt);
+    release_cached_statement(stmt);
     pthread_mutex_unlock(db_mutex);
 
     return result;
@@ -345,7 +347,6 @@ int get_recording_metadata(time_t start_time, time_t end_time,
     int count = 0;
 
     sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
 
     if (!db) {
         log_error("Database not initialized");
@@ -357,7 +358,11 @@ int get_recording_metadata(time_t start_time, time_t end_time,
         return -1;
     }
 
-    pthread_mutex_lock(db_mutex);
+    db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
 
     // Build query based on filters
     char sql[1024];
@@ -382,7 +387,7 @@ int get_recording_metadata(time_t start_time, time_t end_time,
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
+        release_db_reader(db);
         return -1;
     }
 
@@ -461,12 +466,97 @@ int get_recording_metadata(time_t start_time, time_t end_time,
 
     // Finalize the prepared statement
     sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+    release_db_reader(db);
 
     log_info("Found %d recordings in database matching criteria", count);
     return count;
 }
 
+// Bounds for open-ended ranges in the rollup queries
+#define ROLLUP_TIME_MIN (-((sqlite3_int64)1 << 62))
+#define ROLLUP_TIME_MAX ((sqlite3_int64)1 << 62)
+
+/**
+ * Count complete recordings from the hourly rollups (migration 0018)
+ * Whole hours inside the range are summed from recording_rollups and only
+ * the partial hours at either end are counted from recordings, so the cost
+ * does not grow with the number of recordings.
+ *
+ * @return 0 on success, -1 if the rollups cannot answer (no rollup table,
+ *         or a range inside a single hour) and the caller should count rows
+ */
+static int count_recordings_from_rollups(sqlite3 *db, time_t start_time, time_t end_time,
+                                         const char *stream_name, int *count) {
+    // ?1..?2 is the whole-hour range; ?3..?1 and ?2..?4 are the partial hours
+    const char *sql = stream_name ?
+        "SELECT (SELECT COALESCE(SUM(segments), 0) FROM recording_rollups "
+        "WHERE stream_name = ?5 AND bucket >= ?1 AND bucket < ?2) + "
+        "(SELECT COUNT(*) FROM recordings r WHERE r.is_complete = 1 AND r.end_time IS NOT NULL "
+        "AND r.stream_name = ?5 "
+        "AND ((r.start_time >= ?3 AND r.start_time < ?1) OR (r.start_time >= ?2 AND r.start_time <= ?4)))" :
+        "SELECT (SELECT COALESCE(SUM(segments), 0) FROM recording_rollups "
+        "WHERE bucket >= ?1 AND bucket < ?2) + "
+        "(SELECT COUNT(*) FROM recordings r WHERE r.is_complete = 1 AND r.end_time IS NOT NULL "
+        "AND ((r.start_time >= ?3 AND r.start_time < ?1) OR (r.start_time >= ?2 AND r.start_time <= ?4)))";
+
+    sqlite3_int64 first = start_time > 0 ? (sqlite3_int64)start_time : ROLLUP_TIME_MIN;
+    sqlite3_int64 last = end_time > 0 ? (sqlite3_int64)end_time : ROLLUP_TIME_MAX;
+    sqlite3_int64 hours_from = start_time > 0 ? (first + 3599) / 3600 * 3600 : ROLLUP_TIME_MIN;
+    sqlite3_int64 hours_to = end_time > 0 ? (last + 1) / 3600 * 3600 : ROLLUP_TIME_MAX;
+
+    if (hours_from >= hours_to) {
+        return -1;
+    }
+
+    sqlite3_stmt *stmt = get_cached_statement(db, sql);
+    if (!stmt) {
+        // Databases without migration 0018 (e.g. the rebuild tool's schema)
+        log_debug("Recording rollups not available: %s", sqlite3_errmsg(db));
+        return -1;
+    }
+
+    sqlite3_bind_int64(stmt, 1, hours_from);
+    sqlite3_bind_int64(stmt, 2, hours_to);
+    sqlite3_bind_int64(stmt, 3, first);
+    sqlite3_bind_int64(stmt, 4, last);
+    if (stream_name) {
+        sqlite3_bind_text(stmt, 5, stream_name, -1, SQLITE_STATIC);
+    }
+
+    int ret = -1;
+    if (sqlite3_step(stmt) == SQLITE_ROW) {
+        *count = sqlite3_column_int(stmt, 0);
+        ret = 0;
+    } else {
+        log_error("Error while counting recordings from rollups: %s", sqlite3_errmsg(db));
+    }
+
+    release_cached_statement(stmt);
+    return ret;
+}
+
+/**
+ * Append the has_detection filter to a recordings query
+ * Matches recordings triggered by detection or with detections in their time
+ * range; packed detections match when the span of a block overlaps the
+ * recording (blocks are only looked at once migration 0019 has run).
+ */
+static void append_detection_filter(char *sql, size_t sql_size) {
+    size_t len = strlen(sql);
+    snprintf(sql + len, sql_size - len,
+             " AND (r.trigger_type = 'detection' OR EXISTS (SELECT 1 FROM detections d WHERE d.stream_name = r.stream_name AND d.timestamp >= r.start_time AND d.timestamp <= r.end_time)");
+
+    if (cached_table_exists("detection_blocks")) {
+        len = strlen(sql);
+        snprintf(sql + len, sql_size - len,
+                 " OR EXISTS (SELECT 1 FROM detection_blocks b WHERE b.stream_name = r.stream_name AND b.bucket >= r.start_time - %d AND b.bucket <= r.end_time AND b.first_timestamp <= r.end_time AND b.last_timestamp >= r.start_time)",
+                 DETECTION_BLOCK_SECONDS);
+    }
+
+    len = strlen(sql);
+    snprintf(sql + len, sql_size - len, ")");
+}
+
 // Get total count of recordings matching filter criteria
 int get_recording_count(time_t start_time, time_t end_time,
                        const char *stream_name, int has_detection) {
@@ -475,14 +565,25 @@ int get_recording_count(time_t start_time, time_t end_time,
     int count = 0;
 
     sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
 
     if (!db) {
         log_error("Database not initialized");
         return -1;
     }
 
-    pthread_mutex_lock(db_mutex);
+    db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
+    }
+
+    // Without the detection filter the hourly rollups have the answer
+    if (!has_detection &&
+        count_recordings_from_rollups(db, start_time, end_time, stream_name, &count) == 0) {
+        release_db_reader(db);
+        log_debug("Total count of recordings matching criteria (rollups): %d", count);
+        return count;
+    }
 
     // Build query based on filters
     char sql[1024];
@@ -491,8 +592,7 @@ int get_recording_count(time_t start_time, time_t end_time,
     strcpy(sql, "SELECT COUNT(*) FROM recordings r WHERE r.is_complete = 1 AND r.end_time IS NOT NULL");
 
     if (has_detection) {
-        // Filter by trigger_type = 'detection' OR existence of detections in the recording's time range
-        strcat(sql, " AND (r.trigger_type = 'detection' OR EXISTS (SELECT 1 FROM detections d WHERE d.stream_name = r.stream_name AND d.timestamp >= r.start_time AND d.timestamp <= r.end_time))");
+        append_detection_filter(sql, sizeof(sql));
         log_debug("Adding detection filter (trigger_type OR detections table)");
     }
 
@@ -515,7 +615,7 @@ int get_recording_count(time_t start_time, time_t end_time,
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
         log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
+        release_db_reader(db);
         return -1;
     }
 
@@ -546,86 +646,302 @@ int get_recording_count(time_t start_time, time_t end_time,
 
     // Finalize the prepared statement
     sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+    release_db_reader(db);
 
     log_debug("Total count of recordings matching criteria: %d", count);
     return count;
 }
 
-// Get paginated recording metadata from the database with sorting
-int get_recording_metadata_paginated(time_t start_time, time_t end_time,
-                                   const char *stream_name, int has_detection,
-                                   const char *sort_field, const char *sort_order,
-                                   recording_metadata_t *metadata,
-                                   int limit, int offset) {
-    int rc;
-    sqlite3_stmt *stmt;
-    int count = 0;
-
-    sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
+int get_recording_rollups(const char *stream_name, time_t start_time, time_t end_time,
+                          int bucket_seconds, long utc_offset,
+                          recording_rollup_t *rollups, int max_count) {
+    if (!rollups || max_count <= 0) {
+        return -1;
+    }
+    if (bucket_seconds < 3600 || bucket_seconds % 3600 != 0) {
+        log_error("Invalid rollup bucket size: %d seconds", bucket_seconds);
+        return -1;
+    }
 
+    sqlite3 *db = acquire_db_reader();
     if (!db) {
         log_error("Database not initialized");
         return -1;
     }
 
-    if (!metadata || limit <= 0) {
-        log_error("Invalid parameters for get_recording_metadata_paginated");
+    // Hourly rows are merged into buckets aligned to local time (?1 = UTC offset)
+    const char *sql = stream_name ?
+        "SELECT stream_name, (bucket + ?1) / ?2 * ?2 - ?1 AS period, SUM(segments), SUM(bytes), "
+        "SUM(seconds), SUM(detections) FROM recording_rollups "
+        "WHERE stream_name = ?5 AND bucket >= ?3 AND bucket <= ?4 "
+        "GROUP BY stream_name, period HAVING SUM(segments) > 0 OR SUM(detections) > 0 "
+        "ORDER BY period, stream_name LIMIT ?6" :
+        "SELECT stream_name, (bucket + ?1) / ?2 * ?2 - ?1 AS period, SUM(segments), SUM(bytes), "
+        "SUM(seconds), SUM(detections) FROM recording_rollups "
+        "WHERE bucket >= ?3 AND bucket <= ?4 "
+        "GROUP BY stream_name, period HAVING SUM(segments) > 0 OR SUM(detections) > 0 "
+        "ORDER BY period, stream_name LIMIT ?6";
+
+    sqlite3_stmt *stmt = get_cached_statement(db, sql);
+    if (!stmt) {
+        log_error("Failed to prepare recording rollups query: %s", sqlite3_errmsg(db));
+        release_db_reader(db);
         return -1;
     }
 
-    pthread_mutex_lock(db_mutex);
+    sqlite3_bind_int64(stmt, 1, (sqlite3_int64)utc_offset);
+    sqlite3_bind_int(stmt, 2, bucket_seconds);
+    sqlite3_bind_int64(stmt, 3, start_time > 0 ? (sqlite3_int64)start_time / 3600 * 3600 : ROLLUP_TIME_MIN);
+    sqlite3_bind_int64(stmt, 4, end_time > 0 ? (sqlite3_int64)end_time : ROLLUP_TIME_MAX);
+    if (stream_name) {
+        sqlite3_bind_text(stmt, 5, stream_name, -1, SQLITE_STATIC);
+    }
+    sqlite3_bind_int(stmt, 6, max_count);
+
+    int count = 0;
+    int rc;
+    while ((rc = sqlite3_step(stmt)) == SQLITE_ROW && count < max_count) {
+        recording_rollup_t *rollup = &rollups[count++];
+        const char *name = (const char *)sqlite3_column_text(stmt, 0);
+
+        memset(rollup, 0, sizeof(*rollup));
+        if (name) {
+            strncpy(rollup->stream_name, name, sizeof(rollup->stream_name) - 1);
+        }
+        rollup->bucket_start = (time_t)sqlite3_column_int64(stmt, 1);
+        rollup->segments = sqlite3_column_int(stmt, 2);
+        rollup->size_bytes = (uint64_t)sqlite3_column_int64(stmt, 3);
+        rollup->seconds = (uint64_t)sqlite3_column_int64(stmt, 4);
+        rollup->detections = sqlite3_column_int(stmt, 5);
+    }
+
+    if (rc != SQLITE_ROW && rc != SQLITE_DONE) {
+        log_error("Error while reading recording rollups: %s", sqlite3_errmsg(db));
+        count = -1;
+    }
 
-    // Validate and sanitize sort field to prevent SQL injection
-    char safe_sort_field[32] = "start_time"; // Default sort field
+    release_cached_statement(stmt);
+    release_db_reader(db);
+    return count;
+}
+
+// Sort fields accepted by the paginated queries, with the key each one orders by.
+// Indexed fields have a matching idx_recordings_page_* index (migration 0017)
+// and their plans are checked at startup.
+typedef struct {
+    const char *name;
+    const char *alias;
+    const char *expr;
+    bool text;
+    bool indexed;
+} recording_sort_field_t;
+
+static const recording_sort_field_t recording_sort_fields[] = {
+    {"start_time",  NULL,   "r.start_time",                false, true},
+    {"end_time",    NULL,   "r.end_time",                  false, false},
+    {"id",          NULL,   "r.id",                        false, false},
+    {"stream_name", "name", "r.stream_name",               true,  true},
+    {"size_bytes",  "size", "COALESCE(r.size_bytes, 0)",   false, true},
+    {"duration",    NULL,   "(r.end_time - r.start_time)", false, true},
+};
+
+#define RECORDING_SORT_FIELD_COUNT (int)(sizeof(recording_sort_fields) / sizeof(recording_sort_fields[0]))
+
+// Position after the last row of a page: the sort key and id of that row
+typedef struct {
+    const recording_sort_field_t *field;
+    bool ascending;
+    sqlite3_int64 key;
+    char text_key[MAX_STREAM_NAME];
+    uint64_t id;
+} recording_cursor_t;
+
+// Resolve a sort field name, falling back to start_time
+static const recording_sort_field_t *find_sort_field(const char *sort_field) {
     if (sort_field) {
-        if (strcmp(sort_field, "id") == 0 ||
-            strcmp(sort_field, "stream_name") == 0 ||
-            strcmp(sort_field, "start_time") == 0 ||
-            strcmp(sort_field, "end_time") == 0 ||
-            strcmp(sort_field, "size_bytes") == 0) {
-            strncpy(safe_sort_field, sort_field, sizeof(safe_sort_field) - 1);
-            safe_sort_field[sizeof(safe_sort_field) - 1] = '\0';
-        } else {
-            log_warn("Invalid sort field: %s, using default", sort_field);
+        for (int i = 0; i < RECORDING_SORT_FIELD_COUNT; i++) {
+            if (strcmp(sort_field, recording_sort_fields[i].name) == 0 ||
+                (recording_sort_fields[i].alias && strcmp(sort_field, recording_sort_fields[i].alias) == 0)) {
+                return &recording_sort_fields[i];
+            }
         }
+        log_warn("Invalid sort field: %s, using default", sort_field);
     }
+    return &recording_sort_fields[0];
+}
 
-    // Validate sort order
-    char safe_sort_order[8] = "DESC"; // Default sort order
+// Resolve a sort order, falling back to descending
+static bool sort_ascending(const char *sort_order) {
     if (sort_order) {
         if (strcasecmp(sort_order, "asc") == 0) {
-            strcpy(safe_sort_order, "ASC");
-        } else if (strcasecmp(sort_order, "desc") == 0) {
-            strcpy(safe_sort_order, "DESC");
-        } else {
+            return true;
+        }
+        if (strcasecmp(sort_order, "desc") != 0) {
             log_warn("Invalid sort order: %s, using default", sort_order);
         }
     }
+    return false;
+}
 
-    // Build query based on filters
-    char sql[1536];
+// Encode a page position as an opaque token (hex of "field|order|id|key")
+int encode_recording_cursor(const recording_metadata_t *last, const char *sort_field,
+                            const char *sort_order, char *cursor, size_t cursor_size) {
+    if (!last || !cursor || cursor_size == 0) {
+        return -1;
+    }
+
+    const recording_sort_field_t *field = find_sort_field(sort_field);
+    char plain[RECORDING_CURSOR_SIZE / 2];
+    int len;
 
+    if (field->text) {
+        len = snprintf(plain, sizeof(plain), "%s|%c|%llu|%s", field->name,
+                       sort_ascending(sort_order) ? 'A' : 'D',
+                       (unsigned long long)last->id, last->stream_name);
+    } else {
+        sqlite3_int64 key;
+        if (strcmp(field->name, "end_time") == 0) {
+            key = (sqlite3_int64)last->end_time;
+        } else if (strcmp(field->name, "id") == 0) {
+            key = (sqlite3_int64)last->id;
+        } else if (strcmp(field->name, "size_bytes") == 0) {
+            key = (sqlite3_int64)last->size_bytes;
+        } else if (strcmp(field->name, "duration") == 0) {
+            key = (sqlite3_int64)(last->end_time - last->start_time);
+        } else {
+            key = (sqlite3_int64)last->start_time;
+        }
+        len = snprintf(plain, sizeof(plain), "%s|%c|%llu|%lld", field->name,
+                       sort_ascending(sort_order) ? 'A' : 'D',
+                       (unsigned long long)last->id, (long long)key);
+    }
+
+    if (len < 0 || (size_t)len >= sizeof(plain) || (size_t)len * 2 + 1 > cursor_size) {
+        cursor[0] = '\0';
+        return -1;
+    }
+
+    static const char hex[] = "0123456789abcdef";
+    for (int i = 0; i < len; i++) {
+        cursor[i * 2] = hex[(unsigned char)plain[i] >> 4];
+        cursor[i * 2 + 1] = hex[(unsigned char)plain[i] & 0x0f];
+    }
+    cursor[len * 2] = '\0';
+    return 0;
+}
+
+// Decode a cursor produced by encode_recording_cursor
+static int decode_recording_cursor(const char *token, recording_cursor_t *cursor) {
+    size_t token_len = strlen(token);
+    char plain[RECORDING_CURSOR_SIZE / 2];
+
+    if (token_len == 0 || token_len % 2 != 0 || token_len / 2 >= sizeof(plain)) {
+        return -1;
+    }
+
+    for (size_t i = 0; i < token_len / 2; i++) {
+        int value = 0;
+        for (int j = 0; j < 2; j++) {
+            char ch = token[i * 2 + j];
+            int nibble;
+            if (ch >= '0' && ch <= '9') {
+                nibble = ch - '0';
+            } else if (ch >= 'a' && ch <= 'f') {
+                nibble = ch - 'a' + 10;
+            } else if (ch >= 'A' && ch <= 'F') {
+                nibble = ch - 'A' + 10;
+            } else {
+                return -1;
+            }
+            value = (value << 4) | nibble;
+        }
+        plain[i] = (char)value;
+    }
+    plain[token_len / 2] = '\0';
+
+    // field|order|id|key, where the key (a stream name) may itself contain '|'
+    char *order = strchr(plain, '|');
+    if (!order) return -1;
+    *order++ = '\0';
+    char *id = strchr(order, '|');
+    if (!id) return -1;
+    *id++ = '\0';
+    char *key = strchr(id, '|');
+    if (!key) return -1;
+    *key++ = '\0';
+
+    memset(cursor, 0, sizeof(*cursor));
+    for (int i = 0; i < RECORDING_SORT_FIELD_COUNT; i++) {
+        if (strcmp(plain, recording_sort_fields[i].name) == 0) {
+            cursor->field = &recording_sort_fields[i];
+            break;
+        }
+    }
+    if (!cursor->field || (strcmp(order, "A") != 0 && strcmp(order, "D") != 0)) {
+        return -1;
+    }
+    cursor->ascending = order[0] == 'A';
+
+    char *end;
+    cursor->id = strtoull(id, &end, 10);
+    if (*id == '\0' || *end != '\0') {
+        return -1;
+    }
+
+    if (cursor->field->text) {
+        if (strlen(key) >= sizeof(cursor->text_key)) {
+            return -1;
+        }
+        strcpy(cursor->text_key, key);
+    } else {
+        cursor->key = strtoll(key, &end, 10);
+        if (*key == '\0' || *end != '\0') {
+            return -1;
+        }
+    }
+    return 0;
+}
+
+// Which part of a page a statement reads: rows after an offset, or after a
+// cursor as two index seeks, first the rest of the cursor's sort key and then
+// the keys past it
+typedef enum {
+    PAGE_OFFSET,
+    PAGE_CURSOR_TIES,
+    PAGE_CURSOR_KEYS
+} recordings_page_part_t;
+
+// Build the recordings list query for one part of a page
+static void build_recordings_page_sql(char *sql, size_t sql_size,
+                                      time_t start_time, time_t end_time,
+                                      const char *stream_name, int has_detection,
+                                      const recording_sort_field_t *field, bool ascending,
+                                      recordings_page_part_t part) {
     // Use trigger_type and/or detections table to filter detection-based recordings
-    snprintf(sql, sizeof(sql),
+    snprintf(sql, sql_size,
             "SELECT r.id, r.stream_name, r.file_path, r.start_time, r.end_time, "
             "r.size_bytes, r.width, r.height, r.fps, r.codec, r.is_complete, r.trigger_type "
             "FROM recordings r WHERE r.is_complete = 1 AND r.end_time IS NOT NULL");
 
     if (has_detection) {
-        // Filter by trigger_type = 'detection' OR existence of detections in the recording's time range
-        strcat(sql, " AND (r.trigger_type = 'detection' OR EXISTS (SELECT 1 FROM detections d WHERE d.stream_name = r.stream_name AND d.timestamp >= r.start_time AND d.timestamp <= r.end_time))");
+        append_detection_filter(sql, sql_size);
         log_info("Adding detection filter (trigger_type OR detections table)");
     }
 
+    // Rows sharing the cursor's key are found with key = ? AND id < ?; the
+    // unary + keeps the planner from seeking the date range instead
+    const char *range_prefix = part == PAGE_CURSOR_TIES ? "+" : "";
+    char range_clause[48];
+
     if (start_time > 0) {
-        strcat(sql, " AND r.start_time >= ?");
+        snprintf(range_clause, sizeof(range_clause), " AND %sr.start_time >= ?", range_prefix);
+        strcat(sql, range_clause);
         log_info("Adding start_time filter to paginated query: %ld", (long)start_time);
     }
 
     if (end_time > 0) {
-        strcat(sql, " AND r.start_time <= ?");
+        snprintf(range_clause, sizeof(range_clause), " AND %sr.start_time <= ?", range_prefix);
+        strcat(sql, range_clause);
         log_info("Adding end_time filter to paginated query: %ld", (long)end_time);
     }
 
@@ -633,167 +949,272 @@ int get_recording_metadata_paginated(time_t start_time, time_t end_time,
         strcat(sql, " AND r.stream_name = ?");
     }
 
-    // Add ORDER BY clause with sanitized field and order
-    char order_clause[64];
-    snprintf(order_clause, sizeof(order_clause), " ORDER BY r.%s %s", safe_sort_field, safe_sort_order);
+    // Keyset condition, split in two so each half is a single seek of the
+    // sort index: key = ? AND id < ? uses the rowid that ends the index.
+    // A combined key <= ? AND (key < ? OR id < ?) walks every row sharing
+    // the cursor's key, which for durations is most of the table.
+    const char *dir = ascending ? "ASC" : "DESC";
+    const char *op = ascending ? ">" : "<";
+    char keyset_clause[192];
+    if (part == PAGE_CURSOR_TIES) {
+        snprintf(keyset_clause, sizeof(keyset_clause), " AND %s = ? AND r.id %s ?", field->expr, op);
+        strcat(sql, keyset_clause);
+    } else if (part == PAGE_CURSOR_KEYS) {
+        snprintf(keyset_clause, sizeof(keyset_clause), " AND %s %s ?", field->expr, op);
+        strcat(sql, keyset_clause);
+    }
+
+    // Add ORDER BY clause with sanitized field and order; id breaks ties so
+    // every row has a stable position. Rows sharing the cursor's key are
+    // ordered by id alone, SQLite does not see an expression key as fixed
+    // by the equality and would sort them.
+    char order_clause[96];
+    if (part == PAGE_CURSOR_TIES) {
+        snprintf(order_clause, sizeof(order_clause), " ORDER BY r.id %s", dir);
+    } else {
+        snprintf(order_clause, sizeof(order_clause), " ORDER BY %s %s, r.id %s", field->expr, dir, dir);
+    }
     strcat(sql, order_clause);
 
-    // Add LIMIT and OFFSET for pagination
-    char limit_clause[64];
-    snprintf(limit_clause, sizeof(limit_clause), " LIMIT ? OFFSET ?");
-    strcat(sql, limit_clause);
+    if (part == PAGE_OFFSET) {
+        strcat(sql, " LIMIT ? OFFSET ?");
+    } else {
+        strcat(sql, " LIMIT ?");
+    }
+}
 
-    log_debug("SQL query for get_recording_metadata_paginated: %s", sql);
+// Whether a cursor page needs the keys past the cursor's key; sorted by
+// name within one stream, every row shares the key
+static bool page_has_cursor_keys(const recording_sort_field_t *field, const char *stream_name) {
+    return !(field->text && stream_name);
+}
 
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
-        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
-        return -1;
+// Bind a cursor's sort key
+static void bind_cursor_key(sqlite3_stmt *stmt, int index, const recording_cursor_t *after) {
+    if (after->field->text) {
+        sqlite3_bind_text(stmt, index, after->text_key, -1, SQLITE_STATIC);
+    } else {
+        sqlite3_bind_int64(stmt, index, after->key);
     }
+}
 
-    // No longer tracking statements - each function is responsible for finalizing its own statements
+// Decode up to limit rows of a recordings page statement
+static int fetch_recordings_page_rows(sqlite3 *db, sqlite3_stmt *stmt,
+                                      recording_metadata_t *metadata, int limit) {
+    int count = 0;
+    int rc_step = SQLITE_DONE;
 
-    // Bind parameters
-    int param_index = 1;
+    while (count < limit && (rc_step = sqlite3_step(stmt)) == SQLITE_ROW) {
+        metadata[count].id = (uint64_t)sqlite3_column_int64(stmt, 0);
 
-    if (start_time > 0) {
-        sqlite3_bind_int64(stmt, param_index++, (sqlite3_int64)start_time);
+        const char *stream = (const char *)sqlite3_column_text(stmt, 1);
+        if (stream) {
+            strncpy(metadata[count].stream_name, stream, sizeof(metadata[count].stream_name) - 1);
+            metadata[count].stream_name[sizeof(metadata[count].stream_name) - 1] = '\0';
+        } else {
+            metadata[count].stream_name[0] = '\0';
+        }
+
+        const char *path = (const char *)sqlite3_column_text(stmt, 2);
+        if (path) {
+            strncpy(metadata[count].file_path, path, sizeof(metadata[count].file_path) - 1);
+            metadata[count].file_path[sizeof(metadata[count].file_path) - 1] = '\0';
+        } else {
+            metadata[count].file_path[0] = '\0';
+        }
+
+        metadata[count].start_time = (time_t)sqlite3_column_int64(stmt, 3);
+
+        if (sqlite3_column_type(stmt, 4) != SQLITE_NULL) {
+            metadata[count].end_time = (time_t)sqlite3_column_int64(stmt, 4);
+        } else {
+            metadata[count].end_time = 0;
+        }
+
+        metadata[count].size_bytes = (uint64_t)sqlite3_column_int64(stmt, 5);
+        metadata[count].width = sqlite3_column_int(stmt, 6);
+        metadata[count].height = sqlite3_column_int(stmt, 7);
+        metadata[count].fps = sqlite3_column_int(stmt, 8);
+
+        const char *codec = (const char *)sqlite3_column_text(stmt, 9);
+        if (codec) {
+            strncpy(metadata[count].codec, codec, sizeof(metadata[count].codec) - 1);
+            metadata[count].codec[sizeof(metadata[count].codec) - 1] = '\0';
+        } else {
+            metadata[count].codec[0] = '\0';
+        }
+
+        metadata[count].is_complete = sqlite3_column_int(stmt, 10) != 0;
+
+        const char *trigger_type = (const char *)sqlite3_column_text(stmt, 11);
+        if (trigger_type) {
+            strncpy(metadata[count].trigger_type, trigger_type, sizeof(metadata[count].trigger_type) - 1);
+            metadata[count].trigger_type[sizeof(metadata[count].trigger_type) - 1] = '\0';
+        } else {
+            strncpy(metadata[count].trigger_type, "scheduled", sizeof(metadata[count].trigger_type) - 1);
+        }
+
+        count++;
     }
 
-    if (end_time > 0) {
-        sqlite3_bind_int64(stmt, param_index++, (sqlite3_int64)end_time);
+    if (rc_step != SQLITE_DONE && rc_step != SQLITE_ROW) {
+        log_error("Error while fetching recordings: %s", sqlite3_errmsg(db));
     }
 
-    if (stream_name) {
-        sqlite3_bind_text(stmt, param_index++, stream_name, -1, SQLITE_STATIC);
+    return count;
+}
+
+/**
+ * Run one page of the recordings list query
+ * Rows are ordered by (sort key, id). With a cursor the page starts after
+ * the cursor row using index seeks, otherwise offset rows are skipped.
+ */
+static int query_recordings_page(time_t start_time, time_t end_time,
+                                 const char *stream_name, int has_detection,
+                                 const recording_sort_field_t *field, bool ascending,
+                                 const recording_cursor_t *after, int offset,
+                                 recording_metadata_t *metadata, int limit) {
+    int count = 0;
+
+    sqlite3 *db = acquire_db_reader();
+    if (!db) {
+        log_error("Database not initialized");
+        return -1;
     }
 
-    // Bind LIMIT and OFFSET parameters
-    sqlite3_bind_int(stmt, param_index++, limit);
-    sqlite3_bind_int(stmt, param_index, offset);
+    // A cursor page takes the rows sharing the cursor's key first, then the
+    // following keys until the page is full
+    recordings_page_part_t parts[2] = {PAGE_OFFSET, PAGE_OFFSET};
+    int part_count = 1;
+    if (after) {
+        parts[0] = PAGE_CURSOR_TIES;
+        parts[1] = PAGE_CURSOR_KEYS;
+        part_count = page_has_cursor_keys(field, stream_name) ? 2 : 1;
+    }
 
-    // Execute query and fetch results
-    int rc_step;
-    while ((rc_step = sqlite3_step(stmt)) == SQLITE_ROW && count < limit) {
-        // Safely copy data to metadata structure
-        if (count < limit) {
-            metadata[count].id = (uint64_t)sqlite3_column_int64(stmt, 0);
+    for (int part = 0; part < part_count && count < limit; part++) {
+        sqlite3_stmt *stmt;
+        char sql[1536];
 
-            const char *stream = (const char *)sqlite3_column_text(stmt, 1);
-            if (stream) {
-                strncpy(metadata[count].stream_name, stream, sizeof(metadata[count].stream_name) - 1);
-                metadata[count].stream_name[sizeof(metadata[count].stream_name) - 1] = '\0';
-            } else {
-                metadata[count].stream_name[0] = '\0';
-            }
+        // Build query based on filters
+        build_recordings_page_sql(sql, sizeof(sql), start_time, end_time, stream_name, has_detection,
+                                  field, ascending, parts[part]);
 
-            const char *path = (const char *)sqlite3_column_text(stmt, 2);
-            if (path) {
-                strncpy(metadata[count].file_path, path, sizeof(metadata[count].file_path) - 1);
-                metadata[count].file_path[sizeof(metadata[count].file_path) - 1] = '\0';
-            } else {
-                metadata[count].file_path[0] = '\0';
-            }
+        log_debug("SQL query for recordings page: %s", sql);
 
-            metadata[count].start_time = (time_t)sqlite3_column_int64(stmt, 3);
+        if (sqlite3_prepare_v2(db, sql, -1, &stmt, NULL) != SQLITE_OK) {
+            log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
+            release_db_reader(db);
+            return -1;
+        }
 
-            if (sqlite3_column_type(stmt, 4) != SQLITE_NULL) {
-                metadata[count].end_time = (time_t)sqlite3_column_int64(stmt, 4);
-            } else {
-                metadata[count].end_time = 0;
-            }
+        // Bind parameters
+        int param_index = 1;
 
-            metadata[count].size_bytes = (uint64_t)sqlite3_column_int64(stmt, 5);
-            metadata[count].width = sqlite3_column_int(stmt, 6);
-            metadata[count].height = sqlite3_column_int(stmt, 7);
-            metadata[count].fps = sqlite3_column_int(stmt, 8);
+        if (start_time > 0) {
+            sqlite3_bind_int64(stmt, param_index++, (sqlite3_int64)start_time);
+        }
 
-            const char *codec = (const char *)sqlite3_column_text(stmt, 9);
-            if (codec) {
-                strncpy(metadata[count].codec, codec, sizeof(metadata[count].codec) - 1);
-                metadata[count].codec[sizeof(metadata[count].codec) - 1] = '\0';
-            } else {
-                metadata[count].codec[0] = '\0';
-            }
+        if (end_time > 0) {
+            sqlite3_bind_int64(stmt, param_index++, (sqlite3_int64)end_time);
+        }
 
-            metadata[count].is_complete = sqlite3_column_int(stmt, 10) != 0;
+        if (stream_name) {
+            sqlite3_bind_text(stmt, param_index++, stream_name, -1, SQLITE_STATIC);
+        }
 
-            const char *trigger_type = (const char *)sqlite3_column_text(stmt, 11);
-            if (trigger_type) {
-                strncpy(metadata[count].trigger_type, trigger_type, sizeof(metadata[count].trigger_type) - 1);
-                metadata[count].trigger_type[sizeof(metadata[count].trigger_type) - 1] = '\0';
-            } else {
-                strncpy(metadata[count].trigger_type, "scheduled", sizeof(metadata[count].trigger_type) - 1);
-            }
+        if (parts[part] == PAGE_CURSOR_TIES) {
+            bind_cursor_key(stmt, param_index++, after);
+            sqlite3_bind_int64(stmt, param_index++, (sqlite3_int64)after->id);
+        } else if (parts[part] == PAGE_CURSOR_KEYS) {
+            bind_cursor_key(stmt, param_index++, after);
+        }
 
-            count++;
+        sqlite3_bind_int(stmt, param_index++, limit - count);
+        if (parts[part] == PAGE_OFFSET) {
+            sqlite3_bind_int(stmt, param_index, offset);
         }
-    }
 
-    if (rc_step != SQLITE_DONE && rc_step != SQLITE_ROW) {
-        log_error("Error while fetching recordings: %s", sqlite3_errmsg(db));
+        count += fetch_recordings_page_rows(db, stmt, metadata + count, limit - count);
+
+        // Finalize the prepared statement
+        sqlite3_finalize(stmt);
     }
 
-    // Finalize the prepared statement
-    sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+    release_db_reader(db);
 
-    log_debug("Found %d recordings in database matching criteria (page %d, limit %d)",
-             count, (offset / limit) + 1, limit);
     return count;
 }
 
-// Delete recording metadata from the database
-int delete_recording_metadata(uint64_t id) {
-    int rc;
-    sqlite3_stmt *stmt;
-
-    sqlite3 *db = get_db_handle();
-    pthread_mutex_t *db_mutex = get_db_mutex();
-
-    if (!db) {
+// Get paginated recording metadata from the database with sorting
+int get_recording_metadata_paginated(time_t start_time, time_t end_time,
+                                   const char *stream_name, int has_detection,
+                                   const char *sort_field, const char *sort_order,
+                                   recording_metadata_t *metadata,
+                                   int limit, int offset) {
+    if (!get_db_handle()) {
         log_error("Database not initialized");
         return -1;
     }
 
-    pthread_mutex_lock(db_mutex);
+    if (!metadata || limit <= 0) {
+        log_error("Invalid parameters for get_recording_metadata_paginated");
+        return -1;
+    }
 
-    const char *sql = "DELETE FROM recordings WHERE id = ?;";
+    int count = query_recordings_page(start_time, end_time, stream_name, has_detection,
+                                      find_sort_field(sort_field), sort_ascending(sort_order),
+                                      NULL, offset, metadata, limit);
+    if (count >= 0) {
+        log_debug("Found %d recordings in database matching criteria (page %d, limit %d)",
+                 count, (offset / limit) + 1, limit);
+    }
+    return count;
+}
 
-    rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
-        log_error("Failed to prepare statement: %s", sqlite3_errmsg(db));
-        pthread_mutex_unlock(db_mutex);
+// Get the page of recording metadata that follows a cursor
+int get_recording_metadata_after(time_t start_time, time_t end_time,
+                                 const char *stream_name, int has_detection,
+                                 const char *sort_field, const char *sort_order,
+                                 const char *cursor,
+                                 recording_metadata_t *metadata, int limit) {
+    if (!get_db_handle()) {
+        log_error("Database not initialized");
         return -1;
     }
 
-    // No longer tracking statements - each function is responsible for finalizing its own statements
+    if (!metadata || limit <= 0) {
+        log_error("Invalid parameters for get_recording_metadata_after");
+        return -1;
+    }
 
-    // Bind parameters
-    sqlite3_bind_int64(stmt, 1, (sqlite3_int64)id);
+    const recording_sort_field_t *field = find_sort_field(sort_field);
+    bool ascending = sort_ascending(sort_order);
 
-    // Execute statement
-    rc = sqlite3_step(stmt);
-    if (rc != SQLITE_DONE) {
-        log_error("Failed to delete recording metadata: %s", sqlite3_errmsg(db));
-        sqlite3_finalize(stmt);
-        pthread_mutex_unlock(db_mutex);
-        return -1;
+    if (!cursor || cursor[0] == '\0') {
+        return query_recordings_page(start_time, end_time, stream_name, has_detection,
+                                     field, ascending, NULL, 0, metadata, limit);
     }
 
-    // Finalize the prepared statement
-    sqlite3_finalize(stmt);
-    pthread_mutex_unlock(db_mutex);
+    recording_cursor_t after;
+    if (decode_recording_cursor(cursor, &after) != 0 ||
+        after.field != field || after.ascending != ascending) {
+        log_warn("Invalid or mismatched recordings cursor");
+        return -2;
+    }
 
-    return 0;
+    int count = query_recordings_page(start_time, end_time, stream_name, has_detection,
+                                      field, ascending, &after, 0, metadata, limit);
+    if (count >= 0) {
+        log_debug("Found %d recordings after cursor (limit %d)", count, limit);
+    }
+    return count;
 }
 
-// Delete old recording metadata from the database
-int delete_old_recording_metadata(uint64_t max_age) {
+// Delete recording metadata from the database
+int delete_recording_metadata(uint64_t id) {
     int rc;
     sqlite3_stmt *stmt;
-    int deleted_count = 0;
 
     sqlite3 *db = get_db_handle();
     pthread_mutex_t *db_mutex = get_db_mutex();
@@ -805,7 +1226,7 @@ int delete_old_recording_metadata(uint64_t max_age) {
 
     pthread_mutex_lock(db_mutex);
 
-    const char *sql = "DELETE FROM recordings WHERE end_time < ?;";
+    const char *sql = "DELETE FROM recordings WHERE id = ?;";
 
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
@@ -814,27 +1235,33 @@ int delete_old_recording_metadata(uint64_t max_age) {
         return -1;
     }
 
-    // Calculate cutoff time
-    time_t cutoff_time = time(NULL) - max_age;
+    // No longer tracking statements - each function is responsible for finalizing its own statements
 
     // Bind parameters
-    sqlite3_bind_int64(stmt, 1, (sqlite3_int64)cutoff_time);
+    sqlite3_bind_int64(stmt, 1, (sqlite3_int64)id);
 
     // Execute statement
     rc = sqlite3_step(stmt);
     if (rc != SQLITE_DONE) {
-        log_error("Failed to delete old recording metadata: %s", sqlite3_errmsg(db));
+        log_error("Failed to delete recording metadata: %s", sqlite3_errmsg(db));
         sqlite3_finalize(stmt);
         pthread_mutex_unlock(db_mutex);
         return -1;
     }
 
-    deleted_count = sqlite3_changes(db);
-
+    // Finalize the prepared statement
     sqlite3_finalize(stmt);
     pthread_mutex_unlock(db_mutex);
 
-    return deleted_count;
+    return 0;
+}
+
+// Delete old recording metadata from the database
+int delete_old_recording_metadata(uint64_t max_age) {
+    // Calculate cutoff time
+    time_t cutoff_time = time(NULL) - max_age;
+
+    return delete_expired_rows("recordings", "end_time", cutoff_time);
 }
 
 /**
@@ -933,6 +1360,59 @@ int set_recording_retention_override(uint64_t id, int days) {
     return 0;
 }
 
+// Queries of the retention and quota passes. Migration 0020 adds indexes for
+// them, and check_recordings_query_plans() warns at startup if one would
+// scan the recordings table.
+static const char *const protected_count_sql =
+    "SELECT COUNT(*) FROM recordings WHERE protected = 1;";
+
+static const char *const stream_protected_count_sql =
+    "SELECT COUNT(*) FROM recordings WHERE protected = 1 AND stream_name = ?;";
+
+// Recordings past retention, ordered by priority (regular first, then detection)
+// and by start_time (oldest first). Protected recordings are excluded, and so
+// are recordings with retention_override_days that haven't expired yet. The
+// last start_time bound is the newer of the two cutoffs; it is implied by the
+// others but lets the index range stop there.
+static const char *const retention_sql =
+    "SELECT id, stream_name, file_path, start_time, end_time, "
+    "size_bytes, width, height, fps, codec, is_complete, trigger_type, protected, retention_override_days "
+    "FROM recordings "
+    "WHERE stream_name = ? "
+    "AND protected = 0 "
+    "AND is_complete = 1 "
+    "AND ("
+    "  (trigger_type != 'detection' AND ? > 0 AND start_time < ?) "
+    "  OR "
+    "  (trigger_type = 'detection' AND ? > 0 AND start_time < ?)"
+    ") "
+    "AND ("
+    "  retention_override_days IS NULL "
+    "  OR start_time < (strftime('%s', 'now') - retention_override_days * 86400)"
+    ") "
+    "AND start_time < ? "
+    "ORDER BY "
+    "  CASE WHEN trigger_type = 'detection' THEN 1 ELSE 0 END ASC, "
+    "  start_time ASC "
+    "LIMIT ?;";
+
+static const char *const quota_sql =
+    "SELECT id, stream_name, file_path, start_time, end_time, "
+    "size_bytes, width, height, fps, codec, is_complete, trigger_type, protected, retention_override_days "
+    "FROM recordings "
+    "WHERE stream_name = ? "
+    "AND protected = 0 "
+    "AND is_complete = 1 "
+    "ORDER BY start_time ASC "
+    "LIMIT ?;";
+
+static const char *const orphaned_sql =
+    "SELECT id, stream_name, file_path, start_time, end_time, "
+    "size_bytes, width, height, fps, codec, is_complete, trigger_type "
+    "FROM recordings "
+    "WHERE is_complete = 1 "
+    "ORDER BY start_time ASC;";
+
 /**
  * Get count of protected recordings for a stream
  *
@@ -954,12 +1434,7 @@ int get_protected_recordings_count(const char *stream_name) {
 
     pthread_mutex_lock(db_mutex);
 
-    const char *sql;
-    if (stream_name) {
-        sql = "SELECT COUNT(*) FROM recordings WHERE protected = 1 AND stream_name = ?;";
-    } else {
-        sql = "SELECT COUNT(*) FROM recordings WHERE protected = 1;";
-    }
+    const char *sql = stream_name ? stream_protected_count_sql : protected_count_sql;
 
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
@@ -1025,30 +1500,7 @@ int get_recordings_for_retention(const char *stream_name,
 
     pthread_mutex_lock(db_mutex);
 
-    // Query for recordings past retention, ordered by priority (regular first, then detection)
-    // and by start_time (oldest first)
-    // Protected recordings are excluded
-    // Also exclude recordings with retention_override_days that haven't expired yet
-    const char *sql =
-        "SELECT id, stream_name, file_path, start_time, end_time, "
-        "size_bytes, width, height, fps, codec, is_complete, trigger_type, protected, retention_override_days "
-        "FROM recordings "
-        "WHERE stream_name = ? "
-        "AND protected = 0 "
-        "AND is_complete = 1 "
-        "AND ("
-        "  (trigger_type != 'detection' AND ? > 0 AND start_time < ?) "
-        "  OR "
-        "  (trigger_type = 'detection' AND ? > 0 AND start_time < ?)"
-        ") "
-        "AND ("
-        "  retention_override_days IS NULL "
-        "  OR start_time < (strftime('%s', 'now') - retention_override_days * 86400)"
-        ") "
-        "ORDER BY "
-        "  CASE WHEN trigger_type = 'detection' THEN 1 ELSE 0 END ASC, "
-        "  start_time ASC "
-        "LIMIT ?;";
+    const char *sql = retention_sql;
 
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
@@ -1062,7 +1514,8 @@ int get_recordings_for_retention(const char *stream_name,
     sqlite3_bind_int64(stmt, 3, (sqlite3_int64)regular_cutoff);
     sqlite3_bind_int(stmt, 4, detection_retention_days);
     sqlite3_bind_int64(stmt, 5, (sqlite3_int64)detection_cutoff);
-    sqlite3_bind_int(stmt, 6, max_count);
+    sqlite3_bind_int64(stmt, 6, (sqlite3_int64)(regular_cutoff > detection_cutoff ? regular_cutoff : detection_cutoff));
+    sqlite3_bind_int(stmt, 7, max_count);
 
     while (sqlite3_step(stmt) == SQLITE_ROW && count < max_count) {
         recordings[count].id = (uint64_t)sqlite3_column_int64(stmt, 0);
@@ -1162,16 +1615,7 @@ int get_recordings_for_quota_enforcement(const char *stream_name,
     pthread_mutex_lock(db_mutex);
 
     // Get oldest unprotected recordings first
-    // Order by protection status (unprotected first), then by start_time (oldest first)
-    const char *sql =
-        "SELECT id, stream_name, file_path, start_time, end_time, "
-        "size_bytes, width, height, fps, codec, is_complete, trigger_type, protected, retention_override_days "
-        "FROM recordings "
-        "WHERE stream_name = ? "
-        "AND protected = 0 "
-        "AND is_complete = 1 "
-        "ORDER BY start_time ASC "
-        "LIMIT ?;";
+    const char *sql = quota_sql;
 
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
@@ -1279,12 +1723,7 @@ int get_orphaned_db_entries(recording_metadata_t *recordings, int max_count) {
     pthread_mutex_lock(db_mutex);
 
     // Get all recordings and check if files exist
-    const char *sql =
-        "SELECT id, stream_name, file_path, start_time, end_time, "
-        "size_bytes, width, height, fps, codec, is_complete, trigger_type "
-        "FROM recordings "
-        "WHERE is_complete = 1 "
-        "ORDER BY start_time ASC;";
+    const char *sql = orphaned_sql;
 
     rc = sqlite3_prepare_v2(db, sql, -1, &stmt, NULL);
     if (rc != SQLITE_OK) {
@@ -1354,3 +1793,71 @@ int get_orphaned_db_entries(recording_metadata_t *recordings, int max_count) {
     log_info("Checked %d recordings, found %d orphaned DB entries", checked, count);
     return count;
 }
+
+// Warn about retention, quota and list queries that the schema's indexes do not serve
+int check_recordings_query_plans(void) {
+    static const struct {
+        const char *name;
+        const char *const *sql;
+    } queries[] = {
+        {"protected recordings count", &protected_count_sql},
+        {"stream protected recordings count", &stream_protected_count_sql},
+        {"recordings for retention", &retention_sql},
+        {"recordings for quota enforcement", &quota_sql},
+        {"orphaned recordings", &orphaned_sql},
+    };
+    int unindexed = 0;
+
+    for (size_t i = 0; i < sizeof(queries) / sizeof(queries[0]); i++) {
+        int rc = check_query_plan(queries[i].name, *queries[i].sql);
+        if (rc < 0) {
+            return -1;
+        }
+        if (rc == 0) {
+            unindexed++;
+        }
+    }
+
+    // Recordings list pages for each indexed sort, with and without a stream
+    // filter, from an offset and both halves of a cursor page; these must
+    // not sort, or a page costs a sort of every complete recording
+    static const struct {
+        recordings_page_part_t part;
+        const char *suffix;
+    } page_parts[] = {
+        {PAGE_OFFSET, ""},
+        {PAGE_CURSOR_TIES, " after a cursor (same key)"},
+        {PAGE_CURSOR_KEYS, " after a cursor"},
+    };
+    for (int i = 0; i < RECORDING_SORT_FIELD_COUNT; i++) {
+        const recording_sort_field_t *field = &recording_sort_fields[i];
+        if (!field->indexed) {
+            continue;
+        }
+        for (size_t j = 0; j < sizeof(page_parts) / sizeof(page_parts[0]) * 2; j++) {
+            bool one_stream = j % 2 != 0;
+            char name[128];
+            char sql[1536];
+
+            if (page_parts[j / 2].part == PAGE_CURSOR_KEYS &&
+                !page_has_cursor_keys(field, one_stream ? "" : NULL)) {
+                continue;
+            }
+
+            snprintf(name, sizeof(name), "recordings page by %s%s%s", field->name,
+                     one_stream ? " for one stream" : "", page_parts[j / 2].suffix);
+            build_recordings_page_sql(sql, sizeof(sql), 0, 0, one_stream ? "" : NULL, 0,
+                                      field, false, page_parts[j / 2].part);
+
+            int rc = check_query_plan_order(name, sql);
+            if (rc < 0) {
+                return -1;
+            }
+            if (rc == 0) {
+                unindexed++;
+            }
+        }
+    }
+
+    return unindexed;
+}
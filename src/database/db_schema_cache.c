@@ -24,6 +24,12 @@ static int column_cache_capacity = 0;
 static pthread_mutex_t column_cache_mutex = PTHREAD_MUTEX_INITIALIZER;
 static bool schema_initialized = false;
 
+// Tables known to exist; only found tables are cached, since a table may
+// still be created by a migration but is never dropped while running
+#define TABLE_CACHE_CAPACITY 16
+static char table_cache[TABLE_CACHE_CAPACITY][64];
+static int table_cache_size = 0;
+
 // Forward declaration of the cached_column_exists function
 bool cached_column_exists(const char *table_name, const char *column_name);
 
@@ -177,6 +183,55 @@ bool cached_column_exists(const char *table_name, const char *column_name) {
     return exists;
 }
 
+/**
+ * Check if a table exists, using the cache if available
+ *
+ * @param table_name Name of the table to check
+ * @return true if the table exists, false otherwise
+ */
+bool cached_table_exists(const char *table_name) {
+    if (!table_name) {
+        return false;
+    }
+
+    pthread_mutex_lock(&column_cache_mutex);
+    for (int i = 0; i < table_cache_size; i++) {
+        if (strcmp(table_cache[i], table_name) == 0) {
+            pthread_mutex_unlock(&column_cache_mutex);
+            return true;
+        }
+    }
+    pthread_mutex_unlock(&column_cache_mutex);
+
+    sqlite3 *db = get_db_handle();
+    if (!db) {
+        return false;
+    }
+
+    sqlite3_stmt *stmt;
+    int rc = sqlite3_prepare_v2(db, "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;",
+                                -1, &stmt, NULL);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to prepare table check: %s", sqlite3_errmsg(db));
+        return false;
+    }
+    sqlite3_bind_text(stmt, 1, table_name, -1, SQLITE_STATIC);
+    bool exists = (sqlite3_step(stmt) == SQLITE_ROW);
+    sqlite3_finalize(stmt);
+
+    if (exists) {
+        pthread_mutex_lock(&column_cache_mutex);
+        if (table_cache_size < TABLE_CACHE_CAPACITY) {
+            strncpy(table_cache[table_cache_size], table_name, sizeof(table_cache[0]) - 1);
+            table_cache[table_cache_size][sizeof(table_cache[0]) - 1] = '\0';
+            table_cache_size++;
+        }
+        pthread_mutex_unlock(&column_cache_mutex);
+    }
+
+    return exists;
+}
+
 /**
  * Free the schema cache
  * This should be called during server shutdown
@@ -205,13 +260,17 @@ void free_schema_cache(void) {
             sqlite3_exec(db, "PRAGMA schema_version;", NULL, NULL, NULL);
 
             // Finalize any prepared statements related to schema queries
-            sqlite3_stmt *stmt;
-            while ((stmt = sqlite3_next_stmt(db, NULL)) != NULL) {
+            // Walk with a saved next pointer: statements that are kept (such as
+            // those in the statement cache) must not stop the loop
+            sqlite3_stmt *stmt = sqlite3_next_stmt(db, NULL);
+            while (stmt != NULL) {
+                sqlite3_stmt *next = sqlite3_next_stmt(db, stmt);
                 const char *sql = sqlite3_sql(stmt);
                 if (sql && (strstr(sql, "PRAGMA") || strstr(sql, "sqlite_master"))) {
                     log_info("Finalizing schema-related statement: %s", sql);
                     sqlite3_finalize(stmt);
                 }
+                stmt = next;
             }
         } else {
             log_warn("Database handle not available during schema cache cleanup");
@@ -223,6 +282,7 @@ void free_schema_cache(void) {
     }
 
     schema_initialized = false;
+    table_cache_size = 0;
 
     pthread_mutex_unlock(&column_cache_mutex);
 }
@@ -0,0 +1,203 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdbool.h>
+#include <pthread.h>
+#include <sqlite3.h>
+
+#include "database/db_stmt_cache.h"
+#include "database/db_core.h"
+#include "core/logger.h"
+
+// Maximum number of statements kept for one connection. When a connection
+// is at its budget, its least recently used idle statement makes room.
+#define STMT_CACHE_PER_CONNECTION 32
+
+// Room for the budget of the writer and every pooled reader
+#define STMT_CACHE_CAPACITY (STMT_CACHE_PER_CONNECTION * (DB_READER_POOL_SIZE + 1))
+
+typedef struct {
+    sqlite3 *db;
+    char *sql;
+    unsigned long hash;
+    sqlite3_stmt *stmt;
+    bool in_use;
+    uint64_t last_used;     // stmt_cache_clock at the last lookup
+} stmt_cache_entry_t;
+
+static stmt_cache_entry_t stmt_cache[STMT_CACHE_CAPACITY];
+static int stmt_cache_size = 0;
+static uint64_t stmt_cache_clock = 0;
+static stmt_cache_stats_t stmt_cache_stats = {0};
+static pthread_mutex_t stmt_cache_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+// djb2 hash of the SQL text, compared before falling back to strcmp
+static unsigned long hash_sql(const char *sql) {
+    unsigned long hash = 5381;
+    int c;
+    while ((c = (unsigned char)*sql++) != 0) {
+        hash = ((hash << 5) + hash) + c;
+    }
+    return hash;
+}
+
+// Find a cached statement; caller must hold stmt_cache_mutex
+static stmt_cache_entry_t *find_entry(sqlite3 *db, const char *sql, unsigned long hash) {
+    for (int i = 0; i < stmt_cache_size; i++) {
+        if (stmt_cache[i].db == db && stmt_cache[i].hash == hash &&
+            strcmp(stmt_cache[i].sql, sql) == 0) {
+            return &stmt_cache[i];
+        }
+    }
+    return NULL;
+}
+
+// Find a slot for a new statement on a connection, evicting the connection's
+// least recently used idle statement when it is at its budget. Only the
+// caller's own connection is touched, since the caller holds its lock.
+// Returns NULL if every statement of the connection is in use or the table
+// is full. Caller must hold stmt_cache_mutex.
+static stmt_cache_entry_t *claim_entry(sqlite3 *db) {
+    int count = 0;
+    stmt_cache_entry_t *oldest = NULL;
+    for (int i = 0; i < stmt_cache_size; i++) {
+        if (stmt_cache[i].db != db) {
+            continue;
+        }
+        count++;
+        if (!stmt_cache[i].in_use &&
+            (!oldest || stmt_cache[i].last_used < oldest->last_used)) {
+            oldest = &stmt_cache[i];
+        }
+    }
+
+    if (count < STMT_CACHE_PER_CONNECTION && stmt_cache_size < STMT_CACHE_CAPACITY) {
+        return &stmt_cache[stmt_cache_size++];
+    }
+    if (!oldest) {
+        return NULL;
+    }
+
+    sqlite3_finalize(oldest->stmt);
+    free(oldest->sql);
+    stmt_cache_stats.evictions++;
+    return oldest;
+}
+
+sqlite3_stmt *get_cached_statement(sqlite3 *db, const char *sql) {
+    if (!db || !sql) {
+        return NULL;
+    }
+
+    unsigned long hash = hash_sql(sql);
+
+    pthread_mutex_lock(&stmt_cache_mutex);
+    stmt_cache_entry_t *entry = find_entry(db, sql, hash);
+    if (entry && !entry->in_use) {
+        entry->in_use = true;
+        entry->last_used = ++stmt_cache_clock;
+        stmt_cache_stats.hits++;
+        sqlite3_stmt *stmt = entry->stmt;
+        pthread_mutex_unlock(&stmt_cache_mutex);
+        return stmt;
+    }
+    bool busy = entry != NULL;
+    pthread_mutex_unlock(&stmt_cache_mutex);
+
+    // Prepare outside the cache lock; parsing is the slow part
+    sqlite3_stmt *stmt = NULL;
+    if (sqlite3_prepare_v2(db, sql, -1, &stmt, NULL) != SQLITE_OK) {
+        sqlite3_finalize(stmt);
+        return NULL;
+    }
+
+    pthread_mutex_lock(&stmt_cache_mutex);
+    char *sql_copy = NULL;
+    stmt_cache_entry_t *slot = NULL;
+    if (!busy && !find_entry(db, sql, hash)) {
+        sql_copy = strdup(sql);
+    }
+    if (sql_copy) {
+        slot = claim_entry(db);
+    }
+    if (slot) {
+        slot->db = db;
+        slot->sql = sql_copy;
+        slot->hash = hash;
+        slot->stmt = stmt;
+        slot->in_use = true;
+        slot->last_used = ++stmt_cache_clock;
+        stmt_cache_stats.prepares++;
+    } else {
+        // Same SQL already in use on this connection (or every statement of
+        // the connection is in use): a one-off statement that
+        // release_cached_statement() finalizes
+        free(sql_copy);
+        stmt_cache_stats.uncached++;
+    }
+    pthread_mutex_unlock(&stmt_cache_mutex);
+
+    return stmt;
+}
+
+void release_cached_statement(sqlite3_stmt *stmt) {
+    if (!stmt) {
+        return;
+    }
+
+    // Reset now so a finished read does not hold its snapshot until the
+    // next use, and clear bindings so no SQLITE_STATIC pointers linger
+    sqlite3_reset(stmt);
+    sqlite3_clear_bindings(stmt);
+
+    pthread_mutex_lock(&stmt_cache_mutex);
+    for (int i = 0; i < stmt_cache_size; i++) {
+        if (stmt_cache[i].stmt == stmt) {
+            stmt_cache[i].in_use = false;
+            pthread_mutex_unlock(&stmt_cache_mutex);
+            return;
+        }
+    }
+    pthread_mutex_unlock(&stmt_cache_mutex);
+
+    sqlite3_finalize(stmt);
+}
+
+void finalize_cached_statements(sqlite3 *db) {
+    if (!db) {
+        return;
+    }
+
+    pthread_mutex_lock(&stmt_cache_mutex);
+    int kept = 0;
+    int finalized = 0;
+    for (int i = 0; i < stmt_cache_size; i++) {
+        if (stmt_cache[i].db != db) {
+            stmt_cache[kept++] = stmt_cache[i];
+            continue;
+        }
+        if (stmt_cache[i].in_use) {
+            log_warn("Finalizing cached statement still in use: %s", stmt_cache[i].sql);
+        }
+        sqlite3_finalize(stmt_cache[i].stmt);
+        free(stmt_cache[i].sql);
+        finalized++;
+    }
+    stmt_cache_size = kept;
+    pthread_mutex_unlock(&stmt_cache_mutex);
+
+    if (finalized > 0) {
+        log_debug("Finalized %d cached statements", finalized);
+    }
+}
+
+void get_stmt_cache_stats(stmt_cache_stats_t *stats) {
+    if (!stats) {
+        return;
+    }
+
+    pthread_mutex_lock(&stmt_cache_mutex);
+    *stats = stmt_cache_stats;
+    stats->cached = stmt_cache_size;
+    pthread_mutex_unlock(&stmt_cache_mutex);
+}
@@ -0,0 +1,502 @@
+#define _POSIX_C_SOURCE 200809L
+#define _XOPEN_SOURCE 700
+#define _GNU_SOURCE
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdbool.h>
+#include <errno.h>
+#include <time.h>
+#include <pthread.h>
+#include <sqlite3.h>
+
+#include "database/db_write_queue.h"
+#include "database/db_core.h"
+#include "database/db_stmt_cache.h"
+#include "core/logger.h"
+
+typedef enum {
+    WRITE_DETECTIONS,
+    WRITE_EVENT,
+    WRITE_RECORDING_PROGRESS
+} write_type_t;
+
+// A pending write; strings and detections are owned by the item
+typedef struct {
+    write_type_t type;
+    time_t timestamp;
+    char *stream_name;
+    union {
+        struct {
+            int count;
+            detection_t *items;
+        } detections;
+        struct {
+            event_type_t type;
+            char *description;
+            char *details;
+        } event;
+        struct {
+            uint64_t id;
+            time_t end_time;
+            uint64_t size_bytes;
+        } progress;
+    } u;
+} write_item_t;
+
+static const char *insert_detection_sql =
+    "INSERT INTO detections (stream_name, timestamp, label, confidence, x, y, width, height, track_id, zone_id) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);";
+
+static const char *insert_event_sql =
+    "INSERT INTO events (type, timestamp, stream_name, description, details) "
+    "VALUES (?, ?, ?, ?, ?);";
+
+static const char *update_progress_sql =
+    "UPDATE recordings SET end_time = ?, size_bytes = ? "
+    "WHERE id = ? AND is_complete = 0;";
+
+// Ring buffer of pending writes
+static write_item_t queue[DB_WRITE_QUEUE_CAPACITY];
+static int queue_head = 0;
+static int queue_count = 0;
+static int queue_rows = 0;
+static struct timespec oldest_queued;
+
+// Writes are numbered as they are queued; flush waits for committed_seq
+static uint64_t queued_seq = 0;
+static uint64_t committed_seq = 0;
+
+static db_write_queue_stats_t stats = {0};
+
+static pthread_mutex_t queue_mutex = PTHREAD_MUTEX_INITIALIZER;
+static pthread_cond_t queue_cond = PTHREAD_COND_INITIALIZER;
+static pthread_cond_t committed_cond = PTHREAD_COND_INITIALIZER;
+static pthread_t writer_thread;
+static bool writer_running = false;
+static bool flush_requested = false;
+
+// Batch being written; only touched by the writer thread
+static write_item_t batch[DB_WRITE_QUEUE_CAPACITY];
+
+static int item_rows(const write_item_t *item) {
+    return item->type == WRITE_DETECTIONS ? item->u.detections.count : 1;
+}
+
+static void free_item(write_item_t *item) {
+    free(item->stream_name);
+    if (item->type == WRITE_DETECTIONS) {
+        free(item->u.detections.items);
+    } else if (item->type == WRITE_EVENT) {
+        free(item->u.event.description);
+        free(item->u.event.details);
+    }
+    memset(item, 0, sizeof(*item));
+}
+
+static double elapsed_ms(const struct timespec *start) {
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return (now.tv_sec - start->tv_sec) * 1000.0 + (now.tv_nsec - start->tv_nsec) / 1000000.0;
+}
+
+// Write one item inside the open transaction; returns rows written or -1
+static int write_item(sqlite3 *db, const write_item_t *item) {
+    sqlite3_stmt *stmt;
+    int rows = 0;
+
+    switch (item->type) {
+    case WRITE_DETECTIONS:
+        stmt = get_cached_statement(db, insert_detection_sql);
+        if (!stmt) {
+            log_error("Failed to prepare detection insert: %s", sqlite3_errmsg(db));
+            return -1;
+        }
+        for (int i = 0; i < item->u.detections.count; i++) {
+            const detection_t *d = &item->u.detections.items[i];
+            sqlite3_bind_text(stmt, 1, item->stream_name, -1, SQLITE_STATIC);
+            sqlite3_bind_int64(stmt, 2, (sqlite3_int64)item->timestamp);
+            sqlite3_bind_text(stmt, 3, d->label, -1, SQLITE_STATIC);
+            sqlite3_bind_double(stmt, 4, d->confidence);
+            sqlite3_bind_double(stmt, 5, d->x);
+            sqlite3_bind_double(stmt, 6, d->y);
+            sqlite3_bind_double(stmt, 7, d->width);
+            sqlite3_bind_double(stmt, 8, d->height);
+            sqlite3_bind_int(stmt, 9, d->track_id);
+            sqlite3_bind_text(stmt, 10, d->zone_id, -1, SQLITE_STATIC);
+            if (sqlite3_step(stmt) != SQLITE_DONE) {
+                log_error("Failed to insert detection for stream %s: %s",
+                          item->stream_name, sqlite3_errmsg(db));
+                release_cached_statement(stmt);
+                return -1;
+            }
+            sqlite3_reset(stmt);
+            rows++;
+        }
+        release_cached_statement(stmt);
+        return rows;
+
+    case WRITE_EVENT:
+        stmt = get_cached_statement(db, insert_event_sql);
+        if (!stmt) {
+            log_error("Failed to prepare event insert: %s", sqlite3_errmsg(db));
+            return -1;
+        }
+        sqlite3_bind_int(stmt, 1, (int)item->u.event.type);
+        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)item->timestamp);
+        if (item->stream_name) {
+            sqlite3_bind_text(stmt, 3, item->stream_name, -1, SQLITE_STATIC);
+        } else {
+            sqlite3_bind_null(stmt, 3);
+        }
+        sqlite3_bind_text(stmt, 4, item->u.event.description, -1, SQLITE_STATIC);
+        if (item->u.event.details) {
+            sqlite3_bind_text(stmt, 5, item->u.event.details, -1, SQLITE_STATIC);
+        } else {
+            sqlite3_bind_null(stmt, 5);
+        }
+        break;
+
+    case WRITE_RECORDING_PROGRESS:
+        stmt = get_cached_statement(db, update_progress_sql);
+        if (!stmt) {
+            log_error("Failed to prepare recording update: %s", sqlite3_errmsg(db));
+            return -1;
+        }
+        sqlite3_bind_int64(stmt, 1, (sqlite3_int64)item->u.progress.end_time);
+        sqlite3_bind_int64(stmt, 2, (sqlite3_int64)item->u.progress.size_bytes);
+        sqlite3_bind_int64(stmt, 3, (sqlite3_int64)item->u.progress.id);
+        break;
+
+    default:
+        return -1;
+    }
+
+    if (sqlite3_step(stmt) != SQLITE_DONE) {
+        log_error("Failed to write queued %s: %s",
+                  item->type == WRITE_EVENT ? "event" : "recording update", sqlite3_errmsg(db));
+        release_cached_statement(stmt);
+        return -1;
+    }
+    release_cached_statement(stmt);
+    return 1;
+}
+
+/**
+ * Write items in a single transaction
+ * Returns the number of rows written; failed items are counted in stats.
+ */
+static int write_items(write_item_t *items, int count) {
+    sqlite3 *db = get_db_handle();
+    pthread_mutex_t *db_mutex = get_db_mutex();
+    int rows = 0;
+    int failures = 0;
+    char *err_msg = NULL;
+
+    if (!db) {
+        log_error("Database not initialized, dropping %d queued writes", count);
+        pthread_mutex_lock(&queue_mutex);
+        stats.failures += count;
+        pthread_mutex_unlock(&queue_mutex);
+        return -1;
+    }
+
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+
+    pthread_mutex_lock(db_mutex);
+
+    int rc = sqlite3_exec(db, "BEGIN TRANSACTION;", NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to begin write batch: %s", err_msg);
+        sqlite3_free(err_msg);
+        pthread_mutex_unlock(db_mutex);
+        pthread_mutex_lock(&queue_mutex);
+        stats.failures += count;
+        pthread_mutex_unlock(&queue_mutex);
+        return -1;
+    }
+
+    // A failed item does not abort the others; SQLite only rolls back the
+    // failing statement
+    for (int i = 0; i < count; i++) {
+        int written = write_item(db, &items[i]);
+        if (written < 0) {
+            failures++;
+        } else {
+            rows += written;
+        }
+    }
+
+    rc = sqlite3_exec(db, "COMMIT;", NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        log_error("Failed to commit write batch of %d writes: %s", count, err_msg);
+        sqlite3_free(err_msg);
+        sqlite3_exec(db, "ROLLBACK;", NULL, NULL, NULL);
+        failures = count;
+        rows = 0;
+    }
+
+    pthread_mutex_unlock(db_mutex);
+
+    double lock_ms = elapsed_ms(&start);
+
+    pthread_mutex_lock(&queue_mutex);
+    stats.failures += failures;
+    stats.last_batch_ms = lock_ms;
+    pthread_mutex_unlock(&queue_mutex);
+
+    return rows;
+}
+
+// Add an item to the queue, or write it now if the queue is full or stopped
+static int submit(write_item_t *item) {
+    pthread_mutex_lock(&queue_mutex);
+    if (writer_running && queue_count < DB_WRITE_QUEUE_CAPACITY) {
+        if (queue_count == 0) {
+            clock_gettime(CLOCK_MONOTONIC, &oldest_queued);
+        }
+        queue[(queue_head + queue_count) % DB_WRITE_QUEUE_CAPACITY] = *item;
+        queue_count++;
+        queue_rows += item_rows(item);
+        queued_seq++;
+        stats.queued++;
+        if (queue_count > stats.max_depth) {
+            stats.max_depth = queue_count;
+        }
+        if (queue_rows >= DB_WRITE_QUEUE_BATCH_ROWS) {
+            pthread_cond_signal(&queue_cond);
+        }
+        pthread_mutex_unlock(&queue_mutex);
+        return 0;
+    }
+    if (writer_running) {
+        stats.overflows++;
+    }
+    pthread_mutex_unlock(&queue_mutex);
+
+    // Writing in the caller's thread slows producers down instead of
+    // dropping data while the writer catches up
+    int rows = write_items(item, 1);
+    free_item(item);
+    return rows < 0 ? -1 : 0;
+}
+
+static void *writer_thread_func(void *arg) {
+    (void)arg;
+
+    log_info("Database writer thread started");
+
+    pthread_mutex_lock(&queue_mutex);
+    while (writer_running || queue_count > 0) {
+        while (writer_running && queue_count == 0) {
+            pthread_cond_wait(&queue_cond, &queue_mutex);
+        }
+
+        // Let the batch fill until it is old or big enough
+        while (writer_running && !flush_requested && queue_count > 0 &&
+               queue_rows < DB_WRITE_QUEUE_BATCH_ROWS) {
+            double waited = elapsed_ms(&oldest_queued);
+            if (waited >= DB_WRITE_QUEUE_FLUSH_MS) {
+                break;
+            }
+            struct timespec deadline;
+            clock_gettime(CLOCK_REALTIME, &deadline);
+            long wait_ns = (long)((DB_WRITE_QUEUE_FLUSH_MS - waited) * 1000000.0);
+            deadline.tv_sec += wait_ns / 1000000000L;
+            deadline.tv_nsec += wait_ns % 1000000000L;
+            if (deadline.tv_nsec >= 1000000000L) {
+                deadline.tv_sec++;
+                deadline.tv_nsec -= 1000000000L;
+            }
+            pthread_cond_timedwait(&queue_cond, &queue_mutex, &deadline);
+        }
+
+        if (queue_count == 0) {
+            continue;
+        }
+
+        int count = queue_count;
+        for (int i = 0; i < count; i++) {
+            batch[i] = queue[(queue_head + i) % DB_WRITE_QUEUE_CAPACITY];
+        }
+        queue_head = (queue_head + count) % DB_WRITE_QUEUE_CAPACITY;
+        queue_count = 0;
+        queue_rows = 0;
+        flush_requested = false;
+        uint64_t batch_seq = queued_seq;
+        pthread_mutex_unlock(&queue_mutex);
+
+        int rows = write_items(batch, count);
+        for (int i = 0; i < count; i++) {
+            free_item(&batch[i]);
+        }
+
+        pthread_mutex_lock(&queue_mutex);
+        committed_seq = batch_seq;
+        if (rows > 0) {
+            stats.rows_written += rows;
+        }
+        stats.batches++;
+        pthread_cond_broadcast(&committed_cond);
+        log_debug("Database writer committed %d writes (%d rows) in %.1f ms",
+                  count, rows, stats.last_batch_ms);
+    }
+    pthread_mutex_unlock(&queue_mutex);
+
+    log_info("Database writer thread stopped");
+    return NULL;
+}
+
+int start_db_write_queue(void) {
+    pthread_mutex_lock(&queue_mutex);
+    if (writer_running) {
+        pthread_mutex_unlock(&queue_mutex);
+        return 0;
+    }
+    writer_running = true;
+    pthread_mutex_unlock(&queue_mutex);
+
+    if (pthread_create(&writer_thread, NULL, writer_thread_func, NULL) != 0) {
+        log_error("Failed to create database writer thread");
+        pthread_mutex_lock(&queue_mutex);
+        writer_running = false;
+        pthread_mutex_unlock(&queue_mutex);
+        return -1;
+    }
+
+    return 0;
+}
+
+void stop_db_write_queue(void) {
+    pthread_mutex_lock(&queue_mutex);
+    if (!writer_running) {
+        pthread_mutex_unlock(&queue_mutex);
+        return;
+    }
+    writer_running = false;
+    pthread_cond_broadcast(&queue_cond);
+    pthread_mutex_unlock(&queue_mutex);
+
+    // The thread commits whatever is still queued before it exits
+    pthread_join(writer_thread, NULL);
+
+    log_info("Database write queue: %llu writes queued, %llu rows in %llu batches, "
+             "%llu overflows, %llu failures, max depth %d",
+             (unsigned long long)stats.queued, (unsigned long long)stats.rows_written,
+             (unsigned long long)stats.batches, (unsigned long long)stats.overflows,
+             (unsigned long long)stats.failures, stats.max_depth);
+}
+
+int queue_detections(const char *stream_name, const detection_result_t *result, time_t timestamp) {
+    if (!stream_name || !result) {
+        log_error("Invalid parameters for queue_detections: stream_name=%p, result=%p",
+                 stream_name, result);
+        return -1;
+    }
+
+    if (result->count <= 0) {
+        return 0;
+    }
+
+    write_item_t item = {0};
+    item.type = WRITE_DETECTIONS;
+    item.timestamp = timestamp != 0 ? timestamp : time(NULL);
+    item.stream_name = strdup(stream_name);
+    item.u.detections.count = result->count < MAX_DETECTIONS ? result->count : MAX_DETECTIONS;
+    item.u.detections.items = malloc(item.u.detections.count * sizeof(detection_t));
+    if (!item.stream_name || !item.u.detections.items) {
+        log_error("Failed to allocate memory for queued detections");
+        free_item(&item);
+        return -1;
+    }
+    memcpy(item.u.detections.items, result->detections, item.u.detections.count * sizeof(detection_t));
+
+    return submit(&item);
+}
+
+int queue_event(event_type_t type, const char *stream_name,
+                const char *description, const char *details) {
+    if (!description) {
+        log_error("Event description is required");
+        return -1;
+    }
+
+    write_item_t item = {0};
+    item.type = WRITE_EVENT;
+    item.timestamp = time(NULL);
+    item.u.event.type = type;
+    item.stream_name = stream_name ? strdup(stream_name) : NULL;
+    item.u.event.description = strdup(description);
+    item.u.event.details = details ? strdup(details) : NULL;
+    if ((stream_name && !item.stream_name) || !item.u.event.description ||
+        (details && !item.u.event.details)) {
+        log_error("Failed to allocate memory for queued event");
+        free_item(&item);
+        return -1;
+    }
+
+    return submit(&item);
+}
+
+int queue_recording_progress(uint64_t id, time_t end_time, uint64_t size_bytes) {
+    if (id == 0) {
+        return -1;
+    }
+
+    write_item_t item = {0};
+    item.type = WRITE_RECORDING_PROGRESS;
+    item.timestamp = time(NULL);
+    item.u.progress.id = id;
+    item.u.progress.end_time = end_time;
+    item.u.progress.size_bytes = size_bytes;
+
+    return submit(&item);
+}
+
+int flush_db_write_queue(int timeout_ms) {
+    pthread_mutex_lock(&queue_mutex);
+    uint64_t target = queued_seq;
+    if (committed_seq >= target) {
+        pthread_mutex_unlock(&queue_mutex);
+        return 0;
+    }
+
+    flush_requested = true;
+    pthread_cond_signal(&queue_cond);
+
+    struct timespec deadline;
+    clock_gettime(CLOCK_REALTIME, &deadline);
+    deadline.tv_sec += timeout_ms / 1000;
+    deadline.tv_nsec += (long)(timeout_ms % 1000) * 1000000L;
+    if (deadline.tv_nsec >= 1000000000L) {
+        deadline.tv_sec++;
+        deadline.tv_nsec -= 1000000000L;
+    }
+
+    int result = 0;
+    while (committed_seq < target) {
+        if (pthread_cond_timedwait(&committed_cond, &queue_mutex, &deadline) == ETIMEDOUT) {
+            result = committed_seq >= target ? 0 : -1;
+            break;
+        }
+    }
+    pthread_mutex_unlock(&queue_mutex);
+
+    if (result != 0) {
+        log_warn("Timed out after %d ms waiting for the database write queue", timeout_ms);
+    }
+    return result;
+}
+
+void get_db_write_queue_stats(db_write_queue_stats_t *out) {
+    if (!out) {
+        return;
+    }
+
+    pthread_mutex_lock(&queue_mutex);
+    *out = stats;
+    out->depth = queue_count;
+    pthread_mutex_unlock(&queue_mutex);
+}
@@ -534,6 +534,29 @@ static int execute_single_statement(sqlite3 *db, const char *sql) {
     return 0;
 }
 
+/**
+ * Copy len bytes of SQL into the statement buffer and terminate it with a semicolon.
+ * Frees the buffer and returns -1 if it can't be grown.
+ */
+static int copy_statement(char **stmt_copy, size_t *stmt_size, const char *start, size_t len) {
+    if (len + 2 > *stmt_size) {
+        size_t new_size = len + 256;
+        char *new_copy = realloc(*stmt_copy, new_size);
+        if (!new_copy) {
+            free(*stmt_copy);
+            *stmt_copy = NULL;
+            return -1;
+        }
+        *stmt_copy = new_copy;
+        *stmt_size = new_size;
+    }
+
+    memcpy(*stmt_copy, start, len);
+    (*stmt_copy)[len] = ';';
+    (*stmt_copy)[len + 1] = '\0';
+    return 0;
+}
+
 /**
  * Execute SQL statements (handles multiple statements separated by semicolons)
  * Makes schema changes idempotent by checking for existing columns/tables.
@@ -571,16 +594,18 @@ static int execute_sql(sqlite3 *db, const char *sql) {
             continue;
         }
 
-        // Find end of statement (semicolon)
+        // Find end of statement: the first semicolon that completes it.
+        // sqlite3_complete() skips semicolons inside strings, comments and
+        // CREATE TRIGGER ... BEGIN ... END bodies.
         end = start;
-        int in_string = 0;
         while (*end) {
-            if (*end == '\'' && !in_string) {
-                in_string = 1;
-            } else if (*end == '\'' && in_string) {
-                in_string = 0;
-            } else if (*end == ';' && !in_string) {
-                break;
+            if (*end == ';') {
+                if (copy_statement(&stmt_copy, &stmt_size, start, end - start) != 0) {
+                    return -1;
+                }
+                if (sqlite3_complete(stmt_copy)) {
+                    break;
+                }
             }
             end++;
         }
@@ -590,22 +615,11 @@ static int execute_sql(sqlite3 *db, const char *sql) {
             continue;
         }
 
-        // Copy statement for execution
-        size_t len = end - start;
-        if (len + 2 > stmt_size) {
-            stmt_size = len + 256;
-            char *new_copy = realloc(stmt_copy, stmt_size);
-            if (!new_copy) {
-                free(stmt_copy);
-                return -1;
-            }
-            stmt_copy = new_copy;
+        // Trailing statement without a semicolon
+        if (*end == '\0' && copy_statement(&stmt_copy, &stmt_size, start, end - start) != 0) {
+            return -1;
         }
 
-        memcpy(stmt_copy, start, len);
-        stmt_copy[len] = ';';
-        stmt_copy[len + 1] = '\0';
-
         // Execute this statement
         int result = execute_single_statement(db, stmt_copy);
         if (result < 0) {
@@ -15,12 +15,21 @@
 #include "database/db_auth.h"
 #include "database/db_streams.h"
 #include "database/db_recordings.h"
+#include "database/db_detection_blocks.h"
+#include "database/db_maintenance.h"
+#include "database/db_core.h"
 #include "core/logger.h"
 
 // Maximum number of streams to process at once
 #define MAX_STREAMS_BATCH 64
 // Maximum recordings to delete per stream per run
 #define MAX_RECORDINGS_PER_STREAM 100
+// Maximum detection buckets to pack into blocks per run (a bucket is 10 minutes)
+#define MAX_DETECTION_BUCKETS_PER_RUN 1000
+// Maximum free database pages to release per run (16 MiB at the default 4 KiB page size)
+#define MAX_VACUUM_PAGES_PER_RUN 4096
+// Maximum online backup steps per run; a larger database is finished in later runs
+#define MAX_BACKUP_STEPS_PER_RUN 1024
 
 // Forward declarations
 static int apply_legacy_retention_policy(void);
@@ -578,6 +587,24 @@ static void* storage_manager_thread_func(void *arg) {
             log_error("Storage manager thread encountered an error applying retention policy");
         }
 
+        // Pack detections of closed buckets into blocks
+        if (detection_block_storage_enabled()) {
+            int packed = compact_detection_blocks(MAX_DETECTION_BUCKETS_PER_RUN);
+            if (packed < 0) {
+                log_warn("Storage manager thread failed to pack detections into blocks");
+            }
+        }
+
+        // Give space freed by deletes back to the filesystem, a bounded amount per run
+        if (incremental_vacuum_database(MAX_VACUUM_PAGES_PER_RUN) < 0) {
+            log_warn("Storage manager thread failed to run incremental vacuum");
+        }
+
+        // Start or continue the scheduled database backup
+        if (run_scheduled_backup(MAX_BACKUP_STEPS_PER_RUN) < 0) {
+            log_warn("Storage manager thread failed to back up the database");
+        }
+
         // Clean up expired authentication sessions
         int sessions_deleted = db_auth_cleanup_sessions();
         if (sessions_deleted > 0) {
@@ -21,6 +21,7 @@
 #include "video/zone_filter.h"
 #include "video/ffmpeg_utils.h"
 #include "database/db_detections.h"
+#include "database/db_write_queue.h"
 #include "video/go2rtc/go2rtc_snapshot.h"
 
 // Global variables
@@ -559,7 +560,7 @@ int detect_objects_api(const char *api_url, const unsigned char *frame_data,
 
         // Store the detections in the database
         time_t timestamp = time(NULL);
-        store_detections_in_db(stream_name, result, timestamp);
+        queue_detections(stream_name, result, timestamp);
 
         // Publish to MQTT if enabled
         if (result->count > 0) {
@@ -885,7 +886,7 @@ int detect_objects_api_snapshot(const char *api_url, const char *stream_name,
                  result->count, stream_name);
         filter_detections_by_zones(stream_name, result);
         time_t timestamp = time(NULL);
-        store_detections_in_db(stream_name, result, timestamp);
+        queue_detections(stream_name, result, timestamp);
 
         // Publish to MQTT if enabled
         if (result->count > 0) {
@@ -264,8 +264,8 @@ void close_all_mp4_writers(void) {
         // Update the database to mark the recording as complete
         if (file_paths_to_close[i][0] != '\0') {
             // Add an event to the database
-            add_event(EVENT_RECORDING_STOP, stream_names_to_close[i], 
-                     "Recording stopped during shutdown", file_paths_to_close[i]);
+            queue_event(EVENT_RECORDING_STOP, stream_names_to_close[i], 
+                       "Recording stopped during shutdown", file_paths_to_close[i]);
         }
     }
     
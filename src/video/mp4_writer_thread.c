@@ -437,7 +437,7 @@ static void *mp4_writer_rtsp_thread(void *arg) {
             if (stat(thread_ctx->writer->output_path, &st) == 0) {
                 uint64_t size_bytes = st.st_size;
                 // Update size but don't mark as complete yet
-                update_recording_metadata(thread_ctx->writer->current_recording_id, 0, size_bytes, false);
+                queue_recording_progress(thread_ctx->writer->current_recording_id, 0, size_bytes);
                 log_debug("Updated recording metadata for ID: %llu, size: %llu bytes",
                         (unsigned long long)thread_ctx->writer->current_recording_id,
                         (unsigned long long)size_bytes);
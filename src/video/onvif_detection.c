@@ -24,6 +24,7 @@
 #include "video/onvif_motion_recording.h"
 #include "video/zone_filter.h"
 #include "database/db_detections.h"
+#include "database/db_write_queue.h"
 
 // Global variables
 static bool initialized = false;
@@ -633,7 +634,7 @@ int detect_motion_onvif(const char *onvif_url, const char *username, const char
 
             // Store the detection in the database
             time_t timestamp = time(NULL);
-            store_detections_in_db(stream_name, result, timestamp);
+            queue_detections(stream_name, result, timestamp);
 
             // Publish to MQTT if enabled
             if (result->count > 0) {
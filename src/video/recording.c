@@ -200,7 +200,7 @@ void update_recording(const char *stream_name) {
             
             // Update recording metadata
             time_t current_time = time(NULL);
-            update_recording_metadata(recording_id, current_time, total_size, false);
+            queue_recording_progress(recording_id, current_time, total_size);
             
             log_debug("Updated recording %llu for stream %s, size: %llu bytes", 
                     (unsigned long long)recording_id, stream_name, (unsigned long long)total_size);
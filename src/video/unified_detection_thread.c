@@ -48,6 +48,7 @@
 #include "video/go2rtc/go2rtc_stream.h"
 #include "database/db_recordings.h"
 #include "database/db_detections.h"
+#include "database/db_write_queue.h"
 
 // Reconnection settings
 #define BASE_RECONNECT_DELAY_MS 500
@@ -1329,7 +1330,7 @@ static bool run_detection_on_frame(unified_detection_ctx_t *ctx, AVPacket *pkt)
     // Store detections in database if any were found
     if (result.count > 0) {
         time_t now = time(NULL);
-        if (store_detections_in_db(ctx->stream_name, &result, now) != 0) {
+        if (queue_detections(ctx->stream_name, &result, now) != 0) {
             log_warn("[%s] Failed to store detections in database", ctx->stream_name);
         }
         ctx->total_detections += result.count;
@@ -76,6 +76,11 @@ void mg_handle_get_detection_results(struct mg_connection *c, struct mg_http_mes
     detection_result_t result;
     memset(&result, 0, sizeof(detection_result_t));
     
+    // Live results should include detections still waiting in the write queue
+    if (max_age > 0) {
+        flush_db_write_queue(1000);
+    }
+
     // Use the time range function
     int count = get_detections_from_db_time_range(stream_name, &result, max_age, start_time, end_time);
     
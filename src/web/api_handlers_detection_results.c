@@ -50,7 +50,7 @@ void store_detection_result(const char *stream_name, const detection_result_t *r
     
     // Store in database
     time_t timestamp = time(NULL);
-    int ret = store_detections_in_db(stream_name, result, timestamp);
+    int ret = queue_detections(stream_name, result, timestamp);
 
     if (ret != 0) {
         log_error("Failed to store detections in database for stream '%s'", stream_name);
@@ -64,8 +64,8 @@ void mg_handle_get_recordings_worker(struct mg_connection *c, struct mg_http_mes
         }
     }
     
-    // Parse query parameters
-    char query_string[512] = {0};
+    // Parse query parameters (room for a cursor on top of the filters)
+    char query_string[2048] = {0};
     if (hm->query.len > 0 && hm->query.len < sizeof(query_string)) {
         memcpy(query_string, mg_str_get_ptr(&hm->query), hm->query.len);
         query_string[hm->query.len] = '\0';
@@ -73,7 +73,7 @@ void mg_handle_get_recordings_worker(struct mg_connection *c, struct mg_http_mes
     }
     
     // Extract parameters
-    char stream_name[64] = {0};
+    char stream_name[MAX_STREAM_NAME] = {0};
     char start_time_str[64] = {0};
     char end_time_str[64] = {0};
     int page = 1;
@@ -81,6 +81,7 @@ void mg_handle_get_recordings_worker(struct mg_connection *c, struct mg_http_mes
     char sort_field[32] = "start_time";
     char sort_order[8] = "desc";
     int has_detection = 0;
+    char cursor[RECORDING_CURSOR_SIZE] = {0};
     
     // Parse query string
     char *param = strtok(query_string, "&");
@@ -103,6 +104,8 @@ void mg_handle_get_recordings_worker(struct mg_connection *c, struct mg_http_mes
             has_detection = atoi(param + 10);
         } else if (strncmp(param, "has_detection=", 14) == 0) {
             has_detection = atoi(param + 14);
+        } else if (strncmp(param, "cursor=", 7) == 0) {
+            strncpy(cursor, param + 7, sizeof(cursor) - 1);
         }
         param = strtok(NULL, "&");
     }
@@ -204,11 +207,24 @@ void mg_handle_get_recordings_worker(struct mg_connection *c, struct mg_http_mes
         return;
     }
     
-    // Get recordings with pagination
-    count = get_recording_metadata_paginated(start_time, end_time, 
-                                           stream_name[0] != '\0' ? stream_name : NULL,
-                                           has_detection, sort_field, sort_order,
-                                           recordings, limit, offset);
+    // Get recordings with pagination: a cursor from the previous page seeks
+    // straight to the next rows, the page number is kept for older clients
+    if (cursor[0] != '\0') {
+        count = get_recording_metadata_after(start_time, end_time,
+                                             stream_name[0] != '\0' ? stream_name : NULL,
+                                             has_detection, sort_field, sort_order,
+                                             cursor, recordings, limit);
+        if (count == -2) {
+            free(recordings);
+            mg_send_json_error(c, 400, "Invalid cursor");
+            return;
+        }
+    } else {
+        count = get_recording_metadata_paginated(start_time, end_time, 
+                                               stream_name[0] != '\0' ? stream_name : NULL,
+                                               has_detection, sort_field, sort_order,
+                                               recordings, limit, offset);
+    }
     
     if (count < 0) {
         log_error("Failed to get recordings from database");
@@ -255,6 +271,14 @@ void mg_handle_get_recordings_worker(struct mg_connection *c, struct mg_http_mes
     cJSON_AddNumberToObject(pagination, "pages", total_pages);
     cJSON_AddNumberToObject(pagination, "total", total_count);
     cJSON_AddNumberToObject(pagination, "limit", limit);
+
+    // Cursor for the following page; absent on the last page
+    char next_cursor[RECORDING_CURSOR_SIZE];
+    if (count == limit &&
+        encode_recording_cursor(&recordings[count - 1], sort_field, sort_order,
+                                next_cursor, sizeof(next_cursor)) == 0) {
+        cJSON_AddStringToObject(pagination, "next_cursor", next_cursor);
+    }
     
     // Add pagination object to response
     cJSON_AddItemToObject(response, "pagination", pagination);
@@ -26,6 +26,8 @@
 #include "video/stream_manager.h"
 #include "database/db_streams.h"
 #include "database/db_recordings.h"
+#include "database/db_write_queue.h"
+#include "database/db_stmt_cache.h"
 #include "storage/storage_manager_streams.h"
 #include "storage/storage_manager_streams_cache.h"
 #include "mongoose.h"
@@ -611,6 +613,42 @@ void mg_handle_get_system_info(struct mg_connection *c, struct mg_http_message *
         cJSON_AddItemToObject(info, "recordings", recordings);
     }
 
+    // Add database write queue and statement cache statistics
+    cJSON *database = cJSON_CreateObject();
+    if (database) {
+        db_write_queue_stats_t queue_stats;
+        get_db_write_queue_stats(&queue_stats);
+
+        cJSON *write_queue = cJSON_CreateObject();
+        if (write_queue) {
+            cJSON_AddNumberToObject(write_queue, "depth", queue_stats.depth);
+            cJSON_AddNumberToObject(write_queue, "maxDepth", queue_stats.max_depth);
+            cJSON_AddNumberToObject(write_queue, "capacity", DB_WRITE_QUEUE_CAPACITY);
+            cJSON_AddNumberToObject(write_queue, "queued", (double)queue_stats.queued);
+            cJSON_AddNumberToObject(write_queue, "rowsWritten", (double)queue_stats.rows_written);
+            cJSON_AddNumberToObject(write_queue, "batches", (double)queue_stats.batches);
+            cJSON_AddNumberToObject(write_queue, "overflows", (double)queue_stats.overflows);
+            cJSON_AddNumberToObject(write_queue, "failures", (double)queue_stats.failures);
+            cJSON_AddNumberToObject(write_queue, "lastBatchMs", queue_stats.last_batch_ms);
+            cJSON_AddItemToObject(database, "writeQueue", write_queue);
+        }
+
+        stmt_cache_stats_t cache_stats;
+        get_stmt_cache_stats(&cache_stats);
+
+        cJSON *stmt_cache = cJSON_CreateObject();
+        if (stmt_cache) {
+            cJSON_AddNumberToObject(stmt_cache, "cached", cache_stats.cached);
+            cJSON_AddNumberToObject(stmt_cache, "hits", (double)cache_stats.hits);
+            cJSON_AddNumberToObject(stmt_cache, "prepares", (double)cache_stats.prepares);
+            cJSON_AddNumberToObject(stmt_cache, "uncached", (double)cache_stats.uncached);
+            cJSON_AddNumberToObject(stmt_cache, "evictions", (double)cache_stats.evictions);
+            cJSON_AddItemToObject(database, "statementCache", stmt_cache);
+        }
+
+        cJSON_AddItemToObject(info, "database", database);
+    }
+
     // Add stream storage usage information with caching
     add_cached_stream_storage_usage_to_json(info, 0);
 
@@ -24,10 +24,14 @@
 void mg_handle_get_timeline_segments(struct mg_connection *c, struct mg_http_message *hm);
 void mg_handle_timeline_manifest(struct mg_connection *c, struct mg_http_message *hm);
 void mg_handle_timeline_playback(struct mg_connection *c, struct mg_http_message *hm);
+void mg_handle_get_timeline_summary(struct mg_connection *c, struct mg_http_message *hm);
 
 // Maximum number of segments to return in a single request
 #define MAX_TIMELINE_SEGMENTS 1000
 
+// Maximum number of stream/bucket rows in a timeline summary
+#define MAX_SUMMARY_BUCKETS 10000
+
 // Maximum number of segments in a manifest
 #define MAX_MANIFEST_SEGMENTS 100
 
@@ -786,3 +790,182 @@ void mg_handle_timeline_playback(struct mg_connection *c, struct mg_http_message
     mg_printf(c, "Content-Length: 0\r\n");
     mg_printf(c, "\r\n");
 }
+
+/**
+ * Parse a summary time parameter: Unix timestamp, ISO 8601 (UTC) or YYYY-MM-DD
+ * Date-only end times cover the whole day.
+ */
+static int parse_summary_time(const char *str, bool end_of_day, time_t *out) {
+    char *endptr;
+    long long value = strtoll(str, &endptr, 10);
+    if (endptr != str && *endptr == '\0') {
+        *out = (time_t)value;
+        return 0;
+    }
+
+    // mg_http_get_var has already URL-decoded the value
+    struct tm tm = {0};
+    const char *rest = strptime(str, "%Y-%m-%dT%H:%M:%S", &tm);
+    if (rest) {
+        // Ignore fractional seconds and the UTC designator
+        *out = timegm(&tm);
+        return 0;
+    }
+
+    memset(&tm, 0, sizeof(tm));
+    rest = strptime(str, "%Y-%m-%d", &tm);
+    if (rest && *rest == '\0') {
+        if (end_of_day) {
+            tm.tm_hour = 23;
+            tm.tm_min = 59;
+            tm.tm_sec = 59;
+        }
+        *out = timegm(&tm);
+        return 0;
+    }
+
+    return -1;
+}
+
+/**
+ * @brief Handler for GET /api/timeline/summary
+ *
+ * Recording and detection totals per stream by hour or day for the calendar
+ * and overview views, read from the recording rollups instead of the
+ * recordings table.
+ */
+void mg_handle_get_timeline_summary(struct mg_connection *c, struct mg_http_message *hm) {
+    log_info("Handling GET /api/timeline/summary request");
+
+    char stream_name[MAX_STREAM_NAME] = {0};
+    char start_time_str[64] = {0};
+    char end_time_str[64] = {0};
+    char bucket_str[16] = {0};
+
+    mg_http_get_var(&hm->query, "stream", stream_name, sizeof(stream_name));
+    mg_http_get_var(&hm->query, "start", start_time_str, sizeof(start_time_str));
+    mg_http_get_var(&hm->query, "end", end_time_str, sizeof(end_time_str));
+    mg_http_get_var(&hm->query, "bucket", bucket_str, sizeof(bucket_str));
+
+    int bucket_seconds = 86400;
+    if (bucket_str[0] != '\0') {
+        if (strcmp(bucket_str, "hour") == 0) {
+            bucket_seconds = 3600;
+        } else if (strcmp(bucket_str, "day") != 0) {
+            mg_send_json_error(c, 400, "Invalid bucket, use hour or day");
+            return;
+        }
+    }
+
+    // Default to the last 30 days
+    time_t end_time = time(NULL);
+    time_t start_time = end_time - (30 * 24 * 60 * 60);
+
+    if (start_time_str[0] != '\0' && parse_summary_time(start_time_str, false, &start_time) != 0) {
+        log_error("Failed to parse start time string: %s", start_time_str);
+        mg_send_json_error(c, 400, "Invalid start time format");
+        return;
+    }
+    if (end_time_str[0] != '\0' && parse_summary_time(end_time_str, true, &end_time) != 0) {
+        log_error("Failed to parse end time string: %s", end_time_str);
+        mg_send_json_error(c, 400, "Invalid end time format");
+        return;
+    }
+    if (end_time < start_time) {
+        mg_send_json_error(c, 400, "End time is before start time");
+        return;
+    }
+
+    // Day buckets start at local midnight, like the times shown in the UI
+    struct tm local_tm;
+    long utc_offset = 0;
+    if (localtime_r(&end_time, &local_tm)) {
+        utc_offset = local_tm.tm_gmtoff;
+    }
+
+    recording_rollup_t *rollups = (recording_rollup_t *)malloc(MAX_SUMMARY_BUCKETS * sizeof(recording_rollup_t));
+    if (!rollups) {
+        log_error("Failed to allocate memory for timeline summary");
+        mg_send_json_error(c, 500, "Failed to allocate memory for timeline summary");
+        return;
+    }
+
+    int count = get_recording_rollups(stream_name[0] != '\0' ? stream_name : NULL, start_time, end_time,
+                                      bucket_seconds, utc_offset, rollups, MAX_SUMMARY_BUCKETS);
+    if (count < 0) {
+        log_error("Failed to get timeline summary");
+        free(rollups);
+        mg_send_json_error(c, 500, "Failed to get timeline summary");
+        return;
+    }
+
+    cJSON *response = cJSON_CreateObject();
+    cJSON *buckets_array = cJSON_CreateArray();
+    if (!response || !buckets_array) {
+        log_error("Failed to create response JSON");
+        cJSON_Delete(response);
+        cJSON_Delete(buckets_array);
+        free(rollups);
+        mg_send_json_error(c, 500, "Failed to create response JSON");
+        return;
+    }
+
+    if (stream_name[0] != '\0') {
+        cJSON_AddStringToObject(response, "stream", stream_name);
+    }
+    cJSON_AddStringToObject(response, "bucket", bucket_seconds == 3600 ? "hour" : "day");
+    cJSON_AddNumberToObject(response, "start_timestamp", (double)start_time);
+    cJSON_AddNumberToObject(response, "end_timestamp", (double)end_time);
+    cJSON_AddItemToObject(response, "buckets", buckets_array);
+
+    int total_segments = 0;
+    int total_detections = 0;
+    double total_bytes = 0;
+    double total_seconds = 0;
+
+    for (int i = 0; i < count; i++) {
+        cJSON *bucket = cJSON_CreateObject();
+        if (!bucket) {
+            log_error("Failed to create bucket JSON object");
+            continue;
+        }
+
+        cJSON_AddStringToObject(bucket, "stream", rollups[i].stream_name);
+        cJSON_AddNumberToObject(bucket, "start_timestamp", (double)rollups[i].bucket_start);
+        cJSON_AddNumberToObject(bucket, "segments", rollups[i].segments);
+        cJSON_AddNumberToObject(bucket, "size_bytes", (double)rollups[i].size_bytes);
+        cJSON_AddNumberToObject(bucket, "duration", (double)rollups[i].seconds);
+        cJSON_AddNumberToObject(bucket, "detections", rollups[i].detections);
+        cJSON_AddItemToArray(buckets_array, bucket);
+
+        total_segments += rollups[i].segments;
+        total_detections += rollups[i].detections;
+        total_bytes += (double)rollups[i].size_bytes;
+        total_seconds += (double)rollups[i].seconds;
+    }
+
+    free(rollups);
+
+    cJSON *totals = cJSON_CreateObject();
+    if (totals) {
+        cJSON_AddNumberToObject(totals, "segments", total_segments);
+        cJSON_AddNumberToObject(totals, "size_bytes", total_bytes);
+        cJSON_AddNumberToObject(totals, "duration", total_seconds);
+        cJSON_AddNumberToObject(totals, "detections", total_detections);
+        cJSON_AddItemToObject(response, "totals", totals);
+    }
+    cJSON_AddBoolToObject(response, "truncated", count == MAX_SUMMARY_BUCKETS);
+
+    char *json_str = cJSON_PrintUnformatted(response);
+    cJSON_Delete(response);
+    if (!json_str) {
+        log_error("Failed to convert response JSON to string");
+        mg_send_json_error(c, 500, "Failed to convert response JSON to string");
+        return;
+    }
+
+    mg_send_json_response(c, 200, json_str);
+    free(json_str);
+
+    log_info("Successfully handled GET /api/timeline/summary request (%d buckets)", count);
+}
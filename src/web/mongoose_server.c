@@ -42,6 +42,7 @@
 void mg_handle_get_timeline_segments(struct mg_connection *c, struct mg_http_message *hm);
 void mg_handle_timeline_manifest(struct mg_connection *c, struct mg_http_message *hm);
 void mg_handle_timeline_playback(struct mg_connection *c, struct mg_http_message *hm);
+void mg_handle_get_timeline_summary(struct mg_connection *c, struct mg_http_message *hm);
 
 // Forward declaration for HLS API handler
 void mg_handle_direct_hls_request(struct mg_connection *c, struct mg_http_message *hm);
@@ -187,6 +188,7 @@ static const mg_api_route_t s_api_routes[] = {
     {"GET", "/api/timeline/segments", mg_handle_get_timeline_segments, true},  // Opt out of auto-threading to prevent hanging
     {"GET", "/api/timeline/manifest", mg_handle_timeline_manifest, true},
     {"GET", "/api/timeline/play", mg_handle_timeline_playback, false},
+    {"GET", "/api/timeline/summary", mg_handle_get_timeline_summary, true},
 
     // Motion Recording API
     {"GET", "/api/motion/config/#", mg_handle_get_motion_config, false},
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+API load generator for the LightNVR REST API
+Replaces stress_test.sh: requests go over a pool of keep-alive connections
+from a single asyncio process instead of one curl subprocess per request, so
+the generator is no longer the bottleneck.
+
+Two load models are supported:
+  closed  - N workers, each sends its next request when the previous returns
+  open    - requests arrive at a constant rate regardless of response times;
+            latency is measured from the scheduled send time, so queueing
+            behind a slow server is counted (no coordinated omission)
+
+The run is described by a JSON scenario file (see stress_test_scenario.json):
+
+    ./stress_test.py stress_test_scenario.json
+    ./stress_test.py stress_test_scenario.json --mode open --rate 200 --duration 60
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+PERCENTILES = (50, 75, 90, 95, 99, 99.9, 99.99)
+
+DEFAULT_SCENARIO = {
+    "base_url": "http://127.0.0.1:8080",
+    "username": "admin",
+    "password": "admin",
+    "mode": "closed",
+    "concurrency": 10,
+    "connections": 10,
+    "rate": 50,
+    "duration": 30,
+    "warmup": 0,
+    "total_requests": 0,
+    "timeout": 5,
+    "headers": {},
+    "requests": [],
+}
+
+
+class LatencyHistogram:
+    """HDR-style histogram with bounded relative error.
+
+    Values (microseconds) are bucketed by their top SIGNIFICANT_BITS bits, so
+    every recorded value is within ~1% of its bucket and memory stays a few
+    hundred buckets no matter how many samples are recorded.
+    """
+
+    SIGNIFICANT_BITS = 7
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+        self.max = 0
+        self.min = None
+        self.sum = 0
+
+    def record(self, value_us):
+        value = max(1, int(value_us))
+        shift = max(0, value.bit_length() - self.SIGNIFICANT_BITS)
+        self.counts[(value >> shift) << shift] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentiles(self, points=PERCENTILES):
+        result = {}
+        if not self.total:
+            return result
+        targets = sorted(points)
+        buckets = sorted(self.counts.items())
+        seen = 0
+        i = 0
+        for value, count in buckets:
+            seen += count
+            while i < len(targets) and seen >= self.total * targets[i] / 100.0:
+                result[targets[i]] = value
+                i += 1
+        for p in targets[i:]:
+            result[p] = self.max
+        return result
+
+    def summary(self):
+        if not self.total:
+            return {"count": 0}
+        ms = lambda us: round(us / 1000.0, 3)
+        summary = {
+            "count": self.total,
+            "min_ms": ms(self.min),
+            "mean_ms": ms(self.sum / self.total),
+            "max_ms": ms(self.max),
+        }
+        for p, value in self.percentiles().items():
+            summary[f"p{p:g}_ms"] = ms(value)
+        return summary
+
+
+class Connection:
+    """A single keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, raw):
+        reused = self.writer is not None
+        if not reused:
+            await self.open()
+        self.writer.write(raw)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line and reused:
+            # Idle keep-alive connection was closed by the server, retry once
+            self.close()
+            await self.open()
+            self.writer.write(raw)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        version, status = status_line.split()[:2]
+        status = int(status)
+
+        length = None
+        chunked = False
+        keep_alive = version != b"HTTP/1.0"
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection":
+                keep_alive = value == "keep-alive" or (keep_alive and value != "close")
+
+        size = 0
+        if chunked:
+            while True:
+                chunk_len = int((await self.reader.readline()).split(b";")[0], 16)
+                if chunk_len:
+                    size += len(await self.reader.readexactly(chunk_len))
+                await self.reader.readline()
+                if chunk_len == 0:
+                    break
+        elif length is not None:
+            size = len(await self.reader.readexactly(length))
+        else:
+            size = len(await self.reader.read())
+            keep_alive = False
+
+        if not keep_alive:
+            self.close()
+        return status, size
+
+
+class ConnectionPool:
+    def __init__(self, host, port, size, timeout):
+        self.idle = asyncio.Queue()
+        for _ in range(size):
+            self.idle.put_nowait(Connection(host, port, timeout))
+
+    async def acquire(self):
+        return await self.idle.get()
+
+    def release(self, conn):
+        self.idle.put_nowait(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+def expand_param(spec, rng):
+    """Resolve a scenario parameter: a literal, {"choice": [...]} or {"randint": [lo, hi]}"""
+    if isinstance(spec, dict):
+        if "choice" in spec:
+            return rng.choice(spec["choice"])
+        if "randint" in spec:
+            return rng.randint(*spec["randint"])
+    return spec
+
+
+class Scenario:
+    def __init__(self, config, seed=None):
+        self.config = config
+        self.rng = random.Random(seed)
+        url = urlsplit(config["base_url"])
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.base_path = url.path.rstrip("/")
+
+        headers = {"Host": f"{self.host}:{self.port}", "Accept": "application/json",
+                   "Connection": "keep-alive", "User-Agent": "StressTestScript/2.0"}
+        if config.get("username"):
+            token = base64.b64encode(f"{config['username']}:{config.get('password', '')}".encode())
+            headers["Authorization"] = "Basic " + token.decode()
+        headers.update(config.get("headers", {}))
+        self.header_block = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+
+        self.requests = config["requests"]
+        if not self.requests:
+            raise ValueError("scenario has no requests")
+        self.weights = [r.get("weight", 1) for r in self.requests]
+
+    def next_request(self):
+        spec = self.rng.choices(self.requests, self.weights)[0]
+        params = {k: expand_param(v, self.rng) for k, v in spec.get("params", {}).items()}
+        target = self.base_path + spec["path"]
+        if params:
+            target += "?" + urlencode(params)
+        raw = f"{spec.get('method', 'GET')} {target} HTTP/1.1\r\n{self.header_block}\r\n".encode()
+        return spec.get("name", spec["path"]), target, raw
+
+
+class Results:
+    def __init__(self, raw_log=None):
+        self.histograms = defaultdict(LatencyHistogram)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.bytes = 0
+        self.raw_log = raw_log
+        self.recording = True
+        self.seq = 0
+
+    def record(self, name, target, status, latency_us, size=0, error=None):
+        if not self.recording:
+            return
+        self.seq += 1
+        if error:
+            self.errors[error] += 1
+            self.statuses[name]["error"] += 1
+        else:
+            self.histograms[name].record(latency_us)
+            self.statuses[name][str(status)] += 1
+            self.bytes += size
+        if self.raw_log:
+            self.raw_log.write(f"{self.seq},{name},{target},{status or error},"
+                               f"{latency_us / 1e6:.6f},{time.time():.6f}\n")
+
+
+class Budget:
+    """Caps the number of requests issued; a limit of 0 means unlimited"""
+
+    def __init__(self, limit=0):
+        self.limit = limit
+        self.issued = 0
+
+    def take(self):
+        if self.limit and self.issued >= self.limit:
+            return False
+        self.issued += 1
+        return True
+
+
+async def issue(pool, scenario, results, timeout, scheduled=None):
+    name, target, raw = scenario.next_request()
+    start = scheduled if scheduled is not None else time.perf_counter()
+    conn = await pool.acquire()
+    try:
+        status, size = await asyncio.wait_for(conn.request(raw), timeout)
+        results.record(name, target, status, (time.perf_counter() - start) * 1e6, size)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+        conn.close()
+        results.record(name, target, None, (time.perf_counter() - start) * 1e6,
+                       error=type(e).__name__)
+    finally:
+        pool.release(conn)
+
+
+async def run_closed(pool, scenario, results, cfg, deadline, budget):
+    async def worker():
+        while time.perf_counter() < deadline and budget.take():
+            await issue(pool, scenario, results, cfg["timeout"])
+            if cfg.get("think_time"):
+                await asyncio.sleep(scenario.rng.uniform(0, cfg["think_time"]))
+
+    await asyncio.gather(*(worker() for _ in range(cfg["concurrency"])))
+
+
+async def run_open(pool, scenario, results, cfg, deadline, budget):
+    interval = 1.0 / cfg["rate"]
+    max_outstanding = cfg.get("max_outstanding", cfg["connections"] * 20)
+    pending = set()
+    start = time.perf_counter()
+    i = 0
+    while True:
+        scheduled = start + i * interval
+        if scheduled >= deadline or not budget.take():
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        i += 1
+        if len(pending) >= max_outstanding:
+            # The server cannot keep up with the arrival rate
+            results.record("dropped", "", None, 0, error="client_overload")
+            continue
+        task = asyncio.ensure_future(issue(pool, scenario, results, cfg["timeout"], scheduled))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def run(cfg, results):
+    scenario = Scenario(cfg, cfg.get("seed"))
+    pool = ConnectionPool(scenario.host, scenario.port, cfg["connections"], cfg["timeout"])
+    runner = run_open if cfg["mode"] == "open" else run_closed
+
+    if cfg["warmup"]:
+        print(f"Warming up for {cfg['warmup']}s...")
+        results.recording = False
+        await runner(pool, scenario, results, cfg, time.perf_counter() + cfg["warmup"], Budget())
+        results.recording = True
+
+    total = cfg["total_requests"]
+    budget = Budget(total)
+    deadline = time.perf_counter() + (cfg["duration"] if not total else 1e9)
+
+    print(f"Running {cfg['mode']}-loop load: "
+          + (f"{cfg['rate']} req/s" if cfg["mode"] == "open" else f"{cfg['concurrency']} workers")
+          + f" over {cfg['connections']} connections to {cfg['base_url']}")
+    started = time.perf_counter()
+    await runner(pool, scenario, results, cfg, deadline, budget)
+    elapsed = time.perf_counter() - started
+    pool.close()
+    return elapsed
+
+
+def build_report(cfg, results, elapsed):
+    overall = LatencyHistogram()
+    endpoints = {}
+    for name, hist in sorted(results.histograms.items()):
+        overall.merge(hist)
+        endpoints[name] = dict(hist.summary(), statuses=dict(results.statuses[name]))
+    completed = overall.total + sum(results.errors.values())
+    return {
+        "scenario": {k: cfg[k] for k in ("base_url", "mode", "concurrency", "connections",
+                                         "rate", "duration", "total_requests")},
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": completed,
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0,
+        "bytes_received": results.bytes,
+        "errors": dict(results.errors),
+        "overall": overall.summary(),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report):
+    print(f"\n{'Endpoint':<24}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}  (ms)")
+    rows = list(report["endpoints"].items()) + [("ALL", report["overall"])]
+    for name, s in rows:
+        if not s.get("count"):
+            continue
+        print(f"{name:<24}{s['count']:>8}{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}"
+              f"{s['p99_ms']:>10.2f}{s['p99.9_ms']:>10.2f}{s['max_ms']:>10.2f}")
+    print(f"\nRequests: {report['requests']} in {report['elapsed_seconds']}s "
+          f"({report['throughput_rps']} req/s)")
+    if report["errors"]:
+        print(f"Errors: {report['errors']}")
+
+
+def load_scenario(path, args):
+    cfg = dict(DEFAULT_SCENARIO)
+    with open(path) as f:
+        cfg.update(json.load(f))
+    for key in ("mode", "rate", "concurrency", "connections", "duration", "total_requests", "seed"):
+        value = getattr(args, key)
+        if value is not None:
+            cfg[key] = value
+    if cfg["mode"] not in ("open", "closed"):
+        raise ValueError(f"unknown mode '{cfg['mode']}'")
+    return cfg
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load generator for the LightNVR REST API")
+    parser.add_argument("scenario", help="JSON scenario file")
+    parser.add_argument("--mode", choices=("open", "closed"), help="Override the scenario load model")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate (requests/second)")
+    parser.add_argument("--concurrency", type=int, help="Closed-loop worker count")
+    parser.add_argument("--connections", type=int, help="Keep-alive connection pool size")
+    parser.add_argument("--duration", type=float, help="Measured run length in seconds")
+    parser.add_argument("--total-requests", type=int, help="Stop after this many requests instead")
+    parser.add_argument("--seed", type=int, help="Random seed for request parameters")
+    parser.add_argument("--results-dir", default=None,
+                        help="Where to write summary.json/results.csv (default: stress_test_results_<timestamp>)")
+    parser.add_argument("--raw", action="store_true", help="Also log every request to results.csv")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cfg = load_scenario(args.scenario, args)
+
+    results_dir = args.results_dir or time.strftime("stress_test_results_%Y%m%d_%H%M%S")
+    os.makedirs(results_dir, exist_ok=True)
+    raw_log = None
+    if args.raw:
+        raw_log = open(os.path.join(results_dir, "results.csv"), "w")
+        raw_log.write("request_id,endpoint,url,status_code,time_taken,timestamp\n")
+
+    results = Results(raw_log)
+    try:
+        elapsed = asyncio.run(run(cfg, results))
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        if raw_log:
+            raw_log.close()
+
+    report = build_report(cfg, results, elapsed)
+    with open(os.path.join(results_dir, "summary.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nSummary report available at {results_dir}/summary.json")
@@ -1,76 +1,506 @@
 #!/usr/bin/env python3
 """
 Direct database sync script for LightNVR recordings
-This script updates the database with actual file sizes from disk
+This script updates the database with actual file sizes from disk, and with
+--backfill-metadata fills end_time/width/height/fps/codec from the MP4 headers
+(size_bytes is only written by the size sync)
 """
 
+import argparse
+import json
 import sqlite3
 import os
+import struct
 import sys
+import time
+from collections import namedtuple
 
 DB_PATH = "/var/lib/lightnvr/lightnvr.db"
 
-def sync_recordings():
-    """Sync recording file sizes with actual files on disk"""
+# Rows read per page of the recordings table
+FETCH_SIZE = 2000
+
+# Maximum number of UPDATEs applied per transaction
+BATCH_SIZE = 1000
+
+# Online mode settings: keep each write transaction short enough that the
+# daemon's recording inserts (10s busy timeout in db_core.c) never notice it
+ONLINE_BATCH_SIZE = 100
+ONLINE_BUSY_TIMEOUT_MS = 2000
+ONLINE_PAUSE = 0.05
+ONLINE_MAX_RETRIES = 8
+ONLINE_MAX_BACKOFF = 5.0
+
+# Incremental mode: already-checked rows re-verified per run, in rotation
+SAMPLE_SIZE = 1000
+
+# Sample entry fourcc -> codec name as stored by the recorder (FFmpeg names)
+MP4_CODECS = {
+    "avc1": "h264", "avc3": "h264",
+    "hvc1": "hevc", "hev1": "hevc",
+    "av01": "av1", "vp09": "vp9", "mp4v": "mpeg4",
+}
+
+Mp4Info = namedtuple("Mp4Info", ["duration", "width", "height", "fps", "codec"])
+
+
+def scan_directory(directory):
+    """Return a {path: size} map for the regular files in a directory.
+
+    A single scandir() pass is used instead of an exists()/getsize() pair per
+    recording; on most filesystems the size comes back with the directory entry.
+    """
+    sizes = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        sizes[entry.path] = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError as e:
+        print(f"Warning: cannot scan {directory}: {e}", file=sys.stderr)
+    return sizes
+
+
+class DirectoryCache:
+    """Lazily scans each stream directory once and answers size lookups"""
+
+    def __init__(self):
+        self.dirs = {}
+
+    def size_of(self, file_path):
+        directory = os.path.dirname(file_path)
+        sizes = self.dirs.get(directory)
+        if sizes is None:
+            sizes = scan_directory(directory)
+            self.dirs[directory] = sizes
+        return sizes.get(os.path.join(directory, os.path.basename(file_path)))
+
+
+def is_lock_error(e):
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def open_database(db_path, online=False):
+    """Open the recordings database.
+
+    Transactions are managed explicitly. In online mode the connection waits
+    briefly on a busy database and expects the WAL journal the daemon enables,
+    so readers never block the daemon and vice versa.
+    """
+    timeout = ONLINE_BUSY_TIMEOUT_MS / 1000.0 if online else 30.0
+    conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+    if online:
+        conn.execute(f"PRAGMA busy_timeout = {ONLINE_BUSY_TIMEOUT_MS}")
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if mode.lower() != "wal":
+            # Switching journal mode needs exclusive access, leave it to the daemon
+            print(f"Warning: database journal mode is '{mode}', not 'wal'; "
+                  "writes may block readers in the running service", file=sys.stderr)
+    return conn
+
+
+def iter_recordings(conn, where="1", params=(), fetch_size=FETCH_SIZE, limit=None,
+                    columns="id, file_path, size_bytes"):
+    """Yield (id, file_path, size_bytes) rows matching `where` in id order.
+
+    `columns` must start with id, which is used for paging.
+
+    Rows are paged by id so every chunk is its own short read snapshot rather
+    than one long-running statement pinning the WAL for the whole sync.
+    """
+    last_id = -1
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page = fetch_size if remaining is None else min(fetch_size, remaining)
+        rows = conn.execute(
+            f"SELECT {columns} FROM recordings WHERE id > ? AND ({where}) "
+            "ORDER BY id LIMIT ?",
+            (last_id, *params, page)).fetchall()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def default_state_path(db_path):
+    return db_path + ".sync-state.json"
+
+
+def load_state(state_path):
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    return {
+        "last_id": int(state.get("last_id", 0)),
+        "last_end_time": int(state.get("last_end_time", 0)),
+        "sample_cursor": int(state.get("sample_cursor", 0)),
+    }
+
+
+def save_state(state_path, state):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+class IncrementalScan:
+    """Selects the rows an incremental sync needs to look at.
+
+    Mirrors sync_recordings_needing_size_update() in db_recordings_sync.c:
+    rows above the persisted high-water mark, rows still marked incomplete,
+    rows that finished since the last sync (end_time at or after the stored
+    last_end_time), and a rotating sample of older rows so drift is
+    eventually caught too.
+    """
+
+    def __init__(self, conn, state, sample_size=SAMPLE_SIZE):
+        self.conn = conn
+        self.state = dict(state)
+        self.sample_size = sample_size
+
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM recordings").fetchone()[0]
+        if self.state["last_id"] > max_id:
+            # Database was recreated or restored, start over
+            print(f"Watermark {self.state['last_id']} is beyond max id {max_id}, resetting")
+            self.state = {"last_id": 0, "last_end_time": 0, "sample_cursor": 0}
+
+    def __iter__(self):
+        last_id = self.state["last_id"]
+        # Taken before scanning so rows finishing during this sync are
+        # picked up as finished on the next one
+        end_time = self.conn.execute(
+            "SELECT COALESCE(MAX(end_time), 0) FROM recordings").fetchone()[0]
+
+        if last_id > 0:
+            yield from iter_recordings(self.conn, "id <= ? AND is_complete = 0", (last_id,))
+            yield from self._finished(last_id, self.state["last_end_time"])
+            yield from self._sample(last_id)
+
+        # New rows, including any inserted while this sync is running
+        for row in iter_recordings(self.conn, "id > ?", (last_id,)):
+            self.state["last_id"] = row[0]
+            yield row
+
+        self.state["last_end_time"] = max(self.state["last_end_time"], end_time)
+
+    def _finished(self, last_id, since, fetch_size=FETCH_SIZE):
+        """Yield rows below the watermark that finished since the last sync.
+
+        These were incomplete when their id was passed and no longer match
+        the is_complete = 0 scan. Paged by (end_time, id) so the end_time
+        index is used instead of walking every id below the watermark.
+        """
+        after = (since, -1)
+        while True:
+            rows = self.conn.execute(
+                "SELECT id, file_path, size_bytes, end_time FROM recordings "
+                "WHERE end_time >= ? AND (end_time > ? OR id > ?) "
+                "AND id <= ? AND is_complete != 0 "
+                "ORDER BY end_time, id LIMIT ?",
+                (after[0], after[0], after[1], last_id, fetch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[:3]
+            after = (rows[-1][3], rows[-1][0])
+
+    def _sample(self, last_id):
+        cursor = self.state["sample_cursor"]
+        taken = 0
+        # From the cursor up to the watermark, then wrap around to the start
+        ranges = [(cursor, last_id)] + ([(0, cursor)] if cursor > 0 else [])
+        for low, high in ranges:
+            for row in iter_recordings(self.conn, "id > ? AND id <= ? AND is_complete != 0",
+                                       (low, high), limit=self.sample_size - taken):
+                taken += 1
+                self.state["sample_cursor"] = row[0]
+                yield row
+            if taken >= self.sample_size:
+                return
+        # Whole history covered this run, restart the rotation next time
+        self.state["sample_cursor"] = 0
+
+
+def iter_boxes(f, start, end):
+    """Yield (type, offset, size, header_size) for the MP4 boxes in [start, end).
+
+    Only box headers are read; payloads are skipped with seek(), so walking
+    past a multi-GB mdat costs one 8-16 byte read. The declared size is
+    reported as-is, callers compare offset + size with the file size to spot
+    truncation.
+    """
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            size = struct.unpack(">Q", large)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            return
+        yield box_type.decode("latin-1"), pos, size, header_size
+        pos += size
+
+
+def _find_box(f, start, end, box_type):
+    for btype, pos, size, header_size in iter_boxes(f, start, end):
+        if btype == box_type:
+            return pos + header_size, min(pos + size, end)
+    return None
+
+
+def _read_box(f, bounds, length):
+    f.seek(bounds[0])
+    return f.read(min(length, bounds[1] - bounds[0]))
+
+
+def _parse_video_trak(f, start, end):
+    """Return (timescale, duration, sample_count, width, height, codec) or None"""
+    mdia = _find_box(f, start, end, "mdia")
+    if not mdia:
+        return None
+    hdlr = _find_box(f, *mdia, "hdlr")
+    if not hdlr or _read_box(f, hdlr, 12)[8:12] != b"vide":
+        return None
+
+    timescale = duration = 0
+    mdhd = _find_box(f, *mdia, "mdhd")
+    if mdhd:
+        data = _read_box(f, mdhd, 32)
+        if data[:1] == b"\x01" and len(data) >= 32:
+            timescale, duration = struct.unpack(">IQ", data[20:32])
+        elif len(data) >= 20:
+            timescale, duration = struct.unpack(">II", data[12:20])
+
+    minf = _find_box(f, *mdia, "minf")
+    stbl = _find_box(f, *minf, "stbl") if minf else None
+    if not stbl:
+        return None
+
+    width = height = sample_count = 0
+    codec = None
+    stsd = _find_box(f, *stbl, "stsd")
+    if stsd:
+        # full box header + entry_count, then the first VisualSampleEntry
+        data = _read_box(f, stsd, 44)
+        if len(data) >= 44:
+            fourcc = data[12:16].decode("latin-1")
+            codec = MP4_CODECS.get(fourcc, fourcc.strip())
+            width, height = struct.unpack(">HH", data[40:44])
+
+    stsz = _find_box(f, *stbl, "stsz")
+    if stsz:
+        data = _read_box(f, stsz, 12)
+        if len(data) == 12:
+            sample_count = struct.unpack(">I", data[8:12])[0]
+
+    return timescale, duration, sample_count, width, height, codec
+
+
+def read_mp4_info(path):
+    """Read duration, dimensions, frame rate and codec from an MP4's moov box.
+
+    Returns an Mp4Info or None when the file has no usable moov (for example
+    a segment truncated by a crash). Only the mvhd, tkhd, hdlr, mdhd, stsd
+    and stsz headers are read, never sample data.
+    """
+    try:
+        with open(path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            moov = _find_box(f, 0, file_size, "moov")
+            if not moov:
+                return None
+
+            duration = 0.0
+            mvhd = _find_box(f, *moov, "mvhd")
+            if mvhd:
+                data = _read_box(f, mvhd, 32)
+                if data[:1] == b"\x01" and len(data) >= 32:
+                    timescale, length = struct.unpack(">IQ", data[20:32])
+                else:
+                    timescale, length = struct.unpack(">II", data[12:20])
+                if timescale:
+                    duration = length / timescale
+
+            for btype, pos, size, header_size in iter_boxes(f, *moov):
+                if btype != "trak":
+                    continue
+                start, end = pos + header_size, min(pos + size, moov[1])
+                video = _parse_video_trak(f, start, end)
+                if not video:
+                    continue
+                timescale, length, samples, width, height, codec = video
+
+                if not (width and height):
+                    # Fall back to the 16.16 display size in tkhd
+                    tkhd = _find_box(f, start, end, "tkhd")
+                    if tkhd:
+                        data = _read_box(f, tkhd, 96)
+                        offset = 88 if data[:1] == b"\x01" else 76
+                        if len(data) >= offset + 8:
+                            w, h = struct.unpack(">II", data[offset:offset + 8])
+                            width, height = w >> 16, h >> 16
+
+                fps = 0
+                if timescale and length and samples:
+                    fps = int(round(samples * timescale / length))
+                    if not duration:
+                        duration = length / timescale
+                return Mp4Info(duration, width, height, fps, codec)
+
+            return Mp4Info(duration, 0, 0, 0, None) if duration else None
+    except (OSError, struct.error):
+        return None
+
+
+def apply_batch(conn, sql, rows, online=False):
+    """Apply a batch of parameter rows for `sql` in a single transaction.
+
+    In online mode the write lock is taken up front with BEGIN IMMEDIATE; if
+    the daemon holds it, the batch is retried with exponential backoff instead
+    of queueing behind (and in front of) its writers.
+    """
+    if not rows:
+        return
+    attempt = 0
+    while True:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(sql, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            break
+        except sqlite3.OperationalError as e:
+            if not online or not is_lock_error(e) or attempt >= ONLINE_MAX_RETRIES:
+                raise
+            delay = min(ONLINE_PAUSE * (2 ** attempt), ONLINE_MAX_BACKOFF)
+            attempt += 1
+            print(f"  Database busy, retrying batch of {len(rows)} in {delay:.2f}s "
+                  f"(attempt {attempt}/{ONLINE_MAX_RETRIES})")
+            time.sleep(delay)
+    rows.clear()
+    if online:
+        # Give the daemon's writers a window between our transactions
+        time.sleep(ONLINE_PAUSE)
+
+
+METADATA_UPDATE_SQL = ("UPDATE recordings SET end_time = ?, width = ?, height = ?, fps = ?, codec = ? "
+                       "WHERE id = ?")
+
+
+def apply_updates(conn, updates, online=False):
+    """Apply a batch of (size_bytes, id) updates"""
+    apply_batch(conn, "UPDATE recordings SET size_bytes = ? WHERE id = ?", updates, online)
+
+
+def report_lock_error(e, online):
+    print(f"Database error: {e}")
+    print("\nThe database may be locked by the running LightNVR service.")
+    if online:
+        print("Try again later or with a smaller --batch-size.")
+    else:
+        print("Re-run with --online to sync alongside the running service,")
+        print("or stop the service first with: sudo systemctl stop lightnvr")
+
+
+def sync_recordings(db_path=DB_PATH, batch_size=BATCH_SIZE, verbose=True, online=False,
+                    state_path=None, sample_size=SAMPLE_SIZE):
+    """Sync recording file sizes with actual files on disk
+
+    When state_path is given only rows past the watermark stored there, rows
+    still marked incomplete and a rotating sample of older rows are checked.
+    """
     try:
         # Connect to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get all recordings
-        cursor.execute("SELECT id, file_path, size_bytes FROM recordings ORDER BY id")
-        recordings = cursor.fetchall()
-        
-        if not recordings:
-            print("No recordings found in database")
-            return 0
-        
+        conn = open_database(db_path, online)
+
+        scan = None
+        if state_path:
+            scan = IncrementalScan(conn, load_state(state_path), sample_size)
+            print(f"Incremental sync from recording id {scan.state['last_id']} "
+                  f"(sample cursor {scan.state['sample_cursor']})")
+            rows = scan
+        else:
+            rows = iter_recordings(conn)
+
+        cache = DirectoryCache()
+        pending = []
+        total = 0
         updated = 0
         errors = 0
         not_found = 0
-        
-        print(f"Found {len(recordings)} recordings in database")
-        print("Syncing file sizes...")
-        
-        for rec_id, file_path, current_size in recordings:
+
+        print("Syncing file sizes" + (" (online mode)..." if online else "..."))
+
+        for rec_id, file_path, current_size in rows:
+            total += 1
             if not file_path:
                 print(f"  Recording {rec_id}: No file path")
                 errors += 1
                 continue
-                
-            if os.path.exists(file_path):
-                try:
-                    actual_size = os.path.getsize(file_path)
-                    if actual_size != current_size:
-                        cursor.execute("UPDATE recordings SET size_bytes = ? WHERE id = ?", 
-                                     (actual_size, rec_id))
-                        updated += 1
-                        print(f"  Recording {rec_id}: {current_size:,} -> {actual_size:,} bytes ({file_path})")
-                except Exception as e:
-                    print(f"  Recording {rec_id}: Error getting file size: {e}")
-                    errors += 1
-            else:
+
+            actual_size = cache.size_of(file_path)
+            if actual_size is None:
                 not_found += 1
-                if current_size != 0:
+                if verbose and current_size:
                     print(f"  Recording {rec_id}: File not found (marked as {current_size:,} bytes): {file_path}")
-        
-        # Commit changes
-        conn.commit()
+                continue
+
+            if actual_size != current_size:
+                pending.append((actual_size, rec_id))
+                updated += 1
+                if verbose:
+                    print(f"  Recording {rec_id}: {current_size or 0:,} -> {actual_size:,} bytes ({file_path})")
+
+            if len(pending) >= batch_size:
+                apply_updates(conn, pending, online)
+
+        apply_updates(conn, pending, online)
         conn.close()
-        
+
+        if scan is not None:
+            save_state(state_path, scan.state)
+
+        if total == 0 and scan is not None:
+            print("No new or incomplete recordings to check")
+            return 0
+        if total == 0:
+            print("No recordings found in database")
+            return 0
+
         print(f"\nSync complete:")
+        print(f"  - {total} recordings checked in {len(cache.dirs)} directories")
         print(f"  - {updated} recordings updated")
-        print(f"  - {len(recordings) - updated - errors - not_found} recordings already correct")
+        print(f"  - {total - updated - errors - not_found} recordings already correct")
         print(f"  - {not_found} files not found")
         print(f"  - {errors} errors")
-        
+
         return updated
-        
+
     except sqlite3.OperationalError as e:
-        if "readonly" in str(e).lower() or "locked" in str(e).lower():
-            print(f"Database error: {e}")
-            print("\nThe database may be locked by the running LightNVR service.")
-            print("Please stop the service first with: sudo systemctl stop lightnvr")
+        if "readonly" in str(e).lower() or is_lock_error(e):
+            report_lock_error(e, online)
             return -1
         else:
             raise
@@ -80,7 +510,118 @@ def sync_recordings():
         traceback.print_exc()
         return -1
 
+
+def backfill_metadata(db_path=DB_PATH, batch_size=BATCH_SIZE, verbose=True, online=False,
+                      check_all=False):
+    """Backfill end_time, width, height, fps and codec from each file's moov box
+
+    The duration in the moov box gives end_time; size_bytes is not touched,
+    sync_recordings() keeps that in step with the files on disk. By default
+    only rows with missing or implausible values are checked.
+    """
+    where = "1" if check_all else (
+        "end_time IS NULL OR end_time <= start_time OR width IS NULL OR width = 0 "
+        "OR height IS NULL OR height = 0 OR fps IS NULL OR fps = 0 "
+        "OR codec IS NULL OR codec = ''")
+    columns = "id, file_path, start_time, end_time, width, height, fps, codec"
+    try:
+        conn = open_database(db_path, online)
+
+        pending = []
+        total = 0
+        updated = 0
+        unreadable = 0
+
+        print("Backfilling recording metadata" + (" (online mode)..." if online else "..."))
+
+        for rec_id, file_path, start_time, end_time, width, height, fps, codec in \
+                iter_recordings(conn, where, columns=columns):
+            total += 1
+            info = read_mp4_info(file_path) if file_path else None
+            if info is None:
+                unreadable += 1
+                if verbose:
+                    print(f"  Recording {rec_id}: No readable moov box: {file_path}")
+                continue
+
+            new_end = end_time
+            if info.duration and start_time:
+                computed = start_time + int(round(info.duration))
+                if end_time is None or abs(end_time - computed) > 1:
+                    new_end = computed
+            new_values = (new_end,
+                          info.width or width,
+                          info.height or height,
+                          info.fps or fps,
+                          info.codec or codec)
+            if new_values != (end_time, width, height, fps, codec):
+                pending.append(new_values + (rec_id,))
+                updated += 1
+                if verbose:
+                    print(f"  Recording {rec_id}: end_time={new_values[0]} {new_values[1]}x{new_values[2]} "
+                          f"@{new_values[3]}fps {new_values[4]} ({file_path})")
+
+            if len(pending) >= batch_size:
+                apply_batch(conn, METADATA_UPDATE_SQL, pending, online)
+
+        apply_batch(conn, METADATA_UPDATE_SQL, pending, online)
+        conn.close()
+
+        print(f"\nBackfill complete:")
+        print(f"  - {total} recordings checked")
+        print(f"  - {updated} recordings updated")
+        print(f"  - {unreadable} files missing or without a readable moov box")
+
+        return updated
+
+    except sqlite3.OperationalError as e:
+        if "readonly" in str(e).lower() or is_lock_error(e):
+            report_lock_error(e, online)
+            return -1
+        else:
+            raise
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return -1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync LightNVR recording sizes with files on disk")
+    parser.add_argument("--db", default=DB_PATH, help=f"Path to lightnvr.db (default: {DB_PATH})")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"UPDATEs per transaction (default: {BATCH_SIZE}, "
+                             f"{ONLINE_BATCH_SIZE} with --online)")
+    parser.add_argument("--online", action="store_true",
+                        help="Run alongside the live lightnvr service: short WAL transactions "
+                             "with busy timeout and backoff")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only check new/incomplete rows plus a rotating sample of older ones")
+    parser.add_argument("--state-file", default=None,
+                        help="Watermark file for --incremental (default: <db>.sync-state.json)")
+    parser.add_argument("--sample-size", type=int, default=SAMPLE_SIZE,
+                        help=f"Older rows re-checked per incremental run (default: {SAMPLE_SIZE})")
+    parser.add_argument("--backfill-metadata", action="store_true",
+                        help="Fill end_time/width/height/fps/codec from each file's moov box "
+                             "instead of syncing sizes")
+    parser.add_argument("--all", action="store_true",
+                        help="With --backfill-metadata, check every row, not just incomplete metadata")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    result = sync_recordings()
-    sys.exit(0 if result >= 0 else 1)
+    args = parse_args()
+    batch_size = args.batch_size or (ONLINE_BATCH_SIZE if args.online else BATCH_SIZE)
+    if args.backfill_metadata:
+        result = backfill_metadata(args.db, max(1, batch_size), verbose=not args.quiet,
+                                   online=args.online, check_all=args.all)
+        sys.exit(0 if result >= 0 else 1)
 
+    state_path = None
+    if args.incremental:
+        state_path = args.state_file or default_state_path(args.db)
+    result = sync_recordings(args.db, max(1, batch_size), verbose=not args.quiet, online=args.online,
+                             state_path=state_path, sample_size=max(0, args.sample_size))
+    sys.exit(0 if result >= 0 else 1)
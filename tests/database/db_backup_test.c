@@ -18,6 +18,10 @@
 // Test database path
 #define TEST_DB_PATH "/tmp/test_db.sqlite"
 #define TEST_BACKUP_PATH "/tmp/test_db.sqlite.bak"
+#define TEST_ONLINE_BACKUP_PATH "/tmp/test_db.sqlite.online.bak"
+
+// Rows of 2 KB blobs seeded for the online backup, about 4 MB
+#define TEST_BULK_ROWS 2048
 
 // Signal handler for simulating a crash
 static void simulate_crash(int sig) {
@@ -166,6 +170,118 @@ static int test_backup(void) {
     return 0;
 }
 
+// Test online backup functionality
+static int test_online_backup(void) {
+    sqlite3 *db;
+    sqlite3_stmt *stmt;
+    int count = 0;
+    int steps = 0;
+    int rc;
+    char *err_msg = NULL;
+    char sql[256];
+    
+    unlink(TEST_ONLINE_BACKUP_PATH);
+    
+    // Seed a few MB so the backup needs several steps of BACKUP_PAGES_PER_STEP pages
+    snprintf(sql, sizeof(sql),
+             "CREATE TABLE online_bulk (id INTEGER PRIMARY KEY, data BLOB);"
+             "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %d) "
+             "INSERT INTO online_bulk (id, data) SELECT i, randomblob(2048) FROM n;",
+             TEST_BULK_ROWS);
+    rc = sqlite3_exec(get_db_handle(), sql, NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        printf("Failed to seed online backup data: %s\n", err_msg);
+        sqlite3_free(err_msg);
+        return -1;
+    }
+    
+    if (start_online_backup(TEST_ONLINE_BACKUP_PATH, false) != 0) {
+        printf("Failed to start online backup\n");
+        return -1;
+    }
+    
+    // A second backup is refused while the first one runs
+    if (start_online_backup(TEST_ONLINE_BACKUP_PATH, false) == 0) {
+        printf("Second online backup started while one was running\n");
+        return -1;
+    }
+    
+    // Run one step per call and check the progress between steps
+    while ((rc = continue_online_backup(1)) == 0) {
+        backup_progress_t progress;
+        if (!get_online_backup_progress(&progress)) {
+            printf("Online backup not reported as running\n");
+            return -1;
+        }
+        if (progress.total_pages <= BACKUP_PAGES_PER_STEP || progress.remaining_pages <= 0 ||
+            progress.remaining_pages >= progress.total_pages) {
+            printf("Unexpected progress: %d of %d pages remaining\n",
+                   progress.remaining_pages, progress.total_pages);
+            return -1;
+        }
+        
+        // A write between steps must end up in the backup
+        if (++steps == 1) {
+            snprintf(sql, sizeof(sql), "INSERT INTO online_bulk (id, data) VALUES (%d, x'00');",
+                     TEST_BULK_ROWS + 1);
+            rc = sqlite3_exec(get_db_handle(), sql, NULL, NULL, &err_msg);
+            if (rc != SQLITE_OK) {
+                printf("Failed to write during online backup: %s\n", err_msg);
+                sqlite3_free(err_msg);
+                return -1;
+            }
+        }
+    }
+    
+    if (rc != 1) {
+        printf("Online backup failed\n");
+        return -1;
+    }
+    
+    if (steps < 2) {
+        printf("Expected the online backup to take several steps, took %d\n", steps + 1);
+        return -1;
+    }
+    
+    // The copy holds the test data
+    rc = sqlite3_open_v2(TEST_ONLINE_BACKUP_PATH, &db, SQLITE_OPEN_READONLY, NULL);
+    if (rc != SQLITE_OK) {
+        printf("Failed to open online backup: %s\n", sqlite3_errmsg(db));
+        sqlite3_close(db);
+        return -1;
+    }
+    
+    rc = sqlite3_prepare_v2(db, "SELECT COUNT(*) FROM test;", -1, &stmt, NULL);
+    if (rc == SQLITE_OK && sqlite3_step(stmt) == SQLITE_ROW) {
+        count = sqlite3_column_int(stmt, 0);
+    }
+    
+    sqlite3_finalize(stmt);
+    
+    int bulk_count = 0;
+    rc = sqlite3_prepare_v2(db, "SELECT COUNT(*) FROM online_bulk;", -1, &stmt, NULL);
+    if (rc == SQLITE_OK && sqlite3_step(stmt) == SQLITE_ROW) {
+        bulk_count = sqlite3_column_int(stmt, 0);
+    }
+    
+    sqlite3_finalize(stmt);
+    sqlite3_close(db);
+    unlink(TEST_ONLINE_BACKUP_PATH);
+    
+    if (count != 2) {
+        printf("Expected 2 rows in online backup, found %d\n", count);
+        return -1;
+    }
+    
+    if (bulk_count != TEST_BULK_ROWS + 1) {
+        printf("Expected %d bulk rows in online backup, found %d\n", TEST_BULK_ROWS + 1, bulk_count);
+        return -1;
+    }
+    
+    printf("Online database backup created successfully in %d steps\n", steps + 1);
+    return 0;
+}
+
 // Test restore functionality
 static int test_restore(void) {
     // Restore the database from backup
@@ -204,6 +320,12 @@ int main(void) {
         return 1;
     }
     
+    // Create an online backup
+    if (test_online_backup() != 0) {
+        printf("Test failed: Could not create online backup\n");
+        return 1;
+    }
+    
     // Corrupt the database
     if (corrupt_database() != 0) {
         printf("Test failed: Could not corrupt database\n");
@@ -0,0 +1,188 @@
+#define _POSIX_C_SOURCE 200809L
+#define _XOPEN_SOURCE 700
+#define _GNU_SOURCE
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <dirent.h>
+#include <sqlite3.h>
+#include <unistd.h>
+
+#include "database/db_core.h"
+#include "database/sqlite_migrate.h"
+#include "core/logger.h"
+
+// Test database path
+#define TEST_DB_PATH "/tmp/test_db_migrations.sqlite"
+
+// Migrations in the source tree (set by CMake)
+#ifndef MIGRATIONS_SOURCE_DIR
+#define MIGRATIONS_SOURCE_DIR "./db/migrations"
+#endif
+
+// Remove the test database and its WAL files
+static void remove_test_database(void) {
+    unlink(TEST_DB_PATH);
+    unlink(TEST_DB_PATH "-wal");
+    unlink(TEST_DB_PATH "-shm");
+}
+
+// Count the migration files in the migrations directory
+static int count_migration_files(void) {
+    DIR *dir = opendir(MIGRATIONS_SOURCE_DIR);
+    if (!dir) {
+        printf("Failed to open %s\n", MIGRATIONS_SOURCE_DIR);
+        return -1;
+    }
+
+    int count = 0;
+    struct dirent *entry;
+    while ((entry = readdir(dir)) != NULL) {
+        size_t len = strlen(entry->d_name);
+        if (len > 4 && strcmp(entry->d_name + len - 4, ".sql") == 0) {
+            count++;
+        }
+    }
+    closedir(dir);
+
+    return count;
+}
+
+// Run a query returning one integer
+static int query_int(const char *sql) {
+    sqlite3 *db = get_db_handle();
+    sqlite3_stmt *stmt;
+    int value = -1;
+
+    if (sqlite3_prepare_v2(db, sql, -1, &stmt, NULL) != SQLITE_OK) {
+        printf("Failed to prepare \"%s\": %s\n", sql, sqlite3_errmsg(db));
+        return -1;
+    }
+    if (sqlite3_step(stmt) == SQLITE_ROW) {
+        value = sqlite3_column_int(stmt, 0);
+    }
+    sqlite3_finalize(stmt);
+
+    return value;
+}
+
+// Check that every migration file was applied
+static int verify_all_applied(int file_count) {
+    int applied = query_int("SELECT COUNT(*) FROM schema_migrations;");
+    if (applied != file_count) {
+        printf("Expected %d applied migrations, found %d\n", file_count, applied);
+        return -1;
+    }
+
+    printf("All %d migrations applied\n", applied);
+    return 0;
+}
+
+// Check that multi-statement trigger bodies were created whole and fire
+static int verify_triggers(void) {
+    sqlite3 *db = get_db_handle();
+    char *err_msg = NULL;
+
+    const char *insert_sql =
+        "INSERT INTO recordings (stream_name, file_path, start_time, end_time, size_bytes, is_complete) "
+        "VALUES ('cam01', '/tmp/cam01.mp4', 7200, 7260, 1000, 1);"
+        "INSERT INTO detection_blocks (stream_name, bucket, first_timestamp, last_timestamp, detection_count, data) "
+        "VALUES ('cam01', 7200, 7200, 7260, 5, x'00');";
+    int rc = sqlite3_exec(db, insert_sql, NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        printf("Failed to insert test rows: %s\n", err_msg);
+        sqlite3_free(err_msg);
+        return -1;
+    }
+
+    int segments = query_int("SELECT segments FROM recording_rollups WHERE stream_name = 'cam01' AND bucket = 7200;");
+    int detections = query_int("SELECT detections FROM recording_rollups WHERE stream_name = 'cam01' AND bucket = 7200;");
+    if (segments != 1 || detections != 5) {
+        printf("Rollup triggers did not fire: segments %d, detections %d\n", segments, detections);
+        return -1;
+    }
+
+    printf("Rollup triggers verified\n");
+    return 0;
+}
+
+// Roll back every migration through the down sections
+static int rollback_all(int file_count) {
+    migrate_config_t config = {
+        .migrations_dir = MIGRATIONS_SOURCE_DIR,
+        .migrations_table = "schema_migrations",
+        .verbose = false
+    };
+
+    sqlite_migrate_t *ctx = migrate_init(get_db_handle(), &config);
+    if (!ctx) {
+        printf("Failed to initialize migration system\n");
+        return -1;
+    }
+
+    int rolled_back = migrate_down_n(ctx, file_count);
+    migrate_free(ctx);
+
+    if (rolled_back != file_count) {
+        printf("Expected %d migrations rolled back, got %d\n", file_count, rolled_back);
+        return -1;
+    }
+
+    printf("All %d migrations rolled back\n", rolled_back);
+    return 0;
+}
+
+int main(void) {
+    // Initialize logger
+    init_logger();
+
+    printf("=== Database Migrations Test ===\n");
+
+    setenv("LIGHTNVR_MIGRATIONS_DIR", MIGRATIONS_SOURCE_DIR, 1);
+
+    int file_count = count_migration_files();
+    if (file_count <= 0) {
+        printf("Test failed: No migration files found\n");
+        return 1;
+    }
+
+    // Test 1: Apply every migration to a new database
+    printf("\nTest 1: Applying migrations to a new database...\n");
+    remove_test_database();
+    if (init_database(TEST_DB_PATH) != 0) {
+        printf("Test failed: Could not initialize database\n");
+        return 1;
+    }
+    if (verify_all_applied(file_count) != 0 || verify_triggers() != 0) {
+        printf("Test failed: Migrations not applied correctly\n");
+        return 1;
+    }
+
+    // Test 2: Roll every migration back
+    printf("\nTest 2: Rolling back all migrations...\n");
+    if (rollback_all(file_count) != 0) {
+        printf("Test failed: Could not roll back migrations\n");
+        return 1;
+    }
+
+    // Test 3: Apply them again on startup
+    printf("\nTest 3: Re-applying migrations...\n");
+    shutdown_database();
+    if (init_database(TEST_DB_PATH) != 0) {
+        printf("Test failed: Could not re-initialize database\n");
+        return 1;
+    }
+    if (verify_all_applied(file_count) != 0) {
+        printf("Test failed: Migrations not re-applied\n");
+        return 1;
+    }
+
+    printf("\n=== All tests passed successfully ===\n");
+
+    // Clean up
+    shutdown_database();
+    remove_test_database();
+
+    return 0;
+}
@@ -0,0 +1,207 @@
+#define _POSIX_C_SOURCE 200809L
+#define _XOPEN_SOURCE 700
+#define _GNU_SOURCE
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <stdbool.h>
+#include <sqlite3.h>
+#include <unistd.h>
+
+#include "database/db_core.h"
+#include "database/db_query_builder.h"
+#include "core/logger.h"
+
+// Test database path
+#define TEST_DB_PATH "/tmp/test_db_query_builder.sqlite"
+
+// Row struct covering every field type and integer width
+typedef struct {
+    int64_t id;
+    int8_t small;
+    int16_t medium;
+    int32_t large;
+    int64_t huge;
+    float ratio;
+    double score;
+    bool flag;
+    char name[8];
+    int missing;
+    char missing_text[8];
+} test_row_t;
+
+static const qb_field_t test_fields[] = {
+    QB_FIELD(test_row_t, id, "id", QB_FIELD_INT),
+    QB_FIELD(test_row_t, small, "small", QB_FIELD_INT),
+    QB_FIELD(test_row_t, medium, "medium", QB_FIELD_INT),
+    QB_FIELD(test_row_t, large, "large", QB_FIELD_INT),
+    QB_FIELD(test_row_t, huge, "huge", QB_FIELD_INT),
+    QB_FIELD(test_row_t, ratio, "ratio", QB_FIELD_DOUBLE),
+    QB_FIELD(test_row_t, score, "score", QB_FIELD_DOUBLE),
+    QB_FIELD(test_row_t, flag, "flag", QB_FIELD_BOOL),
+    QB_FIELD(test_row_t, name, "name", QB_FIELD_TEXT),
+    QB_FIELD(test_row_t, missing, "missing", QB_FIELD_INT),
+    QB_FIELD(test_row_t, missing_text, "missing_text", QB_FIELD_TEXT),
+};
+
+#define TEST_FIELD_COUNT (int)(sizeof(test_fields) / sizeof(test_fields[0]))
+
+#define CHECK(cond) do { \
+        if (!(cond)) { \
+            printf("Check failed at line %d: %s\n", __LINE__, #cond); \
+            return -1; \
+        } \
+    } while (0)
+
+// Create a test table with a full row, a row of NULLs and a long name
+static int create_test_table(void) {
+    sqlite3 *db = get_db_handle();
+    char *err_msg = NULL;
+
+    const char *sql =
+        "CREATE TABLE qb_test (id INTEGER PRIMARY KEY, small INTEGER, medium INTEGER, "
+        "large INTEGER, huge INTEGER, ratio REAL, score REAL, flag INTEGER, name TEXT);"
+        "INSERT INTO qb_test VALUES (1, -100, -30000, -2000000000, 9000000000000000000, "
+        "0.5, 1234.5678, 1, 'front');"
+        "INSERT INTO qb_test VALUES (2, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL);"
+        "INSERT INTO qb_test VALUES (3, 127, 32767, 2147483647, -9000000000000000000, "
+        "-0.25, -1.0, 0, 'backyard-camera');";
+    int rc = sqlite3_exec(db, sql, NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        printf("Failed to create test table: %s\n", err_msg);
+        sqlite3_free(err_msg);
+        return -1;
+    }
+
+    return 0;
+}
+
+// Build a query with two columns the table does not have and decode all rows
+static int test_fetch_rows(void) {
+    query_builder_t qb;
+    qb_row_decoder_t decoder;
+    test_row_t rows[4];
+
+    CHECK(qb_init(&qb, "qb_test") == 0);
+    for (int i = 0; i < TEST_FIELD_COUNT; i++) {
+        CHECK(qb_add_column(&qb, test_fields[i].column_name, false) == 0);
+    }
+    const char *sql = qb_build_select(&qb, NULL, "id");
+    CHECK(sql != NULL);
+    CHECK(qb_compile_decoder(&qb, test_fields, TEST_FIELD_COUNT, &decoder) == 0);
+
+    sqlite3_stmt *stmt;
+    CHECK(sqlite3_prepare_v2(get_db_handle(), sql, -1, &stmt, NULL) == SQLITE_OK);
+    memset(rows, 0xff, sizeof(rows));
+    int count = qb_fetch_rows(stmt, &decoder, rows, sizeof(test_row_t), 4);
+    sqlite3_finalize(stmt);
+    CHECK(count == 3);
+
+    // Every integer width
+    CHECK(rows[0].id == 1);
+    CHECK(rows[0].small == -100);
+    CHECK(rows[0].medium == -30000);
+    CHECK(rows[0].large == -2000000000);
+    CHECK(rows[0].huge == INT64_C(9000000000000000000));
+    CHECK(rows[2].small == 127);
+    CHECK(rows[2].medium == 32767);
+    CHECK(rows[2].large == 2147483647);
+    CHECK(rows[2].huge == INT64_C(-9000000000000000000));
+
+    // Doubles, floats and bools
+    CHECK(rows[0].ratio == 0.5f);
+    CHECK(rows[0].score == 1234.5678);
+    CHECK(rows[0].flag);
+    CHECK(rows[2].ratio == -0.25f);
+    CHECK(!rows[2].flag);
+
+    // Text, and truncation to the member size
+    CHECK(strcmp(rows[0].name, "front") == 0);
+    CHECK(strcmp(rows[2].name, "backyar") == 0);
+
+    // NULL values decode as zero or an empty string
+    CHECK(rows[1].small == 0 && rows[1].medium == 0 && rows[1].large == 0 && rows[1].huge == 0);
+    CHECK(rows[1].ratio == 0.0f && rows[1].score == 0.0);
+    CHECK(!rows[1].flag);
+    CHECK(rows[1].name[0] == '\0');
+
+    // Columns missing from the table decode as zero or an empty string
+    for (int i = 0; i < count; i++) {
+        CHECK(rows[i].missing == 0);
+        CHECK(rows[i].missing_text[0] == '\0');
+    }
+
+    printf("Decoded %d rows\n", count);
+    return 0;
+}
+
+// max_rows stops the fetch early, and invalid fields are rejected
+static int test_limits(void) {
+    query_builder_t qb;
+    qb_row_decoder_t decoder;
+    test_row_t rows[1];
+
+    CHECK(qb_init(&qb, "qb_test") == 0);
+    CHECK(qb_add_column(&qb, "id", true) == 0);
+    CHECK(qb_add_column(&qb, "name", true) == 0);
+    const char *sql = qb_build_select(&qb, NULL, "id");
+    CHECK(sql != NULL);
+    CHECK(qb_compile_decoder(&qb, test_fields, 1, &decoder) == 0);
+
+    sqlite3_stmt *stmt;
+    CHECK(sqlite3_prepare_v2(get_db_handle(), sql, -1, &stmt, NULL) == SQLITE_OK);
+    int count = qb_fetch_rows(stmt, &decoder, rows, sizeof(test_row_t), 1);
+    sqlite3_finalize(stmt);
+    CHECK(count == 1);
+    CHECK(rows[0].id == 1);
+
+    qb_field_t bad_int = {"id", QB_FIELD_INT, 0, 3};
+    CHECK(qb_compile_decoder(&qb, &bad_int, 1, &decoder) != 0);
+    qb_field_t bad_double = {"id", QB_FIELD_DOUBLE, 0, 2};
+    CHECK(qb_compile_decoder(&qb, &bad_double, 1, &decoder) != 0);
+    qb_field_t no_column = {NULL, QB_FIELD_INT, 0, sizeof(int)};
+    CHECK(qb_compile_decoder(&qb, &no_column, 1, &decoder) != 0);
+
+    printf("Limits and invalid fields verified\n");
+    return 0;
+}
+
+int main(void) {
+    // Initialize logger
+    init_logger();
+
+    printf("=== Query Builder Decoder Test ===\n");
+
+    unlink(TEST_DB_PATH);
+    if (init_database(TEST_DB_PATH) != 0) {
+        printf("Test failed: Could not initialize database\n");
+        return 1;
+    }
+
+    if (create_test_table() != 0) {
+        printf("Test failed: Could not create test table\n");
+        return 1;
+    }
+
+    printf("\nTest 1: Decoding rows...\n");
+    if (test_fetch_rows() != 0) {
+        printf("Test failed: Rows not decoded correctly\n");
+        return 1;
+    }
+
+    printf("\nTest 2: Fetch limits and invalid fields...\n");
+    if (test_limits() != 0) {
+        printf("Test failed: Limits not handled correctly\n");
+        return 1;
+    }
+
+    printf("\n=== All tests passed successfully ===\n");
+
+    // Clean up
+    shutdown_database();
+    unlink(TEST_DB_PATH);
+
+    return 0;
+}